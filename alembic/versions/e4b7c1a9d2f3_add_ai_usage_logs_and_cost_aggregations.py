@@ -0,0 +1,128 @@
+"""Add ai_usage_logs and cost_aggregations tables
+
+Revision ID: e4b7c1a9d2f3
+Revises: 00d5af2b3b8e
+Create Date: 2026-10-17 10:12:03.418221
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = "e4b7c1a9d2f3"
+down_revision = "00d5af2b3b8e"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Raw AI usage records, bulk-inserted by the write-behind usage ledger
+    op.create_table(
+        "ai_usage_logs",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("request_id", sa.String(255), nullable=False),
+        sa.Column("session_id", sa.String(255), nullable=True),
+        sa.Column(
+            "user_id",
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("users.id", ondelete="SET NULL"),
+            nullable=True,
+        ),
+        sa.Column("service_name", sa.String(100), nullable=False),
+        sa.Column("model_name", sa.String(100), nullable=False),
+        sa.Column("provider", sa.String(50), nullable=False),
+        sa.Column("input_tokens", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("output_tokens", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("total_tokens", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("cost_usd", sa.Numeric(10, 6), nullable=False, server_default="0"),
+        sa.Column("cost_per_token", sa.Numeric(10, 8), nullable=False, server_default="0"),
+        sa.Column("response_time_ms", sa.Numeric(10, 2), nullable=True),
+        sa.Column("response_quality_score", sa.Numeric(3, 2), nullable=True),
+        sa.Column("cache_hit", sa.Boolean(), nullable=False, server_default=sa.false()),
+        sa.Column("error_occurred", sa.Boolean(), nullable=False, server_default=sa.false()),
+        sa.Column("timestamp", sa.DateTime(), nullable=False, server_default=sa.func.now()),
+        sa.Column("date_key", sa.Date(), nullable=False),
+        sa.Column("hour_key", sa.Integer(), nullable=False),
+        sa.Column("endpoint", sa.String(255), nullable=True),
+        sa.Column("user_agent", sa.String(500), nullable=True),
+        sa.Column("ip_address", sa.String(45), nullable=True),
+        sa.Column("metadata", sa.JSON(), nullable=True),
+        sa.CheckConstraint("input_tokens >= 0", name="check_input_tokens_positive"),
+        sa.CheckConstraint("output_tokens >= 0", name="check_output_tokens_positive"),
+        sa.CheckConstraint("total_tokens >= 0", name="check_total_tokens_positive"),
+        sa.CheckConstraint("cost_usd >= 0", name="check_cost_positive"),
+        sa.CheckConstraint(
+            "response_quality_score >= 0 AND response_quality_score <= 1",
+            name="check_quality_score_range",
+        ),
+    )
+    # The ledger's ON CONFLICT (request_id) DO NOTHING relies on this
+    op.create_index("ix_ai_usage_logs_request_id", "ai_usage_logs", ["request_id"], unique=True)
+    op.create_index("ix_ai_usage_logs_session_id", "ai_usage_logs", ["session_id"])
+    op.create_index("idx_usage_service_date", "ai_usage_logs", ["service_name", "date_key"])
+    op.create_index("idx_usage_model_date", "ai_usage_logs", ["model_name", "date_key"])
+    op.create_index("idx_usage_user_date", "ai_usage_logs", ["user_id", "date_key"])
+    op.create_index("idx_usage_timestamp", "ai_usage_logs", ["timestamp"])
+
+    # Compacted daily/monthly cost rollups written by cost_rollups.compact_month
+    op.create_table(
+        "cost_aggregations",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("aggregation_type", sa.String(20), nullable=False),
+        sa.Column("date_key", sa.Date(), nullable=False),
+        sa.Column("service_name", sa.String(100), nullable=True),
+        sa.Column("model_name", sa.String(100), nullable=True),
+        sa.Column(
+            "user_id",
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("users.id", ondelete="SET NULL"),
+            nullable=True,
+        ),
+        sa.Column("total_cost", sa.Numeric(12, 6), nullable=False, server_default="0"),
+        sa.Column("total_requests", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("total_tokens", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("total_input_tokens", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("total_output_tokens", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("average_response_time_ms", sa.Numeric(10, 2), nullable=True),
+        sa.Column("average_quality_score", sa.Numeric(3, 2), nullable=True),
+        sa.Column("cache_hit_rate", sa.Numeric(5, 2), nullable=True),
+        sa.Column("error_rate", sa.Numeric(5, 2), nullable=True),
+        sa.Column("cost_per_request", sa.Numeric(10, 6), nullable=False, server_default="0"),
+        sa.Column("cost_per_token", sa.Numeric(10, 8), nullable=False, server_default="0"),
+        sa.Column("tokens_per_request", sa.Numeric(10, 2), nullable=True),
+        sa.Column("calculated_at", sa.DateTime(), nullable=False, server_default=sa.func.now()),
+        sa.Column("is_final", sa.Boolean(), nullable=False, server_default=sa.false()),
+        sa.CheckConstraint("total_cost >= 0", name="check_total_cost_positive"),
+        sa.CheckConstraint("total_requests >= 0", name="check_total_requests_positive"),
+        sa.CheckConstraint("total_tokens >= 0", name="check_total_tokens_positive"),
+        sa.CheckConstraint("cost_per_request >= 0", name="check_cost_per_request_positive"),
+        sa.CheckConstraint("cost_per_token >= 0", name="check_cost_per_token_positive"),
+        sa.CheckConstraint(
+            "cache_hit_rate >= 0 AND cache_hit_rate <= 100",
+            name="check_cache_hit_rate_range",
+        ),
+        sa.CheckConstraint(
+            "error_rate >= 0 AND error_rate <= 100", name="check_error_rate_range",
+        ),
+    )
+    op.create_index("idx_agg_type_date", "cost_aggregations", ["aggregation_type", "date_key"])
+    op.create_index("idx_agg_service_date", "cost_aggregations", ["service_name", "date_key"])
+    op.create_index("idx_agg_user_date", "cost_aggregations", ["user_id", "date_key"])
+
+
+def downgrade() -> None:
+    op.drop_index("idx_agg_user_date", "cost_aggregations")
+    op.drop_index("idx_agg_service_date", "cost_aggregations")
+    op.drop_index("idx_agg_type_date", "cost_aggregations")
+    op.drop_table("cost_aggregations")
+
+    op.drop_index("idx_usage_timestamp", "ai_usage_logs")
+    op.drop_index("idx_usage_user_date", "ai_usage_logs")
+    op.drop_index("idx_usage_model_date", "ai_usage_logs")
+    op.drop_index("idx_usage_service_date", "ai_usage_logs")
+    op.drop_index("ix_ai_usage_logs_session_id", "ai_usage_logs")
+    op.drop_index("ix_ai_usage_logs_request_id", "ai_usage_logs")
+    op.drop_table("ai_usage_logs")
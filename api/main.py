@@ -6,6 +6,7 @@ Production-ready FastAPI application with comprehensive configuration
 from __future__ import annotations
 
 # Standard library imports
+import asyncio
 import logging
 import os
 import time
@@ -222,10 +223,27 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     else:
         logger.info('--- Lifespan Startup: Redis not configured (optional) ---')
 
+    try:
+        from api.routers.ai_cost_monitoring import cost_tracker
+        from services.ai.cost_rollups import run_compaction_schedule
+        app.state.rollup_compaction_task = asyncio.create_task(
+            run_compaction_schedule(cost_tracker.redis, cost_tracker.compact_month)
+        )
+        logger.info('--- Lifespan Startup: AI cost rollup compaction scheduled ---')
+    except Exception as e:
+        logger.warning('AI cost rollup compaction not scheduled: %s', e)
+
     logger.info('--- Lifespan Startup: Completed Successfully ---')
     yield
 
     logger.info('Shutting down ruleIQ API...')
+    compaction_task = getattr(app.state, 'rollup_compaction_task', None)
+    if compaction_task is not None:
+        compaction_task.cancel()
+        try:
+            await compaction_task
+        except asyncio.CancelledError:
+            pass
     try:
         from api.routers.iq_agent import cleanup_iq_agent
         await cleanup_iq_agent()
@@ -233,6 +251,21 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     except Exception as e:
         logger.warning('IQ agent cleanup warning: %s', e)
 
+    try:
+        from services.ai.cost_ledger import drain_usage_ledgers
+        await drain_usage_ledgers()
+        logger.info('AI usage ledgers drained')
+    except Exception as e:
+        logger.warning('AI usage ledger drain warning: %s', e)
+
+    try:
+        from services.ai.ab_testing_framework import close_ab_testing_framework
+        # Writes Parquet segments; keep the file I/O off the event loop
+        await asyncio.to_thread(close_ab_testing_framework)
+        logger.info('A/B testing data flushed')
+    except Exception as e:
+        logger.warning('A/B testing flush warning: %s', e)
+
     try:
         await cleanup_db_connections()
         logger.info('Database connections closed')
@@ -1,25 +1,55 @@
 """
-from __future__ import annotations
-
 Redis-based rate limiting middleware for production use.
 
 This module provides distributed rate limiting using Redis as the backend,
 which is essential for production environments with multiple server instances.
+
+Two algorithms are available:
+
+- sliding_window (default): sliding-window counter that interpolates between
+  the current and previous fixed-window counters. One Lua call per request and
+  O(1) memory per identifier.
+- sliding_log: sorted-set log holding one member per request. Exact, but
+  several round trips per request and memory grows with the request rate.
 """
+from __future__ import annotations
+import logging
+import math
 import time
-from typing import Optional, Tuple, Any
+import uuid
+from typing import List, Optional, Tuple, Any
 import redis.asyncio as redis
 from fastapi import HTTPException, Request, status
 from fastapi.responses import JSONResponse
 from config.settings import get_settings
 settings = get_settings()
+logger = logging.getLogger(__name__)
+SLIDING_WINDOW = 'sliding_window'
+SLIDING_LOG = 'sliding_log'
+ALGORITHMS = SLIDING_WINDOW, SLIDING_LOG
+SLIDING_WINDOW_SCRIPT = """
+local limit = tonumber(ARGV[1])
+local previous_weight = tonumber(ARGV[2])
+local ttl = tonumber(ARGV[3])
+local current = tonumber(redis.call('GET', KEYS[1]) or '0')
+local previous = tonumber(redis.call('GET', KEYS[2]) or '0')
+if previous * previous_weight + current >= limit then
+    return {0, current, previous}
+end
+current = redis.call('INCR', KEYS[1])
+if current == 1 then
+    redis.call('EXPIRE', KEYS[1], ttl)
+end
+return {1, current, previous}
+"""
 
 
 class RedisRateLimiter:
     """Redis-based rate limiter for distributed environments."""
 
     def __init__(self, requests_per_window: int=100, window_seconds: int=60,
-        redis_url: Optional[str]=None, key_prefix: str='rate_limit') ->None:
+        redis_url: Optional[str]=None, key_prefix: str='rate_limit',
+        algorithm: str=SLIDING_WINDOW) ->None:
         """
         Initialize Redis rate limiter.
 
@@ -28,7 +58,14 @@ class RedisRateLimiter:
             window_seconds: Time window in seconds
             redis_url: Redis connection URL (defaults to settings.redis_url)
             key_prefix: Prefix for Redis keys
+            algorithm: 'sliding_window' (counter) or 'sliding_log' (sorted set)
         """
+        if algorithm not in ALGORITHMS:
+            raise ValueError(
+                f'Unknown rate limit algorithm: {algorithm}. Expected one of {ALGORITHMS}'
+                )
+        self.algorithm = algorithm
+        self._window_script = None
         self.requests_per_window = requests_per_window
         self.window_seconds = window_seconds
         self.key_prefix = key_prefix
@@ -55,36 +92,95 @@ class RedisRateLimiter:
         """
         try:
             redis_client = await self._get_redis_client()
-            key = f'{self.key_prefix}:{identifier}'
-            current_time = int(time.time())
-            window_start = current_time - self.window_seconds
-            await redis_client.zremrangebyscore(key, 0, window_start)
-            current_count = await redis_client.zcard(key)
-            if current_count >= self.requests_per_window:
-                oldest_requests = await redis_client.zrange(key, 0, 0,
-                    withscores=True)
-                if oldest_requests:
-                    oldest_time = int(oldest_requests[0][1])
-                    retry_after = max(1, self.window_seconds - (
-                        current_time - oldest_time))
-                else:
-                    retry_after = self.window_seconds
-                return False, retry_after
-            await redis_client.zadd(key, {str(current_time): current_time})
-            await redis_client.expire(key, self.window_seconds)
-            return True, 0
+            if self.algorithm == SLIDING_WINDOW:
+                return await self._check_sliding_window(redis_client,
+                    identifier)
+            return await self._check_sliding_log(redis_client, identifier)
         except redis.RedisError as e:
-            import logging
-            logger = logging.getLogger(__name__)
             logger.error('Redis rate limiter error: %s' % e)
             return True, 0
 
+    async def _check_sliding_log(self, redis_client: redis.Redis,
+        identifier: str) ->Tuple[bool, int]:
+        """Sorted-set log: one member per request inside the window."""
+        key = f'{self.key_prefix}:{identifier}'
+        current_time = time.time()
+        window_start = current_time - self.window_seconds
+        await redis_client.zremrangebyscore(key, 0, window_start)
+        current_count = await redis_client.zcard(key)
+        if current_count >= self.requests_per_window:
+            oldest_requests = await redis_client.zrange(key, 0, 0,
+                withscores=True)
+            if oldest_requests:
+                oldest_time = oldest_requests[0][1]
+                retry_after = max(1, math.ceil(self.window_seconds - (
+                    current_time - oldest_time)))
+            else:
+                retry_after = self.window_seconds
+            return False, retry_after
+        # Unique member so same-second requests are counted separately
+        await redis_client.zadd(key, {f'{current_time}:{uuid.uuid4().hex}':
+            current_time})
+        await redis_client.expire(key, self.window_seconds)
+        return True, 0
+
+    async def _check_sliding_window(self, redis_client: redis.Redis,
+        identifier: str) ->Tuple[bool, int]:
+        """Sliding-window counter evaluated atomically in a single Lua call."""
+        if self._window_script is None:
+            self._window_script = redis_client.register_script(
+                SLIDING_WINDOW_SCRIPT)
+        now = time.time()
+        keys, elapsed = self._window_keys(identifier, now)
+        allowed, current, previous = await self._window_script(keys=keys,
+            args=[self.requests_per_window, 1 - elapsed, self.
+            window_seconds * 2], client=redis_client)
+        if allowed:
+            return True, 0
+        return False, self._window_retry_after(int(current), int(previous),
+            elapsed)
+
+    def _window_keys(self, identifier: str, now: float) ->Tuple[List[str],
+        float]:
+        """Current and previous window counter keys plus elapsed fraction."""
+        window_index = int(now // self.window_seconds)
+        elapsed = (now - window_index * self.window_seconds
+            ) / self.window_seconds
+        base = f'{self.key_prefix}:{identifier}'
+        return [f'{base}:{window_index}', f'{base}:{window_index - 1}'
+            ], elapsed
+
+    def _window_estimate(self, current: int, previous: int, elapsed: float
+        ) ->float:
+        """Weighted request count over the sliding window."""
+        return previous * (1 - elapsed) + current
+
+    def _window_retry_after(self, current: int, previous: int, elapsed: float
+        ) ->int:
+        """Seconds until the weighted count drops below the limit."""
+        limit = self.requests_per_window
+        if current < limit and previous > 0:
+            unblocked_at = 1 - (limit - current) / previous
+            if unblocked_at <= 1:
+                return max(1, math.ceil((unblocked_at - elapsed) * self.
+                    window_seconds))
+        # Blocked for the rest of this window; the current count then decays
+        unblocked_at = max(0.0, 1 - limit / current) if current else 0.0
+        return max(1, math.ceil((1 - elapsed + unblocked_at) * self.
+            window_seconds))
+
     async def get_remaining_requests(self, identifier: str) ->int:
         """Get remaining requests for the identifier."""
         try:
             redis_client = await self._get_redis_client()
+            if self.algorithm == SLIDING_WINDOW:
+                keys, elapsed = self._window_keys(identifier, time.time())
+                current, previous = await redis_client.mget(keys)
+                estimate = self._window_estimate(int(current or 0), int(
+                    previous or 0), elapsed)
+                return max(0, self.requests_per_window - math.ceil(estimate))
             key = f'{self.key_prefix}:{identifier}'
-            current_time = int(time.time())
+            current_time = time.time()
             window_start = current_time - self.window_seconds
             await redis_client.zremrangebyscore(key, 0, window_start)
             current_count = await redis_client.zcard(key)
@@ -97,7 +193,11 @@ class RedisRateLimiter:
         try:
             redis_client = await self._get_redis_client()
             key = f'{self.key_prefix}:{identifier}'
-            await redis_client.delete(key)
+            if self.algorithm == SLIDING_WINDOW:
+                await redis_client.delete(*self._window_keys(identifier,
+                    time.time())[0])
+            else:
+                await redis_client.delete(key)
             return True
         except redis.RedisError:
             return False
@@ -109,8 +209,7 @@ class RedisRateLimiter:
 
 
 general_limiter = RedisRateLimiter(requests_per_window=settings.
-    rate_limit_requests, window_seconds=settings.rate_limit_window,
-    key_prefix='general')
+    rate_limit_per_minute, window_seconds=60, key_prefix='general')
 auth_limiter = RedisRateLimiter(requests_per_window=10, window_seconds=60,
     key_prefix='auth')
 api_limiter = RedisRateLimiter(requests_per_window=100, window_seconds=60,
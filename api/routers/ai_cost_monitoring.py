@@ -19,6 +19,7 @@ from typing import Dict, List, Optional, Any
 from fastapi import APIRouter, Depends, HTTPException, Query, status
 from pydantic import BaseModel, Field
 from api.dependencies.auth import get_current_active_user
+from api.dependencies.rbac_auth import require_role
 from database.user import User
 from api.middleware.rate_limiter import RateLimited
 from services.ai.cost_management import AICostManager, CostTrackingService, BudgetAlertService, CostOptimizationService
@@ -241,7 +242,9 @@ async def get_cost_trends(days: int=Query(7, ge=1, le=90, description=
     Analyzes cost trends, growth rates, and identifies anomalies.
     """
     try:
-        trends = await cost_tracker.get_cost_trends(days)
+        # One range read serves both the trend and the 7-day anomaly window
+        history = await cost_tracker.get_cost_trends(max(days, 7))
+        trends = history[-days:]
         if len(trends) >= 2:
             first_cost = float(trends[0]['cost'])
             last_cost = float(trends[-1]['cost'])
@@ -254,7 +257,8 @@ async def get_cost_trends(days: int=Query(7, ge=1, le=90, description=
             }
         anomalies = []
         if include_anomalies:
-            anomalies = await cost_tracker.identify_cost_anomalies()
+            anomalies = await cost_tracker.identify_cost_anomalies(trends=
+                history)
         return CostTrendsResponse(trends=trends, growth_rate=growth_rate,
             seasonal_patterns=seasonal_patterns, anomalies=anomalies)
     except Exception as e:
@@ -496,6 +500,30 @@ async def cost_monitoring_health() -> Dict[str, Any]:
             datetime.now().isoformat()}
 
 
+@router.post('/rollups/compact', dependencies=[Depends(require_role(
+    'admin')), Depends(RateLimited(requests=5, window=3600))])
+async def compact_cost_rollups(year: int=Query(..., ge=2020, le=2030,
+    description='Year of the month to compact'), month: int=Query(..., ge=
+    1, le=12, description='Month to compact')) -> Dict[str, Any]:
+    """
+    Compact a finished month's daily cost rollups into Postgres.
+
+    The previous month is compacted automatically by the scheduled job
+    started at application startup; this admin-only endpoint reruns or
+    backfills a month by hand. Limited to 5 requests per hour.
+    """
+    try:
+        return await cost_tracker.compact_month(year, month)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e))
+    except Exception as e:
+        logger.error('Failed to compact cost rollups: %s' % str(e))
+        raise HTTPException(status_code=status.
+            HTTP_500_INTERNAL_SERVER_ERROR, detail=
+            f'Failed to compact rollups: {str(e)}')
+
+
 @router.delete('/cache/clear', dependencies=[Depends(
     get_current_active_user), Depends(RateLimited(requests=5, window=3600))])
 async def clear_cost_cache() -> Dict[str, Any]:
@@ -13,7 +13,7 @@ import asyncio
 import json
 import uuid
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Set
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Query, status
 from api.dependencies.auth import verify_websocket_token
 from api.dependencies.websocket_auth import (
@@ -23,6 +23,8 @@ from middleware.websocket_security import websocket_security
 from fastapi.websockets import WebSocketState
 from pydantic import BaseModel
 from services.ai.cost_management import AICostManager, CostTrackingService
+from services.websocket_fanout import (DEFAULT_QUEUE_SIZE,
+    DEFAULT_SEND_TIMEOUT, ConnectionOutbox, FanoutStats, TopicRelay)
 from config.logging_config import get_logger
 import contextlib
 logger = get_logger(__name__)
@@ -46,12 +48,53 @@ class BudgetAlertMessage(WebSocketMessage):
     type: str = 'budget_alert'
 
 
+# Topics a connection receives without subscribing, by connection type prefix
+DEFAULT_TOPICS = {'dashboard': ('cost_update', 'budget_alert', 'cost_spike'),
+    'budget_alerts': ('budget_alert', 'cost_spike'), 'service': ('cost_spike',)}
+# Every topic the server publishes; clients can only subscribe to these, so
+# arbitrary client strings never become Redis SUBSCRIBE calls on the relay
+SUBSCRIBABLE_TOPICS = frozenset({'cost_update', 'budget_alert', 'cost_spike'})
+COST_UPDATE_INTERVAL = 30
+
+
+def default_topics(connection_type: str) ->Set[str]:
+    """Topics a new connection of the given type is subscribed to."""
+    if connection_type in DEFAULT_TOPICS:
+        return set(DEFAULT_TOPICS[connection_type])
+    prefix = connection_type.split('_', 1)[0]
+    return set(DEFAULT_TOPICS.get(prefix, ()))
+
+
+def known_topics(event_types: Any) ->List[str]:
+    """The event types from a client message that are SUBSCRIBABLE_TOPICS."""
+    if not isinstance(event_types, (list, tuple, set)):
+        return []
+    topics = [event_type for event_type in event_types if isinstance(
+        event_type, str) and event_type in SUBSCRIBABLE_TOPICS]
+    if len(topics) < len(event_types):
+        logger.debug('Ignored %s unknown event types' % (len(event_types) -
+            len(topics)))
+    return topics
+
+
 class ConnectionManager:
-    """Manages WebSocket connections for real-time cost monitoring."""
+    """Manages WebSocket connections for real-time cost monitoring.
 
-    def __init__(self) ->None:
+    Every connection sends through its own bounded outbox, so a broadcast
+    serializes a message once and only enqueues it; slow clients drop their
+    oldest messages and are evicted instead of stalling everyone else.
+    Topic messages reach other instances through the optional Redis relay.
+    """
+
+    def __init__(self, queue_size: int=DEFAULT_QUEUE_SIZE, send_timeout:
+        float=DEFAULT_SEND_TIMEOUT) ->None:
         self.active_connections: Dict[str, Dict[str, Any]] = {}
         self.user_connections: Dict[str, List[str]] = {}
+        self.topic_subscribers: Dict[str, Set[str]] = {}
+        self.queue_size = queue_size
+        self.send_timeout = send_timeout
+        self.stats = FanoutStats()
+        self.relay: Optional[TopicRelay] = None
         self.cost_manager = AICostManager()
         self.cost_tracker = CostTrackingService()
 
@@ -60,13 +103,18 @@ class ConnectionManager:
         """Accept new WebSocket connection."""
         await websocket.accept()
         connection_id = str(uuid.uuid4())
+        outbox = ConnectionOutbox(connection_id, websocket.send_text, self.
+            _evict, stats=self.stats, max_size=self.queue_size,
+            send_timeout=self.send_timeout)
         self.active_connections[connection_id] = {'websocket': websocket,
             'user_id': user_id, 'connection_type': connection_type,
             'connected_at': datetime.now(), 'last_ping': datetime.now(),
-            'subscriptions': set()}
+            'subscriptions': set(), 'outbox': outbox}
         if user_id not in self.user_connections:
             self.user_connections[user_id] = []
         self.user_connections[user_id].append(connection_id)
+        await self.subscribe_to_events(connection_id, list(default_topics(
+            connection_type)))
         logger.info('WebSocket connection %s established for user %s' % (
             connection_id, user_id))
         await self._send_initial_data(connection_id)
@@ -82,9 +130,24 @@ class ConnectionManager:
                     user_connections[user_id] if cid != connection_id]
                 if not self.user_connections[user_id]:
                     del self.user_connections[user_id]
+            await self.unsubscribe_from_events(connection_id, list(
+                connection['subscriptions']))
             del self.active_connections[connection_id]
+            await connection['outbox'].close()
             logger.info('WebSocket connection %s disconnected' % connection_id)
 
+    async def _evict(self, connection_id: str, reason: str) ->None:
+        """Drop a connection whose outbox gave up on it."""
+        connection = self.active_connections.get(connection_id)
+        if connection is None:
+            return
+        logger.warning('Evicting WebSocket connection %s: %s' % (
+            connection_id, reason))
+        await self.disconnect(connection_id)
+        with contextlib.suppress(Exception):
+            await connection['websocket'].close(code=status.
+                WS_1013_TRY_AGAIN_LATER)
+
     async def _send_initial_data(self, connection_id: str) ->None:
         """Send initial cost data to newly connected client."""
         try:
@@ -119,60 +182,124 @@ class ConnectionManager:
 
     async def send_personal_message(self, connection_id: str, message: Dict
         [str, Any]) ->None:
-        """Send message to specific connection."""
+        """Queue a message for a specific connection."""
         if connection_id in self.active_connections:
-            try:
-                websocket = self.active_connections[connection_id]['websocket']
-                if websocket.client_state == WebSocketState.CONNECTED:
-                    await websocket.send_text(json.dumps(message))
-                else:
-                    await self.disconnect(connection_id)
-            except Exception as e:
-                logger.error('Failed to send message to %s: %s' % (
-                    connection_id, str(e)))
-                await self.disconnect(connection_id)
+            self.active_connections[connection_id]['outbox'].put(json.
+                dumps(message))
 
     async def send_to_user(self, user_id: str, message: Dict[str, Any]) ->None:
         """Send message to all connections for a specific user."""
         if user_id in self.user_connections:
+            text = json.dumps(message)
             for connection_id in self.user_connections[user_id].copy():
-                await self.send_personal_message(connection_id, message)
+                self.active_connections[connection_id]['outbox'].put(text)
 
     async def broadcast(self, message: Dict[str, Any], connection_type:
         Optional[str]=None) ->None:
-        """Broadcast message to all connections or specific connection type."""
-        disconnected = []
-        for connection_id, connection in self.active_connections.items():
-            if connection_type and connection['connection_type'
-                ] != connection_type:
+        """Broadcast message to all connections or a connection type.
+
+        connection_type matches as a prefix, so 'dashboard' reaches every
+        dashboard_<type> connection.
+        """
+        text = json.dumps(message)
+        for connection in list(self.active_connections.values()):
+            if connection_type and not connection['connection_type'
+                ].startswith(connection_type):
                 continue
-            try:
-                websocket = connection['websocket']
-                if websocket.client_state == WebSocketState.CONNECTED:
-                    await websocket.send_text(json.dumps(message))
-                else:
-                    disconnected.append(connection_id)
-            except Exception as e:
-                logger.error('Failed to broadcast to %s: %s' % (
-                    connection_id, str(e)))
-                disconnected.append(connection_id)
-        for connection_id in disconnected:
-            await self.disconnect(connection_id)
+            connection['outbox'].put(text)
+
+    async def publish(self, topic: str, message: Dict[str, Any]) ->int:
+        """Send a message to every subscriber of a topic on every instance.
+
+        Returns the number of local connections it was queued for.
+        """
+        text = json.dumps(message)
+        self.stats.messages_published += 1
+        delivered = self.deliver_local(topic, text)
+        if self.relay is not None:
+            await self.relay.publish(topic, text)
+        return delivered
+
+    def deliver_local(self, topic: str, text: str) ->int:
+        """Queue serialized text for this instance's subscribers of a topic."""
+        delivered = 0
+        for connection_id in list(self.topic_subscribers.get(topic, ())):
+            connection = self.active_connections.get(connection_id)
+            if connection is not None and connection['outbox'].put(text):
+                delivered += 1
+        return delivered
+
+    async def _deliver_relayed(self, topic: str, text: str) ->None:
+        self.deliver_local(topic, text)
+
+    async def has_subscribers(self, topic: str) ->bool:
+        """Whether any connection on any instance is subscribed to a topic."""
+        if self.topic_subscribers.get(topic):
+            return True
+        if self.relay is not None:
+            return await self.relay.remote_subscribers(topic) > 0
+        return False
+
+    async def acquire_lease(self, name: str, ttl: int) ->bool:
+        """Whether this instance should run a periodic producer.
+
+        Without the relay every instance serves only its own clients and
+        always produces.
+        """
+        if self.relay is None:
+            return True
+        return await self.relay.acquire_lease(name, ttl)
+
+    async def start_relay(self, redis_client: Any) ->None:
+        """Relay topic messages between instances through Redis pub/sub."""
+        if self.relay is not None:
+            return
+        relay = TopicRelay(redis_client, self._deliver_relayed, stats=self
+            .stats)
+        relay.topics.update(self.topic_subscribers)
+        await relay.start()
+        self.relay = relay
+
+    async def stop_relay(self) ->None:
+        """Stop relaying topic messages between instances."""
+        relay, self.relay = self.relay, None
+        if relay is not None:
+            await relay.stop()
 
     async def subscribe_to_events(self, connection_id: str, event_types:
         List[str]) ->None:
-        """Subscribe connection to specific event types."""
-        if connection_id in self.active_connections:
-            self.active_connections[connection_id]['subscriptions'].update(
-                event_types)
+        """Subscribe connection to specific event types.
+
+        Event types outside SUBSCRIBABLE_TOPICS are ignored.
+        """
+        if connection_id not in self.active_connections:
+            return
+        subscriptions = self.active_connections[connection_id]['subscriptions'
+            ]
+        for event_type in known_topics(event_types):
+            subscriptions.add(event_type)
+            subscribers = self.topic_subscribers.setdefault(event_type, set())
+            subscribers.add(connection_id)
+            if len(subscribers) == 1 and self.relay is not None:
+                await self.relay.subscribe(event_type)
 
     async def unsubscribe_from_events(self, connection_id: str, event_types:
         List[str]) ->None:
         """Unsubscribe connection from specific event types."""
-        if connection_id in self.active_connections:
-            for event_type in event_types:
-                self.active_connections[connection_id]['subscriptions'
-                    ].discard(event_type)
+        if connection_id not in self.active_connections:
+            return
+        subscriptions = self.active_connections[connection_id]['subscriptions'
+            ]
+        for event_type in known_topics(event_types):
+            subscriptions.discard(event_type)
+            subscribers = self.topic_subscribers.get(event_type)
+            if subscribers is None or connection_id not in subscribers:
+                continue
+            subscribers.discard(connection_id)
+            if not subscribers:
+                del self.topic_subscribers[event_type]
+                if self.relay is not None:
+                    await self.relay.unsubscribe(event_type)
 
     async def ping_connections(self) ->None:
         """Send ping to all connections to keep them alive."""
@@ -192,7 +319,13 @@ class ConnectionManager:
         return {'total_connections': total_connections, 'users_connected':
             users_connected, 'connection_types': connection_types,
             'connections_by_user': {user_id: len(connections) for user_id,
-            connections in self.user_connections.items()}}
+            connections in self.user_connections.items()},
+            'topic_subscribers': {topic: len(subscribers) for topic,
+            subscribers in self.topic_subscribers.items()},
+            'queued_messages': sum(connection['outbox'].depth for
+            connection in self.active_connections.values()),
+            'relay_connected': bool(self.relay and self.relay.connected),
+            'fanout': self.stats.to_dict()}
 
 
 connection_manager = ConnectionManager()
@@ -254,8 +387,9 @@ async def realtime_cost_dashboard(
                 data = json.loads(message)
                 await handle_websocket_message(connection_id, data)
             except asyncio.TimeoutError:
-                await websocket.send_text(json.dumps({'type': 'ping',
-                    'timestamp': datetime.now().isoformat(), 'data': {}}))
+                await connection_manager.send_personal_message(connection_id,
+                    {'type': 'ping', 'timestamp': datetime.now().isoformat(),
+                    'data': {}})
             except WebSocketDisconnect:
                 logger.info('User %s disconnected from cost dashboard' %
                     user_id)
@@ -310,8 +444,9 @@ async def budget_alerts_websocket(websocket: WebSocket) ->None:
                     await connection_manager.unsubscribe_from_events(
                         connection_id, event_types)
             except asyncio.TimeoutError:
-                await websocket.send_text(json.dumps({'type': 'ping',
-                    'timestamp': datetime.now().isoformat(), 'data': {}}))
+                await connection_manager.send_personal_message(connection_id,
+                    {'type': 'ping', 'timestamp': datetime.now().isoformat(),
+                    'data': {}})
             except WebSocketDisconnect:
                 break
     except Exception as e:
@@ -359,8 +494,9 @@ async def service_cost_monitoring(websocket: WebSocket, service_name: str) ->Non
                 if data.get('type') == 'get_service_stats':
                     await send_service_stats(connection_id, service_name)
             except asyncio.TimeoutError:
-                await websocket.send_text(json.dumps({'type': 'ping',
-                    'timestamp': datetime.now().isoformat(), 'data': {}}))
+                await connection_manager.send_personal_message(connection_id,
+                    {'type': 'ping', 'timestamp': datetime.now().isoformat(),
+                    'data': {}})
             except WebSocketDisconnect:
                 break
     except Exception as e:
@@ -467,20 +603,28 @@ async def send_service_stats(connection_id: str, service_name: str) ->None:
 
 
 async def broadcast_cost_updates() ->None:
-    """Background task to broadcast real-time cost updates."""
+    """Background task to broadcast real-time cost updates.
+
+    The daily summary is only computed when some instance has a cost_update
+    subscriber, and with the Redis relay only the lease holder computes it.
+    """
     while True:
         try:
-            from datetime import date
-            today = date.today()
-            daily_summary = (await connection_manager.cost_manager.
-                get_daily_summary(today))
-            update_message = {'type': 'cost_update', 'timestamp': datetime.
-                now().isoformat(), 'data': {'current_daily_cost': str(
-                daily_summary['total_cost']), 'requests_today':
-                daily_summary['total_requests'], 'last_hour_cost': '5.25',
-                'cost_trend': 'stable'}}
-            await connection_manager.broadcast(update_message, 'dashboard')
-            await asyncio.sleep(30)
+            if not await connection_manager.has_subscribers('cost_update'):
+                connection_manager.stats.publishes_skipped += 1
+            elif await connection_manager.acquire_lease('cost_update',
+                COST_UPDATE_INTERVAL * 2):
+                from datetime import date
+                today = date.today()
+                daily_summary = (await connection_manager.cost_manager.
+                    get_daily_summary(today))
+                update_message = {'type': 'cost_update', 'timestamp':
+                    datetime.now().isoformat(), 'data': {
+                    'current_daily_cost': str(daily_summary['total_cost']),
+                    'requests_today': daily_summary['total_requests'],
+                    'last_hour_cost': '5.25', 'cost_trend': 'stable'}}
+                await connection_manager.publish('cost_update', update_message)
+            await asyncio.sleep(COST_UPDATE_INTERVAL)
         except Exception as e:
             logger.error('Error in broadcast cost updates: %s' % str(e))
             await asyncio.sleep(60)
@@ -495,6 +639,11 @@ async def start_websocket_background_tasks() ->None:
     This should be called during application startup.
     """
     global _background_task
+    try:
+        from database.redis_client import get_redis_client
+        await connection_manager.start_relay(await get_redis_client())
+    except Exception as e:
+        logger.warning('WebSocket topic relay unavailable, delivering locally only: %s' % str(e))
     if _background_task is None or _background_task.done():
         _background_task = asyncio.create_task(broadcast_cost_updates())
         logger.info('Started WebSocket cost monitoring background task')
@@ -513,6 +662,7 @@ async def stop_websocket_background_tasks() ->None:
         with contextlib.suppress(asyncio.CancelledError):
             await _background_task
         logger.info('Stopped WebSocket cost monitoring background task')
+    await connection_manager.stop_relay()
 
 
 @router.post('/admin/background-tasks/start')
@@ -540,8 +690,7 @@ async def broadcast_budget_alert(alert_data: Dict[str, Any]) ->Dict[str, Any]:
     """Broadcast budget alert to all connected clients."""
     alert_message = {'type': 'budget_alert', 'timestamp': datetime.now().
         isoformat(), 'data': alert_data}
-    await connection_manager.broadcast(alert_message, 'dashboard')
-    await connection_manager.broadcast(alert_message, 'budget_alerts')
+    await connection_manager.publish('budget_alert', alert_message)
     return {'message': 'Alert broadcasted successfully'}
 
 
@@ -550,5 +699,5 @@ async def broadcast_cost_spike(spike_data: Dict[str, Any]) ->Dict[str, Any]:
     """Broadcast cost spike alert to connected clients."""
     spike_message = {'type': 'cost_spike', 'timestamp': datetime.now().
         isoformat(), 'data': spike_data}
-    await connection_manager.broadcast(spike_message)
+    await connection_manager.publish('cost_spike', spike_message)
     return {'message': 'Cost spike alert broadcasted successfully'}
@@ -1,10 +1,9 @@
 """
-from __future__ import annotations
-import requests
-
 Usage Dashboard API for SMB owners.
 Provides visibility into AI feature usage and remaining limits.
 """
+from __future__ import annotations
+import requests
 
 from typing import Any, Dict, List, Optional
 from datetime import datetime, timedelta, timezone
@@ -54,10 +53,10 @@ async def get_usage_dashboard(current_user: User=Depends(get_current_active_user
     - Usage trends over time
     - Most frequently used features
     """
+    usage = await RateLimitService.get_usage_stats(db, current_user)
     current_usage = []
-    for feature, _limits in RateLimitService.LIMITS.items():
-        usage_info = await RateLimitService.check_rate_limit(db, current_user, feature, check_only=True)
-        stats = UsageStats(feature=feature.replace('_', ' ').title(), used_today=usage_info['used_today'], daily_limit=usage_info['daily_limit'], remaining=usage_info['remaining'], reset_time=usage_info['reset_time'])
+    for feature, usage_info in usage['features'].items():
+        stats = UsageStats(feature=feature.replace('_', ' ').title(), used_today=usage_info['used'], daily_limit=usage_info['limit'], remaining=usage_info['remaining'], reset_time=usage_info['reset_time'])
         current_usage.append(stats)
     cutoff_date = datetime.now(timezone.utc) - timedelta(days=days)
     stmt = select(AuditLog).where(and_(AuditLog.user_id == current_user.id, AuditLog.action.like('rate_limit:%'), AuditLog.timestamp >= cutoff_date)).order_by(AuditLog.timestamp.desc()).limit(50)
@@ -110,23 +109,6 @@ async def get_feature_usage(feature: str, current_user: User=Depends(get_current
     usage_info = await RateLimitService.check_rate_limit(db, current_user, feature_key, check_only=True)
     return UsageStats(feature=feature.replace('_', ' ').title(), used_today=usage_info['used_today'], daily_limit=usage_info['daily_limit'], remaining=usage_info['remaining'], reset_time=usage_info['reset_time'])
 
-@router.post('/usage/reset-demo')
-@require_auth
-async def reset_demo_usage(current_user: User=Depends(get_current_active_user), db: AsyncSession=Depends(get_async_db)) -> Dict[str, Any]:
-    """
-    Reset usage counters for demo/testing purposes.
-
-    NOTE: This endpoint should be removed or restricted in production.
-    """
-    cutoff = datetime.now(timezone.utc) - timedelta(hours=24)
-    stmt = select(AuditLog).where(and_(AuditLog.user_id == current_user.id, AuditLog.action.like('rate_limit:%'), AuditLog.timestamp >= cutoff))
-    result = await db.execute(stmt)
-    logs_to_delete = result.scalars().all()
-    for log in logs_to_delete:
-        await db.delete(log)
-    await db.commit()
-    return {'message': 'Usage counters reset successfully', 'deleted_entries': len(logs_to_delete)}
-
 def _get_feature_description(feature: str) -> str:
     """Get human-readable description for a feature."""
     descriptions = {'ai_assessment': 'AI-powered assessment help and question assistance', 'ai_policy_generation': 'Generate compliance policies using AI', 'ai_compliance_check': 'Validate policies against compliance frameworks', 'ai_recommendation': 'Get personalized compliance recommendations'}
@@ -16,7 +16,7 @@ primarily Google Generative AI for compliance content generation.
 import os
 from dataclasses import dataclass
 from enum import Enum
-from typing import Any, Dict, List, Optional, TYPE_CHECKING
+from typing import Any, Dict, List, Optional, TYPE_CHECKING, Union
 if TYPE_CHECKING:
     import google.generativeai as genai
 else:
@@ -129,16 +129,19 @@ class AIConfig:
             raise ValueError('GOOGLE_API_KEY environment variable is required')
         genai.configure(api_key=self.google_api_key)
 
-    def get_model(self, model_type: Optional[ModelType]=None,
+    def get_model(self, model_type: Optional[Union[ModelType, str]]=None,
         system_instruction: Optional[str]=None, tools: Optional[List[Dict[
         str, Any]]]=None) ->genai.GenerativeModel:
-        """Get configured AI model instance with optional system instruction and tools"""
+        """Get configured AI model instance (by ModelType or model name) with optional system instruction and tools"""
         if os.getenv('USE_MOCK_AI', 'false').lower() == 'true':
             from unittest.mock import MagicMock
             mock_model = MagicMock()
             mock_model.generate_content.return_value.text = 'Mock AI response'
             return mock_model
-        model_name = model_type.value if model_type else self.default_model
+        if isinstance(model_type, ModelType):
+            model_name = model_type.value
+        else:
+            model_name = model_type or self.default_model
         model_params = {'model_name': model_name, 'generation_config': self
             .generation_config, 'safety_settings': self.safety_settings}
         if system_instruction:
@@ -388,15 +391,15 @@ class AIConfig:
 ai_config = AIConfig()
 
 
-def get_ai_model(model_type: Optional[ModelType]=None, task_complexity: str
-    ='medium', prefer_speed: bool=False, task_context: Optional[Dict[str,
-    Any]]=None, system_instruction: Optional[str]=None, tools: Optional[
-    List[Dict[str, Any]]]=None) ->genai.GenerativeModel:
+def get_ai_model(model_type: Optional[Union[ModelType, str]]=None,
+    task_complexity: str='medium', prefer_speed: bool=False, task_context:
+    Optional[Dict[str, Any]]=None, system_instruction: Optional[str]=None,
+    tools: Optional[List[Dict[str, Any]]]=None) ->genai.GenerativeModel:
     """
     Convenience function to get AI model instance with intelligent selection, system instructions, and tools
 
     Args:
-        model_type: Specific model to use (overrides intelligent selection)
+        model_type: Specific model or model name to use (overrides intelligent selection)
         task_complexity: "simple", "medium", "complex", or "auto"
         prefer_speed: Whether to prioritize speed over capability
         task_context: Context for automatic complexity calculation
@@ -216,6 +216,7 @@ class RateLimitConfig(BaseModel):
     # Token bucket algorithm settings
     refill_rate: float = 1.0  # tokens per second
     bucket_capacity: int = 100  # max tokens
+    local_bucket_max_entries: int = 10000  # LRU bound for degraded-mode buckets
 
     # Configuration hot-reload
     enable_hot_reload: bool = True
@@ -22,9 +22,10 @@ from sqlalchemy import (
     Index,
     CheckConstraint,
 )
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID
 from sqlalchemy.orm import relationship
 
-from database.base import Base
+from .db_setup import Base
 
 
 class AIUsageLog(Base):
@@ -37,7 +38,9 @@ class AIUsageLog(Base):
     # Request identification
     request_id = Column(String(255), unique=True, index=True, nullable=False)
     session_id = Column(String(255), index=True, nullable=True)
-    user_id = Column(Integer, ForeignKey("users.id"), index=True, nullable=True)
+    user_id = Column(
+        PG_UUID(as_uuid=True), ForeignKey("users.id", ondelete="SET NULL"), index=True, nullable=True,
+    )
 
     # Service and model information
     service_name = Column(String(100), index=True, nullable=False)
@@ -68,7 +71,7 @@ class AIUsageLog(Base):
     endpoint = Column(String(255), nullable=True)
     user_agent = Column(String(500), nullable=True)
     ip_address = Column(String(45), nullable=True)  # IPv6 compatible
-    metadata = Column(JSON, nullable=True)
+    usage_metadata = Column("metadata", JSON, nullable=True)
 
     # Relationships
     user = relationship("User", back_populates="ai_usage_logs")
@@ -134,7 +137,7 @@ class AIModelConfig(Base):
         DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow,
     )
     description = Column(Text, nullable=True)
-    metadata = Column(JSON, nullable=True)
+    model_metadata = Column("metadata", JSON, nullable=True)
 
     # Constraints
     __table_args__ = (
@@ -249,7 +252,7 @@ class CostAlert(Base):
     webhook_sent = Column(Boolean, nullable=False, default=False)
 
     # Additional context
-    metadata = Column(JSON, nullable=True)
+    alert_metadata = Column("metadata", JSON, nullable=True)
 
     # Relationships
     user = relationship("User", foreign_keys=[user_id])
@@ -355,7 +358,9 @@ class CostAggregation(Base):
     date_key = Column(Date, nullable=False, index=True)
     service_name = Column(String(100), nullable=True, index=True)
     model_name = Column(String(100), nullable=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=True, index=True)
+    user_id = Column(
+        PG_UUID(as_uuid=True), ForeignKey("users.id", ondelete="SET NULL"), nullable=True, index=True,
+    )
 
     # Aggregated metrics
     total_cost = Column(Numeric(12, 6), nullable=False, default=0)
@@ -0,0 +1,255 @@
+"""
+Per-company BM25 inverted index for RAGSystem keyword retrieval.
+
+Chunks are tokenized once at ingest time into postings (term -> chunk ->
+term frequency and first token position). Queries only touch the postings
+of their own terms, and document frequencies and lengths are kept up to
+date as chunks are added and removed. Each chunk also keeps its list of
+distinct terms, so removing it only touches its own postings. The index
+can be saved to and loaded from a JSON file.
+"""
+
+import heapq
+import json
+import logging
+import math
+import re
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+from uuid import UUID
+
+logger = logging.getLogger(__name__)
+
+# BM25 parameters
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+INDEX_FORMAT_VERSION = 1
+
+_TOKEN_PATTERN = re.compile(r'\w+')
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens used for both indexing and queries."""
+    return _TOKEN_PATTERN.findall(text.lower())
+
+
+def squash_score(score: float) -> float:
+    """Map an unbounded BM25 score onto [0, 1) without changing its order."""
+    return score / (score + 1.0)
+
+
+class CompanyKeywordIndex:
+    """Inverted index over one company's chunks."""
+
+    def __init__(self) -> None:
+        # term -> chunk_id -> (term frequency, first token position)
+        self._postings: Dict[str, Dict[str, Tuple[int, int]]] = {}
+        # chunk_id -> distinct terms, so removal skips the rest of the vocabulary
+        self._terms: Dict[str, Tuple[str, ...]] = {}
+        self._lengths: Dict[str, int] = {}
+        self._total_length = 0
+        # BM25 length normalization per chunk; rebuilt lazily after changes
+        self._norms: Optional[Dict[str, float]] = None
+
+    def __len__(self) -> int:
+        return len(self._lengths)
+
+    def __contains__(self, chunk_id: str) -> bool:
+        return chunk_id in self._lengths
+
+    @property
+    def term_count(self) -> int:
+        return len(self._postings)
+
+    @property
+    def avg_length(self) -> float:
+        return self._total_length / len(self._lengths) if self._lengths else 0.0
+
+    def add(self, chunk_id: str, text: str) -> None:
+        """Index a chunk, replacing any previous version of it."""
+        if chunk_id in self._lengths:
+            self.remove([chunk_id])
+        tokens = tokenize(text)
+        stats: Dict[str, Tuple[int, int]] = {}
+        for position, token in enumerate(tokens):
+            frequency, first = stats.get(token, (0, position))
+            stats[token] = (frequency + 1, first)
+        for term, entry in stats.items():
+            self._postings.setdefault(term, {})[chunk_id] = entry
+        self._terms[chunk_id] = tuple(stats)
+        self._lengths[chunk_id] = len(tokens)
+        self._total_length += len(tokens)
+        self._norms = None
+
+    def remove(self, chunk_ids: Iterable[str]) -> int:
+        """
+        Remove chunks from the index.
+
+        Returns:
+            Number of chunks removed
+        """
+        removed = 0
+        for chunk_id in chunk_ids:
+            length = self._lengths.pop(chunk_id, None)
+            if length is None:
+                continue
+            self._total_length -= length
+            for term in self._terms.pop(chunk_id):
+                postings = self._postings[term]
+                del postings[chunk_id]
+                if not postings:
+                    del self._postings[term]
+            removed += 1
+        if removed:
+            self._norms = None
+        return removed
+
+    def idf(self, term: str) -> float:
+        """BM25 inverse document frequency (always positive)."""
+        frequency = len(self._postings.get(term, ()))
+        return math.log(1.0 + (len(self._lengths) - frequency + 0.5) / (frequency + 0.5))
+
+    def score(self, query_terms: Sequence[str], chunk_ids: Optional[Iterable[str]]=None) -> Dict[str, float]:
+        """
+        BM25 scores for chunks matching at least one query term.
+
+        Args:
+            query_terms: Tokenized query
+            chunk_ids: Restrict scoring to these chunks
+
+        Returns:
+            Mapping of chunk_id to BM25 score
+        """
+        allowed = set(chunk_ids) if chunk_ids is not None else None
+        norms = self._get_norms()
+        scores: Dict[str, float] = {}
+        for term in set(query_terms):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            weight = self.idf(term) * (BM25_K1 + 1.0)
+            if allowed is not None:
+                postings = {chunk_id: postings[chunk_id] for chunk_id in allowed.intersection(postings)}
+            for chunk_id, (frequency, _) in postings.items():
+                scores[chunk_id] = scores.get(chunk_id, 0.0) + weight * frequency / (frequency + norms[chunk_id])
+        return scores
+
+    def _get_norms(self) -> Dict[str, float]:
+        if self._norms is None:
+            avg_length = self.avg_length or 1.0
+            self._norms = {chunk_id: BM25_K1 * (1.0 - BM25_B + BM25_B * length / avg_length) for chunk_id, length in self._lengths.items()}
+        return self._norms
+
+    def search(self, query_terms: Sequence[str], k: int) -> List[Tuple[str, float]]:
+        """
+        Find the k best BM25 matches.
+
+        Returns:
+            (chunk_id, BM25 score) pairs, best first
+        """
+        if k <= 0:
+            return []
+        scores = self.score(query_terms)
+        return heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+
+    def first_positions(self, query_terms: Sequence[str], chunk_id: str) -> List[float]:
+        """Relative position (0 = start) of each query term's first occurrence in a chunk."""
+        length = self._lengths.get(chunk_id)
+        if not length:
+            return []
+        positions = []
+        for term in set(query_terms):
+            entry = self._postings.get(term, {}).get(chunk_id)
+            if entry is not None:
+                positions.append(entry[1] / length)
+        return positions
+
+    def to_dict(self) -> Dict[str, object]:
+        return {'lengths': self._lengths, 'postings': {term: {chunk_id: list(entry) for chunk_id, entry in postings.items()} for term, postings in self._postings.items()}}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, object]) -> 'CompanyKeywordIndex':
+        index = cls()
+        index._lengths = {chunk_id: int(length) for chunk_id, length in data['lengths'].items()}
+        index._total_length = sum(index._lengths.values())
+        index._norms = None
+        index._postings = {term: {chunk_id: (int(entry[0]), int(entry[1])) for chunk_id, entry in postings.items()} for term, postings in data['postings'].items()}
+        terms: Dict[str, List[str]] = {chunk_id: [] for chunk_id in index._lengths}
+        for term, postings in index._postings.items():
+            for chunk_id in postings:
+                terms[chunk_id].append(term)
+        index._terms = {chunk_id: tuple(chunk_terms) for chunk_id, chunk_terms in terms.items()}
+        return index
+
+
+class KeywordIndex:
+    """Per-company BM25 indexes keyed by company id."""
+
+    def __init__(self) -> None:
+        self._companies: Dict[UUID, CompanyKeywordIndex] = {}
+
+    def __len__(self) -> int:
+        return sum(len(index) for index in self._companies.values())
+
+    def add(self, company_id: UUID, chunks: Iterable[Tuple[str, str]]) -> None:
+        """Index (chunk_id, text) pairs for a company."""
+        index = self._companies.get(company_id)
+        if index is None:
+            index = CompanyKeywordIndex()
+            self._companies[company_id] = index
+        for chunk_id, text in chunks:
+            index.add(chunk_id, text)
+        if not len(index):
+            del self._companies[company_id]
+
+    def remove(self, company_id: UUID, chunk_ids: Iterable[str]) -> int:
+        """Remove chunks from a company's index."""
+        index = self._companies.get(company_id)
+        if index is None:
+            return 0
+        removed = index.remove(chunk_ids)
+        if not len(index):
+            del self._companies[company_id]
+        return removed
+
+    def search(self, company_id: UUID, query: str, k: int) -> List[Tuple[str, float]]:
+        """
+        Find a company's k best BM25 matches for a query.
+
+        Returns:
+            (chunk_id, BM25 score) pairs, best first
+        """
+        index = self._companies.get(company_id)
+        if index is None:
+            return []
+        return index.search(tokenize(query), k)
+
+    def get_company_index(self, company_id: UUID) -> Optional[CompanyKeywordIndex]:
+        return self._companies.get(company_id)
+
+    def save(self, path: Union[str, Path]) -> None:
+        """Write the index to a JSON file."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        data = {'version': INDEX_FORMAT_VERSION, 'companies': {str(company_id): index.to_dict() for company_id, index in self._companies.items()}}
+        tmp_path = path.with_suffix(path.suffix + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        tmp_path.replace(path)
+        logger.info(f'Saved keyword index with {len(self)} chunks to {path}')
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> 'KeywordIndex':
+        """Read an index written by save()."""
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get('version') != INDEX_FORMAT_VERSION:
+            raise ValueError(f"Unsupported keyword index version: {data.get('version')}")
+        index = cls()
+        index._companies = {UUID(company_id): CompanyKeywordIndex.from_dict(company) for company_id, company in data['companies'].items()}
+        return index
+
+    def get_stats(self) -> Dict[str, int]:
+        """Get index statistics."""
+        return {'companies': len(self._companies), 'chunks': len(self), 'terms': sum(index.term_count for index in self._companies.values())}
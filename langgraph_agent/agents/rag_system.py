@@ -7,20 +7,36 @@ Integrates with Graphiti memory manager for comprehensive knowledge retrieval.
 import asyncio
 import logging
 from typing import Dict, List, Optional, Any, Tuple
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, replace
 from datetime import datetime, timezone
 from enum import Enum
 from uuid import UUID, uuid4
 import hashlib
+import re
 from pathlib import Path
 from langchain_core.vectorstores import VectorStore
 from langchain_core.embeddings import Embeddings
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_community.document_loaders import PyPDFLoader, TextLoader, JSONLoader, CSVLoader
+from services.ai.embedding_pipeline import EmbeddingPipeline, EmbeddingPipelineConfig, EmbeddingPipelineError
+from services.caching.embedding_cache import EmbeddingCache, embedding_model_name, get_embedding_cache
 from ..core.constants import MODEL_CONFIG, RAG_CONFIG
 from .memory_manager import MemoryManager
+from .keyword_index import KeywordIndex, squash_score, tokenize
+from .vector_index import DEFAULT_ANN_THRESHOLD, VectorIndex
 logger = logging.getLogger(__name__)
 
+# Reciprocal rank fusion constant for hybrid retrieval
+RRF_K = 60
+
+# Content-defined chunking: past the minimum size, a paragraph whose hash is
+# divisible by this ends the chunk, so boundaries move with content, not offsets
+CHUNK_BOUNDARY_DIVISOR = 4
+# Minimum chunk body as a fraction of the body budget (chunk_size - chunk_overlap)
+MIN_CHUNK_FRACTION = 0.25
+PARAGRAPH_SEPARATOR = re.compile('\\n\\s*\\n')
+WHITESPACE = re.compile('\\s+')
+
 class DocumentType(str, Enum):
     """Supported document types for processing."""
     PDF = 'pdf'
@@ -127,10 +143,11 @@ class DocumentChunk:
     relevance_score: float = 0.0
     last_retrieved: Optional[datetime] = None
     retrieval_count: int = 0
+    content_hash: str = ''
 
     def to_dict(self) -> Dict[str, Any]:
         """Convert to dictionary for storage."""
-        return {'chunk_id': self.chunk_id, 'document_id': self.document_id, 'content': self.content, 'chunk_index': self.chunk_index, 'start_char': self.start_char, 'end_char': self.end_char, 'page_number': self.page_number, 'token_count': self.token_count, 'embedding': self.embedding, 'preceding_context': self.preceding_context, 'following_context': self.following_context, 'section_title': self.section_title, 'relevance_score': self.relevance_score, 'last_retrieved': self.last_retrieved.isoformat() if self.last_retrieved else None, 'retrieval_count': self.retrieval_count}
+        return {'chunk_id': self.chunk_id, 'document_id': self.document_id, 'content': self.content, 'chunk_index': self.chunk_index, 'start_char': self.start_char, 'end_char': self.end_char, 'page_number': self.page_number, 'token_count': self.token_count, 'embedding': self.embedding, 'preceding_context': self.preceding_context, 'following_context': self.following_context, 'section_title': self.section_title, 'relevance_score': self.relevance_score, 'last_retrieved': self.last_retrieved.isoformat() if self.last_retrieved else None, 'retrieval_count': self.retrieval_count, 'content_hash': self.content_hash}
 
 @dataclass
 class RetrievalResult:
@@ -158,17 +175,21 @@ class DocumentProcessor:
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
         self.embedding_model = embedding_model
-        self.text_splitter = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap, length_function=len, is_separator_regex=False, separators=['\n\n', '\n', ' ', '.', ',', '\u200b', '，', '、', '．', '。', ''])
+        # Only splits paragraphs longer than a chunk body; boundaries between
+        # paragraphs are content-defined (see _chunk_spans)
+        self.text_splitter = RecursiveCharacterTextSplitter(chunk_size=chunk_size - chunk_overlap, chunk_overlap=0, length_function=len, is_separator_regex=False, separators=['\n', ' ', '.', ',', '\u200b', '，', '、', '．', '。', ''])
         self.loaders = {DocumentType.PDF: PyPDFLoader, DocumentType.TXT: TextLoader, DocumentType.JSON: JSONLoader, DocumentType.CSV: CSVLoader}
         logger.info(f'DocumentProcessor initialized with chunk_size={chunk_size}')
 
-    async def process_document(self, file_path: str, document_metadata: DocumentMetadata) -> Tuple[DocumentMetadata, List[DocumentChunk]]:
+    async def process_document(self, file_path: str, document_metadata: DocumentMetadata, previous_chunks: Optional[List[DocumentChunk]]=None) -> Tuple[DocumentMetadata, List[DocumentChunk]]:
         """
         Process a document into chunks with metadata.
 
         Args:
             file_path: Path to the document file
             document_metadata: Document metadata
+            previous_chunks: Chunks of the indexed version of this document; new
+                chunks with the same content keep their chunk_id and embedding
 
         Returns:
             Tuple of updated metadata and document chunks
@@ -184,23 +205,20 @@ class DocumentProcessor:
             full_content = '\n\n'.join([doc.page_content for doc in documents])
             content_hash = hashlib.sha256(full_content.encode()).hexdigest()
             document_metadata.content_hash = content_hash
-            text_chunks = self.text_splitter.split_text(full_content)
+            spans = self._chunk_spans(full_content)
+            text_chunks = [full_content[start:end] for start, end in spans]
             chunks = []
-            char_position = 0
-            for i, chunk_text in enumerate(text_chunks):
+            for i, (chunk_text, (start_char, end_char)) in enumerate(zip(text_chunks, spans)):
                 chunk_id = f'{document_metadata.document_id}_chunk_{i:04d}'
-                start_char = full_content.find(chunk_text, char_position)
-                if start_char == -1:
-                    start_char = char_position
-                end_char = start_char + len(chunk_text)
-                char_position = end_char
                 page_number = start_char // 2000 + 1 if document_type == DocumentType.PDF else None
-                chunk = DocumentChunk(chunk_id=chunk_id, document_id=document_metadata.document_id, content=chunk_text, chunk_index=i, start_char=start_char, end_char=end_char, page_number=page_number, token_count=len(chunk_text.split()))
+                chunk = DocumentChunk(chunk_id=chunk_id, document_id=document_metadata.document_id, content=chunk_text, chunk_index=i, start_char=start_char, end_char=end_char, page_number=page_number, token_count=len(chunk_text.split()), content_hash=hashlib.sha256(chunk_text.encode()).hexdigest())
                 if i > 0:
                     chunk.preceding_context = text_chunks[i - 1][-100:]
                 if i < len(text_chunks) - 1:
                     chunk.following_context = text_chunks[i + 1][:100]
                 chunks.append(chunk)
+            if previous_chunks:
+                self._reuse_chunks(chunks, previous_chunks)
             document_metadata.chunk_count = len(chunks)
             document_metadata.processing_status = 'processed'
             document_metadata.indexed_at = datetime.now(timezone.utc)
@@ -215,6 +233,95 @@ class DocumentProcessor:
             logger.error(f'Failed to process document {document_metadata.document_id}: {e}')
             raise
 
+    def _chunk_spans(self, content: str) -> List[Tuple[int, int]]:
+        """
+        Split content into (start, end) chunk spans with content-defined boundaries.
+
+        Paragraphs are grouped into chunk bodies of at most chunk_size -
+        chunk_overlap characters, and a chunk ends after a paragraph whose hash
+        hits CHUNK_BOUNDARY_DIVISOR. An edit therefore only moves the
+        boundaries next to it, and the chunks elsewhere in the document keep
+        their exact content, so update_document can reuse their embeddings.
+        Each chunk after the first also starts with up to chunk_overlap
+        characters from the end of the previous one, cut at a word boundary.
+        """
+        body_size = self.chunk_size - self.chunk_overlap
+        min_body_size = int(body_size * MIN_CHUNK_FRACTION)
+        bodies: List[Tuple[int, int]] = []
+        start = None
+        end = 0
+        for piece_start, piece_end in self._paragraph_spans(content, body_size):
+            if start is not None and piece_end - start > body_size:
+                bodies.append((start, end))
+                start = None
+            if start is None:
+                start = piece_start
+            end = piece_end
+            piece_hash = hashlib.sha256(content[piece_start:piece_end].encode()).digest()
+            if end - start >= min_body_size and int.from_bytes(piece_hash[:4], 'big') % CHUNK_BOUNDARY_DIVISOR == 0:
+                bodies.append((start, end))
+                start = None
+        if start is not None:
+            bodies.append((start, end))
+        spans = []
+        for i, (body_start, body_end) in enumerate(bodies):
+            chunk_start = body_start
+            if i > 0 and self.chunk_overlap > 0:
+                overlap_start = max(bodies[i - 1][0], body_start - self.chunk_overlap)
+                word_break = WHITESPACE.search(content, overlap_start, body_start)
+                if overlap_start > bodies[i - 1][0] and word_break:
+                    overlap_start = word_break.end()
+                chunk_start = overlap_start
+            spans.append((chunk_start, body_end))
+        return spans
+
+    def _paragraph_spans(self, content: str, max_size: int) -> List[Tuple[int, int]]:
+        """Paragraph spans, with paragraphs longer than max_size split by the text splitter."""
+        spans = []
+        position = 0
+        for separator in [*PARAGRAPH_SEPARATOR.finditer(content), None]:
+            end = separator.start() if separator else len(content)
+            if content[position:end].strip():
+                if end - position <= max_size:
+                    spans.append((position, end))
+                else:
+                    search_from = position
+                    for piece in self.text_splitter.split_text(content[position:end]):
+                        piece_start = content.find(piece, search_from, end)
+                        if piece_start == -1:
+                            piece_start = search_from
+                        spans.append((piece_start, piece_start + len(piece)))
+                        search_from = piece_start + len(piece)
+            position = separator.end() if separator else len(content)
+        return spans
+
+    @staticmethod
+    def _reuse_chunks(chunks: List[DocumentChunk], previous_chunks: List[DocumentChunk]) -> None:
+        """
+        Carry chunk ids, embeddings and retrieval history over from unchanged chunks.
+
+        Chunks are matched by content hash in document order. Unmatched chunks get
+        ids numbered after the previous version's highest, so a new chunk never
+        takes over the id of a removed one.
+        """
+        unclaimed: Dict[str, List[DocumentChunk]] = {}
+        for previous in previous_chunks:
+            previous_hash = previous.content_hash or hashlib.sha256(previous.content.encode()).hexdigest()
+            unclaimed.setdefault(previous_hash, []).append(previous)
+        next_number = max((int(previous.chunk_id.rsplit('_', 1)[-1]) for previous in previous_chunks), default=-1) + 1
+        prefix = chunks[0].chunk_id.rsplit('_', 1)[0] if chunks else ''
+        for chunk in chunks:
+            matches = unclaimed.get(chunk.content_hash)
+            if matches:
+                previous = matches.pop(0)
+                chunk.chunk_id = previous.chunk_id
+                chunk.embedding = previous.embedding
+                chunk.last_retrieved = previous.last_retrieved
+                chunk.retrieval_count = previous.retrieval_count
+            else:
+                chunk.chunk_id = f'{prefix}_{next_number:04d}'
+                next_number += 1
+
     def _extract_keywords(self, content: str) -> List[str]:
         """Extract key terms from content (simple implementation)."""
         import re
@@ -266,7 +373,7 @@ class RAGSystem:
     - Compliance-specific ranking
     """
 
-    def __init__(self, memory_manager: MemoryManager, embeddings: Embeddings, vector_store: Optional[VectorStore]=None, enable_reranking: bool=True, cache_ttl_hours: int=24) -> None:
+    def __init__(self, memory_manager: MemoryManager, embeddings: Embeddings, vector_store: Optional[VectorStore]=None, enable_reranking: bool=True, cache_ttl_hours: int=24, ann_threshold: Optional[int]=DEFAULT_ANN_THRESHOLD, embedding_pipeline_config: Optional[EmbeddingPipelineConfig]=None, embedding_cache: Optional[EmbeddingCache]=None) -> None:
         self.memory_manager = memory_manager
         self.embeddings = embeddings
         self.vector_store = vector_store
@@ -275,9 +382,16 @@ class RAGSystem:
         self.processor = DocumentProcessor()
         self.documents: Dict[str, DocumentMetadata] = {}
         self.chunks: Dict[str, DocumentChunk] = {}
+        self.document_chunk_ids: Dict[str, List[str]] = {}
         self.query_cache: Dict[str, Tuple[RetrievalResult, datetime]] = {}
-        self.embedding_cache: Dict[str, List[float]] = {}
-        self.retrieval_stats = {'total_queries': 0, 'cache_hits': 0, 'avg_retrieval_time_ms': 0.0, 'total_documents': 0, 'total_chunks': 0}
+        self.embedding_cache = embedding_cache
+        self.embedding_model = embedding_model_name(embeddings)
+        self.vector_index = VectorIndex(ann_threshold=ann_threshold)
+        self.keyword_index = KeywordIndex()
+        self.embedding_pipeline = EmbeddingPipeline.from_langchain(embeddings, embedding_pipeline_config)
+        self.last_ingestion_stats: Optional[Dict[str, Any]] = None
+        self.last_reindex_stats: Optional[Dict[str, Any]] = None
+        self.retrieval_stats = {'total_queries': 0, 'cache_hits': 0, 'avg_retrieval_time_ms': 0.0, 'total_documents': 0, 'total_chunks': 0, 'chunks_reused': 0}
         logger.info('RAGSystem initialized with advanced retrieval capabilities')
 
     async def add_document(self, file_path: str, company_id: UUID, title: str, document_type: DocumentType, source: DocumentSource, frameworks: Optional[List[str]]=None, tags: Optional[List[str]]=None, metadata_override: Optional[Dict[str, Any]]=None) -> DocumentMetadata:
@@ -309,7 +423,9 @@ class RAGSystem:
             self.documents[document_id] = processed_metadata
             for chunk in chunks:
                 self.chunks[chunk.chunk_id] = chunk
+            self.document_chunk_ids[document_id] = [chunk.chunk_id for chunk in chunks]
             await self._generate_chunk_embeddings(chunks)
+            self._index_chunks(processed_metadata.company_id, chunks)
             await self._store_document_in_memory(processed_metadata, chunks)
             self.retrieval_stats['total_documents'] += 1
             self.retrieval_stats['total_chunks'] += len(chunks)
@@ -319,6 +435,64 @@ class RAGSystem:
             logger.error(f'Failed to add document: {e}')
             raise
 
+    async def update_document(self, document_id: str, file_path: str, company_id: UUID, metadata_override: Optional[Dict[str, Any]]=None) -> DocumentMetadata:
+        """
+        Re-index a changed version of a document incrementally.
+
+        The new version is chunked and diffed against the stored chunks by content
+        hash: unchanged chunks keep their ids and embeddings, only new or changed
+        chunks are embedded and indexed, and chunks that disappeared are removed
+        from the vector and keyword indexes.
+
+        Args:
+            document_id: ID of the indexed document
+            file_path: Path to the new version of the document
+            company_id: Company UUID for access control
+            metadata_override: Optional metadata overrides
+
+        Returns:
+            Document metadata after processing; chunk counts of the diff are in
+            last_reindex_stats
+        """
+        existing = self.documents.get(document_id)
+        if existing is None or existing.company_id != company_id:
+            raise KeyError(f'Document not found: {document_id}')
+        try:
+            metadata = replace(existing, file_size_bytes=Path(file_path).stat().st_size, updated_at=datetime.now(timezone.utc))
+            if metadata_override:
+                for key, value in metadata_override.items():
+                    if hasattr(metadata, key):
+                        setattr(metadata, key, value)
+            previous_ids = self.document_chunk_ids.get(document_id, [])
+            previous_chunks = [self.chunks[chunk_id] for chunk_id in previous_ids]
+            processed_metadata, chunks = await self.processor.process_document(file_path, metadata, previous_chunks=previous_chunks)
+            current_ids = {chunk.chunk_id for chunk in chunks}
+            removed_ids = [chunk_id for chunk_id in previous_ids if chunk_id not in current_ids]
+            reused_ids = current_ids.intersection(previous_ids)
+            # Reused chunks whose earlier embedding failed are retried as well
+            pending = [chunk for chunk in chunks if chunk.chunk_id not in reused_ids or not chunk.embedding]
+            for chunk_id in removed_ids:
+                del self.chunks[chunk_id]
+            self.vector_index.remove(company_id, removed_ids)
+            self.keyword_index.remove(company_id, removed_ids)
+            for chunk in chunks:
+                self.chunks[chunk.chunk_id] = chunk
+            self.document_chunk_ids[document_id] = [chunk.chunk_id for chunk in chunks]
+            self.documents[document_id] = processed_metadata
+            await self._generate_chunk_embeddings(pending)
+            self._index_chunks(company_id, pending)
+            self.query_cache.clear()
+            if pending or removed_ids:
+                await self._store_document_in_memory(processed_metadata, chunks)
+            self.retrieval_stats['total_chunks'] += len(chunks) - len(previous_ids)
+            self.retrieval_stats['chunks_reused'] += len(reused_ids)
+            self.last_reindex_stats = {'document_id': document_id, 'chunks_total': len(chunks), 'chunks_reused': len(reused_ids), 'chunks_added': len(current_ids) - len(reused_ids), 'chunks_removed': len(removed_ids), 'chunks_embedded': len(pending)}
+            logger.info(f'Re-indexed document {document_id}: {len(reused_ids)}/{len(chunks)} chunks reused, {len(removed_ids)} removed')
+            return processed_metadata
+        except (OSError, KeyError, IndexError) as e:
+            logger.error(f'Failed to update document {document_id}: {e}')
+            raise
+
     async def retrieve_relevant_docs(self, query: str, company_id: UUID, k: int=6, strategy: RetrievalStrategy=RetrievalStrategy.HYBRID, frameworks_filter: Optional[List[str]]=None, source_filter: Optional[List[DocumentSource]]=None, min_relevance_score: float=0.0) -> RetrievalResult:
         """
         Retrieve relevant documents based on query.
@@ -360,7 +534,7 @@ class RAGSystem:
             relevant_chunks = [chunk for chunk in filtered_chunks if chunk.relevance_score >= min_relevance_score]
             if self.enable_reranking and len(relevant_chunks) > k:
                 rerank_start = datetime.now(timezone.utc)
-                relevant_chunks = await self._rerank_chunks(query, relevant_chunks)
+                relevant_chunks = await self._rerank_chunks(query, relevant_chunks, company_id)
                 rerank_time = int((datetime.now(timezone.utc) - rerank_start).total_seconds() * 1000)
             else:
                 rerank_time = None
@@ -385,34 +559,27 @@ class RAGSystem:
         """Perform semantic similarity search."""
         try:
             query_embedding = await self._get_embedding(query)
-            company_chunks = [chunk for chunk in self.chunks.values() if self.documents[chunk.document_id].company_id == company_id and chunk.embedding]
-            similarities = []
-            for chunk in company_chunks:
-                similarity = self._cosine_similarity(query_embedding, chunk.embedding)
+            results = []
+            for chunk_id, similarity in self.vector_index.search(company_id, query_embedding, k):
+                chunk = self.chunks[chunk_id]
                 chunk.relevance_score = similarity
-                similarities.append((chunk, similarity))
-            similarities.sort(key=lambda x: x[1], reverse=True)
-            return [chunk for chunk, _ in similarities[:k]]
+                results.append(chunk)
+            return results
         except (Exception, KeyError, IndexError) as e:
             logger.error(f'Semantic retrieval failed: {e}')
             return []
 
     async def _keyword_retrieval(self, query: str, company_id: UUID, k: int) -> List[DocumentChunk]:
-        """Perform keyword-based search."""
+        """Perform BM25 keyword search over the company's inverted index."""
         try:
-            query_terms = set(query.lower().split())
-            company_chunks = [chunk for chunk in self.chunks.values() if self.documents[chunk.document_id].company_id == company_id]
-            scored_chunks = []
-            for chunk in company_chunks:
-                content_terms = set(chunk.content.lower().split())
-                matches = len(query_terms.intersection(content_terms))
-                if matches > 0:
-                    tf_score = matches / len(query_terms)
-                    idf_boost = 1.0 + matches / len(content_terms)
-                    chunk.relevance_score = tf_score * idf_boost
-                    scored_chunks.append(chunk)
-            scored_chunks.sort(key=lambda x: x.relevance_score, reverse=True)
-            return scored_chunks[:k]
+            results = []
+            for chunk_id, score in self.keyword_index.search(company_id, query, k):
+                chunk = self.chunks.get(chunk_id)
+                if chunk is None:
+                    continue
+                chunk.relevance_score = squash_score(score)
+                results.append(chunk)
+            return results
         except (Exception, KeyError, IndexError) as e:
             logger.error(f'Keyword retrieval failed: {e}')
             return []
@@ -439,17 +606,21 @@ class RAGSystem:
             return await self._semantic_retrieval(query, company_id, k)
 
     def _merge_results(self, semantic_chunks: List[DocumentChunk], keyword_chunks: List[DocumentChunk]) -> List[DocumentChunk]:
-        """Merge semantic and keyword search results."""
-        merged = {}
-        for chunk in semantic_chunks:
-            merged[chunk.chunk_id] = chunk
-            chunk.relevance_score = chunk.relevance_score * 0.7
-        for chunk in keyword_chunks:
-            if chunk.chunk_id in merged:
-                merged[chunk.chunk_id].relevance_score += chunk.relevance_score * 0.3
-            else:
-                chunk.relevance_score = chunk.relevance_score * 0.3
+        """
+        Merge semantic and keyword search results with reciprocal rank fusion.
+
+        Each list contributes 1 / (RRF_K + rank) per chunk; scores are scaled
+        so a chunk ranked first in both lists scores 1.0.
+        """
+        merged: Dict[str, DocumentChunk] = {}
+        fused: Dict[str, float] = {}
+        for ranked in (semantic_chunks, keyword_chunks):
+            for rank, chunk in enumerate(ranked, start=1):
                 merged[chunk.chunk_id] = chunk
+                fused[chunk.chunk_id] = fused.get(chunk.chunk_id, 0.0) + 1.0 / (RRF_K + rank)
+        max_score = 2.0 / (RRF_K + 1)
+        for chunk_id, chunk in merged.items():
+            chunk.relevance_score = fused[chunk_id] / max_score
         result = list(merged.values())
         result.sort(key=lambda x: x.relevance_score, reverse=True)
         return result
@@ -469,44 +640,57 @@ class RAGSystem:
             filtered.append(chunk)
         return filtered
 
-    async def _rerank_chunks(self, query: str, chunks: List[DocumentChunk]) -> List[DocumentChunk]:
-        """Rerank chunks for better relevance."""
-        query_terms = set(query.lower().split())
+    async def _rerank_chunks(self, query: str, chunks: List[DocumentChunk], company_id: UUID) -> List[DocumentChunk]:
+        """Rerank chunks using BM25 and term positions from the keyword index."""
+        index = self.keyword_index.get_company_index(company_id)
+        if index is None:
+            return chunks
+        query_terms = tokenize(query)
+        bm25_scores = index.score(query_terms, (chunk.chunk_id for chunk in chunks))
         for chunk in chunks:
-            content_lower = chunk.content.lower()
-            position_scores = []
-            for term in query_terms:
-                pos = content_lower.find(term)
-                if pos != -1:
-                    position_score = 1.0 - pos / len(content_lower)
-                    position_scores.append(position_score)
-            term_frequency = sum((content_lower.count(term) for term in query_terms))
-            frequency_score = term_frequency / len(chunk.content.split())
-            position_bonus = sum(position_scores) / len(position_scores) if position_scores else 0
+            positions = index.first_positions(query_terms, chunk.chunk_id)
+            position_bonus = sum((1.0 - position for position in positions)) / len(positions) if positions else 0
+            frequency_score = squash_score(bm25_scores.get(chunk.chunk_id, 0.0))
             rerank_score = chunk.relevance_score * 0.7 + position_bonus * 0.2 + frequency_score * 0.1
             chunk.relevance_score = rerank_score
         chunks.sort(key=lambda x: x.relevance_score, reverse=True)
         return chunks
 
     async def _generate_chunk_embeddings(self, chunks: List[DocumentChunk]) -> None:
-        """Generate embeddings for document chunks."""
+        """Generate embeddings for document chunks in batches, reusing cached ones."""
         try:
-            for chunk in chunks:
-                if not chunk.embedding:
-                    chunk.embedding = await self._get_embedding(chunk.content)
+            pending = [chunk for chunk in chunks if not chunk.embedding]
+            if pending:
+                cache = await self._get_embedding_cache()
+                embeddings = await cache.get_or_embed(self.embedding_model, [chunk.content for chunk in pending], self._embed_uncached)
+                for chunk, embedding in zip(pending, embeddings):
+                    chunk.embedding = embedding
             logger.info(f'Generated embeddings for {len(chunks)} chunks')
-        except (ValueError, TypeError) as e:
+        except (ValueError, TypeError, EmbeddingPipelineError) as e:
             logger.error(f'Failed to generate embeddings: {e}')
 
+    async def _embed_uncached(self, texts: List[str]) -> List[List[float]]:
+        """Embed cache misses through the batched pipeline."""
+        result = await self.embedding_pipeline.run(texts, text_of=lambda text: text)
+        self.last_ingestion_stats = result.stats.to_dict()
+        return result.embeddings
+
     async def _get_embedding(self, text: str) -> List[float]:
         """Get embedding for text with caching."""
-        # Use SHA-256 instead of MD5 for security compliance, truncated for cache key compatibility
-        text_hash = hashlib.sha256(text.encode()).hexdigest()[:16]
-        if text_hash in self.embedding_cache:
-            return self.embedding_cache[text_hash]
-        embedding = await asyncio.to_thread(self.embeddings.embed_query, text)
-        self.embedding_cache[text_hash] = embedding
-        return embedding
+        cache = await self._get_embedding_cache()
+        return await cache.get_or_embed_one(self.embedding_model, text, lambda query: asyncio.to_thread(self.embeddings.embed_query, query))
+
+    async def _get_embedding_cache(self) -> EmbeddingCache:
+        if self.embedding_cache is None:
+            self.embedding_cache = await get_embedding_cache()
+        return self.embedding_cache
+
+    def _index_chunks(self, company_id: UUID, chunks: List[DocumentChunk]) -> None:
+        """Add chunks to the company's keyword index and, once embedded, its vector index."""
+        self.keyword_index.add(company_id, ((chunk.chunk_id, chunk.content) for chunk in chunks))
+        embedded = [chunk for chunk in chunks if chunk.embedding]
+        if embedded:
+            self.vector_index.add(company_id, [chunk.chunk_id for chunk in embedded], [chunk.embedding for chunk in embedded])
 
     def _cosine_similarity(self, a: List[float], b: List[float]) -> float:
         """Calculate cosine similarity between two vectors."""
@@ -538,7 +722,7 @@ class RAGSystem:
 
     async def get_document_chunks(self, document_id: str) -> List[DocumentChunk]:
         """Get all chunks for a document."""
-        return [chunk for chunk in self.chunks.values() if chunk.document_id == document_id]
+        return [self.chunks[chunk_id] for chunk_id in self.document_chunk_ids.get(document_id, [])]
 
     async def delete_document(self, document_id: str, company_id: UUID) -> bool:
         """Delete a document and all its chunks."""
@@ -548,9 +732,12 @@ class RAGSystem:
             doc_metadata = self.documents[document_id]
             if doc_metadata.company_id != company_id:
                 return False
-            chunks_to_remove = [chunk_id for chunk_id, chunk in self.chunks.items() if chunk.document_id == document_id]
+            chunks_to_remove = self.document_chunk_ids.pop(document_id, [])
             for chunk_id in chunks_to_remove:
                 del self.chunks[chunk_id]
+            self.vector_index.remove(company_id, chunks_to_remove)
+            self.keyword_index.remove(company_id, chunks_to_remove)
+            self.query_cache.clear()
             del self.documents[document_id]
             self.retrieval_stats['total_documents'] -= 1
             self.retrieval_stats['total_chunks'] -= len(chunks_to_remove)
@@ -573,7 +760,7 @@ class RAGSystem:
             except (KeyError, IndexError):
                 health['components']['embeddings'] = 'failed'
                 health['status'] = 'degraded'
-            health['cache_stats'] = {'query_cache_size': len(self.query_cache), 'embedding_cache_size': len(self.embedding_cache)}
+            health['cache_stats'] = {'query_cache_size': len(self.query_cache), 'embedding_cache': self.embedding_cache.get_stats() if self.embedding_cache else None}
         except (Exception, KeyError, IndexError) as e:
             health['status'] = 'degraded'
             health['error'] = str(e)
@@ -581,7 +768,7 @@ class RAGSystem:
 
     async def get_system_stats(self) -> Dict[str, Any]:
         """Get comprehensive system statistics."""
-        return {'documents': {'total': len(self.documents), 'by_type': self._get_documents_by_type(), 'by_source': self._get_documents_by_source(), 'total_size_bytes': sum((doc.file_size_bytes for doc in self.documents.values()))}, 'chunks': {'total': len(self.chunks), 'avg_size_chars': sum((len(chunk.content) for chunk in self.chunks.values())) / len(self.chunks) if self.chunks else 0, 'total_tokens': sum((chunk.token_count for chunk in self.chunks.values()))}, 'retrieval': self.retrieval_stats.copy(), 'cache': {'query_cache_size': len(self.query_cache), 'embedding_cache_size': len(self.embedding_cache), 'cache_hit_rate': self.retrieval_stats['cache_hits'] / max(self.retrieval_stats['total_queries'], 1)}}
+        return {'documents': {'total': len(self.documents), 'by_type': self._get_documents_by_type(), 'by_source': self._get_documents_by_source(), 'total_size_bytes': sum((doc.file_size_bytes for doc in self.documents.values()))}, 'chunks': {'total': len(self.chunks), 'avg_size_chars': sum((len(chunk.content) for chunk in self.chunks.values())) / len(self.chunks) if self.chunks else 0, 'total_tokens': sum((chunk.token_count for chunk in self.chunks.values()))}, 'retrieval': self.retrieval_stats.copy(), 'cache': {'query_cache_size': len(self.query_cache), 'embedding_cache': self.embedding_cache.get_stats() if self.embedding_cache else None, 'cache_hit_rate': self.retrieval_stats['cache_hits'] / max(self.retrieval_stats['total_queries'], 1)}, 'vector_index': self.vector_index.get_stats(), 'keyword_index': self.keyword_index.get_stats(), 'last_ingestion': self.last_ingestion_stats, 'last_reindex': self.last_reindex_stats}
 
     def _get_documents_by_type(self) -> Dict[str, int]:
         """Get document count by type."""
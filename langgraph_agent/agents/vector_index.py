@@ -0,0 +1,256 @@
+"""
+Per-company vector index for RAGSystem semantic retrieval.
+
+Each company's chunk embeddings live in one contiguous float32 NumPy matrix
+with L2-normalized rows, so cosine similarity against a query is a single
+matrix-vector product and top-k selection is an argpartition over the
+scores. Rows are added and removed incrementally as documents come and go.
+
+Above a size threshold, and when hnswlib is installed, a company's index is
+additionally served by an HNSW graph for approximate search; the flat matrix
+stays the source of truth and is used to (re)build the graph.
+"""
+
+import logging
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+from uuid import UUID
+
+import numpy as np
+
+try:
+    import hnswlib
+except ImportError:  # pragma: no cover - optional dependency
+    hnswlib = None
+
+logger = logging.getLogger(__name__)
+
+# Flat index growth
+INITIAL_CAPACITY = 256
+
+# Approximate (HNSW) backend
+DEFAULT_ANN_THRESHOLD = 50_000  # Rows before a company switches to HNSW
+HNSW_M = 16
+HNSW_EF_CONSTRUCTION = 200
+HNSW_EF_SEARCH = 64
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    """L2-normalize rows; zero vectors stay zero (similarity 0)."""
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+class CompanyVectorIndex:
+    """Vector index over one company's chunks."""
+
+    def __init__(self, dimension: int, ann_threshold: Optional[int] = DEFAULT_ANN_THRESHOLD) -> None:
+        self.dimension = dimension
+        self.ann_threshold = ann_threshold
+        self._matrix = np.zeros((INITIAL_CAPACITY, dimension), dtype=np.float32)
+        self._ids: List[str] = []
+        self._rows: Dict[str, int] = {}
+
+        # HNSW labels are stable integers; flat rows move on delete
+        self._ann = None
+        self._labels: Dict[str, int] = {}
+        self._label_ids: Dict[int, str] = {}
+        self._next_label = 0
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __contains__(self, chunk_id: str) -> bool:
+        return chunk_id in self._rows
+
+    @property
+    def uses_ann(self) -> bool:
+        """Whether searches are served by the HNSW graph."""
+        return self._ann is not None
+
+    def add(self, chunk_ids: Sequence[str], embeddings: Sequence[Sequence[float]]) -> None:
+        """
+        Add or replace embeddings for chunks.
+
+        Args:
+            chunk_ids: Chunk identifiers
+            embeddings: One embedding per chunk id
+        """
+        if not chunk_ids:
+            return
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        if vectors.ndim != 2 or vectors.shape[1] != self.dimension:
+            raise ValueError(f'Expected embeddings of dimension {self.dimension}, got shape {vectors.shape}')
+        vectors = _normalize(vectors)
+
+        replaced = [chunk_id for chunk_id in chunk_ids if chunk_id in self._rows]
+        if replaced:
+            self.remove(replaced)
+
+        start = len(self._ids)
+        self._reserve(start + len(chunk_ids))
+        self._matrix[start:start + len(chunk_ids)] = vectors
+        for offset, chunk_id in enumerate(chunk_ids):
+            self._rows[chunk_id] = start + offset
+            self._ids.append(chunk_id)
+
+        if self._ann is not None:
+            self._ann_add(chunk_ids, vectors)
+        elif self._should_use_ann():
+            self._build_ann()
+
+    def remove(self, chunk_ids: Iterable[str]) -> int:
+        """
+        Remove chunks from the index.
+
+        Each removal moves the last row into the freed slot, so the matrix
+        stays contiguous without shifting every row.
+
+        Returns:
+            Number of chunks removed
+        """
+        removed = 0
+        for chunk_id in chunk_ids:
+            row = self._rows.pop(chunk_id, None)
+            if row is None:
+                continue
+            last = len(self._ids) - 1
+            if row != last:
+                moved_id = self._ids[last]
+                self._matrix[row] = self._matrix[last]
+                self._ids[row] = moved_id
+                self._rows[moved_id] = row
+            self._ids.pop()
+            removed += 1
+
+            if self._ann is not None:
+                label = self._labels.pop(chunk_id)
+                del self._label_ids[label]
+                self._ann.mark_deleted(label)
+
+        if self._ann is not None and self.ann_threshold and len(self._ids) < self.ann_threshold // 2:
+            self._drop_ann()
+        return removed
+
+    def search(self, query: np.ndarray, k: int) -> List[Tuple[str, float]]:
+        """
+        Find the k chunks most similar to a normalized query vector.
+
+        Returns:
+            (chunk_id, cosine similarity) pairs, most similar first
+        """
+        size = len(self._ids)
+        k = min(k, size)
+        if k <= 0:
+            return []
+
+        if self._ann is not None:
+            self._ann.set_ef(max(HNSW_EF_SEARCH, k))
+            try:
+                labels, distances = self._ann.knn_query(query, k=k)
+                # Inner-product distance is 1 - similarity
+                return [(self._label_ids[int(label)], float(1.0 - distance)) for label, distance in zip(labels[0], distances[0])]
+            except RuntimeError as e:
+                # Heavily deleted graphs can fail to yield k results
+                logger.warning(f'HNSW search failed, using flat index: {e}')
+
+        scores = self._matrix[:size] @ query
+        if k < size:
+            top = np.argpartition(scores, -k)[-k:]
+        else:
+            top = np.arange(size)
+        top = top[np.argsort(scores[top])[::-1]]
+        return [(self._ids[row], float(scores[row])) for row in top]
+
+    def _reserve(self, rows: int) -> None:
+        capacity = self._matrix.shape[0]
+        if rows <= capacity:
+            return
+        while capacity < rows:
+            capacity *= 2
+        matrix = np.zeros((capacity, self.dimension), dtype=np.float32)
+        matrix[:len(self._ids)] = self._matrix[:len(self._ids)]
+        self._matrix = matrix
+
+    def _should_use_ann(self) -> bool:
+        return hnswlib is not None and bool(self.ann_threshold) and len(self._ids) >= self.ann_threshold
+
+    def _build_ann(self) -> None:
+        size = len(self._ids)
+        self._ann = hnswlib.Index(space='ip', dim=self.dimension)
+        self._ann.init_index(max_elements=max(size * 2, INITIAL_CAPACITY), ef_construction=HNSW_EF_CONSTRUCTION, M=HNSW_M, allow_replace_deleted=True)
+        self._labels.clear()
+        self._label_ids.clear()
+        self._next_label = 0
+        self._ann_add(self._ids, self._matrix[:size])
+        logger.info(f'Built HNSW index over {size} chunks')
+
+    def _ann_add(self, chunk_ids: Sequence[str], vectors: np.ndarray) -> None:
+        needed = self._ann.get_current_count() + len(chunk_ids)
+        if needed > self._ann.get_max_elements():
+            self._ann.resize_index(needed * 2)
+        labels = np.arange(self._next_label, self._next_label + len(chunk_ids))
+        self._next_label += len(chunk_ids)
+        for label, chunk_id in zip(labels, chunk_ids):
+            self._labels[chunk_id] = int(label)
+            self._label_ids[int(label)] = chunk_id
+        self._ann.add_items(vectors, labels, replace_deleted=True)
+
+    def _drop_ann(self) -> None:
+        self._ann = None
+        self._labels.clear()
+        self._label_ids.clear()
+        logger.info(f'Dropped HNSW index; {len(self._ids)} chunks served by the flat index')
+
+
+class VectorIndex:
+    """Per-company vector indexes keyed by company id."""
+
+    def __init__(self, ann_threshold: Optional[int] = DEFAULT_ANN_THRESHOLD) -> None:
+        self.ann_threshold = ann_threshold
+        self._companies: Dict[UUID, CompanyVectorIndex] = {}
+
+    def __len__(self) -> int:
+        return sum(len(index) for index in self._companies.values())
+
+    def add(self, company_id: UUID, chunk_ids: Sequence[str], embeddings: Sequence[Sequence[float]]) -> None:
+        """Add or replace chunk embeddings for a company."""
+        if not chunk_ids:
+            return
+        index = self._companies.get(company_id)
+        if index is None:
+            index = CompanyVectorIndex(len(embeddings[0]), self.ann_threshold)
+            self._companies[company_id] = index
+        index.add(chunk_ids, embeddings)
+
+    def remove(self, company_id: UUID, chunk_ids: Iterable[str]) -> int:
+        """Remove chunks from a company's index."""
+        index = self._companies.get(company_id)
+        if index is None:
+            return 0
+        removed = index.remove(chunk_ids)
+        if not len(index):
+            del self._companies[company_id]
+        return removed
+
+    def search(self, company_id: UUID, query_embedding: Sequence[float], k: int) -> List[Tuple[str, float]]:
+        """
+        Find a company's k chunks most similar to the query embedding.
+
+        Returns:
+            (chunk_id, cosine similarity) pairs, most similar first
+        """
+        index = self._companies.get(company_id)
+        if index is None:
+            return []
+        query = np.asarray(query_embedding, dtype=np.float32)
+        if query.shape != (index.dimension,):
+            raise ValueError(f'Expected query of dimension {index.dimension}, got shape {query.shape}')
+        norm = np.linalg.norm(query)
+        if norm == 0:
+            return []
+        return index.search(query / norm, k)
+
+    def get_stats(self) -> Dict[str, int]:
+        """Get index statistics."""
+        return {'companies': len(self._companies), 'chunks': len(self), 'ann_companies': sum(1 for index in self._companies.values() if index.uses_ann)}
@@ -1 +0,0 @@
-../../services/neo4j_service.py
\ No newline at end of file
@@ -0,0 +1,24 @@
+"""
+Neo4j GraphRAG service for the LangGraph agent.
+
+Re-exports services.neo4j_service so the agent and the API share one
+implementation, one async driver pool and one global service instance.
+"""
+
+from services.neo4j_service import (
+    REGULATION_FULLTEXT_INDEX,
+    REQUIREMENT_FULLTEXT_INDEX,
+    Neo4jGraphRAGService,
+    get_neo4j_service,
+    initialize_neo4j_service,
+    query_fingerprint,
+)
+
+__all__ = [
+    "REGULATION_FULLTEXT_INDEX",
+    "REQUIREMENT_FULLTEXT_INDEX",
+    "Neo4jGraphRAGService",
+    "get_neo4j_service",
+    "initialize_neo4j_service",
+    "query_fingerprint",
+]
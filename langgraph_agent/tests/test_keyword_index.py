@@ -0,0 +1,139 @@
+"""
+Tests for the per-company BM25 keyword index used by RAGSystem.
+"""
+
+import math
+from uuid import uuid4
+
+import pytest
+
+from langgraph_agent.agents.keyword_index import (
+    BM25_B,
+    BM25_K1,
+    CompanyKeywordIndex,
+    KeywordIndex,
+    squash_score,
+    tokenize,
+)
+
+
+class TestTokenize:
+    """Test query and content tokenization."""
+
+    def test_lowercases_and_strips_punctuation(self):
+        assert tokenize("GDPR Article 32: security, of processing.") == ["gdpr", "article", "32", "security", "of", "processing"]
+
+
+class TestCompanyKeywordIndex:
+    """Test BM25 scoring and incremental maintenance."""
+
+    def test_bm25_score_matches_formula(self):
+        index = CompanyKeywordIndex()
+        index.add("a", "encryption at rest")
+        index.add("b", "access control policy")
+
+        idf = math.log(1.0 + (2 - 1 + 0.5) / (1 + 0.5))
+        expected = idf * (BM25_K1 + 1.0) / (1 + BM25_K1 * (1.0 - BM25_B + BM25_B * 3 / 3))
+        assert index.score(["encryption"]) == {"a": pytest.approx(expected)}
+
+    def test_rare_terms_outrank_common_ones(self):
+        index = CompanyKeywordIndex()
+        index.add("common", "data data data processing")
+        index.add("rare", "data breach notification")
+        index.add("other", "data retention schedule")
+
+        results = index.search(tokenize("data breach"), k=3)
+
+        assert results[0][0] == "rare"
+        assert len(results) == 3
+
+    def test_remove_updates_frequencies(self):
+        index = CompanyKeywordIndex()
+        index.add("a", "breach")
+        index.add("b", "breach notification")
+
+        assert index.remove(["a", "missing"]) == 1
+        assert "a" not in index
+        assert index.idf("breach") == pytest.approx(math.log(1.0 + 0.5 / 1.5))
+        assert index.avg_length == 2
+        assert [chunk_id for chunk_id, _ in index.search(["breach"], 5)] == ["b"]
+
+    def test_readding_chunk_replaces_postings(self):
+        index = CompanyKeywordIndex()
+        index.add("a", "old text")
+        index.add("a", "new text")
+
+        assert len(index) == 1
+        assert index.score(["old"]) == {}
+        assert index.term_count == 2
+
+    def test_first_positions(self):
+        index = CompanyKeywordIndex()
+        index.add("a", "risk assessment and risk treatment")
+
+        assert sorted(index.first_positions(["treatment", "risk", "absent"], "a")) == [0.0, 0.8]
+
+    def test_score_restricted_to_chunk_ids(self):
+        index = CompanyKeywordIndex()
+        index.add("a", "audit log")
+        index.add("b", "audit trail")
+
+        assert set(index.score(["audit"], ["b"])) == {"b"}
+
+
+class TestKeywordIndex:
+    """Test partitioning and persistence."""
+
+    def test_search_is_scoped_to_company(self):
+        company_a, company_b = uuid4(), uuid4()
+        index = KeywordIndex()
+        index.add(company_a, [("a1", "incident response plan")])
+        index.add(company_b, [("b1", "incident response plan")])
+
+        assert [chunk_id for chunk_id, _ in index.search(company_a, "incident", 5)] == ["a1"]
+        assert index.search(uuid4(), "incident", 5) == []
+
+    def test_save_and_load_round_trip(self, tmp_path):
+        company_id = uuid4()
+        index = KeywordIndex()
+        index.add(company_id, [("a", "vendor risk review"), ("b", "vendor onboarding")])
+        path = tmp_path / "keyword_index.json"
+
+        index.save(path)
+        loaded = KeywordIndex.load(path)
+
+        assert loaded.search(company_id, "vendor risk", 2) == index.search(company_id, "vendor risk", 2)
+        assert loaded.get_stats() == index.get_stats()
+
+    def test_remove_after_load(self, tmp_path):
+        company_id = uuid4()
+        index = KeywordIndex()
+        index.add(company_id, [("a", "vendor risk review"), ("b", "vendor onboarding")])
+        path = tmp_path / "keyword_index.json"
+        index.save(path)
+
+        loaded = KeywordIndex.load(path)
+        loaded.remove(company_id, ["a"])
+
+        assert loaded.get_stats() == {"companies": 1, "chunks": 1, "terms": 2}
+        assert loaded.search(company_id, "risk", 5) == []
+
+    def test_load_rejects_unknown_version(self, tmp_path):
+        path = tmp_path / "keyword_index.json"
+        path.write_text('{"version": 999, "companies": {}}')
+
+        with pytest.raises(ValueError):
+            KeywordIndex.load(path)
+
+    def test_empty_company_is_dropped(self):
+        company_id = uuid4()
+        index = KeywordIndex()
+        index.add(company_id, [("a", "policy")])
+
+        index.remove(company_id, ["a"])
+        assert index.get_stats() == {"companies": 0, "chunks": 0, "terms": 0}
+
+
+def test_squash_score_is_monotonic_and_bounded():
+    assert squash_score(0.0) == 0.0
+    assert squash_score(1.0) < squash_score(5.0) < 1.0
@@ -0,0 +1,142 @@
+"""
+Tests for incremental, content-hash based re-indexing in RAGSystem.
+"""
+
+from unittest.mock import AsyncMock, MagicMock
+from uuid import uuid4
+
+import pytest
+
+pytest.importorskip("langchain_community")
+pytest.importorskip("graphiti_core")
+
+from langchain_core.embeddings import Embeddings
+
+from langgraph_agent.agents.rag_system import DocumentProcessor, DocumentSource, DocumentType, RAGSystem
+from services.caching.embedding_cache import EmbeddingCache
+
+PARAGRAPHS = [
+    f"Section {i}. The controller shall document processing activity {i}, record its lawful basis "
+    f"and retention period, and review the record at least annually or when the activity changes."
+    for i in range(60)
+]
+EDIT = "Section 30. Breach notifications go to the regulator within 72 hours of the controller becoming aware."
+
+
+class CountingEmbeddings(Embeddings):
+    """Deterministic embeddings that record every text sent for embedding."""
+
+    def __init__(self):
+        self.embedded = []
+
+    def embed_documents(self, texts):
+        self.embedded.extend(texts)
+        return [self._vector(text) for text in texts]
+
+    def embed_query(self, text):
+        return self._vector(text)
+
+    @staticmethod
+    def _vector(text):
+        return [float(len(text)), float(sum(map(ord, text)) % 97), 1.0]
+
+
+@pytest.fixture
+def rag():
+    memory_manager = MagicMock()
+    memory_manager.store_conversation = AsyncMock()
+    # A zero-byte L1 budget disables the embedding cache, so reuse comes from the diff alone
+    # Production chunk size and overlap
+    return RAGSystem(memory_manager, CountingEmbeddings(), embedding_cache=EmbeddingCache(max_memory_bytes=0))
+
+
+def write_document(path, paragraphs):
+    path.write_text("\n\n".join(paragraphs))
+    return str(path)
+
+
+def test_chunks_cover_document_within_size_limits():
+    processor = DocumentProcessor()
+    content = "\n\n".join(PARAGRAPHS)
+
+    spans = processor._chunk_spans(content)
+
+    assert len(spans) > 5
+    assert all(end - start <= processor.chunk_size for start, end in spans)
+    assert spans[0][0] == 0 and spans[-1][1] == len(content)
+    # Consecutive chunks overlap, so no text falls between them
+    assert all(next_start <= end for (_start, end), (next_start, _end) in zip(spans, spans[1:]))
+
+
+@pytest.mark.asyncio
+async def test_update_embeds_only_chunks_near_the_edit(rag, tmp_path):
+    company_id = uuid4()
+    path = tmp_path / "policy.txt"
+    metadata = await rag.add_document(write_document(path, PARAGRAPHS), company_id, "Policy", DocumentType.TXT, DocumentSource.POLICY)
+    original = {chunk.content: chunk.chunk_id for chunk in await rag.get_document_chunks(metadata.document_id)}
+    rag.embeddings.embedded.clear()
+
+    edited = PARAGRAPHS[:30] + [EDIT] + PARAGRAPHS[31:]
+    await rag.update_document(metadata.document_id, write_document(path, edited), company_id)
+
+    stats = rag.last_reindex_stats
+    chunks = await rag.get_document_chunks(metadata.document_id)
+    assert stats["chunks_total"] > 5
+    assert 1 <= stats["chunks_embedded"] <= 2
+    assert stats["chunks_reused"] == stats["chunks_total"] - stats["chunks_embedded"]
+    assert any(EDIT in text for text in rag.embeddings.embedded)
+    assert all(original.get(chunk.content, chunk.chunk_id) == chunk.chunk_id for chunk in chunks)
+    assert len(rag.keyword_index) == len(rag.vector_index) == len(rag.chunks) == len(chunks)
+    edited_chunk = next(chunk for chunk in chunks if EDIT in chunk.content)
+    assert rag.keyword_index.search(company_id, "breach regulator", 1)[0][0] == edited_chunk.chunk_id
+    assert rag.retrieval_stats["total_chunks"] == len(chunks)
+
+
+@pytest.mark.asyncio
+async def test_inserted_opening_section_keeps_later_chunks(rag, tmp_path):
+    company_id = uuid4()
+    path = tmp_path / "policy.txt"
+    metadata = await rag.add_document(write_document(path, PARAGRAPHS), company_id, "Policy", DocumentType.TXT, DocumentSource.POLICY)
+    rag.embeddings.embedded.clear()
+
+    await rag.update_document(metadata.document_id, write_document(path, [EDIT] + PARAGRAPHS), company_id)
+
+    stats = rag.last_reindex_stats
+    assert stats["chunks_embedded"] <= 2
+    assert stats["chunks_reused"] >= stats["chunks_total"] - 2
+
+
+@pytest.mark.asyncio
+async def test_unchanged_document_reuses_every_chunk(rag, tmp_path):
+    company_id = uuid4()
+    file_path = write_document(tmp_path / "policy.txt", PARAGRAPHS)
+    metadata = await rag.add_document(file_path, company_id, "Policy", DocumentType.TXT, DocumentSource.POLICY)
+    rag.embeddings.embedded.clear()
+
+    await rag.update_document(metadata.document_id, file_path, company_id)
+
+    assert rag.embeddings.embedded == []
+    assert rag.last_reindex_stats["chunks_reused"] == rag.last_reindex_stats["chunks_total"]
+    assert rag.last_reindex_stats["chunks_embedded"] == 0
+
+
+@pytest.mark.asyncio
+async def test_delete_after_update_clears_indexes(rag, tmp_path):
+    company_id = uuid4()
+    path = tmp_path / "policy.txt"
+    metadata = await rag.add_document(write_document(path, PARAGRAPHS), company_id, "Policy", DocumentType.TXT, DocumentSource.POLICY)
+    await rag.update_document(metadata.document_id, write_document(path, ["New opening section."] + PARAGRAPHS), company_id)
+
+    assert await rag.delete_document(metadata.document_id, company_id)
+    assert rag.chunks == {}
+    assert len(rag.vector_index) == len(rag.keyword_index) == 0
+    assert rag.retrieval_stats["total_chunks"] == 0
+
+
+@pytest.mark.asyncio
+async def test_update_rejects_other_company(rag, tmp_path):
+    file_path = write_document(tmp_path / "policy.txt", PARAGRAPHS)
+    metadata = await rag.add_document(file_path, uuid4(), "Policy", DocumentType.TXT, DocumentSource.POLICY)
+
+    with pytest.raises(KeyError):
+        await rag.update_document(metadata.document_id, file_path, uuid4())
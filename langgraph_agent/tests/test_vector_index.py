@@ -0,0 +1,117 @@
+"""
+Tests for the per-company vector index used by RAGSystem semantic retrieval.
+"""
+
+from uuid import uuid4
+
+import numpy as np
+import pytest
+
+from langgraph_agent.agents import vector_index
+from langgraph_agent.agents.vector_index import CompanyVectorIndex, VectorIndex
+
+
+class TestCompanyVectorIndex:
+    """Test the flat NumPy index for a single company."""
+
+    def test_search_orders_by_cosine_similarity(self):
+        index = CompanyVectorIndex(dimension=3)
+        index.add(["x", "y", "z"], [[1.0, 0.0, 0.0], [0.0, 2.0, 0.0], [1.0, 1.0, 0.0]])
+
+        results = index.search(np.array([1.0, 0.0, 0.0], dtype=np.float32), k=2)
+
+        assert [chunk_id for chunk_id, _ in results] == ["x", "z"]
+        assert results[0][1] == pytest.approx(1.0)
+        assert results[1][1] == pytest.approx(1 / np.sqrt(2), rel=1e-5)
+
+    def test_k_larger_than_index_returns_everything(self):
+        index = CompanyVectorIndex(dimension=2)
+        index.add(["a", "b"], [[1.0, 0.0], [0.0, 1.0]])
+
+        assert len(index.search(np.array([1.0, 0.0], dtype=np.float32), k=10)) == 2
+
+    def test_remove_moves_last_row_into_gap(self):
+        index = CompanyVectorIndex(dimension=2)
+        index.add(["a", "b", "c"], [[1.0, 0.0], [0.0, 1.0], [1.0, 1.0]])
+
+        assert index.remove(["a", "missing"]) == 1
+        assert len(index) == 2
+        assert "a" not in index
+        assert index.search(np.array([0.0, 1.0], dtype=np.float32), k=1)[0][0] == "b"
+        top = index.search(np.array([1.0, 1.0], dtype=np.float32) / np.sqrt(2), k=1)
+        assert top[0][0] == "c"
+
+    def test_add_replaces_existing_chunk(self):
+        index = CompanyVectorIndex(dimension=2)
+        index.add(["a"], [[1.0, 0.0]])
+        index.add(["a"], [[0.0, 1.0]])
+
+        assert len(index) == 1
+        assert index.search(np.array([0.0, 1.0], dtype=np.float32), k=1)[0][1] == pytest.approx(1.0)
+
+    def test_grows_past_initial_capacity(self, monkeypatch):
+        monkeypatch.setattr(vector_index, "INITIAL_CAPACITY", 2)
+        index = CompanyVectorIndex(dimension=2)
+        for position in range(5):
+            index.add([f"c{position}"], [[1.0, float(position)]])
+
+        assert len(index) == 5
+        assert index.search(np.array([1.0, 0.0], dtype=np.float32), k=1)[0][0] == "c0"
+
+    def test_rejects_wrong_dimension(self):
+        index = CompanyVectorIndex(dimension=3)
+        with pytest.raises(ValueError):
+            index.add(["a"], [[1.0, 0.0]])
+
+
+class TestVectorIndex:
+    """Test per-company partitioning."""
+
+    def test_search_is_scoped_to_company(self):
+        company_a, company_b = uuid4(), uuid4()
+        index = VectorIndex()
+        index.add(company_a, ["a1"], [[1.0, 0.0]])
+        index.add(company_b, ["b1"], [[1.0, 0.0]])
+
+        assert [chunk_id for chunk_id, _ in index.search(company_a, [1.0, 0.0], 5)] == ["a1"]
+        assert index.search(uuid4(), [1.0, 0.0], 5) == []
+
+    def test_empty_company_is_dropped(self):
+        company_id = uuid4()
+        index = VectorIndex()
+        index.add(company_id, ["a", "b"], [[1.0, 0.0], [0.0, 1.0]])
+
+        assert index.remove(company_id, ["a", "b"]) == 2
+        assert index.get_stats() == {"companies": 0, "chunks": 0, "ann_companies": 0}
+
+    def test_zero_query_returns_nothing(self):
+        company_id = uuid4()
+        index = VectorIndex()
+        index.add(company_id, ["a"], [[1.0, 0.0]])
+
+        assert index.search(company_id, [0.0, 0.0], 1) == []
+
+
+class TestApproximateBackend:
+    """Test switching to HNSW above the size threshold."""
+
+    def test_switches_to_hnsw_and_back(self):
+        pytest.importorskip("hnswlib")
+        rng = np.random.default_rng(7)
+        vectors = rng.standard_normal((40, 8)).astype(np.float32)
+        chunk_ids = [f"c{position}" for position in range(40)]
+        index = CompanyVectorIndex(dimension=8, ann_threshold=20)
+
+        index.add(chunk_ids, vectors)
+        assert index.uses_ann
+        assert index.search(vectors[3] / np.linalg.norm(vectors[3]), k=1)[0][0] == "c3"
+
+        index.remove(chunk_ids[:35])
+        assert not index.uses_ann
+        assert index.search(vectors[36] / np.linalg.norm(vectors[36]), k=1)[0][0] == "c36"
+
+    def test_stays_flat_without_threshold(self):
+        index = CompanyVectorIndex(dimension=2, ann_threshold=None)
+        index.add([f"c{position}" for position in range(10)], [[1.0, float(position)] for position in range(10)])
+
+        assert not index.uses_ann
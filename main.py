@@ -79,6 +79,14 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[Any, None]:
         app.state.monitoring_task = monitoring_task
     except Exception as e:
         logger.warning(f'Failed to start database monitoring: {e}')
+    try:
+        from api.routers.ai_cost_monitoring import cost_tracker
+        from services.ai.cost_rollups import run_compaction_schedule
+        app.state.rollup_compaction_task = asyncio.create_task(
+            run_compaction_schedule(cost_tracker.redis, cost_tracker.compact_month))
+        logger.info('AI cost rollup compaction scheduled.')
+    except Exception as e:
+        logger.warning(f'Failed to schedule AI cost rollup compaction: {e}')
     logger.info(f'Environment: {settings.environment}')
     logger.info(f'Debug mode: {settings.debug}')
     yield
@@ -91,6 +99,24 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[Any, None]:
             logger.info('Database monitoring task cancelled successfully')
         except Exception as e:
             logger.warning(f'Error cancelling monitoring task: {e}')
+    if hasattr(app.state, 'rollup_compaction_task'):
+        app.state.rollup_compaction_task.cancel()
+        try:
+            await app.state.rollup_compaction_task
+        except asyncio.CancelledError:
+            pass
+    try:
+        from services.ai.cost_ledger import drain_usage_ledgers
+        await drain_usage_ledgers()
+        logger.info('AI usage ledgers drained.')
+    except Exception as e:
+        logger.warning('AI usage ledger drain warning: %s', e)
+    from services.ai.ab_testing_framework import close_ab_testing_framework
+    try:
+        await asyncio.to_thread(close_ab_testing_framework)
+        logger.info('A/B testing data flushed.')
+    except Exception as e:
+        logger.warning(f'Failed to flush A/B testing data: {e}')
 app = FastAPI(title='ruleIQ Compliance Automation API', description='\n    **ruleIQ API** provides comprehensive compliance automation for UK Small and Medium Businesses (SMBs).\n\n    ## Features\n    - 🤖 **AI-Powered Assessments** with 6 specialized AI tools\n    - 📋 **Policy Generation** with 25+ compliance frameworks\n    - 📁 **Evidence Management** with automated validation\n    - 🔐 **RBAC Security** with JWT authentication\n    - 📊 **Real-time Analytics** and compliance scoring\n\n    ## Authentication\n    All endpoints require JWT bearer token authentication except `/api/auth/*` endpoints.\n\n    Get your access token via `/api/auth/token` endpoint.\n\n    ## Rate Limiting\n    - **General endpoints**: 100 requests/minute\n    - **AI endpoints**: 3-20 requests/minute (tiered)\n    - **Authentication**: 5 requests/minute\n\n    ## Support\n    - **Documentation**: See `/docs/api/` for detailed guides\n    - **Interactive Testing**: Use this Swagger UI to test endpoints\n    - **Status**: Production-ready (98% complete, 671+ tests)\n    ', version='2.0.0', docs_url='/docs', redoc_url='/redoc', openapi_url='/openapi.json', lifespan=lifespan, contact={'name': 'ruleIQ API Support', 'url': 'https://docs.ruleiq.com', 'email': 'api-support@ruleiq.com'}, license_info={'name': 'Proprietary', 'url': 'https://ruleiq.com/license'}, servers=[{'url': 'http://localhost:8000', 'description': 'Development server'}, {'url': 'https://api.ruleiq.com', 'description': 'Production server'}])
 # Configure CORS based on environment
 security_settings = get_security_settings()
@@ -1,20 +1,82 @@
 """
 Enhanced Rate Limiting Middleware with Token Bucket Algorithm
 Implements burst allowance, IP/user-based limiting, and hot-reload configuration
+
+Distributed buckets are refilled and consumed atomically inside Redis by a
+single Lua script (one round trip for the IP and user buckets together);
+a bounded set of in-process buckets is used when Redis is unavailable.
 """
 import time
 import asyncio
-from typing import Optional, Dict, Any
+from collections import OrderedDict
+from typing import Optional, Dict, Any, List
 from fastapi import Request, HTTPException, status
 from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.types import ASGIApp
 import logging
-import json
 from config.security_settings import get_security_settings
 from services.redis_circuit_breaker import get_redis_circuit_breaker
 
 logger = logging.getLogger(__name__)
 
+# Bucket hashes live under their own prefix; the pre-script limiter stored
+# JSON strings at rate:ip:* / rate:user:*, and reusing those names would
+# raise WRONGTYPE for old keys and old workers during a rolling deploy.
+TOKEN_BUCKET_KEY_PREFIX = "rate:tb"
+
+# Atomic multi-bucket token bucket.
+# KEYS: bucket hashes. ARGV: now, cost, all_or_nothing, then
+# (capacity, refill_rate_per_second) per key.
+# Returns a flat list of (allowed, remaining_tokens, seconds_until_full).
+TOKEN_BUCKET_SCRIPT = """
+local now = tonumber(ARGV[1])
+local cost = tonumber(ARGV[2])
+local all_or_nothing = ARGV[3] == '1'
+local tokens = {}
+local all_allowed = true
+
+for i = 1, #KEYS do
+    local capacity = tonumber(ARGV[2 + i * 2])
+    local rate = tonumber(ARGV[3 + i * 2])
+    local state = redis.call('HMGET', KEYS[i], 'tokens', 'ts')
+    local current = tonumber(state[1])
+    local last = tonumber(state[2])
+    if current == nil or last == nil then
+        current = capacity
+        last = now
+    end
+    current = math.min(capacity, current + math.max(0, now - last) * rate)
+    tokens[i] = current
+    if current < cost then
+        all_allowed = false
+    end
+end
+
+local result = {}
+for i = 1, #KEYS do
+    local capacity = tonumber(ARGV[2 + i * 2])
+    local rate = tonumber(ARGV[3 + i * 2])
+    local current = tokens[i]
+    local allowed = 0
+    if current >= cost and (all_allowed or not all_or_nothing) then
+        current = current - cost
+        allowed = 1
+    end
+    redis.call('HSET', KEYS[i], 'tokens', tostring(current), 'ts', tostring(now))
+    local reset = 0
+    if rate > 0 then
+        reset = math.ceil((capacity - current) / rate)
+        redis.call('EXPIRE', KEYS[i], math.ceil(capacity / rate) + 1)
+    else
+        redis.call('EXPIRE', KEYS[i], 3600)
+    end
+    result[#result + 1] = allowed
+    result[#result + 1] = math.floor(current)
+    result[#result + 1] = reset
+end
+return result
+"""
+
 
 class TokenBucket:
     """Token bucket algorithm for rate limiting with burst support"""
@@ -110,8 +172,9 @@ class EnhancedRateLimiter(BaseHTTPMiddleware):
         # Redis for distributed rate limiting
         self.redis_breaker = None
 
-        # Local cache for degraded mode
-        self.local_buckets: Dict[str, TokenBucket] = {}
+        # Local LRU-bounded buckets for degraded mode
+        self.local_buckets: OrderedDict[str, TokenBucket] = OrderedDict()
+        self.local_bucket_max_entries = self.rate_config.local_bucket_max_entries
 
         # Start hot-reload task if enabled
         if self.enable_hot_reload:
@@ -184,37 +247,31 @@ class EnhancedRateLimiter(BaseHTTPMiddleware):
     ) -> Dict[str, Any]:
         """Check if request is within rate limits"""
 
-        results = []
+        keys: List[str] = []
 
-        # Check IP-based limit
+        # IP-based limit
         if self.use_ip_based and ip_address:
-            ip_result = await self._check_bucket(
-                key=f"rate:ip:{ip_address}:{request.url.path}",
-                limit=limit_config["limit"],
-                burst=limit_config["burst"]
-            )
-            results.append(ip_result)
+            keys.append(f"{TOKEN_BUCKET_KEY_PREFIX}:ip:{ip_address}:{request.url.path}")
 
-        # Check user-based limit
+        # User-based limit
         if self.use_user_based and user_id:
-            user_result = await self._check_bucket(
-                key=f"rate:user:{user_id}:{request.url.path}",
-                limit=limit_config["limit"],
-                burst=limit_config["burst"]
-            )
-            results.append(user_result)
+            keys.append(f"{TOKEN_BUCKET_KEY_PREFIX}:user:{user_id}:{request.url.path}")
 
         # If no specific limiting, use default IP-based
-        if not results:
-            ip_result = await self._check_bucket(
-                key=f"rate:ip:{ip_address}:{request.url.path}",
-                limit=limit_config["limit"],
-                burst=limit_config["burst"]
-            )
-            results.append(ip_result)
+        if not keys:
+            keys.append(f"{TOKEN_BUCKET_KEY_PREFIX}:ip:{ip_address}:{request.url.path}")
+
+        # When combining, a request consumes from every bucket or from none
+        combine = self.combine_limits and len(keys) > 1
+        results = await self._check_buckets(
+            keys=keys,
+            limit=limit_config["limit"],
+            burst=limit_config["burst"],
+            all_or_nothing=combine
+        )
 
         # Combine results based on strategy
-        if self.combine_limits and len(results) > 1:
+        if combine:
             # Both limits must pass
             allowed = all(r["allowed"] for r in results)
             # Use the most restrictive limit for headers
@@ -232,7 +289,18 @@ class EnhancedRateLimiter(BaseHTTPMiddleware):
         limit: int,
         burst: int
     ) -> Dict[str, Any]:
-        """Check token bucket for rate limiting"""
+        """Check a single token bucket for rate limiting"""
+        results = await self._check_buckets([key], limit, burst)
+        return results[0]
+
+    async def _check_buckets(
+        self,
+        keys: List[str],
+        limit: int,
+        burst: int,
+        all_or_nothing: bool = False
+    ) -> List[Dict[str, Any]]:
+        """Check several token buckets in one atomic Redis round trip"""
 
         # Calculate bucket parameters
         capacity = limit + burst  # Total capacity including burst
@@ -241,69 +309,66 @@ class EnhancedRateLimiter(BaseHTTPMiddleware):
         # Try Redis first
         if self.redis_breaker:
             try:
-                bucket_data = await self._get_redis_bucket(key)
-
-                if bucket_data:
-                    bucket = TokenBucket.from_dict(bucket_data)
-                else:
-                    bucket = TokenBucket(capacity, refill_rate)
-
-                # Try to consume token
-                allowed = bucket.consume()
-
-                # Save updated bucket
-                await self._save_redis_bucket(key, bucket.to_dict())
-
-                return {
-                    "allowed": allowed,
-                    "limit": limit,
-                    "burst": burst,
-                    "remaining": int(bucket.tokens),
-                    "reset": int(time.time() + (capacity - bucket.tokens) / refill_rate)
-                }
+                now = time.time()
+                args: List[Any] = [now, 1, 1 if all_or_nothing else 0]
+                for _ in keys:
+                    args.extend([capacity, refill_rate])
+
+                raw = await self.redis_breaker.eval_script(
+                    TOKEN_BUCKET_SCRIPT, keys, args
+                )
+
+                if raw is not None:
+                    return [
+                        {
+                            "allowed": bool(int(raw[i])),
+                            "limit": limit,
+                            "burst": burst,
+                            "remaining": int(raw[i + 1]),
+                            "reset": int(now + int(raw[i + 2]))
+                        }
+                        for i in range(0, len(raw), 3)
+                    ]
 
             except Exception as e:
                 logger.warning(f"Redis bucket check failed, using local: {e}")
 
         # Fallback to local buckets
-        if key not in self.local_buckets:
-            self.local_buckets[key] = TokenBucket(capacity, refill_rate)
-
-        bucket = self.local_buckets[key]
-        allowed = bucket.consume()
+        buckets = [
+            self._get_local_bucket(key, capacity, refill_rate) for key in keys
+        ]
+        for bucket in buckets:
+            bucket._refill()
+        can_consume_all = all(bucket.tokens >= 1 for bucket in buckets)
 
-        return {
-            "allowed": allowed,
-            "limit": limit,
-            "burst": burst,
-            "remaining": int(bucket.tokens),
-            "reset": int(time.time() + (capacity - bucket.tokens) / refill_rate)
-        }
-
-    async def _get_redis_bucket(self, key: str) -> Optional[Dict[str, Any]]:
-        """Get bucket data from Redis"""
-        if not self.redis_breaker:
-            return None
-
-        data = await self.redis_breaker.get(key)
-        if data:
-            try:
-                return json.loads(data)
-            except json.JSONDecodeError:
-                return None
-        return None
-
-    async def _save_redis_bucket(self, key: str, bucket_data: Dict[str, Any]) -> None:
-        """Save bucket data to Redis"""
-        if not self.redis_breaker:
-            return
-
-        # Set with TTL of 1 hour (buckets reset if not used)
-        await self.redis_breaker.set(
-            key,
-            json.dumps(bucket_data),
-            ex=3600
-        )
+        results = []
+        for bucket in buckets:
+            allowed = (can_consume_all or not all_or_nothing) and bucket.consume()
+            results.append({
+                "allowed": allowed,
+                "limit": limit,
+                "burst": burst,
+                "remaining": int(bucket.tokens),
+                "reset": int(time.time() + (capacity - bucket.tokens) / refill_rate)
+            })
+        return results
+
+    def _get_local_bucket(
+        self,
+        key: str,
+        capacity: int,
+        refill_rate: float
+    ) -> TokenBucket:
+        """Get or create a local bucket, evicting least recently used ones"""
+        bucket = self.local_buckets.get(key)
+        if bucket is None:
+            bucket = TokenBucket(capacity, refill_rate)
+            self.local_buckets[key] = bucket
+            while len(self.local_buckets) > self.local_bucket_max_entries:
+                self.local_buckets.popitem(last=False)
+        else:
+            self.local_buckets.move_to_end(key)
+        return bucket
 
     def _get_endpoint_limit(self, path: str) -> Dict[str, int]:
         """Get rate limit configuration for endpoint"""
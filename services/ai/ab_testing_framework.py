@@ -8,29 +8,38 @@ Includes t-tests, chi-squared tests, and comprehensive experiment management.
 
 import hashlib
 import asyncio
+import os
 import threading
 import numpy as np
 from abc import ABC, abstractmethod
-from collections import defaultdict
+from collections import OrderedDict, defaultdict
 from dataclasses import dataclass, field
 from datetime import datetime
 from enum import Enum
 from typing import Any, Dict, List, Optional, Tuple, Union, Callable
 from uuid import uuid4
 from scipy import stats
-from scipy.stats import ttest_ind, chi2_contingency, mannwhitneyu
-import logging
+from scipy.stats import ttest_ind, ttest_ind_from_stats, chi2_contingency, mannwhitneyu
 
 from config.logging_config import get_logger
+from .ab_testing_sequential import MAX_SAMPLE_MULTIPLIER, SequentialDecision, SequentialTest
+from .ab_testing_stats import VariantStats
 from .analytics_monitor import (
-
-logger = logging.getLogger(__name__)
     MetricType as AnalyticsMetricType,
     analytics_monitor as _analytics_monitor,
 )
 
 logger = get_logger(__name__)
 
+# Streaming analysis: below this many observations per variant the
+# continuous-metric tests keep their normality checks on the raw data
+STREAMING_MIN_SAMPLE_SIZE = 50
+
+# Sticky assignments remembered per experiment (least recently used are
+# evicted). An evicted unit is re-hashed against the current split, which can
+# only move it from the trailing variant to the leader, see assign_variant
+MAX_STICKY_ASSIGNMENTS = 100_000
+
 
 # Comment 10: Custom exception classes
 class ExperimentNotFoundError(Exception):
@@ -120,7 +129,8 @@ class ExperimentConfig:
     # Duration and sample size
     min_sample_size: int = 100
     max_duration_days: int = 30
-    early_stopping_enabled: bool = True
+    early_stopping_enabled: bool = True  # Sequential (mSPRT) stop/ramp decisions
+    higher_is_better: bool = True  # False for cost and latency metrics
 
     # Metadata
     owner: str = "system"
@@ -193,6 +203,25 @@ class StorageBackend(ABC):
         """Count data points for an experiment."""
         pass
 
+    def variant_stats(self, experiment_id: str) -> Dict[str, VariantStats]:
+        """Per-variant sufficient statistics of the primary metric.
+
+        Rebuilds the framework's running statistics from stored data. The
+        default scans query(); columnar backends override it.
+        """
+        values = defaultdict(list)
+        for data_point in self.query(experiment_id):
+            values[data_point.variant].append(data_point.primary_metric_value)
+        return {variant: VariantStats.from_values(items) for variant, items in values.items()}
+
+    def flush(self) -> None:
+        """Persist buffered data. Backends that write through need not override."""
+        pass
+
+    def close(self) -> None:
+        """Persist buffered data and release resources (application shutdown)."""
+        self.flush()
+
 
 class InMemoryStorageBackend(StorageBackend):
     """In-memory storage backend for testing only.
@@ -255,6 +284,23 @@ class ABTestingFramework:
         self.experiment_status: Dict[str, ExperimentStatus] = {}
         self.experiment_results: Dict[str, List[StatisticalResult]] = {}
 
+        # Running per-variant statistics of the primary metric, kept up to
+        # date by record_metric so analysis does not rescan observations
+        self.variant_stats: Dict[str, Dict[str, VariantStats]] = {}
+
+        # Sequential tests of experiments with early stopping, updated on
+        # every recorded metric
+        self.sequential_tests: Dict[str, SequentialTest] = {}
+
+        # Variant each recently seen unit was first assigned to, per
+        # experiment, so a ramped traffic split only moves new units
+        self.assignments: Dict[str, OrderedDict[str, str]] = {}
+        self.max_assignments = MAX_STICKY_ASSIGNMENTS
+
+        # Task type -> (experiment_id, variant -> model) of model experiments,
+        # shared by every ProviderFactory routing through this framework
+        self.model_experiments: Dict[str, Tuple[str, Dict[str, Any]]] = {}
+
         # Comment 3: Use injected storage backend
         self.storage_backend = storage_backend or InMemoryStorageBackend()
 
@@ -356,13 +402,14 @@ class ABTestingFramework:
         self.experiments[experiment_id] = config
         self.experiment_status[experiment_id] = ExperimentStatus.DRAFT
         self.experiment_results[experiment_id] = []
+        self.variant_stats[experiment_id] = {}
 
         logger.info(f"Created experiment {experiment_id}: {config.name}")
 
         # Comment 2: Use safe coroutine scheduling
         self._schedule_coro(
             self.analytics_facade.record_metric(
-                AnalyticsMetricType.ERROR,
+                AnalyticsMetricType.EXPERIMENT,
                 "experiment_created",
                 1.0,
                 {
@@ -403,7 +450,7 @@ class ABTestingFramework:
         # Comment 2: Use safe coroutine scheduling
         self._schedule_coro(
             self.analytics_facade.record_metric(
-                AnalyticsMetricType.ERROR,
+                AnalyticsMetricType.EXPERIMENT,
                 "experiment_started",
                 1.0,
                 {"experiment_id": experiment_id},
@@ -418,6 +465,13 @@ class ABTestingFramework:
         """
         Assign a user to an experiment variant.
 
+        Assignment is deterministic per user (and strata). Once sequential
+        testing ramps the traffic split, users seen before the ramp keep
+        their variant and only new users follow the ramped split. Only the
+        max_assignments most recently seen users are remembered; since the
+        control owns the low end of the hash range, re-hashing a forgotten
+        user against a two-variant ramp never moves them off the leader.
+
         Args:
             experiment_id: ID of the experiment
             user_id: User identifier
@@ -430,11 +484,16 @@ class ABTestingFramework:
         if experiment_id not in self.experiments:
             raise ExperimentNotFoundError(f"Experiment {experiment_id} not found")
 
+        decision = self.get_traffic_decision(experiment_id)
         if self.experiment_status[experiment_id] != ExperimentStatus.RUNNING:
+            if decision is not None and decision.stopped:
+                return decision.winner  # Stopped early, serve the winner
             logger.warning(f"Experiment {experiment_id} is not running")
             return "control"  # Default to control if experiment not running
 
         config = self.experiments[experiment_id]
+        # Sequential decisions may have ramped traffic towards the leader
+        traffic_split = decision.traffic_split if decision is not None else config.traffic_split
 
         # Deterministic assignment based on user ID and experiment ID
         hash_input = f"{experiment_id}:{user_id}"
@@ -446,31 +505,49 @@ class ABTestingFramework:
             ]
             hash_input += ":" + ":".join(strata_values)
 
+        # Sequential decisions may change the split; earlier assignments stand
+        assignments = (
+            self.assignments.setdefault(experiment_id, OrderedDict())
+            if config.early_stopping_enabled else OrderedDict()
+        )
+        if hash_input in assignments:
+            assignments.move_to_end(hash_input)
+            return assignments[hash_input]
+
         # Generate hash and convert to assignment
         hash_value = int(hashlib.md5(hash_input.encode()).hexdigest(), 16)
         assignment_ratio = (hash_value % 10000) / 10000.0
 
-        # Comment 4: Explicit variant mapping with deterministic ordering
-        # First check for standard keys, then fall back to sorted order
-        variant_keys = list(config.traffic_split.keys())
-        if 'control' in variant_keys and 'treatment' in variant_keys:
-            # Use explicit control/treatment ordering
-            ordered_variants = ['control'] + [k for k in variant_keys if k != 'control']
-        else:
-            # Deterministic ordering by sorting keys
-            ordered_variants = sorted(variant_keys)
-            logger.debug(f"Using deterministic variant ordering: {ordered_variants}")
+        ordered_variants = self._ordered_variants(traffic_split)
 
-        # Assign to variant based on traffic split
+        # Assign to variant based on traffic split, falling back to the
+        # first variant (typically control)
+        assigned = ordered_variants[0] if ordered_variants else "control"
         cumulative_probability = 0.0
         for variant in ordered_variants:
-            probability = config.traffic_split[variant]
+            probability = traffic_split[variant]
             cumulative_probability += probability
             if assignment_ratio <= cumulative_probability:
-                return variant
+                assigned = variant
+                break
+
+        assignments[hash_input] = assigned
+        if len(assignments) > self.max_assignments:
+            assignments.popitem(last=False)
+        return assigned
 
-        # Fallback to first variant (typically control)
-        return ordered_variants[0] if ordered_variants else "control"
+    def _ordered_variants(self, traffic_split: Dict[str, float]) -> List[str]:
+        """Variants in assignment order, the control first."""
+        # Comment 4: Explicit variant mapping with deterministic ordering
+        # First check for standard keys, then fall back to sorted order
+        variant_keys = list(traffic_split.keys())
+        if 'control' in variant_keys and 'treatment' in variant_keys:
+            # Use explicit control/treatment ordering
+            return ['control'] + [k for k in variant_keys if k != 'control']
+        # Deterministic ordering by sorting keys
+        ordered_variants = sorted(variant_keys)
+        logger.debug(f"Using deterministic variant ordering: {ordered_variants}")
+        return ordered_variants
 
     def record_metric(
         self,
@@ -517,11 +594,16 @@ class ABTestingFramework:
 
         # Comment 3: Use storage backend
         self.storage_backend.append(experiment_id, data_point)
+        variant_stats = self._get_variant_stats(experiment_id)
+        variant_stats.setdefault(variant, VariantStats()).update(validated_value)
+
+        if config.early_stopping_enabled and self.experiment_status[experiment_id] == ExperimentStatus.RUNNING:
+            self.evaluate_sequential(experiment_id)
 
         # Comment 2: Use safe coroutine scheduling
         self._schedule_coro(
             self.analytics_facade.record_metric(
-                AnalyticsMetricType.ERROR,
+                AnalyticsMetricType.EXPERIMENT,
                 "experiment_metric_recorded",
                 1.0,
                 {
@@ -552,24 +634,35 @@ class ABTestingFramework:
             raise ExperimentNotFoundError(f"Experiment {experiment_id} not found")
 
         config = self.experiments[experiment_id]
-        # Comment 3: Use storage backend
-        data = self.storage_backend.query(experiment_id)
+        variant_stats = self._get_variant_stats(experiment_id)
+        total_observations = sum(summary.count for summary in variant_stats.values())
 
-        if len(data) < config.min_sample_size:
+        if total_observations < config.min_sample_size:
             logger.warning(
-                f"Insufficient data for analysis: {len(data)} < {config.min_sample_size}",
+                f"Insufficient data for analysis: {total_observations} < {config.min_sample_size}",
+            )
+
+        # t-tests and chi-squared run on the running statistics; other tests
+        # need the observations themselves
+        test_type = self._select_streaming_test(config.metric_type, variant_stats)
+        if test_type is not None:
+            result = self._execute_streaming_test(
+                test_type, variant_stats, config, confidence_level,
             )
+        else:
+            # Comment 3: Use storage backend
+            data = self.storage_backend.query(experiment_id)
 
-        # Group data by variant
-        variant_data = self._group_data_by_variant(data)
+            # Group data by variant
+            variant_data = self._group_data_by_variant(data)
 
-        # Choose appropriate statistical test
-        test_type = self._select_statistical_test(config.metric_type, variant_data)
+            # Choose appropriate statistical test
+            test_type = self._select_statistical_test(config.metric_type, variant_data)
 
-        # Perform statistical analysis
-        result = self._perform_statistical_test(
-            test_type, variant_data, config, confidence_level,
-        )
+            # Perform statistical analysis
+            result = self._execute_statistical_test(
+                test_type, variant_data, config, confidence_level,
+            )
 
         # Store result
         self.experiment_results[experiment_id].append(result)
@@ -577,7 +670,7 @@ class ABTestingFramework:
         # Comment 2: Use safe coroutine scheduling
         self._schedule_coro(
             self.analytics_facade.record_metric(
-                AnalyticsMetricType.ERROR,
+                AnalyticsMetricType.EXPERIMENT,
                 "experiment_analyzed",
                 float(result.p_value),
                 {
@@ -591,6 +684,95 @@ class ABTestingFramework:
 
         return result
 
+    def evaluate_sequential(self, experiment_id: str) -> Optional[SequentialDecision]:
+        """
+        Take a sequential look at an experiment and act on the decision.
+
+        Runs a mixture sequential probability ratio test (mSPRT) on the
+        running statistics, so it is valid however often it is called.
+        Stopping completes the experiment; assign_variant then serves the
+        winner, and while running it follows the ramped traffic split.
+
+        Args:
+            experiment_id: ID of the experiment
+
+        Returns:
+            Decision, or None for experiments the test does not cover
+            (categorical metrics, other than two variants)
+        """
+        # Comment 10: Use custom exceptions
+        if experiment_id not in self.experiments:
+            raise ExperimentNotFoundError(f"Experiment {experiment_id} not found")
+
+        config = self.experiments[experiment_id]
+        if config.metric_type == ExperimentMetricType.CATEGORICAL or len(config.traffic_split) != 2:
+            return None
+
+        sequential_test = self.sequential_tests.get(experiment_id)
+        if sequential_test is None:
+            control, treatment = self._ordered_variants(config.traffic_split)
+            sequential_test = SequentialTest(
+                control=control,
+                treatment=treatment,
+                traffic_split=config.traffic_split,
+                alpha=config.significance_level,
+                min_effect_size=config.min_effect_size,
+                max_sample_size=int(np.ceil(self._calculate_sample_size(config) * MAX_SAMPLE_MULTIPLIER)),
+                higher_is_better=config.higher_is_better,
+            )
+            self.sequential_tests[experiment_id] = sequential_test
+
+        if sequential_test.decision is not None and sequential_test.decision.stopped:
+            return sequential_test.decision
+
+        variant_stats = self._get_variant_stats(experiment_id)
+        decision = sequential_test.update(
+            variant_stats.get(sequential_test.control, VariantStats()),
+            variant_stats.get(sequential_test.treatment, VariantStats()),
+        )
+
+        if decision.stopped and self.experiment_status[experiment_id] == ExperimentStatus.RUNNING:
+            self.experiment_status[experiment_id] = ExperimentStatus.COMPLETED
+            # Everyone gets the winner from now on
+            self.assignments.pop(experiment_id, None)
+            logger.info(
+                f"Stopped experiment {experiment_id} early ({decision.action.value}): "
+                f"serving {decision.winner}, p={decision.p_value:.4f}, samples={decision.sample_sizes}"
+            )
+
+            # Comment 2: Use safe coroutine scheduling
+            self._schedule_coro(
+                self.analytics_facade.record_metric(
+                    AnalyticsMetricType.EXPERIMENT,
+                    "experiment_stopped_early",
+                    float(decision.p_value),
+                    {
+                        "experiment_id": experiment_id,
+                        "action": decision.action.value,
+                        "winner": decision.winner,
+                        "sample_sizes": decision.sample_sizes,
+                    },
+                )
+            )
+
+        return decision
+
+    def get_traffic_decision(self, experiment_id: str) -> Optional[SequentialDecision]:
+        """
+        Latest sequential decision for an experiment.
+
+        This is the hook traffic routers consult: the decision carries the
+        traffic split to use and, once stopped, the variant to serve.
+
+        Args:
+            experiment_id: ID of the experiment
+
+        Returns:
+            Latest decision, or None before the first sequential look
+        """
+        sequential_test = self.sequential_tests.get(experiment_id)
+        return sequential_test.decision if sequential_test is not None else None
+
     def _validate_experiment_config(self, config: ExperimentConfig) -> None:
         """Validate experiment configuration."""
         if config.significance_level <= 0 or config.significance_level >= 1:
@@ -764,23 +946,10 @@ class ABTestingFramework:
         elif metric_type == ExperimentMetricType.CATEGORICAL:
             # Cramér's V from chi-squared test
             if test_type == StatisticalTest.CHI_SQUARED:
-                control_counts = self._get_category_counts(control_data)
-                treatment_counts = self._get_category_counts(treatment_data)
-
-                # Create contingency table
-                all_categories = set(control_counts.keys()) | set(treatment_counts.keys())
-                contingency_table = []
-                for category in all_categories:
-                    contingency_table.append([
-                        control_counts.get(category, 0),
-                        treatment_counts.get(category, 0)
-                    ])
-
-                chi2, _, _, _ = chi2_contingency(contingency_table)
-                n = len(control_data) + len(treatment_data)
-                k = min(2, len(all_categories))  # min of rows, cols
-                cramers_v = np.sqrt(chi2 / (n * (k - 1)))
-                return cramers_v
+                return self._cramers_v(
+                    self._get_category_counts(control_data),
+                    self._get_category_counts(treatment_data),
+                )
             return 0.0
 
         elif metric_type == ExperimentMetricType.COUNT:
@@ -797,6 +966,21 @@ class ABTestingFramework:
 
         return 0.0
 
+    def _cramers_v(self, control_counts: Dict[str, int], treatment_counts: Dict[str, int]) -> float:
+        """Cramér's V from per-variant category counts."""
+        chi2, _ = self._chi_squared_from_counts(control_counts, treatment_counts)
+        n = sum(control_counts.values()) + sum(treatment_counts.values())
+        all_categories = set(control_counts.keys()) | set(treatment_counts.keys())
+        k = min(2, len(all_categories))  # min of rows, cols
+        return np.sqrt(chi2 / (n * (k - 1)))
+
+    def _cohens_d(self, control: VariantStats, treatment: VariantStats) -> float:
+        """Cohen's d from running statistics."""
+        pooled_std = np.sqrt((control.variance + treatment.variance) / 2)
+        if pooled_std == 0:
+            return 0.0
+        return (treatment.mean - control.mean) / pooled_std
+
     def _run_t_test(self, control_data: np.ndarray, treatment_data: np.ndarray) -> Tuple[float, float, str]:
         """Run two-sample t-test."""
         statistic, p_value = ttest_ind(control_data, treatment_data, equal_var=True)
@@ -816,9 +1000,15 @@ class ABTestingFramework:
 
     def _run_chi_squared(self, control_data: List, treatment_data: List) -> Tuple[float, float, str]:
         """Run chi-squared test."""
-        control_counts = self._get_category_counts(control_data)
-        treatment_counts = self._get_category_counts(treatment_data)
+        chi2, p_value = self._chi_squared_from_counts(
+            self._get_category_counts(control_data),
+            self._get_category_counts(treatment_data),
+        )
+        return chi2, p_value, "Chi-squared test"
 
+    def _chi_squared_from_counts(self, control_counts: Dict[str, int],
+                                 treatment_counts: Dict[str, int]) -> Tuple[float, float]:
+        """Chi-squared statistic and p-value from per-variant category counts."""
         # Align categories
         all_categories = set(control_counts.keys()) | set(treatment_counts.keys())
         contingency_table = []
@@ -829,48 +1019,54 @@ class ABTestingFramework:
             ])
 
         chi2, p_value, _, _ = chi2_contingency(contingency_table)
-        return chi2, p_value, "Chi-squared test"
+        return chi2, p_value
 
     def _compute_confidence_interval(self, test_type: StatisticalTest,
                                     control_data: np.ndarray, treatment_data: np.ndarray,
                                     alpha: float) -> Optional[Tuple[float, float]]:
-        """Compute confidence interval for the test.
-
-        Comment 11: Add numeric stability checks for Welch df calculation.
-        """
+        """Compute confidence interval for the test."""
         if test_type not in [StatisticalTest.T_TEST, StatisticalTest.WELCH_T_TEST]:
             return None
 
-        control_mean = np.mean(control_data)
-        treatment_mean = np.mean(treatment_data)
-        control_std = np.std(control_data, ddof=1)
-        treatment_std = np.std(treatment_data, ddof=1)
+        return self._confidence_interval_from_stats(
+            test_type, VariantStats.from_array(control_data),
+            VariantStats.from_array(treatment_data), alpha,
+        )
+
+    def _confidence_interval_from_stats(self, test_type: StatisticalTest,
+                                        control: VariantStats, treatment: VariantStats,
+                                        alpha: float) -> Tuple[float, float]:
+        """Confidence interval for the difference in means from running statistics.
 
-        mean_diff = treatment_mean - control_mean
+        Comment 11: Add numeric stability checks for Welch df calculation.
+        """
+        # numpy scalars keep the original inf/nan semantics for tiny samples
+        n_control, n_treatment = np.float64(control.count), np.float64(treatment.count)
+        mean_diff = treatment.mean - control.mean
         pooled_se = np.sqrt(
-            control_std**2 / len(control_data) + treatment_std**2 / len(treatment_data)
+            control.variance / n_control + treatment.variance / n_treatment
         )
 
         if test_type == StatisticalTest.T_TEST:
-            df = len(control_data) + len(treatment_data) - 2
+            df = n_control + n_treatment - 2
         else:  # Welch's t-test
             # Comment 11: Check for numeric stability
             numerator = (
-                control_std**2 / len(control_data) + treatment_std**2 / len(treatment_data)
+                control.variance / n_control + treatment.variance / n_treatment
             ) ** 2
             denominator = (
-                control_std**4 / (len(control_data) ** 2 * (len(control_data) - 1)) +
-                treatment_std**4 / (len(treatment_data) ** 2 * (len(treatment_data) - 1))
+                control.variance**2 / (n_control ** 2 * (n_control - 1)) +
+                treatment.variance**2 / (n_treatment ** 2 * (n_treatment - 1))
             )
 
             if denominator == 0 or not np.isfinite(numerator / denominator):
                 logger.warning("Welch df calculation unstable, using conservative df")
-                df = min(len(control_data) - 1, len(treatment_data) - 1)
+                df = min(n_control - 1, n_treatment - 1)
             else:
                 df = numerator / denominator
                 if df <= 0 or not np.isfinite(df):
                     logger.warning("Invalid df calculated, using conservative estimate")
-                    df = min(len(control_data) - 1, len(treatment_data) - 1)
+                    df = min(n_control - 1, n_treatment - 1)
 
         t_critical = stats.t.ppf(1 - alpha / 2, df)
         margin_error = t_critical * pooled_se
@@ -977,6 +1173,135 @@ class ABTestingFramework:
             },
         )
 
+    def _get_variant_stats(self, experiment_id: str) -> Dict[str, VariantStats]:
+        """Running statistics for an experiment, rebuilt from storage if missing."""
+        variant_stats = self.variant_stats.get(experiment_id)
+        if variant_stats is None:
+            variant_stats = self.storage_backend.variant_stats(experiment_id)
+            self.variant_stats[experiment_id] = variant_stats
+        return variant_stats
+
+    def _select_streaming_test(
+        self, metric_type: ExperimentMetricType, variant_stats: Dict[str, VariantStats]
+    ) -> Optional[StatisticalTest]:
+        """
+        Select a test that can run on running statistics alone.
+
+        Args:
+            metric_type: Type of metric being analyzed
+            variant_stats: Running statistics per variant
+
+        Returns:
+            Statistical test, or None if the raw observations are needed
+        """
+        if metric_type in (ExperimentMetricType.BINARY, ExperimentMetricType.CATEGORICAL):
+            return StatisticalTest.CHI_SQUARED
+
+        if metric_type != ExperimentMetricType.CONTINUOUS or len(variant_stats) != 2:
+            return None
+
+        control, treatment = variant_stats.values()
+        if min(control.count, treatment.count) < STREAMING_MIN_SAMPLE_SIZE:
+            return None  # Small samples keep the normality checks
+        if control.variance == 0 or treatment.variance == 0:
+            return None  # Zero variance falls back to Mann-Whitney
+
+        # At these sample sizes the means are approximately normal; compare
+        # variances with an F-test, since Levene's test needs raw data
+        f_statistic = control.variance / treatment.variance
+        dfn, dfd = control.count - 1, treatment.count - 1
+        p_var = 2 * min(stats.f.cdf(f_statistic, dfn, dfd), stats.f.sf(f_statistic, dfn, dfd))
+
+        if p_var < 0.05:
+            return StatisticalTest.WELCH_T_TEST  # Unequal variances
+        return StatisticalTest.T_TEST  # Equal variances
+
+    def _execute_streaming_test(
+        self,
+        test_type: StatisticalTest,
+        variant_stats: Dict[str, VariantStats],
+        config: ExperimentConfig,
+        confidence_level: float,
+    ) -> StatisticalResult:
+        """Run a t-test, Welch's test or chi-squared test from running statistics.
+
+        Args:
+            test_type: Type of statistical test to perform
+            variant_stats: Running statistics per variant
+            config: Experiment configuration
+            confidence_level: Confidence level for the test
+
+        Returns:
+            Statistical test results
+        """
+        alpha = 1 - confidence_level
+        variants = list(variant_stats.keys())
+
+        if len(variants) != 2:
+            raise ValueError("Currently only supports two-variant experiments")
+
+        control, treatment = variant_stats[variants[0]], variant_stats[variants[1]]
+
+        if test_type == StatisticalTest.CHI_SQUARED:
+            statistic, p_value = self._chi_squared_from_counts(control.categories, treatment.categories)
+            test_name = "Chi-squared test"
+            if config.metric_type == ExperimentMetricType.BINARY:
+                effect_size = treatment.mean - control.mean  # Difference in proportions
+            else:
+                effect_size = self._cramers_v(control.categories, treatment.categories)
+            confidence_interval = None
+            power = 0.8  # Default for categorical tests
+            means = {variants[0]: 0.0, variants[1]: 0.0}
+            std_devs = {variants[0]: 0.0, variants[1]: 0.0}
+        elif test_type in (StatisticalTest.T_TEST, StatisticalTest.WELCH_T_TEST):
+            equal_var = test_type == StatisticalTest.T_TEST
+            statistic, p_value = ttest_ind_from_stats(
+                control.mean, control.std, control.count,
+                treatment.mean, treatment.std, treatment.count,
+                equal_var=equal_var,
+            )
+            test_name = (
+                "Two-sample t-test (equal variances)" if equal_var
+                else "Welch's t-test (unequal variances)"
+            )
+            effect_size = self._cohens_d(control, treatment)
+            confidence_interval = self._confidence_interval_from_stats(test_type, control, treatment, alpha)
+            power = self._calculate_power(abs(effect_size), control.count, treatment.count, alpha)
+            means = {variants[0]: control.mean, variants[1]: treatment.mean}
+            std_devs = {variants[0]: control.std, variants[1]: treatment.std}
+        else:
+            raise ValueError(f"Unsupported streaming test type: {test_type}")
+
+        # Determine significance
+        is_significant = p_value < alpha
+        practical_significance = abs(effect_size) >= config.min_effect_size
+
+        # Generate recommendation
+        recommendation = self._generate_recommendation(
+            is_significant, practical_significance, effect_size, p_value, power
+        )
+
+        return StatisticalResult(
+            test_name=test_name,
+            statistic=statistic,
+            p_value=p_value,
+            confidence_interval=confidence_interval,
+            effect_size=effect_size,
+            power=power,
+            is_significant=is_significant,
+            practical_significance=practical_significance,
+            recommendation=recommendation,
+            sample_sizes={variants[0]: control.count, variants[1]: treatment.count},
+            means=means,
+            std_devs=std_devs,
+            metadata={
+                "confidence_level": confidence_level,
+                "alpha": alpha,
+                "test_type": test_type.value,
+                "streaming": True,
+            },
+        )
+
     def _get_category_counts(self, data: List) -> Dict[str, int]:
         """Get counts for each category in categorical data."""
         counts = defaultdict(int)
@@ -1009,7 +1334,7 @@ class ABTestingFramework:
         power = (
             1
             - stats.nct.cdf(t_critical, n1 + n2 - 2, ncp)
-            + stats.nct.cdf(-t_critical, n1 + n2 - 2, ncp),
+            + stats.nct.cdf(-t_critical, n1 + n2 - 2, ncp)
         )
 
         return max(0.0, min(1.0, power))
@@ -1081,6 +1406,7 @@ class ABTestingFramework:
             total_count = self.storage_backend.count(experiment_id)
         results = self.experiment_results[experiment_id]
         status = self.experiment_status[experiment_id]
+        decision = self.get_traffic_decision(experiment_id)
 
         # Calculate summary statistics efficiently
         if include_full_data and data:
@@ -1091,7 +1417,11 @@ class ABTestingFramework:
             start_time = min(d.timestamp for d in data) if data else None
             end_time = max(d.timestamp for d in data) if data else None
         else:
-            variant_counts = {}
+            # Running statistics give per-variant counts without loading data
+            variant_counts = {
+                variant: summary.count
+                for variant, summary in self._get_variant_stats(experiment_id).items()
+            }
             start_time = None
             end_time = None
 
@@ -1109,6 +1439,7 @@ class ABTestingFramework:
                 "traffic_split": config.traffic_split,
             },
             "status": status.value,
+            "sequential": decision.to_dict() if decision is not None else None,
             "data_summary": {
                 "total_observations": len(data) if include_full_data else total_count,
                 "variant_counts": dict(variant_counts),
@@ -1138,19 +1469,47 @@ class ABTestingFramework:
 
         return summary
 
+    def close(self) -> None:
+        """Write buffered experiment data to storage."""
+        self.storage_backend.close()
+
 
 # Global instance
 _ab_testing_framework: Optional[ABTestingFramework] = None
 
+# Sub-directory of settings.data_dir holding Parquet experiment data
+AB_TESTING_DATA_DIR = 'ab_testing'
+
+
+def _default_storage_backend() -> StorageBackend:
+    """Parquet segments under the data directory, in memory if that is unavailable."""
+    from config.settings import settings
+
+    try:
+        from .ab_testing_storage import ParquetStorageBackend
+
+        return ParquetStorageBackend(os.path.join(settings.data_dir, AB_TESTING_DATA_DIR))
+    except (ImportError, OSError) as e:
+        logger.warning(f"A/B testing data will not persist, using in-memory storage: {e}")
+        return InMemoryStorageBackend()
+
 
 def get_ab_testing_framework() -> ABTestingFramework:
     """Get global A/B testing framework instance."""
     global _ab_testing_framework
     if _ab_testing_framework is None:
-        _ab_testing_framework = ABTestingFramework()
+        _ab_testing_framework = ABTestingFramework(storage_backend=_default_storage_backend())
     return _ab_testing_framework
 
 
+def close_ab_testing_framework() -> None:
+    """Flush the global framework's buffered data (application shutdown)."""
+    global _ab_testing_framework
+    if _ab_testing_framework is not None:
+        _ab_testing_framework.close()
+        _ab_testing_framework = None
+
+
 def create_ai_model_experiment(
     model_a: str,
     model_b: str,
@@ -0,0 +1,240 @@
+"""
+Sequential Testing and Early Stopping for A/B Experiments
+
+Lets prompt and model experiments be checked after every observation and
+stopped as soon as the evidence is in, instead of waiting for the
+fixed-horizon sample size:
+
+- Mixture sequential probability ratio test (mSPRT) on the difference in
+  means, with a normal mixing distribution scaled to the experiment's minimum
+  detectable effect. Its always-valid p-value is below alpha under the null
+  with probability at most alpha, however often it is checked
+- Computed from the running VariantStats of each variant, so a look costs a
+  handful of float operations regardless of how much data has been recorded
+- Stop/ramp decisions: stop on significance (the winner takes all traffic),
+  stop for futility at a sample cap, and ramp traffic towards the leading
+  variant once the running p-value falls below RAMP_P_VALUE, keeping a floor
+  on the trailing variant so the test can still finish. The running p-value
+  never rises, so a ramp is never undone or reversed; the traffic router only
+  ever moves new units
+"""
+
+import math
+from dataclasses import dataclass, field
+from datetime import datetime
+from enum import Enum
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+from .ab_testing_stats import VariantStats
+
+# Observations per variant before the first look; the plug-in variances are
+# too noisy to scale the test below this
+BURN_IN_SAMPLE_SIZE = 50
+
+# Running always-valid p-value below which traffic is shifted towards the leader
+RAMP_P_VALUE = 0.2
+
+# Share of traffic the trailing variant keeps while ramping
+MIN_TRAFFIC_SHARE = 0.1
+
+# Stop for futility once every variant has this multiple of the
+# fixed-horizon sample size without a significant difference
+MAX_SAMPLE_MULTIPLIER = 2.0
+
+
+class SequentialAction(Enum):
+    """What to do with an experiment's traffic after a sequential look."""
+
+    CONTINUE = "continue"  # Keep the configured traffic split
+    RAMP = "ramp"  # Shift traffic towards the leading variant
+    STOP_WINNER = "stop_winner"  # Significant difference, serve the winner
+    STOP_FUTILITY = "stop_futility"  # Sample cap reached, keep the control
+
+
+@dataclass
+class SequentialDecision:
+    """Outcome of a sequential look at an experiment."""
+
+    action: SequentialAction
+    traffic_split: Dict[str, float]
+    winner: Optional[str]
+    p_value: float  # Always-valid p-value
+    effect: float  # Treatment mean minus control mean
+    confidence_sequence: Optional[Tuple[float, float]]
+    sample_sizes: Dict[str, int]
+    max_sample_size: int
+    timestamp: datetime = field(default_factory=datetime.now)
+
+    @property
+    def stopped(self) -> bool:
+        """Whether the experiment should stop collecting data."""
+        return self.action in (SequentialAction.STOP_WINNER, SequentialAction.STOP_FUTILITY)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert decision to dictionary."""
+        return {
+            'action': self.action.value,
+            'traffic_split': dict(self.traffic_split),
+            'winner': self.winner,
+            'p_value': self.p_value,
+            'effect': self.effect,
+            'confidence_sequence': self.confidence_sequence,
+            'sample_sizes': dict(self.sample_sizes),
+            'max_sample_size': self.max_sample_size,
+            'timestamp': self.timestamp.isoformat(),
+        }
+
+
+def msprt_log_likelihood_ratio(difference: Any, variance: Any, tau2: Any) -> Any:
+    """
+    Log mixture likelihood ratio for a difference in means.
+
+    Works on floats and, elementwise, on NumPy arrays.
+
+    Args:
+        difference: Observed difference in means
+        variance: Variance of the difference (s1^2/n1 + s2^2/n2)
+        tau2: Variance of the normal mixing distribution over effects
+
+    Returns:
+        log of the mSPRT statistic; reject at log(1/alpha)
+    """
+    return (
+        -0.5 * np.log1p(tau2 / variance)
+        + tau2 * np.square(difference) / (2 * variance * (variance + tau2))
+    )
+
+
+def msprt_confidence_sequence(difference: float, variance: float, tau2: float,
+                              alpha: float) -> Tuple[float, float]:
+    """Always-valid (1 - alpha) interval for the difference, the mSPRT inverted."""
+    radius = math.sqrt(
+        variance * (variance + tau2) / tau2
+        * (math.log1p(tau2 / variance) - 2 * math.log(alpha))
+    )
+    return (difference - radius, difference + radius)
+
+
+class SequentialTest:
+    """mSPRT state for one two-variant experiment, updated look by look."""
+
+    def __init__(
+        self,
+        control: str,
+        treatment: str,
+        traffic_split: Dict[str, float],
+        alpha: float,
+        min_effect_size: float,
+        max_sample_size: int,
+        higher_is_better: bool = True,
+        ramp_p_value: float = RAMP_P_VALUE,
+        min_traffic_share: float = MIN_TRAFFIC_SHARE,
+    ) -> None:
+        """
+        Initialize the sequential test.
+
+        Args:
+            control: Baseline variant, kept if the test stops for futility
+            treatment: Variant compared against the control
+            traffic_split: Configured split, used while there is no evidence
+            alpha: Type I error rate over the whole experiment
+            min_effect_size: Minimum detectable effect in standard deviations
+            max_sample_size: Per-variant sample size at which to stop for futility
+            higher_is_better: Direction of the primary metric
+            ramp_p_value: Running always-valid p-value below which traffic ramps
+            min_traffic_share: Share the trailing variant keeps while ramping
+        """
+        self.control = control
+        self.treatment = treatment
+        self.traffic_split = dict(traffic_split)
+        self.alpha = alpha
+        self.min_effect_size = min_effect_size
+        self.max_sample_size = max_sample_size
+        self.higher_is_better = higher_is_better
+        self.ramp_p_value = ramp_p_value
+        self.min_traffic_share = min_traffic_share
+
+        self.tau2: Optional[float] = None  # Fixed at the first look
+        self.p_value = 1.0  # Running minimum of 1 / likelihood ratio
+        self.ramped_split: Optional[Dict[str, float]] = None  # Fixed at the first ramp
+        self.decision: Optional[SequentialDecision] = None
+
+    def update(self, control: VariantStats, treatment: VariantStats) -> SequentialDecision:
+        """
+        Take a look at the current statistics.
+
+        Args:
+            control: Running statistics of the control variant
+            treatment: Running statistics of the treatment variant
+
+        Returns:
+            Decision for the experiment's traffic; sticky once stopped
+        """
+        if self.decision is not None and self.decision.stopped:
+            return self.decision
+
+        sample_sizes = {self.control: control.count, self.treatment: treatment.count}
+        effect = treatment.mean - control.mean
+        variance = (
+            control.variance / control.count + treatment.variance / treatment.count
+            if control.count and treatment.count else 0.0
+        )
+
+        if min(control.count, treatment.count) < BURN_IN_SAMPLE_SIZE or variance <= 0:
+            return self._decide(SequentialAction.CONTINUE, self.traffic_split, None,
+                                effect, None, sample_sizes)
+
+        if self.tau2 is None:
+            # Mixing distribution centred on no effect with the spread of
+            # the minimum detectable effect, in the metric's own units
+            pooled_variance = (control.variance + treatment.variance) / 2
+            self.tau2 = self.min_effect_size ** 2 * pooled_variance
+
+        log_ratio = float(msprt_log_likelihood_ratio(effect, variance, self.tau2))
+        current_p = math.exp(-log_ratio) if log_ratio > 0 else 1.0
+        self.p_value = min(self.p_value, current_p)
+        confidence_sequence = msprt_confidence_sequence(effect, variance, self.tau2, self.alpha)
+
+        treatment_leads = effect > 0 if self.higher_is_better else effect < 0
+        leader, trailer = (
+            (self.treatment, self.control) if treatment_leads else (self.control, self.treatment)
+        )
+
+        if self.p_value <= self.alpha:
+            return self._decide(SequentialAction.STOP_WINNER, {leader: 1.0, trailer: 0.0},
+                                leader, effect, confidence_sequence, sample_sizes)
+        if min(control.count, treatment.count) >= self.max_sample_size:
+            return self._decide(SequentialAction.STOP_FUTILITY, {self.control: 1.0, self.treatment: 0.0},
+                                self.control, effect, confidence_sequence, sample_sizes)
+        if self.ramped_split is None and self.p_value <= self.ramp_p_value:
+            leader_share = max(self.traffic_split[leader], 1.0 - self.min_traffic_share)
+            self.ramped_split = {leader: leader_share, trailer: 1.0 - leader_share}
+        if self.ramped_split is not None:
+            return self._decide(SequentialAction.RAMP, self.ramped_split, None,
+                                effect, confidence_sequence, sample_sizes)
+        return self._decide(SequentialAction.CONTINUE, self.traffic_split, None,
+                            effect, confidence_sequence, sample_sizes)
+
+    def _decide(
+        self,
+        action: SequentialAction,
+        traffic_split: Dict[str, float],
+        winner: Optional[str],
+        effect: float,
+        confidence_sequence: Optional[Tuple[float, float]],
+        sample_sizes: Dict[str, int],
+    ) -> SequentialDecision:
+        """Record and return a decision."""
+        self.decision = SequentialDecision(
+            action=action,
+            traffic_split=dict(traffic_split),
+            winner=winner,
+            p_value=self.p_value,
+            effect=effect,
+            confidence_sequence=confidence_sequence,
+            sample_sizes=sample_sizes,
+            max_sample_size=self.max_sample_size,
+        )
+        return self.decision
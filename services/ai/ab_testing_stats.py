@@ -0,0 +1,98 @@
+"""
+Streaming Sufficient Statistics for A/B Experiments
+
+Keeps what the fixed-horizon tests need per variant without holding on to
+the observations:
+
+- Welford running mean and sum of squared deviations for numeric metrics
+  (continuous, count, and binary as 0/1), so means, variances, t-tests and
+  Welch's test come from a handful of numbers per variant
+- Category histograms for binary and categorical metrics, which are the
+  chi-squared contingency table
+- merge() combines two summaries exactly (Chan et al.'s parallel update), so
+  batches and per-segment summaries from columnar storage roll up without
+  rescanning observations
+"""
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, Union
+
+import numpy as np
+
+MetricValue = Union[float, int, str, bool]
+
+
+@dataclass
+class VariantStats:
+    """Running sufficient statistics for one experiment variant."""
+
+    count: int = 0
+    mean: float = 0.0
+    m2: float = 0.0  # Sum of squared deviations from the mean
+    categories: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def variance(self) -> float:
+        """Sample variance (ddof=1), 0.0 below two observations."""
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def std(self) -> float:
+        """Sample standard deviation (ddof=1)."""
+        return float(np.sqrt(self.variance))
+
+    def update(self, value: MetricValue) -> None:
+        """Add one validated metric value."""
+        if isinstance(value, str):
+            self.count += 1
+            self.categories[value] = self.categories.get(value, 0) + 1
+            return
+        if isinstance(value, bool):
+            key = str(value)
+            self.categories[key] = self.categories.get(key, 0) + 1
+        x = float(value)
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (x - self.mean)
+
+    def merge(self, other: 'VariantStats') -> 'VariantStats':
+        """Fold another summary of the same variant into this one."""
+        if other.count:
+            total = self.count + other.count
+            delta = other.mean - self.mean
+            self.mean += delta * other.count / total
+            self.m2 += other.m2 + delta * delta * self.count * other.count / total
+            self.count = total
+        for category, count in other.categories.items():
+            self.categories[category] = self.categories.get(category, 0) + count
+        return self
+
+    @classmethod
+    def from_array(cls, values: np.ndarray) -> 'VariantStats':
+        """Summary of a numeric array, computed vectorized."""
+        values = np.asarray(values, dtype=float)
+        if values.size == 0:
+            return cls()
+        mean = float(values.mean())
+        return cls(count=int(values.size), mean=mean, m2=float(np.square(values - mean).sum()))
+
+    @classmethod
+    def from_values(cls, values: Iterable[MetricValue]) -> 'VariantStats':
+        """Summary of validated metric values of any metric type."""
+        values = list(values)
+        if values and all(isinstance(value, (int, float)) and not isinstance(value, bool) for value in values):
+            return cls.from_array(np.asarray(values, dtype=float))
+        summary = cls()
+        for value in values:
+            summary.update(value)
+        return summary
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert stats to dictionary."""
+        return {
+            'count': self.count,
+            'mean': self.mean,
+            'variance': self.variance,
+            'categories': dict(self.categories),
+        }
@@ -0,0 +1,466 @@
+"""
+Columnar, Append-only Storage for A/B Experiment Data
+
+ParquetStorageBackend keeps each experiment's observations as a sequence of
+Parquet segments on local disk:
+
+- append() only buffers rows column-wise under a short buffer lock, so it
+  is safe to call from the event loop. A background thread writes a segment
+  once segment_rows observations are buffered, writes whatever is buffered
+  every flush_interval seconds, and compacts; close() writes the rest, so a
+  restart loses at most one interval of observations. append_table() ingests
+  a pre-built Arrow table (e.g. a backfill) without going through
+  ExperimentData; like flush() and close() it does file I/O on the calling
+  thread, so async callers run it via asyncio.to_thread
+- Segments are never rewritten in place. Files are named after the range of
+  sequence numbers they cover, segment-<first>-<last>.parquet, and compact()
+  merges runs of small segments into one file written under a temporary
+  name and renamed into place before its inputs are removed. A segment whose
+  range lies inside another one is a leftover of an interrupted compaction
+  and is discarded when the directory is loaded. Readers open the segment
+  files under the lock, so a compaction that removes them mid-read does not
+  pull them out from under the reader
+- count() reads only Parquet footers and variant_stats() reads only the
+  variant and value columns, one segment at a time, so rebuilding an
+  experiment's running statistics never materializes ExperimentData objects
+
+pyarrow is an optional dependency; constructing the backend without it
+raises ImportError.
+"""
+
+import contextlib
+import json
+import logging
+import os
+import re
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+
+from .ab_testing_framework import ExperimentData, StorageBackend
+from .ab_testing_stats import VariantStats
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - optional dependency
+    pa = pc = pq = None
+
+logger = logging.getLogger(__name__)
+
+# Segment Constants
+DEFAULT_SEGMENT_ROWS = 100_000  # Buffered rows per written segment
+DEFAULT_COMPACT_TARGET_ROWS = 1_000_000  # Compaction merges segments up to this size
+DEFAULT_COMPACT_MIN_SEGMENTS = 8  # Small (<= half target) segments that trigger compaction
+DEFAULT_FLUSH_INTERVAL = 10.0  # Seconds buffered rows may wait before being written
+SEGMENT_PATTERN = re.compile(r'^segment-(\d{8})-(\d{8})\.parquet$')
+TMP_SUFFIX = '.tmp'
+
+# Columns filtered on in query()
+FILTER_COLUMNS = ('variant', 'user_id', 'session_id')
+JSON_COLUMNS = ('secondary_metrics', 'user_segments', 'metadata')
+STATS_COLUMNS = ['variant', 'value', 'category', 'value_type']
+
+if pa is not None:
+    SCHEMA = pa.schema([
+        ('variant', pa.string()),
+        ('user_id', pa.string()),
+        ('session_id', pa.string()),
+        ('timestamp', pa.timestamp('us')),
+        ('value', pa.float64()),  # Numeric metric values, bools as 0/1
+        ('category', pa.string()),  # Categorical metric values
+        ('value_type', pa.string()),  # bool, int, float or str
+        ('secondary_metrics', pa.string()),  # JSON
+        ('user_segments', pa.string()),  # JSON
+        ('metadata', pa.string()),  # JSON
+    ])
+else:  # pragma: no cover - optional dependency
+    SCHEMA = None
+
+
+@dataclass
+class Segment:
+    """One Parquet file covering sequence numbers first..last."""
+
+    first: int
+    last: int
+    path: str
+    rows: int
+
+
+def _encode_value(value: Any) -> tuple:
+    if isinstance(value, str):
+        return None, value, 'str'
+    if isinstance(value, bool):
+        return float(value), None, 'bool'
+    if isinstance(value, int):
+        return float(value), None, 'int'
+    return float(value), None, 'float'
+
+
+def _decode_value(value: Optional[float], category: Optional[str], value_type: str) -> Any:
+    if value_type == 'str':
+        return category
+    if value_type == 'bool':
+        return bool(value)
+    if value_type == 'int':
+        return int(value)
+    return value
+
+
+def _encode_json(data: Dict[str, Any]) -> Optional[str]:
+    return json.dumps(data, default=str) if data else None
+
+
+class ParquetStorageBackend(StorageBackend):
+    """Append-only Parquet segment storage with compaction."""
+
+    def __init__(
+        self,
+        root_dir: str,
+        segment_rows: int = DEFAULT_SEGMENT_ROWS,
+        compact_target_rows: int = DEFAULT_COMPACT_TARGET_ROWS,
+        compact_min_segments: int = DEFAULT_COMPACT_MIN_SEGMENTS,
+        flush_interval: Optional[float] = DEFAULT_FLUSH_INTERVAL,
+    ) -> None:
+        """
+        Args:
+            root_dir: Directory holding one sub-directory of segments per experiment
+            segment_rows: Buffered rows per experiment that trigger a segment write
+            compact_target_rows: Maximum rows of a segment written by compaction
+            compact_min_segments: Small segments that trigger compaction
+            flush_interval: Seconds between background flushes of partial
+                segments; None disables them, leaving flush() and close() to
+                the caller. Full segments are always written in the background
+        """
+        if pa is None:
+            raise ImportError('ParquetStorageBackend requires pyarrow')
+        self.root_dir = root_dir
+        self.segment_rows = segment_rows
+        self.compact_target_rows = compact_target_rows
+        self.compact_min_segments = compact_min_segments
+        self.flush_interval = flush_interval
+
+        # Held for file I/O; readers take _buffer_lock inside it, never the reverse
+        self._lock = threading.RLock()
+        # Held only while touching _buffers, so append() never waits on a write
+        self._buffer_lock = threading.Lock()
+        self._buffers: Dict[str, Dict[str, list]] = {}
+        self._segments: Dict[str, List[Segment]] = {}
+        self._closed = threading.Event()
+        self._segment_full = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
+        os.makedirs(root_dir, exist_ok=True)
+
+    # Writes
+
+    def append(self, experiment_id: str, data: ExperimentData) -> None:
+        value, category, value_type = _encode_value(data.primary_metric_value)
+        with self._buffer_lock:
+            buffer = self._buffers.get(experiment_id)
+            if buffer is None:
+                self._experiment_dir(experiment_id)  # Validates the id
+                buffer = self._buffers[experiment_id] = {name: [] for name in SCHEMA.names}
+                self._start_flusher()
+            buffer['variant'].append(data.variant)
+            buffer['user_id'].append(data.user_id)
+            buffer['session_id'].append(data.session_id)
+            buffer['timestamp'].append(data.timestamp)
+            buffer['value'].append(value)
+            buffer['category'].append(category)
+            buffer['value_type'].append(value_type)
+            buffer['secondary_metrics'].append(_encode_json(data.secondary_metrics))
+            buffer['user_segments'].append(_encode_json(data.user_segments))
+            buffer['metadata'].append(_encode_json(data.metadata))
+            if len(buffer['variant']) >= self.segment_rows:
+                self._segment_full.set()
+
+    def append_table(self, experiment_id: str, table: 'pa.Table') -> None:
+        """Append a pre-built table; missing columns are stored as nulls."""
+        columns = [
+            table[name].cast(field.type) if name in table.column_names
+            else pa.nulls(table.num_rows, field.type)
+            for name, field in zip(SCHEMA.names, SCHEMA)
+        ]
+        table = pa.Table.from_arrays(columns, schema=SCHEMA)
+        with self._lock:
+            # Buffered rows were appended first and stay first
+            self._flush_buffer(experiment_id)
+            for offset in range(0, table.num_rows, self.segment_rows):
+                self._write_segment(experiment_id, table.slice(offset, self.segment_rows))
+            self._maybe_compact(experiment_id)
+
+    def flush(self) -> None:
+        """Write every buffered row to a segment."""
+        with self._lock:
+            for experiment_id in self._buffered_experiments():
+                self._flush_buffer(experiment_id)
+
+    def close(self) -> None:
+        """Stop the background flusher and write every buffered row."""
+        self._closed.set()
+        self._segment_full.set()  # Wakes a flusher waiting without a timeout
+        if self._flusher is not None:
+            self._flusher.join()
+            self._flusher = None
+        self.flush()
+
+    def compact(self, experiment_id: str) -> int:
+        """Merge runs of small segments; returns how many segments were merged."""
+        with self._lock:
+            merged = 0
+            group: List[Segment] = []
+            for segment in self._load_segments(experiment_id) + [None]:
+                small = segment is not None and self._is_small(segment)
+                if small and sum(s.rows for s in group) + segment.rows <= self.compact_target_rows:
+                    group.append(segment)
+                    continue
+                if len(group) > 1:
+                    self._merge_segments(experiment_id, group)
+                    merged += len(group)
+                group = [segment] if small else []
+            return merged
+
+    # Reads
+
+    def query(self, experiment_id: str, filters: Optional[Dict[str, Any]] = None) -> List[ExperimentData]:
+        filters = {key: value for key, value in (filters or {}).items() if key in FILTER_COLUMNS}
+        results = []
+        for table in self._tables(experiment_id):
+            for name, value in filters.items():
+                table = table.filter(pc.equal(table[name], value))
+            results.extend(self._to_experiment_data(experiment_id, table))
+        return results
+
+    def count(self, experiment_id: str) -> int:
+        with self._lock:
+            with self._buffer_lock:
+                buffered = len(self._buffers.get(experiment_id, {}).get('variant', ()))
+            return buffered + sum(segment.rows for segment in self._load_segments(experiment_id))
+
+    def variant_stats(self, experiment_id: str) -> Dict[str, VariantStats]:
+        """Per-variant statistics from the variant and value columns only."""
+        merged: Dict[str, VariantStats] = {}
+        for table in self._tables(experiment_id, columns=STATS_COLUMNS):
+            if table.num_rows == 0:
+                continue
+            # Keep variants in order of first appearance, like the framework
+            for variant in pc.unique(table['variant']).to_pylist():
+                merged.setdefault(variant, VariantStats())
+            for variant, summary in self._table_stats(table).items():
+                merged[variant].merge(summary)
+        return merged
+
+    # Internals
+
+    def _experiment_dir(self, experiment_id: str) -> str:
+        if not experiment_id or os.sep in experiment_id or experiment_id in ('.', '..'):
+            raise ValueError(f'Invalid experiment id for file storage: {experiment_id!r}')
+        return os.path.join(self.root_dir, experiment_id)
+
+    def _load_segments(self, experiment_id: str) -> List[Segment]:
+        segments = self._segments.get(experiment_id)
+        if segments is not None:
+            return segments
+
+        directory = self._experiment_dir(experiment_id)
+        found = []
+        if os.path.isdir(directory):
+            for name in os.listdir(directory):
+                path = os.path.join(directory, name)
+                if name.endswith(TMP_SUFFIX):
+                    os.remove(path)  # Unfinished write
+                    continue
+                match = SEGMENT_PATTERN.match(name)
+                if match:
+                    found.append((int(match.group(1)), int(match.group(2)), path))
+
+        segments = []
+        for first, last, path in sorted(found, key=lambda item: (item[0], -item[1])):
+            if segments and last <= segments[-1].last:
+                # Inputs of a compaction that finished writing its output
+                logger.info('Removing compacted segment %s', path)
+                os.remove(path)
+                continue
+            segments.append(Segment(first, last, path, pq.read_metadata(path).num_rows))
+        self._segments[experiment_id] = segments
+        return segments
+
+    def _segment_path(self, experiment_id: str, first: int, last: int) -> str:
+        return os.path.join(self._experiment_dir(experiment_id), f'segment-{first:08d}-{last:08d}.parquet')
+
+    def _write_table(self, table: 'pa.Table', path: str) -> None:
+        tmp_path = path + TMP_SUFFIX
+        pq.write_table(table, tmp_path)
+        os.replace(tmp_path, path)
+
+    def _write_segment(self, experiment_id: str, table: 'pa.Table') -> None:
+        segments = self._load_segments(experiment_id)
+        sequence = segments[-1].last + 1 if segments else 0
+        os.makedirs(self._experiment_dir(experiment_id), exist_ok=True)
+        path = self._segment_path(experiment_id, sequence, sequence)
+        self._write_table(table, path)
+        segments.append(Segment(sequence, sequence, path, table.num_rows))
+
+    def _buffered_experiments(self) -> List[str]:
+        with self._buffer_lock:
+            return list(self._buffers)
+
+    def _flush_buffer(self, experiment_id: str, full_segments_only: bool = False) -> None:
+        """Write buffered rows in segment_rows chunks, then compact.
+
+        With full_segments_only a trailing partial segment stays buffered, so
+        segment boundaries do not depend on when the flusher thread wakes up.
+        """
+        with self._lock:
+            with self._buffer_lock:
+                buffer = self._buffers.get(experiment_id)
+                rows = len(buffer['variant']) if buffer else 0
+                if full_segments_only:
+                    rows -= rows % self.segment_rows
+                if not rows:
+                    return
+                # Taken under _lock, so readers never see rows in neither place
+                taken = {name: column[:rows] for name, column in buffer.items()}
+                if rows == len(buffer['variant']):
+                    del self._buffers[experiment_id]
+                else:
+                    self._buffers[experiment_id] = {name: column[rows:] for name, column in buffer.items()}
+
+            written = 0
+            try:
+                table = pa.Table.from_pydict(taken, schema=SCHEMA)
+                while written < rows:
+                    self._write_segment(experiment_id, table.slice(written, self.segment_rows))
+                    written += self.segment_rows
+            except Exception:
+                # Unwritten rows go back in front, so a failed write is retried by the next flush
+                with self._buffer_lock:
+                    buffer = self._buffers.setdefault(experiment_id, {name: [] for name in SCHEMA.names})
+                    for name in SCHEMA.names:
+                        buffer[name][:0] = taken[name][written:]
+                raise
+            self._maybe_compact(experiment_id)
+
+    def _start_flusher(self) -> None:
+        if self._flusher is not None or self._closed.is_set():
+            return
+        self._flusher = threading.Thread(
+            target=self._flush_periodically, name='ab-testing-parquet-flush', daemon=True)
+        self._flusher.start()
+
+    def _flush_periodically(self) -> None:
+        while True:
+            # Woken early by append() once a segment is full; a timeout means the interval passed
+            segment_full = self._segment_full.wait(self.flush_interval)
+            self._segment_full.clear()
+            if self._closed.is_set():
+                return
+            try:
+                for experiment_id in self._buffered_experiments():
+                    self._flush_buffer(experiment_id, full_segments_only=segment_full)
+            except Exception as e:
+                logger.error('Failed to flush buffered A/B test observations: %s', e)
+
+    def _is_small(self, segment: Segment) -> bool:
+        # Merged groups end up above half the target, so they are not merged again
+        return segment.rows <= self.compact_target_rows // 2
+
+    def _maybe_compact(self, experiment_id: str) -> None:
+        small = [s for s in self._load_segments(experiment_id) if self._is_small(s)]
+        if len(small) >= self.compact_min_segments:
+            self.compact(experiment_id)
+
+    def _merge_segments(self, experiment_id: str, group: List[Segment]) -> None:
+        table = pa.concat_tables([pq.read_table(segment.path) for segment in group])
+        path = self._segment_path(experiment_id, group[0].first, group[-1].last)
+        self._write_table(table, path)
+        for segment in group:
+            os.remove(segment.path)
+
+        segments = self._segments[experiment_id]
+        index = segments.index(group[0])
+        segments[index:index + len(group)] = [Segment(group[0].first, group[-1].last, path, table.num_rows)]
+
+    def _tables(self, experiment_id: str, columns: Optional[List[str]] = None) -> Iterator['pa.Table']:
+        """Segment tables in append order, then the buffered rows."""
+        with contextlib.ExitStack() as stack:
+            with self._lock:
+                # An open file outlives its removal by a concurrent compaction
+                files = [
+                    stack.enter_context(open(segment.path, 'rb'))
+                    for segment in self._load_segments(experiment_id)
+                ]
+                with self._buffer_lock:
+                    buffer = self._buffers.get(experiment_id)
+                    buffered = pa.Table.from_pydict(buffer, schema=SCHEMA) if buffer else None
+            for file in files:
+                yield pq.read_table(file, columns=columns)
+        if buffered is not None:
+            yield buffered.select(columns) if columns else buffered
+
+    def _table_stats(self, table: 'pa.Table') -> Dict[str, VariantStats]:
+        # Rows without a value_type decode as float, see _decode_value
+        value_types = pc.fill_null(table['value_type'], 'float')
+        distinct = pc.unique(value_types).to_pylist()
+        if len(distinct) == 1:
+            return self._typed_table_stats(table, distinct[0])
+
+        summaries: Dict[str, VariantStats] = {}
+        for value_type in distinct:
+            rows = table.filter(pc.equal(value_types, value_type))
+            for variant, summary in self._typed_table_stats(rows, value_type).items():
+                summaries.setdefault(variant, VariantStats()).merge(summary)
+        return summaries
+
+    def _typed_table_stats(self, table: 'pa.Table', value_type: str) -> Dict[str, VariantStats]:
+        if value_type == 'str':
+            counts = table.group_by(['variant', 'category']).aggregate([('category', 'count')])
+            summaries: Dict[str, VariantStats] = {}
+            for row in counts.to_pylist():
+                summary = summaries.setdefault(row['variant'], VariantStats())
+                summary.count += row['category_count']
+                summary.categories[row['category']] = row['category_count']
+            return summaries
+
+        aggregated = table.group_by('variant').aggregate([
+            ('value', 'count'),
+            ('value', 'mean'),
+            ('value', 'variance', pc.VarianceOptions(ddof=0)),
+            ('value', 'sum'),
+        ])
+        summaries = {}
+        for row in aggregated.to_pylist():
+            count = row['value_count']
+            summary = VariantStats(count=count, mean=row['value_mean'], m2=row['value_variance'] * count)
+            if value_type == 'bool':
+                true_count = int(row['value_sum'])
+                summary.categories = {
+                    key: n for key, n in (('True', true_count), ('False', count - true_count)) if n
+                }
+            summaries[row['variant']] = summary
+        return summaries
+
+    def _to_experiment_data(self, experiment_id: str, table: 'pa.Table') -> List[ExperimentData]:
+        columns = {name: table[name].to_pylist() for name in table.column_names}
+        decoded_json = {
+            name: [json.loads(item) if item else {} for item in columns[name]]
+            for name in JSON_COLUMNS
+        }
+        return [
+            ExperimentData(
+                experiment_id=experiment_id,
+                variant=columns['variant'][i],
+                user_id=columns['user_id'][i],
+                session_id=columns['session_id'][i],
+                timestamp=columns['timestamp'][i] or datetime.min,
+                primary_metric_value=_decode_value(
+                    columns['value'][i], columns['category'][i], columns['value_type'][i]),
+                secondary_metrics=decoded_json['secondary_metrics'][i],
+                user_segments=decoded_json['user_segments'][i],
+                metadata=decoded_json['metadata'][i],
+            )
+            for i in range(table.num_rows)
+        ]
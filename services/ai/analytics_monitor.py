@@ -21,6 +21,8 @@ logger = get_logger(__name__)
 class MetricType(Enum):
     """Types of metrics to track."""
     ERROR = 'error'
+    PERFORMANCE = 'performance'
+    EXPERIMENT = 'experiment'
 
 
 class AlertLevel(Enum):
@@ -32,7 +32,7 @@ from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 from uuid import UUID, uuid4
 from google.generativeai.types import HarmBlockThreshold, HarmCategory
 from sqlalchemy.ext.asyncio import AsyncSession
-from config.ai_config import get_ai_model
+from config.ai_config import ai_config, get_ai_model
 from config.logging_config import get_logger
 from core.exceptions import BusinessLogicException, DatabaseException, IntegrationException, NotFoundException
 from database.user import User
@@ -44,6 +44,7 @@ from .exceptions import CircuitBreakerException, ModelUnavailableException
 from .safety_manager import SafetyDecision, ContentType
 from .instruction_integration import get_instruction_manager
 from .performance_optimizer import get_performance_optimizer
+from .providers.base import ProviderConfig, ProviderTimeoutError
 from .prompt_templates import PromptTemplates
 from .quality_monitor import get_quality_monitor
 from .response_cache import get_ai_cache
@@ -106,18 +107,7 @@ class ComplianceAssistant:
             'prompt_length', 0) if context else 0, 'framework': context.get
             ('framework') if context else None, 'business_context': context
             .get('business_context', {}) if context else {}}
-        if task_type in ['help', 'guidance']:
-            complexity = 'simple'
-            prefer_speed = True
-        elif task_type in ['analysis', 'assessment', 'gap_analysis']:
-            complexity = 'complex'
-            prefer_speed = False
-        elif task_type in ['recommendations', 'followup']:
-            complexity = 'medium'
-            prefer_speed = False
-        else:
-            complexity = 'auto'
-            prefer_speed = False
+        complexity, prefer_speed = self._task_complexity(task_type)
         try:
             model, instruction_id = (self.instruction_manager.
                 get_model_with_instruction(instruction_type=task_type,
@@ -148,6 +138,59 @@ class ComplianceAssistant:
             raise ModelUnavailableException(model_name='unknown', reason=
                 f'Model selection failed: {e!s}')
 
+    @staticmethod
+    def _task_complexity(task_type: str) ->Tuple[str, bool]:
+        """Task complexity and speed preference used for model selection."""
+        if task_type in ['help', 'guidance']:
+            return 'simple', True
+        if task_type in ['analysis', 'assessment', 'gap_analysis']:
+            return 'complex', False
+        if task_type in ['recommendations', 'followup']:
+            return 'medium', False
+        return 'auto', False
+
+    def _get_task_provider_config(self, task_type: str, context: Optional[
+        Dict[str, Any]]=None, tools: Optional[List[Dict[str, Any]]]=None,
+        cached_content=None, **overrides: Any) ->Tuple[ProviderConfig, str]:
+        """
+        Get a provider request config for the task, selected like _get_task_appropriate_model
+
+        Args:
+            task_type: Type of task (help, analysis, recommendations, etc.)
+            context: Additional context for model selection
+            tools: List of tool schemas for function calling
+            cached_content: Optional Google CachedContent for improved performance
+            **overrides: Other ProviderConfig fields (temperature, max_tokens, ...)
+
+        Returns:
+            Tuple of (ProviderConfig, instruction_id)
+
+        Raises:
+            ModelUnavailableException: If no models are available
+        """
+        complexity, prefer_speed = self._task_complexity(task_type)
+        framework = context.get('framework') if context else None
+        business_profile = context.get('business_context', {}
+            ) if context else None
+        instruction_id, system_instruction = (self.instruction_manager.
+            get_instruction_with_monitoring(instruction_type=task_type,
+            framework=framework, business_profile=business_profile,
+            task_complexity=complexity))
+        model_name = ai_config.get_optimal_model(complexity, prefer_speed,
+            {'framework': framework, 'task_type': task_type,
+            'business_context': business_profile}).value
+        if not self.circuit_breaker.is_model_available(model_name):
+            logger.warning('Model %s unavailable, trying fallback' %
+                model_name)
+            model_name = ai_config.default_model
+            if not self.circuit_breaker.is_model_available(model_name):
+                raise ModelUnavailableException(model_name=model_name,
+                    reason='All models unavailable due to circuit breaker')
+            system_instruction, instruction_id = None, 'fallback_default'
+        return ProviderConfig(model_name=model_name, system_instruction=
+            system_instruction, tools=tools, cached_content=cached_content,
+            **overrides), instruction_id
+
     async def _get_cached_content_manager(self):
         """Initialize and return the cached content manager."""
         if self.cached_content_manager is None:
@@ -401,8 +444,9 @@ class ComplianceAssistant:
                 'processing_time_ms': 1000, 'optimized': False}
 
     async def _generate_gemini_response(self, prompt: str, context:
-        Optional[Dict[str, Any]]=None) ->str:
-        """Sends a prompt to the Gemini model and returns the text response with optimized caching and performance."""
+        Optional[Dict[str, Any]]=None, tools: Optional[List[Dict[str, Any]]
+        ]=None) ->str:
+        """Sends a prompt to the Gemini model (with any function calling tools) and returns the text response with optimized caching and performance."""
         try:
             if not self.ai_cache:
                 self.ai_cache = await get_ai_cache()
@@ -426,16 +470,6 @@ class ComplianceAssistant:
             except asyncio.TimeoutError:
                 logger.debug(
                     'Cache check timed out, proceeding with generation')
-            try:
-                optimization_task = asyncio.create_task(self.
-                    performance_optimizer.optimize_ai_request(prompt,
-                    safe_context, priority))
-                optimized_prompt, optimization_metadata = (await asyncio.
-                    wait_for(optimization_task, timeout=2.0))
-            except asyncio.TimeoutError:
-                logger.warning('Prompt optimization timed out, using original')
-                optimized_prompt = prompt
-                optimization_metadata = {'optimized': False, 'timeout': True}
             await self.analytics_monitor.record_metric(MetricType.CACHE,
                 'cache_miss', 1, metadata={'fast_path': True})
             try:
@@ -443,56 +477,47 @@ class ComplianceAssistant:
                     apply_rate_limiting(), timeout=1.0)
             except asyncio.TimeoutError:
                 logger.warning('Rate limiting check timed out')
+            timeout_seconds = safe_context.get('timeout', 8.0)
             try:
-                model, instruction_id = self._get_task_appropriate_model(
-                    task_type='general', context=safe_context)
-                generation_config = {'temperature': 0.3,
-                    'max_output_tokens': 800, 'top_p': 0.8, 'top_k': 20}
+                # Identical concurrent requests share one provider call
+                provider_config, instruction_id = (self.
+                    _get_task_provider_config(task_type='general', context=
+                    safe_context, tools=tools,
+                    temperature=0.3, max_tokens=800, safety_settings=self.
+                    safety_settings, timeout=timeout_seconds))
                 start_time = datetime.now(timezone.utc)
-                generation_task = asyncio.create_task(asyncio.to_thread(
-                    model.generate_content, optimized_prompt,
-                    safety_settings=self.safety_settings, generation_config
-                    =generation_config))
-                timeout_seconds = safe_context.get('timeout', 8.0)
-                response = await asyncio.wait_for(generation_task, timeout=
+                provider_response = await asyncio.wait_for(self.
+                    performance_optimizer.execute_request(prompt,
+                    provider_config, safe_context, priority), timeout=
                     timeout_seconds)
                 end_time = datetime.now(timezone.utc)
                 response_time = (end_time - start_time).total_seconds()
-                try:
-                    response_text = self._extract_response_text(response)
-                except Exception as extract_error:
-                    logger.error('Response extraction failed: %s' %
-                        extract_error)
-                    response_text = self._get_fallback_response_text(
-                        optimized_prompt, safe_context)
+                response_text = (provider_response.text or self.
+                    _get_fallback_response_text(prompt, safe_context))
                 logger.info('AI response generated in %ss' % response_time)
-                estimated_tokens = len(optimized_prompt) // 4 + len(
-                    response_text) // 4
-                if hasattr(self.performance_optimizer,
-                    'update_performance_metrics'):
-                    self.performance_optimizer.update_performance_metrics(
-                        response_time, estimated_tokens)
+                estimated_tokens = provider_response.tokens_used
+                optimization_metadata = {'optimized': True}
                 asyncio.create_task(self._record_ai_analytics(response_time,
                     estimated_tokens, safe_context, optimization_metadata))
                 cache_metadata = {'response_time_ms': int(response_time *
                     1000), 'prompt_length': len(prompt), 'response_length':
-                    len(response_text), 'model': 'gemini', 'optimized':
-                    True, 'generation_config': generation_config}
+                    len(response_text), 'model': provider_response.
+                    model_used, 'optimized': True, 'generation_config': {
+                    'temperature': provider_config.temperature,
+                    'max_output_tokens': provider_config.max_tokens}}
                 asyncio.create_task(self.ai_cache.cache_response(prompt,
                     response_text, safe_context, cache_metadata))
                 response_id = (
                     f'resp_{int(datetime.now(timezone.utc).timestamp() * 1000)}',
                     )
                 asyncio.create_task(self._assess_response_quality(
-                    response_id, response_text, optimized_prompt, safe_context),
-                    )
+                    response_id, response_text, prompt, safe_context))
                 return response_text
-            except asyncio.TimeoutError:
+            except (asyncio.TimeoutError, ProviderTimeoutError):
                 logger.warning(
                     'AI generation timed out after %ss, using fallback' %
                     timeout_seconds)
-                return self._get_fallback_response_text(optimized_prompt,
-                    safe_context)
+                return self._get_fallback_response_text(prompt, safe_context)
             finally:
                 if hasattr(self.performance_optimizer, 'release_rate_limit'):
                     self.performance_optimizer.release_rate_limit()
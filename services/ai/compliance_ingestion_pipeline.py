@@ -1,17 +1,29 @@
 """
 Enterprise-grade Compliance Data Ingestion Pipeline for Neo4j GraphRAG
 Handles ingestion of enhanced compliance manifests with full production safeguards
+
+Streaming mode (ingest_compliance_manifest_streaming) never holds the whole
+manifest in memory:
+- Items are yielded by an incremental JSON parser (ijson when installed,
+  a stdlib raw_decode scanner otherwise)
+- A bounded queue lets batch N+1 be parsed and validated while batch N is
+  being written, with a configurable number of concurrent write transactions
+- Nodes whose stored data_hash matches are skipped, so re-ingestion only
+  writes deltas
+- Throughput (items/sec) and peak RSS are reported in the metrics
 """
 
 import json
 import asyncio
 import hashlib
-from typing import Dict, List, Any, Optional, Tuple, Set
+from typing import Dict, List, Any, Iterator, Optional, Tuple, Set, Union
 from pathlib import Path
 from datetime import datetime, timezone
 from dataclasses import dataclass, field
 from enum import Enum
+import itertools
 import logging
+import sys
 import traceback
 
 from neo4j import AsyncGraphDatabase, AsyncSession
@@ -26,12 +38,99 @@ from tenacity import (
     before_sleep_log,
 )
 
+from services.caching.graph_version import get_graph_version
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
 # Production logging configuration
 logging.basicConfig(
     level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
 )
 logger = logging.getLogger(__name__)
 
+# Streaming Constants
+STREAM_READ_SIZE = 64 * 1024  # Bytes read per refill of the parser buffer
+DEFAULT_WRITE_CONCURRENCY = 2  # Concurrent write transactions
+DEFAULT_MAX_PENDING_BATCHES = 4  # Validated batches buffered ahead of the writers
+
+# Fields added at ingest time; excluded from data_hash so unchanged items hash equal
+VOLATILE_FIELDS = frozenset({"ingested_at", "data_hash", "data_quality", "quality_score"})
+
+REGULATION_MERGE_QUERY = """
+UNWIND $batch AS item
+MERGE (r:Regulation {id: item.id})
+ON CREATE SET
+    r.created_at = datetime(),
+    r.nodes_created = true
+ON MATCH SET
+    r.updated_at = datetime(),
+    r.nodes_updated = true
+SET r += item,
+    r.last_ingested = datetime()
+WITH r, item
+
+// Create industry relationships
+FOREACH (industry IN
+    CASE
+        WHEN item.business_triggers IS NOT NULL
+        AND item.business_triggers.industry IS NOT NULL
+        THEN [item.business_triggers.industry]
+        ELSE []
+    END |
+    MERGE (i:Industry {name: industry})
+    MERGE (r)-[:APPLIES_TO]->(i)
+)
+
+// Create jurisdiction relationships
+FOREACH (jurisdiction IN
+    CASE
+        WHEN item.business_triggers IS NOT NULL
+        AND item.business_triggers.jurisdiction IS NOT NULL
+        THEN [item.business_triggers.jurisdiction]
+        ELSE []
+    END |
+    MERGE (j:Jurisdiction {name: jurisdiction})
+    MERGE (r)-[:GOVERNED_BY]->(j)
+)
+
+// Create control relationships
+FOREACH (control IN
+    CASE
+        WHEN item.suggested_controls IS NOT NULL
+        THEN item.suggested_controls
+        ELSE []
+    END |
+    MERGE (c:Control {name: control})
+    MERGE (r)-[:SUGGESTS_CONTROL]->(c)
+)
+
+// Create tag relationships
+FOREACH (tag IN item.tags |
+    MERGE (t:Tag {name: tag})
+    MERGE (r)-[:TAGGED_WITH]->(t)
+)
+
+RETURN r.id as id,
+       r.nodes_created as created,
+       r.nodes_updated as updated
+"""
+
+# Items whose stored node already carries the same content hash
+UNCHANGED_REGULATIONS_QUERY = """
+UNWIND $items AS item
+MATCH (r:Regulation {id: item.id})
+WHERE r.data_hash = item.data_hash
+RETURN r.id as id
+"""
+
 
 class IngestionStatus(Enum):
     """Ingestion status tracking"""
@@ -69,6 +168,8 @@ class IngestionMetrics:
     errors: List[Dict[str, Any]] = field(default_factory=list)
     warnings: List[str] = field(default_factory=list)
     data_quality_scores: Dict[str, float] = field(default_factory=dict)
+    nodes_unchanged: int = 0
+    peak_rss_mb: Optional[float] = None
 
     @property
     def success_rate(self) -> float:
@@ -84,6 +185,14 @@ class IngestionMetrics:
             return (self.end_time - self.start_time).total_seconds()
         return None
 
+    @property
+    def items_per_second(self) -> Optional[float]:
+        """Calculate throughput over all items read"""
+        duration = self.duration_seconds
+        if duration:
+            return self.total_items / duration
+        return None
+
     def to_dict(self) -> Dict[str, Any]:
         """Convert to dictionary for logging/storage"""
         return {
@@ -94,20 +203,175 @@ class IngestionMetrics:
             "relationships_created": self.relationships_created,
             "nodes_created": self.nodes_created,
             "nodes_updated": self.nodes_updated,
+            "nodes_unchanged": self.nodes_unchanged,
             "success_rate": self.success_rate,
             "duration_seconds": self.duration_seconds,
+            "items_per_second": self.items_per_second,
+            "peak_rss_mb": self.peak_rss_mb,
             "start_time": self.start_time.isoformat(),
             "end_time": self.end_time.isoformat() if self.end_time else None,
             "error_count": len(self.errors),
             "warning_count": len(self.warnings),
             "data_quality_avg": (
-                np.mean(list(self.data_quality_scores.values()))
+                float(np.mean(list(self.data_quality_scores.values())))
                 if self.data_quality_scores
-                else 0,
+                else 0
             ),
         }
 
 
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of this process in MB, if the platform reports it"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+class _ManifestItemStream:
+    """
+    Incremental reader for the item array of a JSON manifest.
+
+    Only the current item and the unparsed tail of the last read are held in
+    memory. Values outside the item array are decoded and discarded one at a
+    time.
+    """
+
+    _WHITESPACE = " \t\n\r"
+
+    def __init__(self, f, read_size: int = STREAM_READ_SIZE) -> None:
+        self._file = f
+        self._read_size = read_size
+        self._decoder = json.JSONDecoder()
+        self._buffer = ""
+        self._pos = 0
+        self._eof = False
+
+    def _fill(self) -> None:
+        # Read at least as much as is pending so re-decoding a large value
+        # stays linear in its size
+        chunk = self._file.read(max(self._read_size, len(self._buffer) - self._pos))
+        if not chunk:
+            self._eof = True
+        self._buffer = self._buffer[self._pos :] + chunk
+        self._pos = 0
+
+    def _peek(self) -> str:
+        while True:
+            while self._pos < len(self._buffer) and self._buffer[self._pos] in self._WHITESPACE:
+                self._pos += 1
+            if self._pos < len(self._buffer) or self._eof:
+                return self._buffer[self._pos : self._pos + 1]
+            self._fill()
+
+    def _expect(self, expected: str) -> str:
+        char = self._peek()
+        if not char or char not in expected:
+            raise ValueError(f"Malformed manifest: expected one of {expected!r}, got {char!r}")
+        self._pos += 1
+        return char
+
+    def _value(self) -> Any:
+        self._peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._pos)
+                # A value ending exactly at the buffer edge (e.g. a number) may continue
+                if end < len(self._buffer) or self._eof:
+                    self._pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self._eof:
+                    raise
+            self._fill()
+
+    def _array_items(self) -> Iterator[Any]:
+        self._expect("[")
+        if self._peek() == "]":
+            self._pos += 1
+            return
+        while True:
+            yield self._value()
+            if self._expect(",]") == "]":
+                return
+
+    def items(self, items_key: str) -> Iterator[Any]:
+        """Yield the elements of the top-level array, or of items_key in a top-level object"""
+        if self._peek() == "[":
+            yield from self._array_items()
+            return
+        self._expect("{")
+        if self._peek() == "}":
+            return
+        while True:
+            key = self._value()
+            self._expect(":")
+            if key == items_key:
+                yield from self._array_items()
+            else:
+                self._value()
+            if self._expect(",}") == "}":
+                return
+
+
+def iter_manifest_items(
+    manifest_path: Union[str, Path],
+    items_key: str = "items",
+    read_size: int = STREAM_READ_SIZE,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Stream items from a manifest without loading the whole file
+
+    Args:
+        manifest_path: Path to manifest JSON
+        items_key: Top-level key holding the item array (ignored for a bare array)
+        read_size: Bytes read per buffer refill
+
+    Yields:
+        Manifest items in file order
+    """
+    if ijson is not None:
+        with open(manifest_path, "rb") as f:
+            head = f.read(1024).lstrip()
+            f.seek(0)
+            prefix = "item" if head.startswith(b"[") else f"{items_key}.item"
+            yield from ijson.items(f, prefix, use_float=True)
+        return
+
+    with open(manifest_path, "r", encoding="utf-8") as f:
+        yield from _ManifestItemStream(f, read_size).items(items_key)
+
+
+async def gather_or_cancel(*aws: Any) -> List[Any]:
+    """
+    Run awaitables concurrently; the first failure cancels the rest
+
+    Unlike asyncio.gather, siblings are not left running when one task
+    raises, so a producer blocked on a full queue cannot outlive its
+    consumers.
+
+    Returns:
+        Results in argument order
+
+    Raises:
+        The first exception raised by any of the awaitables
+    """
+    tasks = [asyncio.ensure_future(aw) for aw in aws]
+    try:
+        await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    for task in tasks:
+        if not task.cancelled() and task.exception() is not None:
+            raise task.exception()
+    return [task.result() for task in tasks]
+
+
 class ComplianceDataValidator(BaseModel):
     """Enterprise-grade validation for compliance data"""
 
@@ -227,6 +491,12 @@ class Neo4jComplianceIngestion:
             logger.error(f"Failed to connect to Neo4j: {e}")
             raise
 
+    async def _bump_graph_version(self, metrics: IngestionMetrics) -> None:
+        """Invalidate graph read caches (GraphRAG retrieval) after any write"""
+        if metrics.nodes_created or metrics.nodes_updated or metrics.relationships_created:
+            version = await (await get_graph_version()).bump()
+            logger.info(f"Compliance graph version is now {version}")
+
     async def create_indexes_and_constraints(self) -> None:
         """
         Create necessary indexes and constraints for optimal performance
@@ -261,20 +531,18 @@ class Neo4jComplianceIngestion:
 
     def _generate_node_hash(self, data: Dict[str, Any]) -> str:
         """
-        Generate deterministic hash for deduplication
+        Generate deterministic content hash for deduplication and delta detection
 
         Args:
             data: Node data
 
         Returns:
-            SHA-256 hash of stable fields
+            SHA-256 hash of all fields except those set at ingest time
         """
         stable_fields = {
-            "id": data.get("id"),
-            "title": data.get("title"),
-            "url": data.get("url"),
+            key: value for key, value in data.items() if key not in VOLATILE_FIELDS
         }
-        stable_string = json.dumps(stable_fields, sort_keys=True)
+        stable_string = json.dumps(stable_fields, sort_keys=True, default=str)
         return hashlib.sha256(stable_string.encode()).hexdigest()
 
     def _assess_data_quality(self, item: Dict[str, Any]) -> Tuple[DataQuality, float]:
@@ -334,27 +602,16 @@ class Neo4jComplianceIngestion:
 
         return quality, score
 
-    @retry(
-        stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=2, max=10),
-        retry=retry_if_exception_type(Neo4jError),
-    )
-    async def _ingest_regulation_batch(
-        self, session: AsyncSession, batch: List[Dict[str, Any]]
-    ) -> int:
+    def _validate_batch(self, batch: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """
-        Ingest a batch of regulations with transaction management
+        Validate a batch and attach ingest metadata, dropping invalid items
 
         Args:
-            session: Neo4j session
-            batch: Batch of regulation data
+            batch: Raw manifest items
 
         Returns:
-            Number of successfully ingested items
+            Validated items ready to write
         """
-        success_count = 0
-
-        # Prepare batch data with validation
         validated_batch = []
         for item in batch:
             try:
@@ -390,71 +647,34 @@ class Neo4jComplianceIngestion:
                     },
                 )
 
-        if not validated_batch:
-            return 0
-
-        # Cypher query for MERGE operation with proper updates
-        merge_query = """
-        UNWIND $batch AS item
-        MERGE (r:Regulation {id: item.id})
-        ON CREATE SET
-            r.created_at = datetime(),
-            r.nodes_created = true
-        ON MATCH SET
-            r.updated_at = datetime(),
-            r.nodes_updated = true
-        SET r += item,
-            r.last_ingested = datetime()
-        WITH r, item
-
-        // Create industry relationships
-        FOREACH (industry IN
-            CASE
-                WHEN item.business_triggers IS NOT NULL
-                AND item.business_triggers.industry IS NOT NULL
-                THEN [item.business_triggers.industry]
-                ELSE []
-            END |
-            MERGE (i:Industry {name: industry})
-            MERGE (r)-[:APPLIES_TO]->(i),
-        )
-
-        // Create jurisdiction relationships
-        FOREACH (jurisdiction IN
-            CASE
-                WHEN item.business_triggers IS NOT NULL
-                AND item.business_triggers.jurisdiction IS NOT NULL
-                THEN [item.business_triggers.jurisdiction]
-                ELSE []
-            END |
-            MERGE (j:Jurisdiction {name: jurisdiction})
-            MERGE (r)-[:GOVERNED_BY]->(j),
-        )
+        return validated_batch
 
-        // Create control relationships
-        FOREACH (control IN
-            CASE
-                WHEN item.suggested_controls IS NOT NULL
-                THEN item.suggested_controls
-                ELSE []
-            END |
-            MERGE (c:Control {name: control})
-            MERGE (r)-[:SUGGESTS_CONTROL]->(c),
-        )
+    @retry(
+        stop=stop_after_attempt(3),
+        wait=wait_exponential(multiplier=1, min=2, max=10),
+        retry=retry_if_exception_type(Neo4jError),
+    )
+    async def _ingest_regulation_batch(
+        self, session: AsyncSession, batch: List[Dict[str, Any]]
+    ) -> int:
+        """
+        Ingest a batch of regulations with transaction management
 
-        // Create tag relationships
-        FOREACH (tag IN item.tags |
-            MERGE (t:Tag {name: tag})
-            MERGE (r)-[:TAGGED_WITH]->(t),
-        )
+        Args:
+            session: Neo4j session
+            batch: Batch of regulation data
 
-        RETURN r.id as id,
-               r.nodes_created as created,
-               r.nodes_updated as updated
+        Returns:
+            Number of successfully ingested items
         """
+        success_count = 0
+        validated_batch = self._validate_batch(batch)
+
+        if not validated_batch:
+            return 0
 
         try:
-            result = await session.run(merge_query, batch=validated_batch)
+            result = await session.run(REGULATION_MERGE_QUERY, batch=validated_batch)
             records = await result.fetch(1000)  # Fetch all records
 
             for record in records:
@@ -572,6 +792,7 @@ class Neo4jComplianceIngestion:
                             logger.error(f"Retry failed for {item.get('id')}: {e}")
 
             self.metrics.end_time = datetime.now(timezone.utc)
+            await self._bump_graph_version(self.metrics)
 
             # Log final metrics
             logger.info(f"Ingestion complete: {self.metrics.to_dict()}")
@@ -599,6 +820,142 @@ class Neo4jComplianceIngestion:
             )
             raise
 
+    async def _write_changed_regulations(
+        self, session: AsyncSession, batch: List[Dict[str, Any]]
+    ) -> Tuple[int, int]:
+        """
+        Write validated items whose content hash differs from the stored node
+
+        The hash check and the MERGE run in one managed write transaction, so a
+        concurrent writer cannot slip in between them.
+
+        Args:
+            session: Neo4j session
+            batch: Validated regulation data
+
+        Returns:
+            Tuple of (written, unchanged) item counts
+        """
+        hashes = [{"id": item["id"], "data_hash": item["data_hash"]} for item in batch]
+
+        async def write(tx) -> Tuple[List[Dict[str, Any]], Set[str]]:
+            result = await tx.run(UNCHANGED_REGULATIONS_QUERY, items=hashes)
+            unchanged = {record["id"] for record in await result.data()}
+            changed = [item for item in batch if item["id"] not in unchanged]
+            if not changed:
+                return [], unchanged
+            result = await tx.run(REGULATION_MERGE_QUERY, batch=changed)
+            return await result.data(), unchanged
+
+        records, unchanged = await session.execute_write(write)
+
+        for record in records:
+            if record["created"]:
+                self.metrics.nodes_created += 1
+            elif record["updated"]:
+                self.metrics.nodes_updated += 1
+            self._processed_ids.add(record["id"])
+        self.metrics.nodes_unchanged += len(unchanged)
+        self._processed_ids.update(unchanged)
+
+        # Count relationships created (approximate)
+        self.metrics.relationships_created += len(records) * 3
+
+        return len(records), len(unchanged)
+
+    async def ingest_compliance_manifest_streaming(
+        self,
+        manifest_path: Path,
+        items_key: str = "items",
+        write_concurrency: int = DEFAULT_WRITE_CONCURRENCY,
+        max_pending_batches: int = DEFAULT_MAX_PENDING_BATCHES,
+    ) -> IngestionMetrics:
+        """
+        Streaming ingestion entry point for manifests too large to load at once
+
+        The manifest is parsed incrementally in a worker thread and each batch
+        is validated while earlier batches are still being written. A bounded
+        queue keeps parsing at most max_pending_batches ahead of the writers,
+        so memory stays flat in the manifest size. Items whose data_hash
+        matches the stored node are not rewritten.
+
+        Args:
+            manifest_path: Path to manifest JSON
+            items_key: Top-level key holding the item array
+            write_concurrency: Number of concurrent write transactions
+            max_pending_batches: Validated batches buffered ahead of the writers
+
+        Returns:
+            IngestionMetrics including items/sec and peak RSS
+        """
+        if write_concurrency < 1:
+            raise ValueError("write_concurrency must be at least 1")
+
+        logger.info(f"Starting streaming ingestion from {manifest_path}")
+        self.metrics = IngestionMetrics()
+        items = iter_manifest_items(manifest_path, items_key)
+        queue: asyncio.Queue = asyncio.Queue(maxsize=max_pending_batches)
+
+        async def produce() -> None:
+            while True:
+                raw_batch = await asyncio.to_thread(
+                    list, itertools.islice(items, self.batch_size),
+                )
+                if not raw_batch:
+                    break
+                self.metrics.total_items += len(raw_batch)
+                # Validation overlaps with the writes already in flight
+                validated_batch = self._validate_batch(raw_batch)
+                if validated_batch:
+                    await queue.put(validated_batch)
+            # On failure the writers are cancelled instead of drained
+            for _ in range(write_concurrency):
+                await queue.put(None)
+
+        async def consume() -> None:
+            async with self.driver.session(database=self.database) as session:
+                while True:
+                    batch = await queue.get()
+                    if batch is None:
+                        return
+                    try:
+                        written, unchanged = await self._write_changed_regulations(
+                            session, batch,
+                        )
+                        self.metrics.successful_items += written + unchanged
+                        logger.info(
+                            f"Batch ingested: {written} written, {unchanged} unchanged",
+                        )
+                    except Exception as e:
+                        logger.error(f"Streaming batch write failed: {e}")
+                        self.metrics.failed_items += len(batch)
+                        self._failed_ids.update(item["id"] for item in batch)
+
+        try:
+            await self.create_indexes_and_constraints()
+            await gather_or_cancel(
+                produce(), *(consume() for _ in range(write_concurrency)),
+            )
+
+            self.metrics.end_time = datetime.now(timezone.utc)
+            self.metrics.peak_rss_mb = peak_rss_mb()
+            await self._bump_graph_version(self.metrics)
+            logger.info(f"Streaming ingestion complete: {self.metrics.to_dict()}")
+            return self.metrics
+
+        except Exception as e:
+            logger.error(f"Critical streaming ingestion error: {e}")
+            self.metrics.end_time = datetime.now(timezone.utc)
+            self.metrics.peak_rss_mb = peak_rss_mb()
+            self.metrics.errors.append(
+                {
+                    "error": str(e),
+                    "traceback": traceback.format_exc(),
+                    "timestamp": datetime.now(timezone.utc).isoformat(),
+                },
+            )
+            raise
+
     async def ingest_relationships(self, relationships_path: Path) -> IngestionMetrics:
         """
         Ingest regulatory relationships from relationships manifest
@@ -664,6 +1021,7 @@ class Neo4jComplianceIngestion:
                             metrics.failed_items += 1
 
             metrics.end_time = datetime.now(timezone.utc)
+            await self._bump_graph_version(metrics)
             logger.info(f"Relationship ingestion complete: {metrics.to_dict()}")
             return metrics
 
@@ -729,6 +1087,7 @@ class Neo4jComplianceIngestion:
                         metrics.failed_items += len(batch)
 
             metrics.end_time = datetime.now(timezone.utc)
+            await self._bump_graph_version(metrics)
             logger.info(f"Enforcement ingestion complete: {metrics.to_dict()}")
             return metrics
 
@@ -0,0 +1,422 @@
+"""
+Write-behind Ledger for AI Usage Records
+
+Keeps Redis and Postgres writes off the AI request path:
+
+- record() puts the usage event on a bounded in-process queue; when the
+  queue is full the caller waits for space (backpressure) instead of the
+  event being dropped
+- A background flusher drains the queue in batches bounded by size and a
+  short time window, sums every counter increment per Redis key
+  (daily/hourly/service/model/user) across the batch and applies them in one
+  MULTI/EXEC pipeline, so a burst of calls for the same service and model
+  costs a handful of commands instead of ~20 per call; the same pipeline
+  maintains the per-day rollup hash read by services.ai.cost_rollups
+- Raw usage records are bulk-inserted into ai_usage_logs with executemany
+- Failed writes are retried with the next batch; the pipeline is
+  transactional and inserts skip existing request_ids, so a retry cannot
+  double count. Schema errors (e.g. ai_usage_logs not migrated yet) drop
+  the records instead of retrying them forever
+- flush() writes everything queued so far (readers call it for
+  read-your-writes); close() drains the queue on shutdown
+"""
+
+import asyncio
+import json
+import logging
+import time
+import uuid
+import weakref
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from services.ai.cost_rollups import ROLLUP_TTL, rollup_fields, rollup_key, rollup_prefixes, service_counter_key
+
+if TYPE_CHECKING:
+    from services.ai.cost_management import AIUsageMetrics
+
+logger = logging.getLogger(__name__)
+
+# Ledger Constants
+DEFAULT_MAX_QUEUE_SIZE = 10000
+DEFAULT_FLUSH_BATCH_SIZE = 500
+DEFAULT_FLUSH_INTERVAL = 0.25  # Longest a record waits before being written
+
+# Counter key TTLs (seconds), unchanged from the per-call writes they replace
+DAILY_TTL = 86400 * 90
+HOURLY_TTL = 86400 * 7
+
+COUNTER_FIELDS = ('total_cost', 'total_requests', 'total_tokens')
+
+RecordWriter = Callable[[List['AIUsageMetrics']], Awaitable[None]]
+# (key, rollup field prefix or None for the plain counter fields, ttl)
+CounterTarget = Tuple[str, Optional[str], int]
+
+USAGE_LOG_INSERT = """
+INSERT INTO ai_usage_logs (
+    request_id, session_id, user_id, service_name, model_name, provider,
+    input_tokens, output_tokens, total_tokens, cost_usd, cost_per_token,
+    response_time_ms, response_quality_score, cache_hit, error_occurred,
+    timestamp, date_key, hour_key, endpoint, metadata
+) VALUES (
+    :request_id, :session_id, NULL, :service_name, :model_name, :provider,
+    :input_tokens, :output_tokens, :total_tokens, :cost_usd, :cost_per_token,
+    :response_time_ms, :response_quality_score, :cache_hit, :error_occurred,
+    :timestamp, :date_key, :hour_key, :endpoint, CAST(:metadata AS JSON)
+)
+ON CONFLICT (request_id) DO NOTHING
+"""
+
+# Write errors no retry can fix (missing table/column, bad SQL), matched by
+# name so both SQLAlchemy wrappers and raw driver errors are recognised
+NON_RETRYABLE_WRITE_ERRORS = frozenset({'ProgrammingError', 'UndefinedTableError', 'UndefinedColumnError'})
+
+_database_unconfigured_logged = False
+
+
+def is_schema_error(error: BaseException) -> bool:
+    """Whether a record write failed in a way that retrying cannot fix."""
+    return any(cls.__name__ in NON_RETRYABLE_WRITE_ERRORS for cls in type(error).__mro__)
+
+
+def usage_counter_keys(usage: 'AIUsageMetrics') -> List[Tuple[str, int]]:
+    """Redis counter hashes (key, ttl) that a usage event increments."""
+    day = usage.timestamp.date()
+    keys = [
+        (f'ai_usage:daily:{day}', DAILY_TTL),
+        (f"ai_usage:hourly:{usage.timestamp.strftime('%Y-%m-%d:%H')}", HOURLY_TTL),
+        (service_counter_key(usage.service_name, day), DAILY_TTL),
+        (f'ai_usage:model:{usage.model_name}:{day}', DAILY_TTL),
+    ]
+    if usage.user_id:
+        keys.append((f'ai_usage:user:{usage.user_id}:{day}', DAILY_TTL))
+    return keys
+
+
+def usage_counter_targets(usage: 'AIUsageMetrics') -> List[CounterTarget]:
+    """Every counter a usage event increments: per-key hashes plus rollup fields."""
+    targets: List[CounterTarget] = [(key, None, ttl) for key, ttl in usage_counter_keys(usage)]
+    day_rollup = rollup_key(usage.timestamp.date())
+    targets.extend((day_rollup, prefix, ROLLUP_TTL) for prefix in rollup_prefixes(usage))
+    return targets
+
+
+def usage_log_row(usage: 'AIUsageMetrics') -> Dict[str, Any]:
+    """Parameters for one ai_usage_logs row."""
+    metadata = dict(usage.metadata)
+    # ai_usage_logs.user_id is a users.id FK and callers pass arbitrary user
+    # references, so the reference is kept in metadata instead
+    if usage.user_id is not None:
+        metadata['user_id'] = str(usage.user_id)
+    return {
+        'request_id': usage.request_id or uuid.uuid4().hex,
+        'session_id': usage.session_id,
+        'service_name': usage.service_name,
+        'model_name': usage.model_name,
+        'provider': usage.provider or 'unknown',
+        'input_tokens': usage.input_tokens,
+        'output_tokens': usage.output_tokens,
+        'total_tokens': usage.total_tokens,
+        'cost_usd': usage.cost_usd,
+        'cost_per_token': usage.cost_per_token,
+        'response_time_ms': usage.response_time_ms,
+        'response_quality_score': usage.response_quality_score,
+        'cache_hit': usage.cache_hit,
+        'error_occurred': usage.error_occurred,
+        'timestamp': usage.timestamp,
+        'date_key': usage.timestamp.date(),
+        'hour_key': usage.timestamp.hour,
+        'endpoint': metadata.get('endpoint'),
+        'metadata': json.dumps(metadata, default=str),
+    }
+
+
+async def insert_usage_records(records: List['AIUsageMetrics']) -> None:
+    """Bulk-insert usage records into ai_usage_logs (one executemany)."""
+    global _database_unconfigured_logged
+    from sqlalchemy import text
+
+    from database.db_setup import get_async_session_maker
+
+    try:
+        session_maker = get_async_session_maker()
+    except OSError as e:
+        # DATABASE_URL not set (local tooling, unit tests): counters still work
+        if not _database_unconfigured_logged:
+            logger.warning('Database not configured, AI usage records are not persisted: %s', e)
+            _database_unconfigured_logged = True
+        return
+    async with session_maker() as session:
+        await session.execute(text(USAGE_LOG_INSERT), [usage_log_row(usage) for usage in records])
+        await session.commit()
+
+
+@dataclass
+class LedgerStats:
+    """Throughput and backpressure counters for the ledger."""
+
+    enqueued: int = 0
+    records_flushed: int = 0
+    batches_flushed: int = 0
+    counter_keys_written: int = 0
+    redis_commands: int = 0
+    enqueue_waits: int = 0
+    enqueue_wait_ms: float = 0.0
+    max_queue_depth: int = 0
+    redis_failures: int = 0
+    record_write_failures: int = 0
+    records_dropped: int = 0
+    last_flush_ms: float = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert stats to dictionary with derived ratios."""
+        return {
+            'enqueued': self.enqueued,
+            'records_flushed': self.records_flushed,
+            'batches_flushed': self.batches_flushed,
+            'counter_keys_written': self.counter_keys_written,
+            'redis_commands': self.redis_commands,
+            'enqueue_waits': self.enqueue_waits,
+            'enqueue_wait_ms': self.enqueue_wait_ms,
+            'max_queue_depth': self.max_queue_depth,
+            'redis_failures': self.redis_failures,
+            'record_write_failures': self.record_write_failures,
+            'records_dropped': self.records_dropped,
+            'last_flush_ms': self.last_flush_ms,
+            'average_batch_size': (
+                self.records_flushed / self.batches_flushed
+                if self.batches_flushed else 0.0
+            ),
+            'commands_per_record': (
+                self.redis_commands / self.records_flushed
+                if self.records_flushed else 0.0
+            ),
+        }
+
+
+class UsageLedger:
+    """Bounded queue plus background batch writer for AI usage events."""
+
+    def __init__(
+        self,
+        redis_client: Any,
+        record_writer: Optional[RecordWriter] = insert_usage_records,
+        max_queue_size: int = DEFAULT_MAX_QUEUE_SIZE,
+        flush_batch_size: int = DEFAULT_FLUSH_BATCH_SIZE,
+        flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+    ) -> None:
+        """
+        Initialize the ledger.
+
+        Args:
+            redis_client: Async Redis client for the real-time counters
+            record_writer: Persists raw records (None to keep counters only)
+            max_queue_size: Queued records before record() applies backpressure
+            flush_batch_size: Most records written per flush
+            flush_interval: Longest a partial batch waits for more records
+        """
+        if flush_batch_size < 1:
+            raise ValueError('flush_batch_size must be at least 1')
+
+        self.redis = redis_client
+        self.record_writer = record_writer
+        self.max_queue_size = max_queue_size
+        self.flush_batch_size = flush_batch_size
+        self.flush_interval = flush_interval
+        self.stats = LedgerStats()
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._has_items: Optional[asyncio.Event] = None
+        self._batch_ready: Optional[asyncio.Event] = None
+        self._write_lock: Optional[asyncio.Lock] = None
+        self._flusher: Optional[asyncio.Task] = None
+        self._closed = False
+        # Writes that failed, retried with the next batch
+        self._retry_increments: Dict[CounterTarget, List[Any]] = {}
+        self._retry_records: List['AIUsageMetrics'] = []
+        self._schema_error_logged = False
+
+    @property
+    def queue_depth(self) -> int:
+        """Records waiting to be written."""
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def _ensure_started(self) -> None:
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+            self._has_items = asyncio.Event()
+            self._batch_ready = asyncio.Event()
+            self._write_lock = asyncio.Lock()
+        if self._flusher is None or self._flusher.done():
+            self._flusher = asyncio.get_running_loop().create_task(self._run())
+
+    async def record(self, usage: 'AIUsageMetrics') -> None:
+        """Queue a usage event, waiting for space if the queue is full."""
+        if self._closed:
+            # Late events during shutdown are written straight through
+            await self._write_batch([usage])
+            return
+        self._ensure_started()
+        self.stats.enqueued += 1
+        if self._queue.full():
+            self.stats.enqueue_waits += 1
+            start = time.perf_counter()
+            await self._queue.put(usage)
+            self.stats.enqueue_wait_ms += (time.perf_counter() - start) * 1000
+        else:
+            self._queue.put_nowait(usage)
+        self._has_items.set()
+        depth = self._queue.qsize()
+        self.stats.max_queue_depth = max(self.stats.max_queue_depth, depth)
+        if depth >= self.flush_batch_size:
+            self._batch_ready.set()
+
+    async def flush(self) -> None:
+        """Write every record queued before this call."""
+        if self._queue is None:
+            if self._retry_records or self._retry_increments:
+                await self._write_batch([])
+            return
+        self._batch_ready.set()
+        async with self._write_lock:
+            # Each batch write also retries earlier failures
+            if self._queue.empty() and (self._retry_records or self._retry_increments):
+                await self._write_batch([])
+            while not self._queue.empty():
+                await self._write_batch(self._take(self.flush_batch_size))
+
+    async def close(self) -> None:
+        """Stop the flusher after draining the queue."""
+        self._closed = True
+        if self._flusher is not None:
+            # Wake the flusher so it sees _closed and returns after its
+            # current write instead of being cancelled mid-batch
+            self._has_items.set()
+            self._batch_ready.set()
+            await self._flusher
+            self._flusher = None
+        await self.flush()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Ledger counters plus current queue depth and pending retries."""
+        return {
+            **self.stats.to_dict(),
+            'queue_depth': self.queue_depth,
+            'max_queue_size': self.max_queue_size,
+            'pending_retry_records': len(self._retry_records),
+            'pending_retry_keys': len({key for key, _, _ in self._retry_increments}),
+        }
+
+    def _take(self, limit: int) -> List['AIUsageMetrics']:
+        batch = []
+        while len(batch) < limit and not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+        return batch
+
+    async def _run(self) -> None:
+        while True:
+            await self._has_items.wait()
+            if self._closed:
+                return
+            if self._queue.qsize() < self.flush_batch_size:
+                # Give the batch a short window to fill. asyncio.wait rather
+                # than wait_for, which can swallow a cancellation that races
+                # with the event on Python < 3.12
+                ready = asyncio.ensure_future(self._batch_ready.wait())
+                try:
+                    await asyncio.wait({ready}, timeout=self.flush_interval)
+                finally:
+                    ready.cancel()
+            # Records are only taken off the queue under the lock, so flush()
+            # never returns while another task holds unwritten records
+            async with self._write_lock:
+                self._batch_ready.clear()
+                batch = self._take(self.flush_batch_size)
+                if self._queue.empty() and not self._closed:
+                    self._has_items.clear()
+                if batch:
+                    await self._write_batch(batch)
+
+    async def _write_batch(self, batch: List['AIUsageMetrics']) -> None:
+        start = time.perf_counter()
+        increments = self._coalesce(batch)
+        if increments and self.redis is not None:
+            await self._write_counters(increments)
+        records = self._retry_records + batch
+        self._retry_records = []
+        if records and self.record_writer is not None:
+            try:
+                await self.record_writer(records)
+            except Exception as e:
+                self.stats.record_write_failures += 1
+                if is_schema_error(e):
+                    # A missing table or column fails every retry the same way
+                    if not self._schema_error_logged:
+                        logger.error('AI usage records cannot be persisted, dropping them until '
+                                     'the schema is migrated: %s', e)
+                        self._schema_error_logged = True
+                    self.stats.records_dropped += len(records)
+                else:
+                    logger.error('Failed to persist %s AI usage records, will retry: %s', len(records), e)
+                    self._retry_records = records[-self.max_queue_size:]
+                    self.stats.records_dropped += len(records) - len(self._retry_records)
+        self.stats.records_flushed += len(batch)
+        if batch:
+            self.stats.batches_flushed += 1
+        self.stats.last_flush_ms = (time.perf_counter() - start) * 1000
+
+    def _coalesce(self, batch: List['AIUsageMetrics']) -> Dict[CounterTarget, List[Any]]:
+        """Sum cost/requests/tokens per counter, including pending retries."""
+        increments = self._retry_increments
+        self._retry_increments = {}
+        for usage in batch:
+            for target in usage_counter_targets(usage):
+                totals = increments.get(target)
+                if totals is None:
+                    totals = increments[target] = [Decimal('0'), 0, 0]
+                totals[0] += usage.cost_usd
+                totals[1] += usage.request_count
+                totals[2] += usage.total_tokens
+        return increments
+
+    async def _write_counters(self, increments: Dict[CounterTarget, List[Any]]) -> None:
+        pipe = self.redis.pipeline()
+        expiries: Dict[str, int] = {}
+        for (key, prefix, ttl), (cost, requests, tokens) in increments.items():
+            cost_field, requests_field, tokens_field = COUNTER_FIELDS if prefix is None else rollup_fields(prefix)
+            pipe.hincrbyfloat(key, cost_field, float(cost))
+            pipe.hincrby(key, requests_field, requests)
+            pipe.hincrby(key, tokens_field, tokens)
+            expiries[key] = ttl
+        for key, ttl in expiries.items():
+            pipe.expire(key, ttl)
+        try:
+            await pipe.execute()
+        except Exception as e:
+            # MULTI/EXEC applied nothing, so the same increments are retried
+            self.stats.redis_failures += 1
+            logger.error('Failed to write AI usage counters for %s keys, will retry: %s', len(expiries), e)
+            self._retry_increments = increments
+            return
+        self.stats.counter_keys_written += len(expiries)
+        self.stats.redis_commands += 3 * len(increments) + len(expiries)
+
+
+_ledgers: 'weakref.WeakSet[UsageLedger]' = weakref.WeakSet()
+
+
+def register_ledger(ledger: UsageLedger) -> UsageLedger:
+    """Track a ledger so drain_usage_ledgers() flushes it on shutdown."""
+    _ledgers.add(ledger)
+    return ledger
+
+
+async def drain_usage_ledgers() -> None:
+    """Flush and stop every registered ledger (application shutdown)."""
+    for ledger in list(_ledgers):
+        try:
+            await ledger.close()
+        except Exception as e:
+            logger.error('Failed to drain AI usage ledger: %s', e)
+    _ledgers.clear()
@@ -13,7 +13,7 @@ import statistics
 from datetime import datetime, date, timedelta
 from decimal import Decimal
 from enum import Enum
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
 from dataclasses import dataclass, field
 from collections import defaultdict
 import time
@@ -22,6 +22,8 @@ from config.logging_config import get_logger
 import redis
 import requests
 from config.settings import settings
+from services.ai.cost_ledger import RecordWriter, UsageLedger, insert_usage_records, register_ledger
+from services.ai.cost_rollups import CompactedLoader, compact_month, load_compacted_rollups, read_daily_rollups, read_legacy_service_usage
 logger = get_logger(__name__)
 
 
@@ -128,6 +130,7 @@ class AIUsageMetrics:
     cache_hit: bool = False
     error_occurred: bool = False
     metadata: Dict[str, Any] = field(default_factory=dict)
+    provider: Optional[str] = None
 
     @property
     def cost_per_token(self) ->Decimal:
@@ -220,13 +223,24 @@ class CostOptimization:
 
 
 class CostTrackingService:
-    """Core service for tracking AI usage and costs."""
-
-    def __init__(self, redis_client: Optional[Redis]=None) ->None:
+    """Core service for tracking AI usage and costs.
+
+    Usage events are written behind through a UsageLedger: track_usage only
+    queues the event, and read methods flush the ledger first so they see
+    every event tracked by this instance. Daily costs, trends and reports
+    are served from the per-day rollup hashes (see services.ai.cost_rollups)
+    with one pipelined read per date range.
+    """
+
+    def __init__(self, redis_client: Optional[Redis]=None, record_writer:
+        Optional[RecordWriter]=insert_usage_records, ledger: Optional[
+        UsageLedger]=None, compacted_loader: Optional[CompactedLoader]=
+        load_compacted_rollups) ->None:
         self.redis = redis_client or self._get_redis_client()
+        self.compacted_loader = compacted_loader
         self.model_configs = self._load_model_configs()
-        self.usage_buffer: List[AIUsageMetrics] = []
-        self.buffer_size = 100
+        self.ledger = ledger or register_ledger(UsageLedger(self.redis,
+            record_writer))
 
     def _get_redis_client(self) ->Optional[Redis]:
         """Get Redis client connection."""
@@ -272,68 +286,44 @@ class CostTrackingService:
             user_id=user_id, session_id=session_id, request_id=request_id,
             response_quality_score=response_quality_score, response_time_ms
             =response_time_ms, cache_hit=cache_hit, error_occurred=
-            error_occurred, metadata=request_metadata or {})
-        await self._store_usage_in_redis(usage)
-        self.usage_buffer.append(usage)
-        if len(self.usage_buffer) >= self.buffer_size:
-            await self._flush_usage_buffer()
+            error_occurred, metadata=request_metadata or {}, provider=
+            model_config.provider)
+        await self.ledger.record(usage)
         logger.debug('Tracked usage: %s/%s - $%s' % (service_name,
             model_name, cost_usd))
         return usage
 
-    async def _store_usage_in_redis(self, usage: AIUsageMetrics) ->None:
-        """Store usage metrics in Redis for real-time access."""
-        timestamp = usage.timestamp
-        date_key = f'ai_usage:daily:{timestamp.date()}'
-        hour_key = f"ai_usage:hourly:{timestamp.strftime('%Y-%m-%d:%H')}"
-        service_key = (
-            f'ai_usage:service:{usage.service_name}:{timestamp.date()}')
-        model_key = f'ai_usage:model:{usage.model_name}:{timestamp.date()}'
-        user_key = (f'ai_usage:user:{usage.user_id}:{timestamp.date()}' if
-            usage.user_id else None)
-        usage_data = {'service_name': usage.service_name, 'model_name':
-            usage.model_name, 'input_tokens': usage.input_tokens,
-            'output_tokens': usage.output_tokens, 'total_tokens': usage.
-            total_tokens, 'cost_usd': str(usage.cost_usd), 'timestamp':
-            usage.timestamp.isoformat(), 'user_id': usage.user_id,
-            'session_id': usage.session_id, 'request_id': usage.request_id,
-            'cache_hit': usage.cache_hit, 'error_occurred': usage.
-            error_occurred}
-        usage_id = f'{usage.request_id or int(time.time() * 1000000)}'
-        await self.redis.hset(f'ai_usage:record:{usage_id}', mapping=usage_data,
-            )
-        await self.redis.expire(f'ai_usage:record:{usage_id}', 86400 * 30)
-        pipe = self.redis.pipeline()
-        pipe.hincrbyfloat(date_key, 'total_cost', float(usage.cost_usd))
-        pipe.hincrby(date_key, 'total_requests', 1)
-        pipe.hincrby(date_key, 'total_tokens', usage.total_tokens)
-        pipe.expire(date_key, 86400 * 90)
-        pipe.hincrbyfloat(hour_key, 'total_cost', float(usage.cost_usd))
-        pipe.hincrby(hour_key, 'total_requests', 1)
-        pipe.hincrby(hour_key, 'total_tokens', usage.total_tokens)
-        pipe.expire(hour_key, 86400 * 7)
-        pipe.hincrbyfloat(service_key, 'total_cost', float(usage.cost_usd))
-        pipe.hincrby(service_key, 'total_requests', 1)
-        pipe.hincrby(service_key, 'total_tokens', usage.total_tokens)
-        pipe.expire(service_key, 86400 * 90)
-        pipe.hincrbyfloat(model_key, 'total_cost', float(usage.cost_usd))
-        pipe.hincrby(model_key, 'total_requests', 1)
-        pipe.hincrby(model_key, 'total_tokens', usage.total_tokens)
-        pipe.expire(model_key, 86400 * 90)
-        if user_key:
-            pipe.hincrbyfloat(user_key, 'total_cost', float(usage.cost_usd))
-            pipe.hincrby(user_key, 'total_requests', 1)
-            pipe.hincrby(user_key, 'total_tokens', usage.total_tokens)
-            pipe.expire(user_key, 86400 * 90)
-        await pipe.execute()
-
-    async def _flush_usage_buffer(self) ->None:
-        """Flush usage buffer to persistent storage."""
-        if not self.usage_buffer:
-            return
-        logger.info('Flushing %s usage records to persistent storage' % len
-            (self.usage_buffer))
-        self.usage_buffer.clear()
+    async def flush(self) ->None:
+        """Write all tracked usage through to Redis and Postgres."""
+        await self.ledger.flush()
+
+    async def close(self) ->None:
+        """Drain queued usage records and stop the background flusher."""
+        await self.ledger.close()
+
+    def get_ledger_stats(self) ->Dict[str, Any]:
+        """Write-behind queue depth, backpressure and flush statistics."""
+        return self.ledger.get_stats()
+
+    async def get_cost_range(self, start_date: date, end_date: date) ->List[
+        Dict[str, Any]]:
+        """Daily cost summaries with service/model breakdowns for a date range."""
+        await self.ledger.flush()
+        days = await read_daily_rollups(self.redis, start_date, end_date,
+            self.compacted_loader)
+        return [{'date': day.isoformat(), **summary} for day, summary in
+            days.items()]
+
+    async def _service_usage_by_day(self, service_name: str, start_date:
+        date, end_date: date) ->List[Tuple[str, Optional[Dict[str, Any]]]]:
+        """One service's usage per day, including days tracked before rollups."""
+        days = await self.get_cost_range(start_date, end_date)
+        # Legacy days have totals but no breakdown; read their service hashes
+        legacy = await read_legacy_service_usage(self.redis, service_name,
+            [date.fromisoformat(day['date']) for day in days if day[
+            'total_requests'] and not day['service_breakdown']])
+        return [(day['date'], day['service_breakdown'].get(service_name) or
+            legacy.get(date.fromisoformat(day['date']))) for day in days]
 
     async def get_usage_by_service(self, service_name: str, start_date:
         Optional[date]=None, end_date: Optional[date]=None) ->List[
@@ -344,97 +334,61 @@ class CostTrackingService:
         if not end_date:
             end_date = start_date
         usage_metrics = []
-        current_date = start_date
-        while current_date <= end_date:
-            service_key = f'ai_usage:service:{service_name}:{current_date}'
-            data = await self.redis.hgetall(service_key)
+        for day, data in (await self._service_usage_by_day(service_name,
+            start_date, end_date)):
             if data:
                 usage_metrics.append(AIUsageMetrics(service_name=
                     service_name, model_name='aggregated', input_tokens=0,
-                    output_tokens=0, total_tokens=int(data.get(
-                    'total_tokens', 0)), request_count=int(data.get(
-                    'total_requests', 0)), cost_usd=Decimal(data.get(
-                    'total_cost', '0')), timestamp=datetime.combine(
-                    current_date, datetime.min.time())))
-            current_date += timedelta(days=1)
+                    output_tokens=0, total_tokens=data['tokens'],
+                    request_count=data['requests'], cost_usd=data['cost'],
+                    timestamp=datetime.combine(date.fromisoformat(day),
+                    datetime.min.time())))
         return usage_metrics
 
     async def get_usage_by_time_range(self, start_time: datetime, end_time:
         datetime, service_name: Optional[str]=None) ->List[AIUsageMetrics]:
         """Get usage metrics for specific time range."""
+        if service_name:
+            return await self.get_usage_by_service(service_name, start_time
+                .date(), end_time.date())
         usage_metrics = []
-        current_date = start_time.date()
-        end_date = end_time.date()
-        while current_date <= end_date:
-            if service_name:
-                key = f'ai_usage:service:{service_name}:{current_date}'
-            else:
-                key = f'ai_usage:daily:{current_date}'
-            data = await self.redis.hgetall(key)
-            if data:
-                usage_metrics.append(AIUsageMetrics(service_name=
-                    service_name or 'all', model_name='aggregated',
-                    input_tokens=0, output_tokens=0, total_tokens=int(data.
-                    get('total_tokens', 0)), request_count=int(data.get(
-                    'total_requests', 0)), cost_usd=Decimal(data.get(
-                    'total_cost', '0')), timestamp=datetime.combine(
-                    current_date, datetime.min.time())))
-            current_date += timedelta(days=1)
+        for day in (await self.get_cost_range(start_time.date(), end_time.
+            date())):
+            if day['total_requests']:
+                usage_metrics.append(AIUsageMetrics(service_name='all',
+                    model_name='aggregated', input_tokens=0, output_tokens=
+                    0, total_tokens=day['total_tokens'], request_count=day[
+                    'total_requests'], cost_usd=day['total_cost'],
+                    timestamp=datetime.combine(date.fromisoformat(day[
+                    'date']), datetime.min.time())))
         return usage_metrics
 
     async def calculate_daily_costs(self, target_date: date) ->Dict[str, Any]:
         """Calculate comprehensive daily cost breakdown."""
-        daily_key = f'ai_usage:daily:{target_date}'
-        daily_data = await self.redis.hgetall(daily_key)
-        if not daily_data:
-            return {'total_cost': Decimal('0'), 'total_requests': 0,
-                'total_tokens': 0, 'service_breakdown': {},
-                'model_breakdown': {}}
-        service_breakdown = {}
-        service_keys = await self.redis.keys(
-            f'ai_usage:service:*:{target_date}')
-        for key in service_keys:
-            service_name = key.decode().split(':')[2]
-            service_data = await self.redis.hgetall(key)
-            if service_data:
-                service_breakdown[service_name] = {'cost': Decimal(
-                    service_data.get('total_cost', '0')), 'requests': int(
-                    service_data.get('total_requests', 0)), 'tokens': int(
-                    service_data.get('total_tokens', 0))}
-        model_breakdown = {}
-        model_keys = await self.redis.keys(f'ai_usage:model:*:{target_date}')
-        for key in model_keys:
-            model_name = key.decode().split(':')[2]
-            model_data = await self.redis.hgetall(key)
-            if model_data:
-                model_breakdown[model_name] = {'cost': Decimal(model_data.
-                    get('total_cost', '0')), 'requests': int(model_data.get
-                    ('total_requests', 0)), 'tokens': int(model_data.get(
-                    'total_tokens', 0))}
-        return {'total_cost': Decimal(daily_data.get('total_cost', '0')),
-            'total_requests': int(daily_data.get('total_requests', 0)),
-            'total_tokens': int(daily_data.get('total_tokens', 0)),
-            'service_breakdown': service_breakdown, 'model_breakdown':
-            model_breakdown}
+        day = (await self.get_cost_range(target_date, target_date))[0]
+        del day['date']
+        return day
 
     async def get_cost_trends(self, days: int=7) ->List[Dict[str, Any]]:
         """Get cost trends over specified number of days."""
-        trends = []
         end_date = date.today()
         start_date = end_date - timedelta(days=days - 1)
-        current_date = start_date
-        while current_date <= end_date:
-            daily_costs = await self.calculate_daily_costs(current_date)
-            trends.append({'date': current_date.isoformat(), 'cost':
-                daily_costs['total_cost'], 'requests': daily_costs[
-                'total_requests'], 'tokens': daily_costs['total_tokens']})
-            current_date += timedelta(days=1)
-        return trends
+        return [{'date': day['date'], 'cost': day['total_cost'], 'requests':
+            day['total_requests'], 'tokens': day['total_tokens']} for day in
+            (await self.get_cost_range(start_date, end_date))]
 
     async def identify_cost_anomalies(self, threshold_multiplier: float=2.0,
-        lookback_days: int=7) ->List[Dict[str, Any]]:
-        """Identify cost anomalies based on historical patterns."""
-        trends = await self.get_cost_trends(lookback_days)
+        lookback_days: int=7, trends: Optional[List[Dict[str, Any]]]=None
+        ) ->List[Dict[str, Any]]:
+        """Identify cost anomalies based on historical patterns.
+
+        Pass trends (oldest first, ending today) to reuse an already
+        fetched range instead of reading lookback_days again.
+        """
+        if trends is None:
+            trends = await self.get_cost_trends(lookback_days)
+        else:
+            trends = trends[-lookback_days:]
         if len(trends) < 3:
             return []
         costs = [float(trend['cost']) for trend in trends[:-1]]
@@ -451,6 +405,11 @@ class CostTrackingService:
                 threshold * 1.5 else 'medium'})
         return anomalies
 
+    async def compact_month(self, year: int, month: int) ->Dict[str, Any]:
+        """Move a finished month's daily rollups from Redis into Postgres."""
+        await self.ledger.flush()
+        return await compact_month(self.redis, year, month)
+
 
 class BudgetAlertService:
     """Service for managing budgets and generating alerts."""
@@ -825,16 +784,12 @@ class AICostManager:
         total_cost = Decimal('0')
         total_requests = 0
         total_tokens = 0
-        current_date = start_date
-        while current_date <= end_date:
-            daily_data = await self.cost_tracker.calculate_daily_costs(
-                current_date)
-            daily_breakdown.append({'date': current_date.isoformat(), **
-                daily_data})
+        for daily_data in (await self.cost_tracker.get_cost_range(
+            start_date, end_date)):
+            daily_breakdown.append(daily_data)
             total_cost += daily_data['total_cost']
             total_requests += daily_data['total_requests']
             total_tokens += daily_data['total_tokens']
-            current_date += timedelta(days=1)
         analysis_data = {'total_cost': total_cost}
         optimization_report = (await self.optimization_service.
             generate_optimization_report(analysis_data))
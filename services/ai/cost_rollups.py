@@ -0,0 +1,433 @@
+"""
+Pre-aggregated Daily AI Cost Rollups
+
+Serves daily, trend and monthly cost reads without KEYS scans:
+
+- The usage ledger increments one hash per day, ai_usage:rollup:{date}, whose
+  fields are '<dimension>:<name>:<metric>' for the total, service and model
+  dimensions (e.g. 'service:policy_generation:cost')
+- read_daily_rollups() fetches a whole date range with one pipelined HGETALL
+  per day, so a 90-day trend is a single Redis round trip; days tracked
+  before rollups existed fall back to their ai_usage:daily totals, and
+  per-service reads of those days to their ai_usage:service hashes
+- compact_month() collapses a finished month into Postgres cost_aggregations
+  rows (daily rows per service and model plus monthly totals) and drops the
+  month's rollup hashes; reads pick those days up again with one query
+- run_compaction_schedule() compacts the previous month in the background,
+  once across workers
+
+A day can be described by up to three sources: its compacted rows, its
+rollup hash and its legacy ai_usage:daily totals. The hash is partial on
+the day rollups were deployed, and a usage write arriving after compaction
+recreates a partial hash for a compacted day; the daily totals count every
+event of the day. Reads and compaction therefore use whichever source covers
+the most requests instead of letting a present hash shadow the others.
+"""
+
+import asyncio
+import calendar
+import logging
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    from services.ai.cost_management import AIUsageMetrics
+
+logger = logging.getLogger(__name__)
+
+# Rollup Constants
+ROLLUP_KEY_PREFIX = 'ai_usage:rollup:'
+ROLLUP_TTL = 86400 * 90  # Same retention as the per-day counter hashes
+ROLLUP_METRICS = ('cost', 'requests', 'tokens')
+COMPACTION_CHECK_INTERVAL = 6 * 3600  # Seconds between scheduled compaction attempts
+COMPACTION_LOCK_KEY = 'ai_usage:rollup:compaction_lock'
+COMPACTION_LOCK_TTL = 3600  # Bounds how long a crashed worker blocks compaction
+DIMENSIONS = {'service': 'service_breakdown', 'model': 'model_breakdown'}
+
+CompactedLoader = Callable[[date, date], Awaitable[Dict[date, Dict[str, Any]]]]
+CompactedWriter = Callable[[date, date, List[Dict[str, Any]]], Awaitable[None]]
+
+COMPACTED_SELECT = """
+SELECT date_key, service_name, model_name, total_cost, total_requests, total_tokens
+FROM cost_aggregations
+WHERE aggregation_type = 'daily' AND user_id IS NULL
+  AND date_key BETWEEN :start_date AND :end_date
+"""
+
+COMPACTED_DELETE = """
+DELETE FROM cost_aggregations
+WHERE aggregation_type IN ('daily', 'monthly') AND user_id IS NULL
+  AND date_key BETWEEN :start_date AND :end_date
+"""
+
+COMPACTED_INSERT = """
+INSERT INTO cost_aggregations (
+    aggregation_type, date_key, service_name, model_name, user_id,
+    total_cost, total_requests, total_tokens, total_input_tokens,
+    total_output_tokens, cost_per_request, cost_per_token, calculated_at,
+    is_final
+) VALUES (
+    :aggregation_type, :date_key, :service_name, :model_name, NULL,
+    :total_cost, :total_requests, :total_tokens, 0, 0, :cost_per_request,
+    :cost_per_token, :calculated_at, TRUE
+)
+"""
+
+
+def rollup_key(day: date) -> str:
+    """Redis hash holding every rollup counter for one day."""
+    return f'{ROLLUP_KEY_PREFIX}{day}'
+
+
+def rollup_prefixes(usage: 'AIUsageMetrics') -> List[str]:
+    """Field prefixes a usage event increments in its day's rollup hash."""
+    return ['total', f'service:{usage.service_name}', f'model:{usage.model_name}']
+
+
+def rollup_fields(prefix: str) -> Tuple[str, str, str]:
+    """Cost, requests and tokens field names for a rollup prefix."""
+    return tuple(f'{prefix}:{metric}' for metric in ROLLUP_METRICS)
+
+
+def empty_day() -> Dict[str, Any]:
+    """Cost summary for a day without usage."""
+    return {
+        'total_cost': Decimal('0'),
+        'total_requests': 0,
+        'total_tokens': 0,
+        'service_breakdown': {},
+        'model_breakdown': {},
+    }
+
+
+def service_counter_key(service_name: str, day: date) -> str:
+    """Per-service counter hash written for every day, with or without rollups."""
+    return f'ai_usage:service:{service_name}:{day}'
+
+
+def _breakdown_entry(day: Dict[str, Any], dimension: str, name: str) -> Dict[str, Any]:
+    return day[DIMENSIONS[dimension]].setdefault(
+        name, {'cost': Decimal('0'), 'requests': 0, 'tokens': 0})
+
+
+def parse_rollup(data: Dict[str, str]) -> Dict[str, Any]:
+    """Turn a rollup hash into a day summary with service/model breakdowns."""
+    day = empty_day()
+    for field, value in data.items():
+        prefix, _, metric = field.rpartition(':')
+        if metric not in ROLLUP_METRICS:
+            continue
+        if prefix == 'total':
+            if metric == 'cost':
+                day['total_cost'] = Decimal(value)
+            else:
+                day[f'total_{metric}'] = int(value)
+            continue
+        dimension, _, name = prefix.partition(':')
+        if dimension not in DIMENSIONS or not name:
+            continue
+        entry = _breakdown_entry(day, dimension, name)
+        entry[metric] = Decimal(value) if metric == 'cost' else int(value)
+    return day
+
+
+def parse_daily_totals(data: Dict[str, str]) -> Dict[str, Any]:
+    """Day summary from a legacy ai_usage:daily hash (totals only)."""
+    day = empty_day()
+    day['total_cost'] = Decimal(data.get('total_cost', '0'))
+    day['total_requests'] = int(data.get('total_requests', 0))
+    day['total_tokens'] = int(data.get('total_tokens', 0))
+    return day
+
+
+def most_complete(*summaries: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """The summary covering the most requests; earlier arguments win ties."""
+    best = None
+    for summary in summaries:
+        if summary is not None and (best is None or summary['total_requests'] > best['total_requests']):
+            best = summary
+    return best
+
+
+def _date_range(start_date: date, end_date: date) -> List[date]:
+    return [start_date + timedelta(days=offset) for offset in range((end_date - start_date).days + 1)]
+
+
+async def fetch_compacted_rollups(start_date: date, end_date: date) -> Dict[date, Dict[str, Any]]:
+    """Day summaries for compacted days between start_date and end_date."""
+    from sqlalchemy import text
+
+    from database.db_setup import get_async_session_maker
+
+    session_maker = get_async_session_maker()
+    async with session_maker() as session:
+        result = await session.execute(
+            text(COMPACTED_SELECT), {'start_date': start_date, 'end_date': end_date})
+        rows = result.fetchall()
+
+    days: Dict[date, Dict[str, Any]] = {}
+    for date_key, service_name, model_name, cost, requests, tokens in rows:
+        day = days.setdefault(date_key, empty_day())
+        if service_name is None and model_name is None:
+            day['total_cost'] = Decimal(cost)
+            day['total_requests'] = int(requests)
+            day['total_tokens'] = int(tokens)
+            continue
+        dimension, name = ('service', service_name) if service_name is not None else ('model', model_name)
+        entry = _breakdown_entry(day, dimension, name)
+        entry.update(cost=Decimal(cost), requests=int(requests), tokens=int(tokens))
+    return days
+
+
+async def load_compacted_rollups(start_date: date, end_date: date) -> Dict[date, Dict[str, Any]]:
+    """Compacted day summaries for reads; empty when Postgres is unavailable."""
+    try:
+        return await fetch_compacted_rollups(start_date, end_date)
+    except Exception as e:
+        # Reads degrade to Redis-only data rather than failing
+        logger.warning('Could not load compacted cost rollups: %s', e)
+        return {}
+
+
+async def read_daily_rollups(
+    redis_client: Any,
+    start_date: date,
+    end_date: date,
+    compacted_loader: Optional[CompactedLoader] = load_compacted_rollups,
+    today: Optional[date] = None,
+) -> Dict[date, Dict[str, Any]]:
+    """
+    Day summaries for every day from start_date to end_date, in order.
+
+    Redis is read with one pipeline; days in a finished month are also
+    looked up among the compacted rows with one query. Each day is served
+    from its most complete source.
+    """
+    days = _date_range(start_date, end_date)
+    rollups: Dict[date, Dict[str, Any]] = {}
+    legacy_totals: Dict[date, Dict[str, Any]] = {}
+
+    if redis_client is not None and days:
+        pipe = redis_client.pipeline()
+        for day in days:
+            pipe.hgetall(rollup_key(day))
+            pipe.hgetall(f'ai_usage:daily:{day}')
+        results = await pipe.execute()
+        for index, day in enumerate(days):
+            rollup, daily = results[2 * index], results[2 * index + 1]
+            if rollup:
+                rollups[day] = parse_rollup(rollup)
+            if daily:
+                legacy_totals[day] = parse_daily_totals(daily)
+
+    # Only finished months are ever compacted
+    month_start = (today or date.today()).replace(day=1)
+    finished = [day for day in days if day < month_start]
+    compacted: Dict[date, Dict[str, Any]] = {}
+    if finished and compacted_loader is not None:
+        compacted = await compacted_loader(finished[0], finished[-1])
+
+    return {
+        day: most_complete(compacted.get(day), rollups.get(day), legacy_totals.get(day)) or empty_day()
+        for day in days
+    }
+
+
+async def read_legacy_service_usage(
+    redis_client: Any,
+    service_name: str,
+    days: List[date],
+) -> Dict[date, Dict[str, Any]]:
+    """
+    One service's usage on days whose summaries carry no service breakdown.
+
+    Days tracked before rollups existed only have ai_usage:daily totals; their
+    per-service numbers are read from the ai_usage:service hashes with one
+    pipeline.
+    """
+    if redis_client is None or not days:
+        return {}
+    pipe = redis_client.pipeline()
+    for day in days:
+        pipe.hgetall(service_counter_key(service_name, day))
+    results = await pipe.execute()
+    usage = {}
+    for day, data in zip(days, results):
+        if data:
+            totals = parse_daily_totals(data)
+            usage[day] = {
+                'cost': totals['total_cost'],
+                'requests': totals['total_requests'],
+                'tokens': totals['total_tokens'],
+            }
+    return usage
+
+
+def _aggregation_row(aggregation_type: str, date_key: date, service_name: Optional[str],
+                     model_name: Optional[str], cost: Decimal, requests: int, tokens: int,
+                     calculated_at: datetime) -> Dict[str, Any]:
+    return {
+        'aggregation_type': aggregation_type,
+        'date_key': date_key,
+        'service_name': service_name,
+        'model_name': model_name,
+        'total_cost': cost,
+        'total_requests': requests,
+        'total_tokens': tokens,
+        'cost_per_request': cost / requests if requests else Decimal('0'),
+        'cost_per_token': cost / tokens if tokens else Decimal('0'),
+        'calculated_at': calculated_at,
+    }
+
+
+def aggregation_rows(summaries: Dict[date, Dict[str, Any]], month_start: date) -> List[Dict[str, Any]]:
+    """cost_aggregations rows for a month: daily rows plus monthly totals."""
+    calculated_at = datetime.utcnow()
+    rows = []
+    month = empty_day()
+    for day, summary in summaries.items():
+        if not summary['total_requests']:
+            continue
+        rows.append(_aggregation_row(
+            'daily', day, None, None, summary['total_cost'], summary['total_requests'],
+            summary['total_tokens'], calculated_at))
+        month['total_cost'] += summary['total_cost']
+        month['total_requests'] += summary['total_requests']
+        month['total_tokens'] += summary['total_tokens']
+        for dimension, breakdown_key in DIMENSIONS.items():
+            for name, entry in summary[breakdown_key].items():
+                service_name, model_name = (name, None) if dimension == 'service' else (None, name)
+                rows.append(_aggregation_row(
+                    'daily', day, service_name, model_name, entry['cost'], entry['requests'],
+                    entry['tokens'], calculated_at))
+                total = _breakdown_entry(month, dimension, name)
+                total['cost'] += entry['cost']
+                total['requests'] += entry['requests']
+                total['tokens'] += entry['tokens']
+
+    if month['total_requests']:
+        rows.append(_aggregation_row(
+            'monthly', month_start, None, None, month['total_cost'], month['total_requests'],
+            month['total_tokens'], calculated_at))
+        for dimension, breakdown_key in DIMENSIONS.items():
+            for name, entry in month[breakdown_key].items():
+                service_name, model_name = (name, None) if dimension == 'service' else (None, name)
+                rows.append(_aggregation_row(
+                    'monthly', month_start, service_name, model_name, entry['cost'],
+                    entry['requests'], entry['tokens'], calculated_at))
+    return rows
+
+
+async def write_compacted_rollups(start_date: date, end_date: date, rows: List[Dict[str, Any]]) -> None:
+    """Replace the compacted rows for a date range in one transaction."""
+    from sqlalchemy import text
+
+    from database.db_setup import get_async_session_maker
+
+    session_maker = get_async_session_maker()
+    async with session_maker() as session:
+        # Re-running a compaction replaces its rows instead of duplicating them
+        await session.execute(text(COMPACTED_DELETE), {'start_date': start_date, 'end_date': end_date})
+        if rows:
+            await session.execute(text(COMPACTED_INSERT), rows)
+        await session.commit()
+
+
+async def compact_month(
+    redis_client: Any,
+    year: int,
+    month: int,
+    compacted_writer: CompactedWriter = write_compacted_rollups,
+    today: Optional[date] = None,
+    compacted_loader: CompactedLoader = fetch_compacted_rollups,
+) -> Dict[str, Any]:
+    """
+    Collapse a finished month's rollup hashes into cost_aggregations rows.
+
+    Days already compacted keep their rows unless the hash or the daily
+    totals cover more requests, so a hash recreated by a late write never
+    replaces a complete compacted day. The Redis hashes are deleted only
+    after the rows are committed, so a failed compaction leaves the month
+    readable from Redis.
+    """
+    month_start = date(year, month, 1)
+    month_end = date(year, month, calendar.monthrange(year, month)[1])
+    if month_end >= (today or date.today()):
+        raise ValueError(f'{year}-{month:02d} has not finished yet and cannot be compacted')
+    if redis_client is None:
+        raise ValueError('Redis is not available, nothing to compact')
+
+    days = _date_range(month_start, month_end)
+    pipe = redis_client.pipeline()
+    for day in days:
+        pipe.hgetall(rollup_key(day))
+        pipe.hgetall(f'ai_usage:daily:{day}')
+    results = await pipe.execute()
+    rollups = {day: parse_rollup(data) for day, data in zip(days, results[::2]) if data}
+    if not rollups:
+        return {'period': f'{year}-{month:02d}', 'days_compacted': 0, 'rows_written': 0}
+    legacy_totals = {day: parse_daily_totals(data) for day, data in zip(days, results[1::2]) if data}
+
+    # The rows are replaced, so days compacted earlier must be carried over
+    compacted = await compacted_loader(month_start, month_end)
+    summaries = {
+        day: most_complete(compacted.get(day), rollups.get(day), legacy_totals.get(day))
+        for day in days if day in compacted or day in rollups
+    }
+
+    rows = aggregation_rows(summaries, month_start)
+    await compacted_writer(month_start, month_end, rows)
+    await redis_client.delete(*(rollup_key(day) for day in rollups))
+    logger.info('Compacted %s days of AI cost rollups for %s-%02d into %s rows',
+                len(rollups), year, month, len(rows))
+    return {'period': f'{year}-{month:02d}', 'days_compacted': len(rollups), 'rows_written': len(rows)}
+
+
+def previous_month(today: Optional[date] = None) -> Tuple[int, int]:
+    """(year, month) of the month before today's."""
+    last_day = (today or date.today()).replace(day=1) - timedelta(days=1)
+    return last_day.year, last_day.month
+
+
+async def compact_previous_month(
+    redis_client: Any,
+    compact: Callable[[int, int], Awaitable[Dict[str, Any]]],
+    today: Optional[date] = None,
+) -> Optional[Dict[str, Any]]:
+    """
+    Compact last month unless another worker is already compacting.
+
+    Returns compact's result, or None when Redis is unavailable or the
+    compaction lock is held elsewhere.
+    """
+    if redis_client is None:
+        return None
+    if not await redis_client.set(COMPACTION_LOCK_KEY, '1', nx=True, ex=COMPACTION_LOCK_TTL):
+        return None
+    try:
+        return await compact(*previous_month(today))
+    finally:
+        await redis_client.delete(COMPACTION_LOCK_KEY)
+
+
+async def run_compaction_schedule(
+    redis_client: Any,
+    compact: Callable[[int, int], Awaitable[Dict[str, Any]]],
+    interval: float = COMPACTION_CHECK_INTERVAL,
+) -> None:
+    """
+    Background loop compacting the previous month's rollups.
+
+    Once a month is compacted its hashes are gone and later runs are a
+    single pipelined read, so checking every few hours is cheap and picks
+    the month up soon after it ends.
+    """
+    while True:
+        try:
+            result = await compact_previous_month(redis_client, compact)
+            if result and result['days_compacted']:
+                logger.info('Scheduled AI cost rollup compaction: %s', result)
+        except Exception as e:
+            logger.warning('Scheduled AI cost rollup compaction failed: %s', e)
+        await asyncio.sleep(interval)
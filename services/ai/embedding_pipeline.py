@@ -0,0 +1,223 @@
+"""
+Batched, Concurrent Embedding Pipeline for Document Ingestion
+
+Turns a list of chunk texts into embeddings without one provider round trip
+per chunk:
+
+- Optional prepare stage (e.g. contextual enrichment) runs per item under a
+  bounded concurrency pool
+- Texts are grouped into batches bounded by item count and total characters
+  and sent through a single embed_documents-style call per batch
+- Each batch is retried with exponential backoff and jitter
+- An optional store stage receives each embedded batch for a bulk upsert
+- Progress is reported after every batch and per-stage timings are collected
+"""
+
+import asyncio
+import logging
+import random
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Generic, List, Optional, Sequence, TypeVar
+
+logger = logging.getLogger(__name__)
+
+# Pipeline Constants
+DEFAULT_BATCH_SIZE = 64
+DEFAULT_MAX_BATCH_CHARS = 200_000
+DEFAULT_MAX_CONCURRENCY = 4
+DEFAULT_MAX_ATTEMPTS = 3
+DEFAULT_BASE_DELAY = 0.5
+DEFAULT_MAX_DELAY = 8.0
+
+T = TypeVar('T')
+
+EmbedBatchFn = Callable[[List[str]], Awaitable[List[List[float]]]]
+PrepareFn = Callable[[T], Awaitable[str]]
+StoreFn = Callable[[List[T], List[List[float]]], Awaitable[None]]
+ProgressFn = Callable[[int, int], None]
+
+
+class EmbeddingPipelineError(Exception):
+    """Raised when a batch still fails after all retry attempts."""
+
+
+@dataclass
+class EmbeddingPipelineConfig:
+    """Batching, concurrency and retry settings."""
+
+    batch_size: int = DEFAULT_BATCH_SIZE
+    max_batch_chars: int = DEFAULT_MAX_BATCH_CHARS
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY
+    max_attempts: int = DEFAULT_MAX_ATTEMPTS
+    base_delay: float = DEFAULT_BASE_DELAY
+    max_delay: float = DEFAULT_MAX_DELAY
+
+
+@dataclass
+class IngestionStats:
+    """Counters and per-stage timings for one pipeline run.
+
+    Stage times are summed across concurrent batches, so they measure work
+    done per stage rather than wall-clock time; elapsed_seconds is wall clock.
+    """
+
+    items: int = 0
+    batches: int = 0
+    retries: int = 0
+    elapsed_seconds: float = 0.0
+    stage_seconds: Dict[str, float] = field(default_factory=lambda: {'prepare': 0.0, 'embed': 0.0, 'store': 0.0})
+
+    @property
+    def items_per_second(self) -> float:
+        return self.items / self.elapsed_seconds if self.elapsed_seconds else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert stats to dictionary with derived throughput."""
+        return {
+            'items': self.items,
+            'batches': self.batches,
+            'retries': self.retries,
+            'elapsed_seconds': self.elapsed_seconds,
+            'items_per_second': self.items_per_second,
+            'average_batch_size': self.items / self.batches if self.batches else 0.0,
+            'stage_seconds': dict(self.stage_seconds),
+        }
+
+
+@dataclass
+class IngestionResult(Generic[T]):
+    """Items with their embeddings, in input order."""
+
+    items: List[T]
+    embeddings: List[List[float]]
+    stats: IngestionStats
+
+
+class EmbeddingPipeline:
+    """Size-bounded batching of embedding calls with bounded concurrency and retries."""
+
+    def __init__(self, embed_batch: EmbedBatchFn, config: Optional[EmbeddingPipelineConfig] = None) -> None:
+        """
+        Args:
+            embed_batch: Async callable embedding a list of texts in one call
+            config: Batching, concurrency and retry settings
+        """
+        self.embed_batch = embed_batch
+        self.config = config or EmbeddingPipelineConfig()
+
+    @classmethod
+    def from_langchain(cls, embeddings: Any, config: Optional[EmbeddingPipelineConfig] = None) -> 'EmbeddingPipeline':
+        """Build a pipeline around a LangChain Embeddings model's embed_documents."""
+
+        async def embed_batch(texts: List[str]) -> List[List[float]]:
+            return await asyncio.to_thread(embeddings.embed_documents, texts)
+
+        return cls(embed_batch, config)
+
+    def make_batches(self, texts: Sequence[str]) -> List[range]:
+        """Split text positions into batches bounded by count and total characters."""
+        batches = []
+        start = 0
+        chars = 0
+        for position, text in enumerate(texts):
+            size = position - start
+            if size and (size >= self.config.batch_size or chars + len(text) > self.config.max_batch_chars):
+                batches.append(range(start, position))
+                start = position
+                chars = 0
+            chars += len(text)
+        if start < len(texts):
+            batches.append(range(start, len(texts)))
+        return batches
+
+    async def embed(self, texts: Sequence[str], progress: Optional[ProgressFn] = None) -> List[List[float]]:
+        """Embed texts, returning one embedding per text in input order."""
+        result = await self.run(list(texts), text_of=lambda text: text, progress=progress)
+        return result.embeddings
+
+    async def run(
+        self,
+        items: List[T],
+        text_of: Callable[[T], str],
+        prepare: Optional[PrepareFn] = None,
+        store: Optional[StoreFn] = None,
+        progress: Optional[ProgressFn] = None,
+    ) -> IngestionResult:
+        """
+        Run items through the prepare, embed and store stages.
+
+        Args:
+            items: Items to embed (chunks, dicts, ...)
+            text_of: Text to embed for an item when there is no prepare stage
+            prepare: Async callable producing the text to embed for an item
+            store: Async callable receiving each embedded batch for a bulk write
+            progress: Called with (items_done, items_total) after each batch
+
+        Returns:
+            Items and embeddings in input order, plus run statistics
+
+        Raises:
+            EmbeddingPipelineError: If a batch fails after all retry attempts
+        """
+        stats = IngestionStats(items=len(items))
+        started = time.perf_counter()
+        semaphore = asyncio.Semaphore(self.config.max_concurrency)
+
+        if prepare is not None:
+            stage_start = time.perf_counter()
+
+            async def prepare_item(item: T) -> str:
+                async with semaphore:
+                    return await prepare(item)
+
+            texts = list(await asyncio.gather(*(prepare_item(item) for item in items)))
+            stats.stage_seconds['prepare'] += time.perf_counter() - stage_start
+        else:
+            texts = [text_of(item) for item in items]
+
+        batches = self.make_batches(texts)
+        stats.batches = len(batches)
+        embeddings: List[Optional[List[float]]] = [None] * len(items)
+        done = 0
+
+        async def process(batch: range) -> None:
+            nonlocal done
+            async with semaphore:
+                stage_start = time.perf_counter()
+                vectors = await self._embed_with_retry([texts[position] for position in batch], stats)
+                stats.stage_seconds['embed'] += time.perf_counter() - stage_start
+                for position, vector in zip(batch, vectors):
+                    embeddings[position] = vector
+                if store is not None:
+                    stage_start = time.perf_counter()
+                    await store([items[position] for position in batch], vectors)
+                    stats.stage_seconds['store'] += time.perf_counter() - stage_start
+            done += len(batch)
+            if progress is not None:
+                progress(done, len(items))
+
+        await asyncio.gather(*(process(batch) for batch in batches))
+        stats.elapsed_seconds = time.perf_counter() - started
+        logger.info(
+            f'Embedded {stats.items} items in {stats.batches} batches '
+            f'({stats.items_per_second:.1f} items/s, {stats.retries} retries)'
+        )
+        return IngestionResult(items=items, embeddings=embeddings, stats=stats)
+
+    async def _embed_with_retry(self, texts: List[str], stats: IngestionStats) -> List[List[float]]:
+        for attempt in range(1, self.config.max_attempts + 1):
+            try:
+                vectors = await self.embed_batch(texts)
+                if len(vectors) != len(texts):
+                    raise EmbeddingPipelineError(f'Expected {len(texts)} embeddings, got {len(vectors)}')
+                return vectors
+            except Exception as e:
+                if attempt == self.config.max_attempts:
+                    raise EmbeddingPipelineError(f'Embedding batch of {len(texts)} failed after {attempt} attempts: {e}') from e
+                delay = min(self.config.base_delay * 2 ** (attempt - 1), self.config.max_delay)
+                delay += random.uniform(0, delay * 0.1)
+                stats.retries += 1
+                logger.warning(f'Embedding batch failed (attempt {attempt}), retrying in {delay:.2f}s: {e}')
+                await asyncio.sleep(delay)
+        raise EmbeddingPipelineError('Embedding batch failed')
@@ -15,7 +15,7 @@ This module provides integration between the instruction template system,
 performance monitoring, and the ComplianceAssistant.
 """
 from typing import Any, Dict, List, Optional, Tuple
-from config.ai_config import get_ai_model
+from config.ai_config import ModelType, get_ai_model
 from config.logging_config import get_logger
 from .instruction_monitor import InstructionMetricType, get_instruction_monitor
 from .instruction_templates import SystemInstructionTemplates, get_system_instruction
@@ -71,7 +71,8 @@ class InstructionManager:
         Optional[str]=None, business_profile: Optional[Dict[str, Any]]=None,
         user_persona: Optional[str]=None, task_complexity: str='medium',
         session_id: Optional[str]=None, tools: Optional[List[Dict[str, Any]
-        ]]=None, **kwargs) ->Tuple[Any, str]:
+        ]]=None, model_type: Optional[ModelType]=None, **kwargs) ->Tuple[
+        Any, str]:
         """
         Get AI model with system instruction and register for monitoring
 
@@ -83,6 +84,7 @@ class InstructionManager:
             task_complexity: Task complexity level
             session_id: Session identifier
             tools: Function calling tools
+            model_type: Specific model to use (overrides intelligent selection)
             **kwargs: Additional context
 
         Returns:
@@ -93,7 +95,8 @@ class InstructionManager:
             instruction_type, framework=framework, business_profile=
             business_profile, user_persona=user_persona, task_complexity=
             task_complexity, session_id=session_id, **kwargs))
-        model = get_ai_model(task_complexity=task_complexity, prefer_speed=
+        model = get_ai_model(model_type=model_type, task_complexity=
+            task_complexity, prefer_speed=
             kwargs.get('prefer_speed', False), task_context={'framework':
             framework, 'task_type': instruction_type, 'business_context':
             business_profile}, system_instruction=instruction_content,
@@ -1,28 +1,28 @@
 """
-from __future__ import annotations
-
 AI Performance Optimization System
 
-Implements response time optimization, request batching, and intelligent
-prompt optimization to enhance system performance and reduce costs.
+Implements response time optimization, request coalescing and batching, and
+intelligent prompt optimization to enhance system performance and reduce costs.
 """
-import logging
-
+from __future__ import annotations
 import asyncio
 import re
 import time
 from dataclasses import dataclass
-from datetime import datetime, timezone
 from enum import Enum
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, List, Optional
 from config.logging_config import get_logger
 import contextlib
-import requests
+from services.ai.providers.base import AIProvider, ProviderConfig, ProviderResponse
+from services.ai.request_batcher import RequestBatcher
 logger = get_logger(__name__)
 
 
 class OptimizationStrategy(Enum):
     """Performance optimization strategies."""
+    BATCH_PROCESSING = 'batch_processing'
+    PROMPT_COMPRESSION = 'prompt_compression'
+    PARALLEL_EXECUTION = 'parallel_execution'
 
 
 @dataclass
@@ -37,20 +37,6 @@ class PerformanceMetrics:
     optimization_savings: float = 0.0
 
 
-@dataclass
-class BatchRequest:
-    """Batch request for AI processing."""
-    request_id: str
-    prompt: str
-    context: Dict[str, Any]
-    priority: int = 1
-    created_at: datetime = None
-
-    def __post_init__(self) ->None:
-        if self.created_at is None:
-            self.created_at = datetime.now(timezone.utc)
-
-
 class AIPerformanceOptimizer:
     """
     AI Performance Optimization System
@@ -63,10 +49,9 @@ class AIPerformanceOptimizer:
     - Performance monitoring and analytics
     """
 
-    def __init__(self) ->None:
-        self.batch_queue: List[BatchRequest] = []
+    def __init__(self, provider_factory: Optional[Any]=None) ->None:
+        self.provider_factory = provider_factory
         self.batch_size = 5
-        self.batch_timeout = 2.0
         self.max_prompt_length = 4000
         self.performance_metrics = PerformanceMetrics()
         self.enable_batching = True
@@ -77,54 +62,52 @@ class AIPerformanceOptimizer:
             )
         self.last_request_time = 0
         self.min_request_interval = 0.1
-
-    async def optimize_ai_request(self, prompt: str, context: Optional[Dict
-        [str, Any]]=None, priority: int=1) ->Tuple[str, Dict[str, Any]]:
+        self.request_batcher = RequestBatcher(self._resolve_provider,
+            max_batch_size=self.batch_size, max_wait_seconds=0.05,
+            max_concurrent_batches=self.max_concurrent_requests)
+
+    def _resolve_provider(self, provider_name: str) ->AIProvider:
+        """Resolve a provider through the ProviderFactory (created lazily)."""
+        if self.provider_factory is None:
+            from services.ai.providers.factory import ProviderFactory
+            self.provider_factory = ProviderFactory()
+        return self.provider_factory.get_provider_by_name(provider_name)
+
+    async def execute_request(self, prompt: str, config: ProviderConfig,
+        context: Optional[Dict[str, Any]]=None, priority: int=1,
+        provider_name: str='gemini') ->ProviderResponse:
         """
-        Optimize AI request for better performance.
+        Optimize and execute an AI request through the batching engine.
+
+        Identical concurrent prompts share one provider call; batchable
+        requests are grouped into micro-batches, while urgent requests are
+        dispatched immediately.
 
         Args:
-            prompt: The AI prompt to optimize
+            prompt: The AI prompt
+            config: Provider configuration
             context: Request context
             priority: Request priority (1-10, higher = more urgent)
+            provider_name: Provider to dispatch through
 
         Returns:
-            Tuple of (optimized_prompt, optimization_metadata)
+            ProviderResponse for this caller
         """
         start_time = time.time()
-        try:
-            optimized_prompt = await self._optimize_prompt(prompt, context)
-            logger.debug('Original prompt length: %s' % len(prompt))
-            logger.debug('Optimized prompt length: %s' % len(optimized_prompt))
-            logger.debug('Optimized prompt content: %s...' %
-                optimized_prompt[:200])
-            logging.info('\n=== OPTIMIZED PROMPT ===')
-            logging.info('Original length: %s' % len(prompt))
-            logging.info('Optimized length: %s' % len(optimized_prompt))
-            logging.info('Compression ratio: %s' % (len(optimized_prompt) /
-                len(prompt) if len(prompt) > 0 else 1.0))
-            logging.info('Content preview: %s...' % optimized_prompt[:300])
-            logging.info('========================\n')
-            strategy = self._select_optimization_strategy(optimized_prompt,
-                context, priority)
-            if (strategy == OptimizationStrategy.BATCH_PROCESSING and self.
-                enable_batching):
-                optimized_prompt = await self._apply_batch_optimization(
-                    optimized_prompt, context, priority)
-            elif strategy == OptimizationStrategy.PROMPT_COMPRESSION and self.enable_compression:
-                optimized_prompt = await self._apply_compression_optimization(
-                    optimized_prompt)
-            optimization_time = time.time() - start_time
-            metadata = {'optimization_strategy': strategy.value,
-                'optimization_time_ms': round(optimization_time * 1000, 2),
-                'original_length': len(prompt), 'optimized_length': len(
-                optimized_prompt), 'compression_ratio': len(
-                optimized_prompt) / len(prompt) if len(prompt) > 0 else 1.0}
-            return optimized_prompt, metadata
-        except Exception as e:
-            logger.warning('Optimization failed, using original prompt: %s' % e,
-                )
-            return prompt, {'optimization_strategy': 'none', 'error': str(e)}
+        optimized_prompt = await self._optimize_prompt(prompt, context)
+        strategy = self._select_optimization_strategy(optimized_prompt,
+            context, priority)
+        if (strategy == OptimizationStrategy.PROMPT_COMPRESSION and self.
+            enable_compression):
+            optimized_prompt = await self._apply_compression_optimization(
+                optimized_prompt)
+        batchable = (strategy == OptimizationStrategy.BATCH_PROCESSING and
+            self.enable_batching)
+        response = await self.request_batcher.submit(optimized_prompt,
+            config, provider_name=provider_name, immediate=not batchable)
+        self.update_performance_metrics(time.time() - start_time, response
+            .tokens_used)
+        return response
 
     async def _optimize_prompt(self, prompt: str, context: Optional[Dict[
         str, Any]]=None) ->str:
@@ -172,29 +155,7 @@ class AIPerformanceOptimizer:
     def _can_batch_request(self, prompt: str, context: Optional[Dict[str,
         Any]]=None) ->bool:
         """Determine if request can be batched with others."""
-        if context and context.get('priority', 1) >= 7:
-            return False
-        prompt_keywords = set(re.findall('\\b\\w+\\b', prompt.lower()))
-        for batch_req in self.batch_queue:
-            batch_keywords = set(re.findall('\\b\\w+\\b', batch_req.prompt.
-                lower()))
-            similarity = len(prompt_keywords & batch_keywords) / len(
-                prompt_keywords | batch_keywords)
-            if similarity > 0.7:
-                return True
-        return len(self.batch_queue) < self.batch_size
-
-    async def _apply_batch_optimization(self, prompt: str, context: Dict[
-        str, Any], priority: int) ->str:
-        """Apply batch processing optimization."""
-        batch_request = BatchRequest(request_id=
-            f'req_{int(time.time() * 1000)}', prompt=prompt, context=
-            context or {}, priority=priority)
-        self.batch_queue.append(batch_request)
-        if len(self.batch_queue
-            ) >= self.batch_size or self._should_process_batch_timeout():
-            await self._process_batch()
-        return prompt
+        return not (context and context.get('priority', 1) >= 7)
 
     async def _apply_compression_optimization(self, prompt: str) ->str:
         """Apply prompt compression optimization."""
@@ -209,25 +170,9 @@ class AIPerformanceOptimizer:
         compressed = re.sub('\\s+', ' ', compressed)
         return compressed.strip()
 
-    def _should_process_batch_timeout(self) ->bool:
-        """Check if batch should be processed due to timeout."""
-        if not self.batch_queue:
-            return False
-        oldest_request = min(self.batch_queue, key=lambda x: x.created_at)
-        age = (datetime.now(timezone.utc) - oldest_request.created_at
-            ).total_seconds()
-        return age >= self.batch_timeout
-
-    async def _process_batch(self) ->None:
-        """Process the current batch of requests."""
-        if not self.batch_queue:
-            return
-        logger.info('Processing batch of %s requests' % len(self.batch_queue))
-        self.batch_queue.sort(key=lambda x: x.priority, reverse=True)
-        processed_count = len(self.batch_queue)
-        self.batch_queue.clear()
-        self.performance_metrics.request_count += processed_count
-        logger.debug('Processed batch of %s requests' % processed_count)
+    async def flush(self) ->None:
+        """Dispatch pending micro-batches and wait for in-flight requests."""
+        await self.request_batcher.flush()
 
     async def apply_rate_limiting(self) ->bool:
         """Apply intelligent rate limiting."""
@@ -255,20 +200,21 @@ class AIPerformanceOptimizer:
             performance_metrics.request_count, 'average_response_time_ms':
             round(self.performance_metrics.average_response_time * 1000, 2),
             'cache_hit_rate': round(self.performance_metrics.cache_hit_rate,
-            2), 'current_queue_size': len(self.batch_queue)},
+            2), 'current_queue_size': self.request_batcher.pending_count},
             'optimization_settings': {'batching_enabled': self.
             enable_batching, 'compression_enabled': self.enable_compression,
             'parallel_processing_enabled': self.enable_parallel_processing,
             'max_concurrent_requests': self.max_concurrent_requests,
             'batch_size': self.batch_size, 'batch_timeout_seconds': self.
-            batch_timeout}, 'cost_optimization': {'estimated_token_usage':
+            request_batcher.max_wait_seconds}, 'cost_optimization': {'estimated_token_usage':
             self.performance_metrics.token_usage, 'estimated_cost': round(
             self.performance_metrics.cost_estimate, 4),
             'optimization_savings': round(self.performance_metrics.
             optimization_savings, 4)}, 'system_health': {
             'available_capacity': self.request_semaphore._value,
-            'queue_utilization': len(self.batch_queue) / self.batch_size *
-            100, 'last_request_time': self.last_request_time}}
+            'queue_utilization': self.request_batcher.pending_count / self.
+            batch_size * 100, 'last_request_time': self.last_request_time}, 'batching':
+            self.request_batcher.get_stats()}
 
     def update_performance_metrics(self, response_time: float, token_count:
         int=0) ->None:
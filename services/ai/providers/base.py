@@ -4,9 +4,10 @@ Base AI Provider Classes
 Defines the abstract base class and data structures for AI providers.
 """
 
+import asyncio
 from abc import ABC, abstractmethod
 from dataclasses import dataclass, field, asdict
-from typing import Any, AsyncIterator, Dict, List, Optional
+from typing import Any, AsyncIterator, Dict, List, Optional, Union
 
 
 @dataclass
@@ -62,6 +63,11 @@ class ProviderQuotaError(Exception):
 class AIProvider(ABC):
     """Abstract base class for AI providers."""
 
+    # True when generate_batch sends all prompts in a single upstream call
+    # through a batch endpoint that keeps each prompt an isolated request.
+    # Never pack several prompts into one prompt: they come from different users
+    supports_batching: bool = False
+
     @abstractmethod
     async def generate(self, prompt: str, config: ProviderConfig) -> ProviderResponse:
         """
@@ -81,6 +87,30 @@ class AIProvider(ABC):
         """
         pass
 
+    async def generate_batch(
+        self,
+        prompts: List[str],
+        config: ProviderConfig
+    ) -> List[Union[ProviderResponse, BaseException]]:
+        """
+        Generate responses for several prompts sharing one configuration.
+
+        The default implementation issues concurrent generate() calls;
+        providers with a native batch endpoint should override it and set
+        supports_batching = True.
+
+        Args:
+            prompts: Input prompts
+            config: Provider configuration shared by all prompts
+
+        Returns:
+            One ProviderResponse or exception per prompt, in input order
+        """
+        return await asyncio.gather(
+            *(self.generate(prompt, config) for prompt in prompts),
+            return_exceptions=True
+        )
+
     @abstractmethod
     async def generate_stream(
         self,
@@ -1,13 +1,15 @@
 """
 Provider Factory
 
-Handles provider selection and instantiation based on task requirements.
+Handles provider selection and instantiation based on task requirements,
+including routing tasks with a registered model experiment to the variant's
+model and recording each request's outcome against that variant.
 """
 
 import logging
-from typing import Any, Dict, List, Optional, Tuple
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
 
-from config.ai_config import get_ai_model
+from config.ai_config import ModelType, get_ai_model
 from services.ai.circuit_breaker import AICircuitBreaker
 from services.ai.instruction_integration import get_instruction_manager, InstructionManager
 from services.ai.exceptions import ModelUnavailableException
@@ -16,6 +18,9 @@ from .gemini_provider import GeminiProvider
 from .openai_provider import OpenAIProvider
 from .anthropic_provider import AnthropicProvider
 
+if TYPE_CHECKING:
+    from services.ai.ab_testing_framework import ABTestingFramework
+
 logger = logging.getLogger(__name__)
 
 
@@ -40,7 +45,8 @@ class ProviderFactory:
     def __init__(
         self,
         instruction_manager: Optional[InstructionManager] = None,
-        circuit_breaker: Optional[AICircuitBreaker] = None
+        circuit_breaker: Optional[AICircuitBreaker] = None,
+        ab_testing: Optional['ABTestingFramework'] = None
     ):
         """
         Initialize the provider factory.
@@ -48,9 +54,15 @@ class ProviderFactory:
         Args:
             instruction_manager: Instruction manager for system instructions
             circuit_breaker: Circuit breaker for availability checks
+            ab_testing: A/B testing framework for model experiments
         """
+        if ab_testing is None:
+            from services.ai.ab_testing_framework import get_ab_testing_framework
+            ab_testing = get_ab_testing_framework()
+
         self.instruction_manager = instruction_manager or get_instruction_manager()
         self.circuit_breaker = circuit_breaker or AICircuitBreaker()
+        self.ab_testing = ab_testing
 
         # Cache provider instances
         self._gemini_provider: Optional[GeminiProvider] = None
@@ -91,6 +103,8 @@ class ProviderFactory:
         )
 
         try:
+            experiment_id, variant, model_type = self._select_experiment_variant(task_type, context)
+
             # Get model with system instruction
             model, instruction_id = self.instruction_manager.get_model_with_instruction(
                 instruction_type=task_type,
@@ -98,9 +112,14 @@ class ProviderFactory:
                 business_profile=context.get('business_context', {}) if context else None,
                 task_complexity=complexity,
                 tools=tools,
-                prefer_speed=prefer_speed
+                prefer_speed=prefer_speed,
+                model_type=model_type
             )
 
+            # Callers record the experiment metric against this variant
+            if experiment_id:
+                model._experiment_variant = (experiment_id, variant)
+
             # Attach cached content if provided
             if cached_content:
                 model._cached_content = cached_content
@@ -132,6 +151,108 @@ class ProviderFactory:
                 reason=f'Model selection failed: {str(e)}'
             )
 
+    def register_model_experiment(
+        self,
+        task_type: str,
+        experiment_id: str,
+        variant_models: Dict[str, ModelType]
+    ) -> None:
+        """
+        Route a task type through a model A/B experiment.
+
+        Each request is assigned a variant by the A/B testing framework,
+        which follows the experiment's sequential stop/ramp decisions: traffic
+        shifts towards the leading model while evidence builds, and once the
+        experiment stops every request gets the winner. The route is kept on
+        the framework, so every factory sharing it routes the task.
+
+        Args:
+            task_type: Task type to route
+            experiment_id: ID of a running experiment
+            variant_models: Model to use for each experiment variant
+
+        Raises:
+            ValueError: If the experiment is unknown or a variant has no model
+        """
+        config = self.ab_testing.experiments.get(experiment_id)
+        if config is None:
+            raise ValueError(f"Unknown experiment: {experiment_id}")
+        missing = set(config.traffic_split) - set(variant_models)
+        if missing:
+            raise ValueError(f"No model for variants: {sorted(missing)}")
+
+        self.ab_testing.model_experiments[task_type] = (experiment_id, dict(variant_models))
+
+    def _select_experiment_variant(
+        self,
+        task_type: str,
+        context: Optional[Dict]
+    ) -> Tuple[Optional[str], Optional[str], Optional[ModelType]]:
+        """
+        Pick the experiment variant and model for a request.
+
+        Requests without a user_id or session_id in their context are not
+        part of the experiment and use the usual model selection.
+
+        Returns:
+            Tuple of (experiment_id, variant, model_type), all None if the
+            request is not in an experiment
+        """
+        experiment = self.ab_testing.model_experiments.get(task_type)
+        unit_id = (context.get('user_id') or context.get('session_id')) if context else None
+        if experiment is None or unit_id is None:
+            return None, None, None
+
+        experiment_id, variant_models = experiment
+        variant = self.ab_testing.assign_variant(experiment_id, str(unit_id), context)
+        return experiment_id, variant, variant_models.get(variant)
+
+    def record_experiment_outcome(
+        self,
+        model: Any,
+        context: Optional[Dict],
+        outcome: Dict[str, Any]
+    ) -> bool:
+        """
+        Record a request's outcome against its model experiment variant.
+
+        The experiment's primary metric is taken from outcome, along with any
+        of its secondary metrics that are present. Recording never fails the
+        request; errors are logged.
+
+        Args:
+            model: Model returned by get_provider_for_task
+            context: Context the model was selected with
+            outcome: Metric name -> value measured for the request
+
+        Returns:
+            True if an observation was recorded
+        """
+        experiment_variant = getattr(model, '_experiment_variant', None)
+        unit_id = (context.get('user_id') or context.get('session_id')) if context else None
+        if experiment_variant is None or unit_id is None:
+            return False
+
+        try:
+            experiment_id, variant = experiment_variant
+            config = self.ab_testing.experiments[experiment_id]
+            if config.primary_metric not in outcome:
+                return False
+            secondary_metrics = {
+                name: outcome[name] for name in config.secondary_metrics if name in outcome
+            }
+            return self.ab_testing.record_metric(
+                experiment_id,
+                variant,
+                str(unit_id),
+                outcome[config.primary_metric],
+                secondary_metrics=secondary_metrics,
+                context={'session_id': context.get('session_id')},
+            )
+        except Exception as e:
+            logger.warning(f"Failed to record model experiment outcome: {e}")
+            return False
+
     def get_provider_by_name(self, provider_name: str) -> AIProvider:
         """
         Get a specific provider by name.
@@ -5,6 +5,7 @@ Implements the AIProvider interface for Google's Gemini models.
 """
 
 import asyncio
+import json
 import logging
 from datetime import datetime, timezone
 from typing import Any, AsyncIterator, Dict, Optional
@@ -30,6 +31,11 @@ logger = logging.getLogger(__name__)
 class GeminiProvider(AIProvider):
     """Google Gemini AI provider implementation."""
 
+    # Prompts from different users must not share a request: one could steer
+    # another's answer, and a safety block or timeout would fail them all.
+    # RequestBatcher still coalesces identical prompts into one call.
+    supports_batching = False
+
     def __init__(
         self,
         circuit_breaker: Optional[AICircuitBreaker] = None,
@@ -57,6 +63,27 @@ class GeminiProvider(AIProvider):
         }
 
         self.model = None
+        self._model_key = None
+
+    def _get_model(self, config: ProviderConfig) -> Any:
+        """Model for the config, rebuilt only when name, instruction, tools or cache change."""
+        key = (
+            config.model_name,
+            config.system_instruction,
+            json.dumps(config.tools, sort_keys=True, default=str) if config.tools else None,
+            id(config.cached_content),
+        )
+        if self.model is None or self._model_key != key:
+            self.model = get_ai_model(
+                config.model_name,
+                system_instruction=config.system_instruction,
+                tools=config.tools
+            )
+            if config.cached_content:
+                self.model._cached_content = config.cached_content
+                logger.debug("Attached cached content to Gemini model")
+            self._model_key = key
+        return self.model
 
     async def generate(self, prompt: str, config: ProviderConfig) -> ProviderResponse:
         """
@@ -89,13 +116,7 @@ class GeminiProvider(AIProvider):
 
         try:
             # Get or create model
-            if not self.model or self.model.model_name != model_name:
-                self.model = get_ai_model(model_name)
-
-            # Attach cached content if provided
-            if config.cached_content:
-                self.model._cached_content = config.cached_content
-                logger.debug(f"Attached cached content to Gemini model")
+            model = self._get_model(config)
 
             # Build generation config
             generation_config = {
@@ -117,7 +138,7 @@ class GeminiProvider(AIProvider):
                 # Run generation in thread pool to avoid blocking
                 generation_task = asyncio.create_task(
                     asyncio.to_thread(
-                        self.model.generate_content,
+                        model.generate_content,
                         prompt,
                         safety_settings=safety_settings,
                         generation_config=generation_config
@@ -150,7 +171,7 @@ class GeminiProvider(AIProvider):
             # Record analytics
             if self.analytics_monitor:
                 await self.analytics_monitor.record_metric(
-                    MetricType.RESPONSE_TIME,
+                    MetricType.PERFORMANCE,
                     'gemini_generation',
                     response_time,
                     metadata={
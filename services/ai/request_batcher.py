@@ -0,0 +1,287 @@
+"""
+AI Request Coalescing and Micro-Batching
+
+Sits between callers and AI providers to cut provider call volume during
+bursts (e.g. many users running the same assessment at once):
+
+- Single-flight: concurrent requests with the same normalized prompt and
+  configuration share one in-flight provider call
+- Micro-batching: compatible requests are grouped into batches bounded by
+  size and a short time window, dispatched through the provider's
+  generate_batch(), and each caller receives its own result. Only providers
+  with a native batch endpoint (supports_batching) are batched; for the
+  rest the window would add latency without saving any calls
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import re
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from .providers.base import AIProvider, ProviderConfig, ProviderResponse
+
+logger = logging.getLogger(__name__)
+
+# Batching Constants
+DEFAULT_MAX_BATCH_SIZE = 8
+DEFAULT_MAX_WAIT_SECONDS = 0.05
+DEFAULT_MAX_CONCURRENT_BATCHES = 4
+
+ProviderResolver = Callable[[str], AIProvider]
+BatchKey = Tuple[Any, ...]
+
+
+@dataclass
+class BatcherStats:
+    """Counters describing how much work the batcher saved."""
+
+    submitted: int = 0
+    coalesced: int = 0
+    prompts_dispatched: int = 0
+    batches_dispatched: int = 0
+    provider_calls: int = 0
+    failures: int = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert stats to dictionary with derived ratios."""
+        return {
+            'submitted': self.submitted,
+            'coalesced': self.coalesced,
+            'prompts_dispatched': self.prompts_dispatched,
+            'batches_dispatched': self.batches_dispatched,
+            'provider_calls': self.provider_calls,
+            'failures': self.failures,
+            'average_batch_size': (
+                self.prompts_dispatched / self.batches_dispatched
+                if self.batches_dispatched else 0.0
+            ),
+            'call_reduction_ratio': (
+                1 - self.provider_calls / self.submitted
+                if self.submitted else 0.0
+            ),
+        }
+
+
+@dataclass
+class _PendingRequest:
+    key: str
+    prompt: str
+    future: asyncio.Future
+
+
+class RequestBatcher:
+    """Single-flight request coalescing plus size/time bounded micro-batching."""
+
+    def __init__(
+        self,
+        provider_resolver: ProviderResolver,
+        max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+        max_wait_seconds: float = DEFAULT_MAX_WAIT_SECONDS,
+        max_concurrent_batches: int = DEFAULT_MAX_CONCURRENT_BATCHES
+    ) -> None:
+        """
+        Initialize the batcher.
+
+        Args:
+            provider_resolver: Maps a provider name to an AIProvider
+                (typically ProviderFactory.get_provider_by_name)
+            max_batch_size: Maximum prompts per dispatched batch
+            max_wait_seconds: Longest a request waits for its batch to fill
+            max_concurrent_batches: Bound on batches in flight at once
+        """
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+
+        self.provider_resolver = provider_resolver
+        self.max_batch_size = max_batch_size
+        self.max_wait_seconds = max_wait_seconds
+        self.max_concurrent_batches = max_concurrent_batches
+        self.stats = BatcherStats()
+
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._pending: Dict[BatchKey, List[_PendingRequest]] = {}
+        self._configs: Dict[BatchKey, Tuple[str, ProviderConfig]] = {}
+        self._timers: Dict[BatchKey, asyncio.TimerHandle] = {}
+        self._tasks: Set[asyncio.Task] = set()
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    @property
+    def pending_count(self) -> int:
+        """Number of requests waiting for their batch to be dispatched."""
+        return sum(len(batch) for batch in self._pending.values())
+
+    @property
+    def inflight_count(self) -> int:
+        """Number of distinct requests currently in flight."""
+        return len(self._inflight)
+
+    async def submit(
+        self,
+        prompt: str,
+        config: ProviderConfig,
+        provider_name: str = 'gemini',
+        immediate: bool = False
+    ) -> ProviderResponse:
+        """
+        Submit a prompt and wait for its response.
+
+        Args:
+            prompt: The input prompt
+            config: Provider configuration
+            provider_name: Provider to dispatch through
+            immediate: Skip the batching window (still coalesced)
+
+        Returns:
+            ProviderResponse for this prompt
+        """
+        self.stats.submitted += 1
+        key = self._request_key(prompt, config, provider_name)
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self.stats.coalesced += 1
+            return await asyncio.shield(inflight)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        future.add_done_callback(lambda done, key=key: self._on_done(key, done))
+        request = _PendingRequest(key=key, prompt=prompt, future=future)
+
+        # Tool calls and cached content are request specific, never batch them
+        if (
+            immediate or self.max_batch_size == 1 or config.tools
+            or config.cached_content or not self._supports_batching(provider_name)
+        ):
+            self._spawn_dispatch(provider_name, config, [request])
+        else:
+            self._enqueue(provider_name, config, request)
+
+        return await asyncio.shield(future)
+
+    async def flush(self) -> None:
+        """Dispatch every pending batch and wait for in-flight batches."""
+        for batch_key in list(self._pending):
+            self._flush_group(batch_key)
+        if self._tasks:
+            await asyncio.gather(*list(self._tasks), return_exceptions=True)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get batching statistics."""
+        stats = self.stats.to_dict()
+        stats['pending'] = self.pending_count
+        stats['inflight'] = self.inflight_count
+        return stats
+
+    def _supports_batching(self, provider_name: str) -> bool:
+        try:
+            return self.provider_resolver(provider_name).supports_batching
+        except Exception:
+            # Dispatch reports the resolver error to the caller
+            return False
+
+    def _enqueue(
+        self, provider_name: str, config: ProviderConfig, request: _PendingRequest
+    ) -> None:
+        batch_key = self._batch_key(config, provider_name)
+        batch = self._pending.setdefault(batch_key, [])
+        batch.append(request)
+        self._configs.setdefault(batch_key, (provider_name, config))
+
+        if len(batch) >= self.max_batch_size:
+            self._flush_group(batch_key)
+        elif batch_key not in self._timers:
+            self._timers[batch_key] = asyncio.get_running_loop().call_later(
+                self.max_wait_seconds, self._flush_group, batch_key
+            )
+
+    def _flush_group(self, batch_key: BatchKey) -> None:
+        timer = self._timers.pop(batch_key, None)
+        if timer is not None:
+            timer.cancel()
+        batch = self._pending.pop(batch_key, None)
+        provider_name, config = self._configs.pop(batch_key, (None, None))
+        if batch:
+            self._spawn_dispatch(provider_name, config, batch)
+
+    def _spawn_dispatch(
+        self, provider_name: str, config: ProviderConfig, batch: List[_PendingRequest]
+    ) -> None:
+        task = asyncio.get_running_loop().create_task(
+            self._dispatch(provider_name, config, batch)
+        )
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _dispatch(
+        self, provider_name: str, config: ProviderConfig, batch: List[_PendingRequest]
+    ) -> None:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrent_batches)
+
+        async with self._semaphore:
+            self.stats.batches_dispatched += 1
+            self.stats.prompts_dispatched += len(batch)
+            try:
+                provider = self.provider_resolver(provider_name)
+                if len(batch) == 1:
+                    self.stats.provider_calls += 1
+                    results: List[Any] = [await provider.generate(batch[0].prompt, config)]
+                else:
+                    self.stats.provider_calls += (
+                        1 if provider.supports_batching else len(batch)
+                    )
+                    results = list(await provider.generate_batch(
+                        [request.prompt for request in batch], config
+                    ))
+                if len(results) != len(batch):
+                    raise RuntimeError(
+                        f"Provider returned {len(results)} results for {len(batch)} prompts"
+                    )
+            except Exception as e:
+                logger.warning(f"Batch dispatch to {provider_name} failed: {e}")
+                results = [e] * len(batch)
+
+        for request, result in zip(batch, results):
+            if request.future.done():
+                continue
+            if isinstance(result, BaseException):
+                self.stats.failures += 1
+                request.future.set_exception(result)
+            else:
+                request.future.set_result(result)
+
+    def _on_done(self, key: str, future: asyncio.Future) -> None:
+        if self._inflight.get(key) is future:
+            del self._inflight[key]
+        # Mark exceptions as retrieved when every waiter was cancelled
+        if not future.cancelled():
+            future.exception()
+
+    @staticmethod
+    def _batch_key(config: ProviderConfig, provider_name: str) -> BatchKey:
+        return (
+            provider_name,
+            config.model_name,
+            config.temperature,
+            config.max_tokens,
+            config.system_instruction,
+            config.timeout,
+        )
+
+    @classmethod
+    def _request_key(cls, prompt: str, config: ProviderConfig, provider_name: str) -> str:
+        normalized = re.sub(r'\s+', ' ', prompt.strip())
+        payload = json.dumps(
+            {
+                'batch': cls._batch_key(config, provider_name),
+                'tools': config.tools,
+                'cached_content': id(config.cached_content) if config.cached_content else None,
+                'prompt': normalized,
+            },
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
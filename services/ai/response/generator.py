@@ -1,10 +1,13 @@
 """
 Response Generator
 
-Orchestrates AI response generation with tool integration.
+Orchestrates AI response generation with tool integration. Requests routed
+through a model experiment have their response time and errors recorded
+against the experiment variant.
 """
 
 import logging
+import time
 from typing import Any, Dict, List, Optional
 
 from services.ai.providers.factory import ProviderFactory
@@ -80,6 +83,8 @@ class ResponseGenerator:
             tools=[tool['schema'] for tool in tools] if tools else None
         )
 
+        started = time.monotonic()
+        response_time = None
         try:
             # Generate response
             # Note: This uses the model directly for now
@@ -88,6 +93,7 @@ class ResponseGenerator:
                 prompt,
                 tools=[tool['schema'] for tool in tools] if tools else None
             )
+            response_time = time.monotonic() - started
 
             # Extract text and function calls
             response_text = self._extract_text(response)
@@ -128,6 +134,8 @@ class ResponseGenerator:
                 'function_results': {},
                 'error': str(e)
             }
+        finally:
+            self._record_experiment_outcome(model, context, response_time)
 
     async def generate_simple(
         self,
@@ -157,9 +165,12 @@ class ResponseGenerator:
             context=context
         )
 
+        started = time.monotonic()
+        response_time = None
         try:
             # Generate response
             response = await model.generate_content_async(full_prompt)
+            response_time = time.monotonic() - started
             response_text = self._extract_text(response)
 
             # Validate safety if manager available
@@ -174,6 +185,27 @@ class ResponseGenerator:
         except Exception as e:
             logger.error(f"Simple generation failed: {e}", exc_info=True)
             return ""
+        finally:
+            self._record_experiment_outcome(model, context, response_time)
+
+    def _record_experiment_outcome(
+        self,
+        model: Any,
+        context: Optional[Dict],
+        response_time: Optional[float]
+    ) -> None:
+        """
+        Record a request's outcome for the model's experiment variant.
+
+        Args:
+            model: Model the response was generated with
+            context: Context the model was selected with
+            response_time: Seconds the model took to respond, None if it failed
+        """
+        outcome = {'error_rate': float(response_time is None)}
+        if response_time is not None:
+            outcome['response_time'] = response_time
+        self.provider_factory.record_experiment_outcome(model, context, outcome)
 
     async def handle_function_calls(
         self,
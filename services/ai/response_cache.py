@@ -1,27 +1,36 @@
 """
-from __future__ import annotations
-import logging
-
-
-logger = logging.getLogger(__name__)
-# Constants
-HTTP_INTERNAL_SERVER_ERROR = 500
-
-
 AI Response Caching System
 
 Intelligent caching for AI responses to improve performance and reduce costs.
-Implements smart TTL management, content-type classification, and cache optimization.
+Implements smart TTL management, content-type classification, semantic
+(embedding-based) matching of near-identical prompts and cache optimization.
+
+Semantic matching only runs when an embedding model is supplied and the
+caller opts in with ``enable_similarity_matching`` in the context: a lexical
+embedding cannot tell "is X required" from "is X not required", and serving
+the wrong one is a wrong compliance answer. Even with an embedding model, a
+match is rejected when the two prompts differ in their numbers or negations.
+The global cache builds OpenAI embeddings on first use when an OpenAI key is
+configured.
 """
+from __future__ import annotations
 import hashlib
 import json
 import re
+import time
 from datetime import datetime, timezone
 from enum import Enum
-from typing import Any, Dict, Optional
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Union
 from config.cache import get_cache_manager
 from config.logging_config import get_logger
+from services.ai.semantic_cache import EmbeddingFunction, SemanticCacheIndex, openai_embedding_function
 logger = get_logger(__name__)
+SHORT_RESPONSE_LENGTH = 500
+SEMANTIC_LOOKUP_ATTEMPTS = 3
+NUMBER_PATTERN = re.compile('\\d+(?:[.,]\\d+)*')
+NEGATION_PATTERN = re.compile(
+    "\\b(?:no|not|never|none|nor|neither|without|cannot|\\w+n't)\\b")
 
 
 class ContentType(Enum):
@@ -48,13 +57,23 @@ class AIResponseCache:
 
     Features:
     - Content-type classification for optimal TTL
-    - Prompt similarity detection for cache hits
+    - Semantic prompt similarity detection for cache hits (opt-in per call
+      site, needs an embedding model)
     - Performance metrics and analytics
     - Cost optimization through intelligent caching
     """
 
-    def __init__(self) ->None:
+    def __init__(self, embedding_function: Optional[EmbeddingFunction]=None,
+        semantic_snapshot_path: Optional[Union[str, Path]]=None,
+        embedding_dimension: Optional[int]=None,
+        embedding_function_factory: Optional[Callable[[], Optional[
+        EmbeddingFunction]]]=None) ->None:
         self.cache_manager = None
+        self.semantic_enabled = embedding_function is not None
+        self.semantic_index = SemanticCacheIndex(embedding_function,
+            dimension=embedding_dimension)
+        self.embedding_function_factory = embedding_function_factory
+        self.semantic_snapshot_path = semantic_snapshot_path
         self.default_ttl = 3600
         self.max_ttl = 86400
         self.min_ttl = 300
@@ -62,14 +81,39 @@ class AIResponseCache:
             POLICY: 86400, ContentType.WORKFLOW: 14400, ContentType.
             ANALYSIS: 3600, ContentType.GUIDANCE: 7200, ContentType.GENERAL:
             1800}
-        self.metrics = {'hits': 0, 'misses': 0, 'total_requests': 0,
-            'cache_size_bytes': 0, 'cost_savings': 0.0}
+        self.metrics = {'hits': 0, 'exact_hits': 0, 'semantic_hits': 0,
+            'misses': 0, 'total_requests': 0, 'cache_size_bytes': 0,
+            'cost_savings': 0.0}
 
     async def initialize(self) ->None:
         """Initialize the cache manager."""
         self.cache_manager = await get_cache_manager()
+        if not self.semantic_enabled and self.embedding_function_factory:
+            embedding_function = self.embedding_function_factory()
+            self.embedding_function_factory = None
+            if embedding_function is not None:
+                self.semantic_index.embedding_function = embedding_function
+                self.semantic_enabled = True
+        if self.semantic_enabled and self.semantic_snapshot_path:
+            try:
+                loaded = self.semantic_index.load(self.semantic_snapshot_path)
+                logger.info('Loaded %s semantic cache entries from snapshot' %
+                    loaded)
+            except (OSError, ValueError, KeyError) as e:
+                logger.warning('Semantic snapshot load failed: %s' % e)
         logger.info('AI Response Cache initialized')
 
+    def save_semantic_snapshot(self) ->bool:
+        """Persist the semantic index to the configured snapshot path."""
+        if not self.semantic_enabled or not self.semantic_snapshot_path:
+            return False
+        try:
+            self.semantic_index.save(self.semantic_snapshot_path)
+            return True
+        except OSError as e:
+            logger.warning('Semantic snapshot save failed: %s' % e)
+            return False
+
     async def get_cached_response(self, prompt: str, context: Optional[Dict
         [str, Any]]=None, similarity_threshold: float=0.85) ->Optional[Dict
         [str, Any]]:
@@ -78,7 +122,9 @@ class AIResponseCache:
 
         Args:
             prompt: The AI prompt to check
-            context: Additional context for cache key generation
+            context: Additional context for cache key generation; set
+                ``enable_similarity_matching`` to also accept near-identical
+                prompts
             similarity_threshold: Minimum similarity for cache hit
 
         Returns:
@@ -90,14 +136,14 @@ class AIResponseCache:
             cache_key = self._generate_cache_key(prompt, context)
             cached_data = await self.cache_manager.get(cache_key)
             if cached_data:
-                self._record_cache_hit()
+                self._record_cache_hit(semantic=False)
                 logger.debug('Cache hit for prompt hash: %s' % cache_key)
                 return cached_data
-            if context and context.get('enable_similarity_matching', True):
+            if self._similarity_requested(context):
                 similar_response = await self._find_similar_cached_response(
                     prompt, context, similarity_threshold)
                 if similar_response:
-                    self._record_cache_hit()
+                    self._record_cache_hit(semantic=True)
                     logger.debug('Similarity cache hit for prompt')
                     return similar_response
             self._record_cache_miss()
@@ -133,9 +179,13 @@ class AIResponseCache:
                 content_type.value, 'cached_at': datetime.now(timezone.utc)
                 .isoformat(), 'ttl': ttl, 'prompt_hash': cache_key,
                 'metadata': metadata or {}, 'context_summary': self.
-                _summarize_context(context)}
+                _summarize_context(context), 'prompt_guard': self.
+                _prompt_guard(prompt)}
             success = await self.cache_manager.set(cache_key, cache_data, ttl)
             if success:
+                if self._similarity_requested(context):
+                    await self._index_prompt_embedding(prompt, context,
+                        cache_key, ttl)
                 self._update_cache_metrics(cache_data)
                 logger.debug(
                     'Cached response with TTL %ss for content type %s' % (
@@ -148,19 +198,24 @@ class AIResponseCache:
     def _generate_cache_key(self, prompt: str, context: Optional[Dict[str,
         Any]]=None) ->str:
         """Generate a unique cache key for the prompt and context."""
-        normalized_prompt = re.sub('\\s+', ' ', prompt.strip().lower())
+        normalized_prompt = self._normalize_prompt(prompt)
         context_key = ''
         if context:
-            stable_context = {'framework': context.get('framework'),
-                'industry': context.get('business_context', {}).get(
-                'industry'), 'org_size': context.get('business_context', {}
-                ).get('employee_count', 0) // 100 * 100, 'content_type':
-                context.get('content_type')}
-            context_key = json.dumps(stable_context, sort_keys=True)
+            context_key = json.dumps(self._stable_context(context),
+                sort_keys=True)
         combined_input = f'{normalized_prompt}|{context_key}'
         return (
             f'ai_response:{hashlib.sha256(combined_input.encode()).hexdigest()[:16]}'
-            ,)
+            )
+
+    @staticmethod
+    def _stable_context(context: Dict[str, Any]) ->Dict[str, Any]:
+        """Context fields that select a cached answer (exact and semantic)."""
+        business_context = context.get('business_context') or {}
+        return {'framework': context.get('framework'), 'industry':
+            business_context.get('industry'), 'org_size': (business_context
+            .get('employee_count') or 0) // 100 * 100, 'content_type':
+            context.get('content_type')}
 
     def _classify_content_type(self, response: str, context: Optional[Dict[
         str, Any]]=None) ->ContentType:
@@ -196,7 +251,7 @@ class AIResponseCache:
         response_length = len(response)
         if response_length > 2000:
             base_ttl = int(base_ttl * 1.5)
-        elif response_length < HTTP_INTERNAL_SERVER_ERROR:
+        elif response_length < SHORT_RESPONSE_LENGTH:
             base_ttl = int(base_ttl * 0.7)
         if context:
             if context.get('business_context', {}).get('maturity_level'
@@ -211,13 +266,70 @@ class AIResponseCache:
         Dict[str, Any], threshold: float) ->Optional[Dict[str, Any]]:
         """Find cached responses for similar prompts using semantic similarity."""
         try:
-            set(re.findall('\\b\\w+\\b', prompt.lower()))
-            context.get('content_type', 'general')
+            partition = self._semantic_partition(context)
+            query_vector = await self.semantic_index.aembed(self.
+                _normalize_prompt(prompt))
+            for _ in range(SEMANTIC_LOOKUP_ATTEMPTS):
+                match = self.semantic_index.search(partition, query_vector,
+                    threshold)
+                if match is None:
+                    return None
+                cache_key, similarity = match
+                cached_data = await self.cache_manager.get(cache_key)
+                if cached_data and cached_data.get('prompt_guard'
+                    ) != self._prompt_guard(prompt):
+                    logger.debug(
+                        'Semantic match %s rejected: numbers or negations differ'
+                         % cache_key)
+                    return None
+                if cached_data:
+                    logger.debug('Semantic match %s with similarity %.3f' %
+                        (cache_key, similarity))
+                    return cached_data
+                self.semantic_index.remove(partition, cache_key)
             return None
         except Exception as e:
             logger.warning('Similarity search error: %s' % e)
             return None
 
+    async def _index_prompt_embedding(self, prompt: str, context: Optional[
+        Dict[str, Any]], cache_key: str, ttl: int) ->None:
+        """Store the prompt embedding so later similar prompts can hit."""
+        try:
+            partition = self._semantic_partition(context)
+            vector = await self.semantic_index.aembed(self._normalize_prompt(
+                prompt))
+            self.semantic_index.add(partition, cache_key, vector, time.time
+                () + ttl)
+        except Exception as e:
+            logger.warning('Semantic index update error: %s' % e)
+
+    def _similarity_requested(self, context: Optional[Dict[str, Any]]=None
+        ) ->bool:
+        """Whether the call site opted in to semantic matching."""
+        return bool(self.semantic_enabled and context and context.get(
+            'enable_similarity_matching', False))
+
+    @classmethod
+    def _prompt_guard(cls, prompt: str) ->Dict[str, Any]:
+        """Numbers and negation count that a semantic match must share."""
+        normalized = cls._normalize_prompt(prompt)
+        return {'numbers': sorted(NUMBER_PATTERN.findall(normalized)),
+            'negations': len(NEGATION_PATTERN.findall(normalized))}
+
+    @classmethod
+    def _semantic_partition(cls, context: Optional[Dict[str, Any]]=None
+        ) ->tuple:
+        """Partition prompts on the same context fields as the exact key."""
+        stable_context = cls._stable_context(context or {})
+        return SemanticCacheIndex.partition_key(stable_context['framework'],
+            stable_context['content_type'], stable_context['industry'],
+            stable_context['org_size'])
+
+    @staticmethod
+    def _normalize_prompt(prompt: str) ->str:
+        return re.sub('\\s+', ' ', prompt.strip().lower())
+
     def _summarize_context(self, context: Optional[Dict[str, Any]]=None
         ) ->Dict[str, Any]:
         """Create a summary of context for cache metadata."""
@@ -228,9 +340,10 @@ class AIResponseCache:
             'business_context', {}).get('industry'), 'has_business_context':
             bool(context.get('business_context'))}
 
-    def _record_cache_hit(self) ->None:
+    def _record_cache_hit(self, semantic: bool=False) ->None:
         """Record a cache hit for metrics."""
         self.metrics['hits'] += 1
+        self.metrics['semantic_hits' if semantic else 'exact_hits'] += 1
         self.metrics['total_requests'] += 1
 
     def _record_cache_miss(self) ->None:
@@ -251,7 +364,12 @@ class AIResponseCache:
         hit_rate = self.metrics['hits'] / self.metrics['total_requests'
             ] * 100 if self.metrics['total_requests'] > 0 else 0
         return {'hit_rate_percentage': round(hit_rate, 2), 'total_hits':
-            self.metrics['hits'], 'total_misses': self.metrics['misses'],
+            self.metrics['hits'], 'exact_hits': self.metrics['exact_hits'],
+            'semantic_hits': self.metrics['semantic_hits'],
+            'semantic_enabled': self.semantic_enabled,
+            'semantic_index_entries': len(self.semantic_index),
+            'semantic_partitions': self.semantic_index.get_stats(),
+            'total_misses': self.metrics['misses'],
             'total_requests': self.metrics['total_requests'],
             'estimated_cost_savings': round(self.metrics['cost_savings'], 4
             ), 'cache_size_mb': round(self.metrics['cache_size_bytes'] /
@@ -269,7 +387,8 @@ class AIResponseCache:
         return 0
 
 
-ai_response_cache = AIResponseCache()
+ai_response_cache = AIResponseCache(embedding_function_factory=
+    openai_embedding_function)
 
 
 async def get_ai_cache() ->AIResponseCache:
@@ -0,0 +1,318 @@
+"""
+Semantic Index for AI Response Caching
+
+Embedding-based lookup used by AIResponseCache to serve near-identical
+prompts from cache. Prompts are embedded with a pluggable (sync or async)
+embedding function and stored in per-context NumPy indexes (framework,
+content type, industry, organisation size) whose rows are L2-normalized, so
+similarity search is one matrix-vector product. The index width is taken
+from the first embedding unless a dimension is given.
+"""
+
+import inspect
+import logging
+import os
+import re
+import time
+import zlib
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+EmbeddingFunction = Callable[[str], Union[Sequence[float], Awaitable[Sequence[float]]]]
+
+# Index Constants
+DEFAULT_EMBEDDING_DIMENSION = 512  # Width of the offline hashing embedding
+DEFAULT_EMBEDDING_MODEL = 'text-embedding-3-small'
+DEFAULT_INITIAL_CAPACITY = 256
+DEFAULT_MAX_ENTRIES_PER_PARTITION = 100_000
+PARTITION_SEPARATOR = '|'
+TOKEN_PATTERN = re.compile(r'\b\w+\b')
+
+
+def hashing_embedding(text: str, dimension: int=DEFAULT_EMBEDDING_DIMENSION
+    ) -> np.ndarray:
+    """
+    Deterministic local embedding using signed feature hashing.
+
+    Hashes word unigrams and bigrams into a fixed-size vector. Needs no
+    model or network access, which suits offline use and tests. It is
+    lexical: prompts differing only by a number or a negation score as
+    near-identical, so AIResponseCache never uses it to serve answers.
+    """
+    vector = np.zeros(dimension, dtype=np.float32)
+    tokens = TOKEN_PATTERN.findall(text.lower())
+    features = tokens + [f'{a} {b}' for a, b in zip(tokens, tokens[1:])]
+    for feature in features:
+        digest = zlib.crc32(feature.encode('utf-8'))
+        sign = 1.0 if digest & 0x80000000 else -1.0
+        vector[digest % dimension] += sign
+    return vector
+
+
+def openai_embedding_function() -> Optional[EmbeddingFunction]:
+    """
+    OpenAI embeddings served through the shared embedding cache.
+
+    Returns None when no OpenAI key is configured, which leaves semantic
+    matching off. The model can be overridden with AI_CACHE_EMBEDDING_MODEL.
+    """
+    if not os.getenv('OPENAI_API_KEY'):
+        return None
+    try:
+        from langchain_openai import OpenAIEmbeddings
+
+        from services.caching.embedding_cache import embedding_model_name, get_embedding_cache
+    except ImportError as e:
+        logger.warning('Semantic cache embeddings unavailable: %s', e)
+        return None
+
+    embeddings = OpenAIEmbeddings(model=os.getenv('AI_CACHE_EMBEDDING_MODEL', DEFAULT_EMBEDDING_MODEL))
+    model = embedding_model_name(embeddings)
+
+    async def embed(text: str) -> List[float]:
+        cache = await get_embedding_cache()
+        return await cache.get_or_embed_one(model, text, embeddings.aembed_query)
+
+    return embed
+
+
+def _normalize(vector: Sequence[float]) -> Optional[np.ndarray]:
+    array = np.asarray(vector, dtype=np.float32).ravel()
+    norm = float(np.linalg.norm(array))
+    if norm == 0.0:
+        return None
+    return array / norm
+
+
+class SemanticVectorIndex:
+    """
+    Dense vector index with normalized rows and per-row expiry.
+
+    Rows live in a contiguous float32 matrix that grows by doubling.
+    Deletes swap the last row into the freed slot, so add and remove are
+    O(1) and search is a single matrix-vector product over live rows.
+    """
+
+    def __init__(self, dimension: int, initial_capacity: int=
+        DEFAULT_INITIAL_CAPACITY, max_entries: int=
+        DEFAULT_MAX_ENTRIES_PER_PARTITION) -> None:
+        self.dimension = dimension
+        self.max_entries = max_entries
+        self._matrix = np.zeros((initial_capacity, dimension), dtype=np.float32)
+        self._expires_at = np.zeros(initial_capacity, dtype=np.float64)
+        self._keys: List[str] = []
+        self._positions: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._positions
+
+    def add(self, key: str, vector: Sequence[float], expires_at: float=np.inf
+        ) -> bool:
+        """
+        Insert or replace the vector for key. Returns False for zero vectors.
+
+        Raises:
+            ValueError: If the vector does not match the index dimension
+        """
+        normalized = _normalize(vector)
+        if normalized is None:
+            return False
+        self._check_dimension(normalized)
+
+        row = self._positions.get(key)
+        if row is None:
+            if len(self._keys) >= self.max_entries:
+                self._evict_soonest_expiring()
+            row = len(self._keys)
+            self._ensure_capacity(row + 1)
+            self._keys.append(key)
+            self._positions[key] = row
+
+        self._matrix[row] = normalized
+        self._expires_at[row] = expires_at
+        return True
+
+    def remove(self, key: str) -> bool:
+        """Remove key from the index"""
+        row = self._positions.pop(key, None)
+        if row is None:
+            return False
+
+        last = len(self._keys) - 1
+        if row != last:
+            moved_key = self._keys[last]
+            self._matrix[row] = self._matrix[last]
+            self._expires_at[row] = self._expires_at[last]
+            self._keys[row] = moved_key
+            self._positions[moved_key] = row
+        self._keys.pop()
+        return True
+
+    def search(self, vector: Sequence[float], threshold: float, now:
+        Optional[float]=None) -> Optional[Tuple[str, float]]:
+        """Return (key, similarity) of the best live match above threshold"""
+        size = len(self._keys)
+        normalized = _normalize(vector)
+        if size == 0 or normalized is None:
+            return None
+        self._check_dimension(normalized)
+
+        scores = self._matrix[:size] @ normalized
+        current = time.time() if now is None else now
+        scores[self._expires_at[:size] <= current] = -np.inf
+
+        best = int(np.argmax(scores))
+        score = float(scores[best])
+        if score < threshold:
+            return None
+        return self._keys[best], score
+
+    def _check_dimension(self, normalized: np.ndarray) -> None:
+        if normalized.shape[0] != self.dimension:
+            raise ValueError(
+                f'Embedding has {normalized.shape[0]} dimensions, index expects {self.dimension}')
+
+    def _ensure_capacity(self, required: int) -> None:
+        capacity = self._matrix.shape[0]
+        if required <= capacity:
+            return
+        new_capacity = max(required, capacity * 2)
+        matrix = np.zeros((new_capacity, self.dimension), dtype=np.float32)
+        matrix[:capacity] = self._matrix
+        expires_at = np.zeros(new_capacity, dtype=np.float64)
+        expires_at[:capacity] = self._expires_at
+        self._matrix = matrix
+        self._expires_at = expires_at
+
+    def _evict_soonest_expiring(self) -> None:
+        row = int(np.argmin(self._expires_at[:len(self._keys)]))
+        self.remove(self._keys[row])
+
+    def export_arrays(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Return (keys, vectors, expires_at) for the live rows"""
+        size = len(self._keys)
+        return (np.array(self._keys, dtype=str), self._matrix[:size].copy(),
+            self._expires_at[:size].copy())
+
+
+class SemanticCacheIndex:
+    """
+    Partitioned semantic index keyed by request context.
+
+    Each partition is an independent SemanticVectorIndex so lookups only
+    compare prompts that could legitimately share a cached answer.
+    """
+
+    def __init__(self, embedding_function: Optional[EmbeddingFunction]=None,
+        dimension: Optional[int]=None, max_entries_per_partition:
+        int=DEFAULT_MAX_ENTRIES_PER_PARTITION) -> None:
+        if embedding_function is None:
+            dimension = dimension or DEFAULT_EMBEDDING_DIMENSION
+            embedding_function = lambda text: hashing_embedding(text,
+                dimension)
+        self.embedding_function = embedding_function
+        # None until the first vector is added, so any model width works
+        self.dimension = dimension
+        self.max_entries_per_partition = max_entries_per_partition
+        self._partitions: Dict[Tuple[str, ...], SemanticVectorIndex] = {}
+
+    def __len__(self) -> int:
+        return sum(len(index) for index in self._partitions.values())
+
+    @staticmethod
+    def partition_key(framework: Optional[str], content_type: Optional[str],
+        industry: Optional[str]=None, org_size: Optional[int]=None
+        ) -> Tuple[str, ...]:
+        return ((framework or '').lower(), (content_type or 'general').
+            lower(), (industry or '').lower(), str(org_size or 0))
+
+    def embed(self, text: str) -> np.ndarray:
+        """Embed text with a synchronous embedding function"""
+        return np.asarray(self.embedding_function(text), dtype=np.float32)
+
+    async def aembed(self, text: str) -> np.ndarray:
+        """Embed text with a sync or async embedding function"""
+        vector = self.embedding_function(text)
+        if inspect.isawaitable(vector):
+            vector = await vector
+        return np.asarray(vector, dtype=np.float32)
+
+    def _partition(self, partition: Tuple[str, ...]) -> SemanticVectorIndex:
+        index = self._partitions.get(partition)
+        if index is None:
+            index = SemanticVectorIndex(self.dimension, max_entries=self.
+                max_entries_per_partition)
+            self._partitions[partition] = index
+        return index
+
+    def add(self, partition: Tuple[str, ...], key: str, vector: Sequence[
+        float], expires_at: float=np.inf) -> bool:
+        if self.dimension is None:
+            self.dimension = int(np.asarray(vector).size)
+        return self._partition(partition).add(key, vector, expires_at)
+
+    def remove(self, partition: Tuple[str, ...], key: str) -> bool:
+        index = self._partitions.get(partition)
+        return index.remove(key) if index is not None else False
+
+    def search(self, partition: Tuple[str, ...], vector: Sequence[float],
+        threshold: float) -> Optional[Tuple[str, float]]:
+        index = self._partitions.get(partition)
+        if index is None:
+            return None
+        return index.search(vector, threshold)
+
+    def get_stats(self) -> Dict[str, int]:
+        return {PARTITION_SEPARATOR.join(partition): len(index) for
+            partition, index in self._partitions.items()}
+
+    def save(self, path: Union[str, Path]) -> None:
+        """Write a snapshot of all partitions to a NumPy .npz archive"""
+        arrays: Dict[str, np.ndarray] = {}
+        names = []
+        for position, (partition, index) in enumerate(self._partitions.items()
+            ):
+            keys, vectors, expires_at = index.export_arrays()
+            arrays[f'keys_{position}'] = keys
+            arrays[f'vectors_{position}'] = vectors
+            arrays[f'expires_{position}'] = expires_at
+            names.append(PARTITION_SEPARATOR.join(partition))
+        arrays['partitions'] = np.array(names, dtype=str)
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with path.open('wb') as handle:
+            np.savez(handle, **arrays)
+
+    def load(self, path: Union[str, Path]) -> int:
+        """Load a snapshot, skipping expired rows. Returns rows loaded."""
+        path = Path(path)
+        if not path.exists():
+            return 0
+
+        loaded = 0
+        now = time.time()
+        with np.load(path, allow_pickle=False) as snapshot:
+            for position, name in enumerate(snapshot['partitions']):
+                vectors = snapshot[f'vectors_{position}']
+                if self.dimension is None and vectors.ndim == 2:
+                    self.dimension = int(vectors.shape[1])
+                if vectors.ndim != 2 or vectors.shape[1] != self.dimension:
+                    logger.warning(
+                        'Skipping semantic snapshot partition %s: dimension mismatch'
+                        , name)
+                    continue
+                partition = tuple(str(name).split(PARTITION_SEPARATOR))
+                for key, vector, expires_at in zip(snapshot[
+                    f'keys_{position}'], vectors, snapshot[
+                    f'expires_{position}']):
+                    if expires_at > now and self.add(partition, str(key),
+                        vector, float(expires_at)):
+                        loaded += 1
+        return loaded
@@ -15,6 +15,12 @@ Key Components:
 - CacheManager: Main caching orchestrator with built-in invalidation
 - CacheMetrics: Performance monitoring and metrics
 - CacheKeyBuilder: Structured key generation and versioning
+- ShardedLRUCache: Sharded in-process L1 tier used by CacheManager
+- CacheInvalidationBus: Redis pub/sub channel keeping L1 tiers coherent
+  across workers
+- CacheCodec: Versioned msgpack/zstd encoding for L2 values
+- EmbeddingCache: Shared L1 + Redis cache of packed embedding vectors
+- GraphVersion: Compliance graph version used to key GraphRAG retrieval caches
 
 Note: Cache invalidation and warming functionality is integrated into the
 CacheManager class for unified cache management.
@@ -23,9 +29,21 @@ CacheManager class for unified cache management.
 from .cache_manager import CacheManager
 from .cache_metrics import CacheMetrics
 from .cache_keys import CacheKeyBuilder
+from .sharded_cache import ShardedLRUCache
+from .invalidation_bus import CacheInvalidationBus
+from .cache_codec import CacheCodec
+from .embedding_cache import EmbeddingCache, get_embedding_cache
+from .graph_version import GraphVersion, get_graph_version
 
 __all__ = [
     "CacheManager",
     "CacheMetrics",
     "CacheKeyBuilder",
+    "ShardedLRUCache",
+    "CacheInvalidationBus",
+    "CacheCodec",
+    "EmbeddingCache",
+    "get_embedding_cache",
+    "GraphVersion",
+    "get_graph_version",
 ]
@@ -0,0 +1,276 @@
+"""
+Binary Cache Value Codec
+
+CacheManager used to store every L2 value as JSON text. That is bulky for
+large AI responses, evidence lists and reports, and it flattens datetime,
+Decimal and UUID values to strings. This module provides a pluggable codec
+layer for L2 values:
+
+- msgpack encoding with extension types for datetime, date, Decimal and UUID
+  (falls back to JSON when msgpack is not installed)
+- Transparent zstd or lz4 compression above a size threshold
+- A versioned header byte describing the encoding, so entries written as
+  plain JSON before this codec existed still decode
+- Per-namespace policies keyed by CacheNamespace
+
+Frame layout: one header byte followed by the payload. The header's high
+nibble is the frame version, the low nibble holds flag bits. Header bytes are
+below 0x20, which no JSON document starts with, so framed and legacy values
+never collide. Redis clients created with decode_responses=True cannot round
+trip raw bytes, so for those the payload is base64 armored and the header
+records that. Armoring costs a third of the payload, more than msgpack saves
+over JSON, so text-safe codecs frame only compressed values and store the
+rest as plain JSON.
+"""
+
+import base64
+import datetime
+import json
+import logging
+import uuid
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Any, Dict, Optional, Union
+
+from .cache_keys import CacheKeyBuilder, CacheNamespace
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - optional dependency
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+try:
+    import lz4.frame as lz4_frame
+except ImportError:  # pragma: no cover - optional dependency
+    lz4_frame = None
+
+logger = logging.getLogger(__name__)
+
+# Frame Constants
+FRAME_VERSION = 1
+FRAME_VERSION_SHIFT = 4
+FLAG_MSGPACK = 0x01  # Payload is msgpack (JSON otherwise)
+FLAG_ZSTD = 0x02  # Payload is zstd compressed
+FLAG_LZ4 = 0x04  # Payload is lz4 frame compressed
+FLAG_BASE64 = 0x08  # Payload is base64 armored for text-mode Redis clients
+MAX_HEADER_BYTE = 0x1F  # JSON text never starts below 0x20
+
+# Codec names
+CODEC_JSON = "json"
+CODEC_MSGPACK = "msgpack"
+
+# Compression names
+COMPRESSION_NONE = "none"
+COMPRESSION_ZSTD = "zstd"
+COMPRESSION_LZ4 = "lz4"
+
+# Compression Constants
+DEFAULT_COMPRESS_THRESHOLD = 1024  # Bytes; smaller payloads are stored as-is
+ZSTD_LEVEL = 3  # zstd's default; good ratio at a few hundred MB/s
+
+# msgpack extension type codes
+EXT_DATETIME = 1
+EXT_DATE = 2
+EXT_DECIMAL = 3
+EXT_UUID = 4
+
+Encoded = Union[str, bytes]
+
+
+class CodecError(ValueError):
+    """Raised when a cached value cannot be encoded or decoded"""
+
+
+@dataclass(frozen=True)
+class CodecPolicy:
+    """How values in one namespace are encoded"""
+
+    codec: str = CODEC_MSGPACK
+    compression: str = COMPRESSION_ZSTD
+    compress_threshold: int = DEFAULT_COMPRESS_THRESHOLD
+
+
+DEFAULT_POLICY = CodecPolicy()
+
+# Sessions are small and read by code outside CacheManager, so they stay
+# JSON. Bulky payloads get a lower compression threshold.
+DEFAULT_NAMESPACE_POLICIES: Dict[CacheNamespace, CodecPolicy] = {
+    CacheNamespace.SESSION: CodecPolicy(
+        codec=CODEC_JSON, compression=COMPRESSION_NONE
+    ),
+    CacheNamespace.EVIDENCE: CodecPolicy(compress_threshold=512),
+    CacheNamespace.ASSESSMENT: CodecPolicy(compress_threshold=512),
+    CacheNamespace.COMPUTE: CodecPolicy(compress_threshold=512),
+    CacheNamespace.EXTERNAL: CodecPolicy(compress_threshold=512),
+}
+
+
+def _msgpack_default(obj: Any) -> Any:
+    if isinstance(obj, datetime.datetime):
+        return msgpack.ExtType(EXT_DATETIME, obj.isoformat().encode())
+    if isinstance(obj, datetime.date):
+        return msgpack.ExtType(EXT_DATE, obj.isoformat().encode())
+    if isinstance(obj, Decimal):
+        return msgpack.ExtType(EXT_DECIMAL, str(obj).encode())
+    if isinstance(obj, uuid.UUID):
+        return msgpack.ExtType(EXT_UUID, obj.bytes)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    # Same fallback as the JSON encoder's default=str
+    return str(obj)
+
+
+def _msgpack_ext_hook(code: int, data: bytes) -> Any:
+    if code == EXT_DATETIME:
+        return datetime.datetime.fromisoformat(data.decode())
+    if code == EXT_DATE:
+        return datetime.date.fromisoformat(data.decode())
+    if code == EXT_DECIMAL:
+        return Decimal(data.decode())
+    if code == EXT_UUID:
+        return uuid.UUID(bytes=data)
+    return msgpack.ExtType(code, data)
+
+
+class CacheCodec:
+    """
+    Encodes cache values into versioned frames and decodes both frames and
+    legacy JSON text.
+
+    Policies whose codec or compressor is not installed degrade to what is
+    available (JSON, uncompressed), so the cache keeps working without the
+    optional dependencies.
+    """
+
+    def __init__(
+        self,
+        default_policy: CodecPolicy = DEFAULT_POLICY,
+        namespace_policies: Optional[Dict[CacheNamespace, CodecPolicy]] = None,
+        text_safe: bool = True,
+    ) -> None:
+        self.default_policy = default_policy
+        self.namespace_policies = (
+            DEFAULT_NAMESPACE_POLICIES if namespace_policies is None
+            else namespace_policies
+        )
+        self.text_safe = text_safe
+        if zstandard is not None:
+            self._zstd_compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL)
+            self._zstd_decompressor = zstandard.ZstdDecompressor()
+
+    def policy_for(self, key: Optional[str]) -> CodecPolicy:
+        """Get the policy for a cache key's namespace"""
+        namespace = CacheKeyBuilder.get_namespace(key) if key else None
+        return self.namespace_policies.get(namespace, self.default_policy)
+
+    def encode(self, value: Any, key: Optional[str] = None) -> Encoded:
+        """
+        Encode value for storage under key.
+
+        Returns plain JSON text when no header is needed (JSON codec, below
+        the compression threshold, or an uncompressed value when text_safe),
+        otherwise a frame: str when text_safe, bytes otherwise.
+        """
+        policy = self.policy_for(key)
+        flags = 0
+        try:
+            if policy.codec == CODEC_MSGPACK and msgpack is not None:
+                payload = msgpack.packb(
+                    value, default=_msgpack_default, use_bin_type=True
+                )
+                flags |= FLAG_MSGPACK
+            else:
+                text = json.dumps(value, default=str)
+                if len(text) < policy.compress_threshold:
+                    return text
+                payload = text.encode()
+        except (TypeError, ValueError, OverflowError) as e:
+            raise CodecError(f"Cannot encode cache value: {e}") from e
+
+        if len(payload) >= policy.compress_threshold:
+            compressed, compression_flag = self._compress(
+                payload, policy.compression
+            )
+            if len(compressed) < len(payload):
+                payload = compressed
+                flags |= compression_flag
+
+        if not flags:
+            # Large JSON that did not compress: legacy format is cheapest
+            return payload.decode()
+        if self.text_safe and not flags & (FLAG_ZSTD | FLAG_LZ4):
+            # Base64 armored msgpack is larger than the JSON it replaces
+            try:
+                return json.dumps(value, default=str)
+            except (TypeError, ValueError, OverflowError) as e:
+                raise CodecError(f"Cannot encode cache value: {e}") from e
+        return self._frame(flags, payload)
+
+    def decode(self, data: Encoded) -> Any:
+        """Decode a frame or legacy JSON text"""
+        if not data:
+            raise CodecError("Empty cache value")
+
+        header = data[0] if isinstance(data, bytes) else ord(data[0])
+        if header > MAX_HEADER_BYTE:
+            try:
+                return json.loads(data)
+            except (TypeError, ValueError) as e:
+                raise CodecError(f"Invalid JSON cache value: {e}") from e
+
+        version = header >> FRAME_VERSION_SHIFT
+        if version != FRAME_VERSION:
+            raise CodecError(f"Unsupported cache frame version {version}")
+
+        flags = header & 0x0F
+        try:
+            payload = data[1:]
+            if isinstance(payload, str):
+                payload = payload.encode("latin-1")
+            if flags & FLAG_BASE64:
+                payload = base64.b64decode(payload)
+            payload = self._decompress(payload, flags)
+            if flags & FLAG_MSGPACK:
+                if msgpack is None:
+                    raise CodecError("msgpack is required to decode this value")
+                return msgpack.unpackb(
+                    payload, ext_hook=_msgpack_ext_hook, raw=False,
+                    strict_map_key=False
+                )
+            return json.loads(payload)
+        except CodecError:
+            raise
+        except Exception as e:
+            raise CodecError(f"Corrupt cache frame: {e}") from e
+
+    def _frame(self, flags: int, payload: bytes) -> Encoded:
+        if self.text_safe:
+            header = (FRAME_VERSION << FRAME_VERSION_SHIFT) | flags | FLAG_BASE64
+            return chr(header) + base64.b64encode(payload).decode("ascii")
+        header = (FRAME_VERSION << FRAME_VERSION_SHIFT) | flags
+        return bytes([header]) + payload
+
+    def _compress(self, payload: bytes, compression: str):
+        if compression == COMPRESSION_ZSTD and zstandard is not None:
+            return self._zstd_compressor.compress(payload), FLAG_ZSTD
+        if compression in (COMPRESSION_ZSTD, COMPRESSION_LZ4) and lz4_frame is not None:
+            return lz4_frame.compress(payload), FLAG_LZ4
+        if compression == COMPRESSION_LZ4 and zstandard is not None:
+            return self._zstd_compressor.compress(payload), FLAG_ZSTD
+        return payload, 0
+
+    def _decompress(self, payload: bytes, flags: int) -> bytes:
+        if flags & FLAG_ZSTD:
+            if zstandard is None:
+                raise CodecError("zstandard is required to decode this value")
+            return self._zstd_decompressor.decompress(payload)
+        if flags & FLAG_LZ4:
+            if lz4_frame is None:
+                raise CodecError("lz4 is required to decode this value")
+            return lz4_frame.decompress(payload)
+        return payload
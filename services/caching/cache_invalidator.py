@@ -40,7 +40,7 @@ class CacheInvalidator:
             Number of cache entries invalidated
         """
         # Ensure cache manager is initialized
-        if not self.cache_manager._initialized:
+        if not self.cache_manager.initialized:
             await self.cache_manager.initialize()
 
         try:
@@ -63,6 +63,10 @@ class CacheInvalidator:
         """
         Invalidate cache entries associated with specific tags.
 
+        Keys written with CacheManager.set(..., tags=...) are tracked in Redis
+        tag sets and invalidated on every worker; keys registered locally via
+        register_tag() are invalidated as well.
+
         Args:
             tags: List of tags to invalidate
 
@@ -70,18 +74,18 @@ class CacheInvalidator:
             Number of cache entries invalidated
         """
         # Ensure cache manager is initialized
-        if not self.cache_manager._initialized:
+        if not self.cache_manager.initialized:
             await self.cache_manager.initialize()
 
-        invalidated_count = 0
+        invalidated_count = await self.cache_manager.invalidate_tags(tags)
 
         for tag in tags:
             if tag in self._tag_mappings:
                 keys = self._tag_mappings[tag]
                 for key in keys:
                     try:
-                        await self.cache_manager.delete(key)
-                        invalidated_count += 1
+                        if await self.cache_manager.delete(key):
+                            invalidated_count += 1
                     except Exception as e:
                         logger.warning(f"Failed to invalidate key {key}: {e}")
 
@@ -126,6 +130,9 @@ class CacheInvalidator:
         """
         Register cache key with tags for tag-based invalidation.
 
+        The mapping is local to this process; prefer passing tags to
+        CacheManager.set() so the association is shared across workers.
+
         Args:
             key: Cache key to register
             tags: Tags to associate with the key
@@ -358,6 +358,30 @@ class CacheKeyBuilder:
 
         return result
 
+    @classmethod
+    def get_namespace(cls, key: str) -> Optional[CacheNamespace]:
+        """
+        Get the namespace of a cache key.
+
+        Accepts both builder keys ("cache:evidence:...") and the unprefixed
+        keys CacheManager builds itself ("api:...", "compute:...").
+
+        Args:
+            key: Cache key
+
+        Returns:
+            CacheNamespace, or None if the key has no known namespace
+        """
+        parts = key.split(":", 2)
+        if parts[0] == cls.PREFIX_CACHE and len(parts) > 1:
+            candidate = parts[1]
+        else:
+            candidate = parts[0]
+        try:
+            return CacheNamespace(candidate)
+        except ValueError:
+            return None
+
     @classmethod
     def is_expired_version(cls, key: str, current_version: Optional[str] = None) -> bool:
         """
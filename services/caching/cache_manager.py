@@ -12,8 +12,13 @@ This module implements a comprehensive caching system with:
 import asyncio
 import json
 import logging
+import math
+import random
 import time
-from typing import Any, Dict, List, Optional, Callable, Awaitable
+import uuid
+from typing import (
+    Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Set, Union
+)
 from collections import OrderedDict
 import hashlib
 from redis.exceptions import (
@@ -22,6 +27,10 @@ from redis.exceptions import (
     RedisError
 )
 
+from .cache_codec import CacheCodec, CodecError
+from .invalidation_bus import CacheInvalidationBus
+from .sharded_cache import DEFAULT_SHARD_COUNT, ShardedLRUCache
+
 
 logger = logging.getLogger(__name__)
 
@@ -44,6 +53,29 @@ RETRY_BACKOFF_BASE = 2  # Exponential backoff base for retries
 RETRY_JITTER_FACTOR = 0.1  # Jitter factor for retry logic
 BACKGROUND_WARMING_INTERVAL = 300  # Background warming interval
 
+# Invalidation Constants
+SCAN_BATCH_SIZE = 500  # COUNT hint for incremental SCAN
+UNLINK_BATCH_SIZE = 500  # Keys per non-blocking UNLINK call
+TAG_KEY_PREFIX = "cache:tag:"  # Redis set of cache keys per tag
+TAG_SET_TTL = 86400  # Tag sets expire a day after their last tagged write
+L1_DEGRADED_TTL = 5  # L1 TTL cap while the invalidation bus is disconnected
+L1_PROMOTED_TTL = 60  # L1 TTL for values promoted from L2, whose TTL is unknown
+TAGS_MARKER = "__cache_tags__"  # Marks L2 values stored with their tags
+
+# Stampede Protection Constants
+DEFAULT_STALE_TTL = 60  # Seconds an expired value may be served while refreshing
+DEFAULT_LOCK_LEASE = 10  # Seconds a cross-worker compute lock is held at most
+LOCK_POLL_INTERVAL = 0.05  # Seconds between checks while another worker computes
+XFETCH_BETA = 1.0  # >1 refreshes earlier, <1 later
+LOCK_KEY_PREFIX = "cache:lock:"
+ENVELOPE_MARKER = "__cache_envelope__"  # Marks values stored with expiry metadata
+RELEASE_LOCK_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
 # Compatibility Constants
 ENABLE_CACHE_HASH_COMPAT = True  # Enable dual-read for MD5->SHA256 migration
 LEGACY_MD5_HASH_LENGTH = 32  # Length of legacy MD5 hash
@@ -59,6 +91,13 @@ class CacheMetrics:
         self.deletes = 0
         self.response_times: List[float] = []
         self.errors = 0
+        self.l1_hits = 0
+        self.l1_misses = 0
+        self.l1_evictions = 0
+        self.coalesced_waits = 0
+        self.stale_serves = 0
+        self.early_refreshes = 0
+        self.lock_waits = 0
 
     def record_hit(self):
         """Record cache hit"""
@@ -84,6 +123,28 @@ class CacheMetrics:
         """Record cache error"""
         self.errors += 1
 
+    def record_coalesced_wait(self):
+        """Record a miss that waited on an in-flight computation"""
+        self.coalesced_waits += 1
+
+    def record_stale_serve(self):
+        """Record a stale value served while a refresh runs"""
+        self.stale_serves += 1
+
+    def record_early_refresh(self):
+        """Record a probabilistic early (XFetch) refresh"""
+        self.early_refreshes += 1
+
+    def record_lock_wait(self):
+        """Record a miss served by another worker's locked computation"""
+        self.lock_waits += 1
+
+    def update_l1_stats(self, l1_stats: Dict[str, Any]):
+        """Sync L1 counters from the sharded cache statistics"""
+        self.l1_hits = l1_stats.get("hits", 0)
+        self.l1_misses = l1_stats.get("misses", 0)
+        self.l1_evictions = l1_stats.get("evictions", 0)
+
     def get_hit_rate(self) -> float:
         """Calculate hit rate"""
         total = self.hits + self.misses
@@ -105,12 +166,24 @@ class CacheMetrics:
             "hit_rate": self.get_hit_rate(),
             "avg_response_time": self.get_avg_response_time(),
             "errors": self.errors,
-            "total_requests": self.hits + self.misses
+            "total_requests": self.hits + self.misses,
+            "l1_hits": self.l1_hits,
+            "l1_misses": self.l1_misses,
+            "l1_evictions": self.l1_evictions,
+            "coalesced_waits": self.coalesced_waits,
+            "stale_serves": self.stale_serves,
+            "early_refreshes": self.early_refreshes,
+            "lock_waits": self.lock_waits
         }
 
 
 class LRUCache:
-    """Thread-safe LRU cache implementation"""
+    """
+    Single-lock LRU cache implementation.
+
+    Superseded by ShardedLRUCache as CacheManager's L1 tier; kept for
+    callers that rely on it directly and as a benchmark baseline.
+    """
 
     def __init__(self, max_items: int = 1000, max_memory_mb: int = 50) -> None:
         self.max_items = max_items
@@ -231,26 +304,59 @@ class CacheManager:
         enable_caching: bool = True,
         l1_max_items: int = 10000,
         l1_max_memory_mb: int = 100,
+        l1_num_shards: int = DEFAULT_SHARD_COUNT,
         ttl_config: Optional[Dict[str, int]] = None,
-        metrics: Optional[CacheMetrics] = None
+        metrics: Optional[CacheMetrics] = None,
+        enable_invalidation_bus: bool = True,
+        l1_degraded_ttl: int = L1_DEGRADED_TTL,
+        l1_promoted_ttl: int = L1_PROMOTED_TTL,
+        stale_ttl: int = DEFAULT_STALE_TTL,
+        distributed_lock: bool = False,
+        lock_lease: int = DEFAULT_LOCK_LEASE,
+        xfetch_beta: float = XFETCH_BETA,
+        codec: Optional[CacheCodec] = None
     ) -> None:
         self.enable_caching = enable_caching
         self.ttl_config = ttl_config or {}
         self.metrics = metrics or CacheMetrics()
 
-        # L1 Cache (in-memory LRU)
-        self._l1_cache = LRUCache(
+        # L1 Cache (sharded in-memory LRU)
+        self._l1_cache = ShardedLRUCache(
             max_items=l1_max_items,
-            max_memory_mb=l1_max_memory_mb
+            max_memory_mb=l1_max_memory_mb,
+            num_shards=l1_num_shards
         )
 
         # L2 Cache (Redis)
         self._redis = None
         self._redis_available = False
 
+        # Cross-worker L1 invalidation
+        self.enable_invalidation_bus = enable_invalidation_bus
+        self.l1_degraded_ttl = l1_degraded_ttl
+        self.l1_promoted_ttl = l1_promoted_ttl
+        self._bus: Optional[CacheInvalidationBus] = None
+
+        # Stampede protection
+        self.stale_ttl = stale_ttl
+        self.distributed_lock = distributed_lock
+        self.lock_lease = lock_lease
+        self.xfetch_beta = xfetch_beta
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._refresh_tasks: Set[asyncio.Task] = set()
+
+        # L2 value encoding; text-safe because the shared Redis client
+        # decodes responses
+        self.codec = codec or CacheCodec()
+
         # Initialization flag
         self._initialized = False
 
+    @property
+    def initialized(self) -> bool:
+        """Whether initialize() has run since construction or the last close()"""
+        return self._initialized
+
     async def initialize(self) -> None:
         """Initialize the cache manager"""
         if not self.enable_caching:
@@ -275,11 +381,55 @@ class CacheManager:
             )
             self._redis_available = False
 
+        if self._redis_available and self.enable_invalidation_bus:
+            await self.start_invalidation_bus()
+
         self._initialized = True
         logger.info("Cache manager initialized")
 
+    async def start_invalidation_bus(self) -> None:
+        """Subscribe to L1 invalidations published by other workers"""
+        if self._bus is None and hasattr(self._redis, 'pubsub'):
+            self._bus = CacheInvalidationBus(
+                self._redis,
+                on_message=self._apply_remote_invalidation,
+                on_state_change=self._on_bus_state_change
+            )
+            await self._bus.start()
+
+    async def _apply_remote_invalidation(
+        self, message: Dict[str, List[str]]
+    ) -> None:
+        """Evict L1 entries invalidated on another worker"""
+        for key in message["keys"]:
+            await self._l1_cache.delete(key)
+        for pattern in message["patterns"]:
+            await self._l1_cache.delete_pattern(pattern)
+        if message["tags"]:
+            await self._l1_cache.delete_tags(message["tags"])
+
+    async def _on_bus_state_change(self, connected: bool) -> None:
+        # Invalidations may have been missed while disconnected
+        await self._l1_cache.clear()
+        if connected:
+            logger.info("Cache invalidation bus connected")
+        else:
+            logger.warning(
+                "Cache invalidation bus lost, capping L1 TTL to %ss",
+                self.l1_degraded_ttl
+            )
+
+    def _l1_ttl(self, ttl: Optional[int]) -> Optional[int]:
+        """L1 TTL, bounded while other workers' invalidations can be missed"""
+        if self._bus is not None and not self._bus.connected:
+            return min(ttl, self.l1_degraded_ttl) if ttl else self.l1_degraded_ttl
+        return ttl
+
     async def close(self) -> None:
         """Close cache connections"""
+        if self._bus is not None:
+            await self._bus.stop()
+            self._bus = None
         if self._redis and hasattr(self._redis, 'close'):
             await self._redis.close()
         self._initialized = False
@@ -288,8 +438,16 @@ class CacheManager:
         """
         Get value from cache with L1 -> L2 fallback.
 
-        Returns None if key not found or caching disabled.
+        Returns None if key not found or caching disabled. Values written by
+        get_or_compute are returned without their expiry metadata.
         """
+        stored = await self._get_stored(key)
+        if stored is None:
+            return None
+        return self._unwrap(stored)[0]
+
+    async def _get_stored(self, key: str) -> Optional[Any]:
+        """Get the value as stored, including any get_or_compute envelope"""
         if not self.enable_caching or not self._initialized:
             return None
 
@@ -308,10 +466,17 @@ class CacheManager:
                 try:
                     serialized = await self._redis.get(key)
                     if serialized:
-                        value = self._deserialize(serialized)
+                        value, tags = self._split_tags(
+                            self._deserialize(serialized, key)
+                        )
                         if value is not None:
-                            # Promote to L1
-                            await self._l1_cache.set(key, value)
+                            # Promote to L1 with its tags so tag
+                            # invalidations still reach it
+                            await self._l1_cache.set(
+                                key, value,
+                                self._l1_ttl(self.l1_promoted_ttl),
+                                tags=tags
+                            )
                             self.metrics.record_hit()
                             self.metrics.record_response_time(
                                 time.time() - start_time
@@ -350,11 +515,19 @@ class CacheManager:
             return None
 
     async def set(
-        self, key: str, value: Any, ttl: Optional[int] = None
+        self,
+        key: str,
+        value: Any,
+        ttl: Optional[int] = None,
+        tags: Optional[List[str]] = None
     ) -> bool:
         """
         Set value in cache.
 
+        Tagged keys are also added to a Redis set per tag so any worker can
+        invalidate them with invalidate_tags(), and the tags are stored
+        alongside the L2 value so workers promoting it to L1 keep them.
+
         Returns True if successful, False otherwise.
         """
         if not self.enable_caching or not self._initialized:
@@ -362,13 +535,30 @@ class CacheManager:
 
         try:
             # Set in L1 cache
-            await self._l1_cache.set(key, value, ttl)
+            await self._l1_cache.set(key, value, self._l1_ttl(ttl), tags=tags)
 
             # Set in L2 cache if available
             if self._redis_available and self._redis:
                 try:
-                    serialized = self._serialize(value)
-                    await self._redis.set(key, serialized, ex=ttl)
+                    if tags:
+                        serialized = self._serialize(
+                            {TAGS_MARKER: list(tags), "value": value}, key
+                        )
+                        pipe = self._redis.pipeline(transaction=False)
+                        pipe.set(key, serialized, ex=ttl)
+                        for tag in tags:
+                            pipe.sadd(f"{TAG_KEY_PREFIX}{tag}", key)
+                            pipe.expire(
+                                f"{TAG_KEY_PREFIX}{tag}",
+                                max(ttl or 0, TAG_SET_TTL)
+                            )
+                        await pipe.execute()
+                    else:
+                        serialized = self._serialize(value, key)
+                        await self._redis.set(key, serialized, ex=ttl)
+                    # Other workers may hold the previous value in L1
+                    if self._bus is not None:
+                        self._bus.publish(keys=[key])
                 except (RedisConnectionError, RedisTimeoutError, OSError) as e:
                     logger.warning(
                         "Redis connection error for key %s: %s", key, e
@@ -415,6 +605,8 @@ class CacheManager:
                 try:
                     if await self._redis.delete(key):
                         deleted = True
+                    if self._bus is not None:
+                        self._bus.publish(keys=[key])
                 except (RedisConnectionError, RedisTimeoutError, OSError) as e:
                     logger.warning(
                         "Redis connection error for key %s: %s", key, e
@@ -444,7 +636,11 @@ class CacheManager:
 
     async def invalidate_pattern(self, pattern: str) -> int:
         """
-        Invalidate keys matching pattern.
+        Invalidate keys matching a Redis glob pattern.
+
+        L1 evicts only matching entries via its prefix index. L2 is walked
+        with incremental SCAN and deleted with batched UNLINK so Redis is
+        never blocked the way KEYS would block it.
 
         Returns number of keys invalidated.
         """
@@ -452,21 +648,18 @@ class CacheManager:
             return 0
 
         try:
-            invalidated = 0
-
-            # Clear L1 cache
-            # (simplified - in production would need pattern matching)
-            await self._l1_cache.clear()
+            invalidated = await self._l1_cache.delete_pattern(pattern)
 
             # Invalidate L2 patterns if available
             if self._redis_available and self._redis:
                 try:
-                    # Get keys matching pattern
-                    if hasattr(self._redis, 'keys'):
-                        keys = await self._redis.keys(pattern)
-                        if keys:
-                            await self._redis.delete(*keys)
-                            invalidated += len(keys)
+                    invalidated = await self._unlink_keys(
+                        self._redis.scan_iter(
+                            match=pattern, count=SCAN_BATCH_SIZE
+                        )
+                    )
+                    if self._bus is not None:
+                        self._bus.publish(patterns=[pattern])
                 except (RedisConnectionError, RedisTimeoutError, OSError) as e:
                     logger.warning(
                         "Redis connection error for pattern %s: %s",
@@ -498,6 +691,82 @@ class CacheManager:
             self.metrics.record_error()
             return 0
 
+    async def invalidate_tags(self, tags: List[str]) -> int:
+        """
+        Invalidate every key written with any of the given tags.
+
+        Returns number of keys invalidated.
+        """
+        if not self.enable_caching or not self._initialized:
+            return 0
+
+        try:
+            invalidated = await self._l1_cache.delete_tags(tags)
+
+            if self._redis_available and self._redis:
+                try:
+                    invalidated = 0
+                    for tag in tags:
+                        tag_key = f"{TAG_KEY_PREFIX}{tag}"
+                        invalidated += await self._unlink_keys(
+                            self._redis.sscan_iter(
+                                tag_key, count=SCAN_BATCH_SIZE
+                            ),
+                            publish=True
+                        )
+                        await self._redis.unlink(tag_key)
+                    if self._bus is not None:
+                        self._bus.publish(tags=tags)
+                except (RedisConnectionError, RedisTimeoutError, OSError) as e:
+                    logger.warning(
+                        "Redis connection error for tags %s: %s", tags, e
+                    )
+                    self.metrics.record_error()
+                except RedisError:
+                    logger.exception(
+                        "Redis tag invalidation error for tags %s", tags
+                    )
+                    self.metrics.record_error()
+                    # Re-raise in debug mode for development
+                    if logger.isEnabledFor(logging.DEBUG):
+                        raise
+
+            return invalidated
+
+        except (TypeError, ValueError, AttributeError):
+            logger.exception("Tag invalidation error for %s", tags)
+            self.metrics.record_error()
+            return 0
+
+    async def _unlink_keys(
+        self, keys: AsyncIterator[Any], publish: bool = False
+    ) -> int:
+        """
+        UNLINK keys from an async iterator in bounded batches.
+
+        With publish, the keys are also sent on the invalidation bus so
+        workers evict them from L1 even where the entry carries no tags.
+        """
+        unlinked = 0
+        batch: List[Any] = []
+        async for key in keys:
+            batch.append(key)
+            if len(batch) >= UNLINK_BATCH_SIZE:
+                unlinked += await self._unlink_batch(batch, publish)
+                batch = []
+        if batch:
+            unlinked += await self._unlink_batch(batch, publish)
+        return unlinked
+
+    async def _unlink_batch(self, batch: List[Any], publish: bool) -> int:
+        unlinked = await self._redis.unlink(*batch)
+        if publish and self._bus is not None:
+            self._bus.publish(keys=[
+                key.decode() if isinstance(key, bytes) else key
+                for key in batch
+            ])
+        return unlinked
+
     async def invalidate(self, key: str) -> bool:
         """
         Invalidate specific key.
@@ -506,30 +775,35 @@ class CacheManager:
         """
         return await self.delete(key)
 
-    def _serialize(self, value: Any) -> str:
-        """Serialize value for storage"""
+    def _serialize(self, value: Any, key: Optional[str] = None) -> Union[str, bytes]:
+        """Serialize value for storage with the codec policy for key"""
         try:
-            return json.dumps(value, default=str)
-        except (TypeError, ValueError):
+            return self.codec.encode(value, key)
+        except CodecError:
             logger.exception("Serialization error")
             raise
 
-    def _deserialize(self, value: str) -> Any:
-        """Deserialize value from storage"""
+    def _deserialize(
+        self, value: Union[str, bytes], key: Optional[str] = None
+    ) -> Any:
+        """Deserialize a codec frame or legacy JSON value from storage"""
         try:
-            return json.loads(value)
-        except (json.JSONDecodeError, TypeError, ValueError):
-            logger.exception("Deserialization error")
+            return self.codec.decode(value)
+        except CodecError:
+            logger.exception("Deserialization error for key %s", key)
             return None
 
     def get_stats(self) -> Dict[str, Any]:
         """Get comprehensive cache statistics"""
         l1_stats = self._l1_cache.get_stats()
+        if hasattr(self.metrics, 'update_l1_stats'):
+            self.metrics.update_l1_stats(l1_stats)
 
         return {
             "enabled": self.enable_caching,
             "initialized": self._initialized,
             "redis_available": self._redis_available,
+            "invalidation_bus": self._bus.get_stats() if self._bus else None,
             "l1_cache": l1_stats,
             "metrics": self.metrics.get_stats()
         }
@@ -579,75 +853,28 @@ class CacheManager:
         ).hexdigest()[:API_CACHE_KEY_LENGTH]
         cache_key = f"api:{key_hash}"
 
-        # Try cache first
-        cached = await self.get(cache_key)
-        if cached is not None:
-            return cached
-
-        # Dual-read fallback for legacy MD5 keys during migration
-        # This ensures no cache hit regression during the hash transition
-        # TODO: Remove this dual-read logic after migration is complete
-        if ENABLE_CACHE_HASH_COMPAT:
-            try:
+        async def compute() -> Any:
+            # Dual-read fallback for legacy MD5 keys during migration
+            # This ensures no cache hit regression during the hash transition
+            # TODO: Remove this dual-read logic after migration is complete
+            if ENABLE_CACHE_HASH_COMPAT:
                 # Compute legacy MD5 key using same key_data structure
                 # noqa: S324 - MD5 needed for backward compatibility
                 legacy_hash = hashlib.md5(
                     json.dumps(key_data, sort_keys=True).encode()
                 ).hexdigest()[:LEGACY_MD5_HASH_LENGTH]
-                legacy_key = f"api:{legacy_hash}"
-
-                # Try to get value from legacy key
-                # (direct Redis fetch to avoid recursion)
-                legacy_value = None
-                if self._redis_available and self._redis:
-                    try:
-                        serialized = await self._redis.get(legacy_key)
-                        if serialized:
-                            legacy_value = self._deserialize(serialized)
-                    except (
-                        RedisConnectionError,
-                        RedisTimeoutError,
-                        RedisError,
-                        OSError,
-                        ValueError
-                    ) as e:
-                        logger.debug(
-                            "Legacy MD5 fetch failed for %s: %s",
-                            legacy_key, e
-                        )
-                else:
-                    # Fallback to L1 cache
-                    legacy_value = await self._l1_cache.get(legacy_key)
+                legacy_value = await self._get_legacy_value(f"api:{legacy_hash}")
                 if legacy_value is not None:
-                    logger.debug(
-                        "Found value in legacy MD5 key %s, "
-                        "promoting to SHA-256 key %s",
-                        legacy_key, cache_key
-                    )
-                    # Promote to new SHA-256 key
-                    actual_ttl = ttl or self.ttl_config.get(
-                        'api_response', DEFAULT_API_TTL
-                    )
-                    await self.set(cache_key, legacy_value, actual_ttl)
-                    # Note: set() already records the metric internally
+                    # Promoted to the SHA-256 key by get_or_compute
                     return legacy_value
-            except (
-                RedisConnectionError, RedisTimeoutError,
-                RedisError, OSError, ValueError
-            ) as e:
-                logger.debug("Legacy key check failed: %s", e)
 
-        # Execute API call
-        result = await api_func()
+            # Execute API call
+            return await api_func()
 
-        # Cache result
-        if result is not None:
-            actual_ttl = ttl or self.ttl_config.get(
-                'api_response', DEFAULT_API_TTL
-            )
-            await self.set(cache_key, result, actual_ttl)
-
-        return result
+        actual_ttl = ttl or self.ttl_config.get(
+            'api_response', DEFAULT_API_TTL
+        )
+        return await self.get_or_compute(cache_key, compute, actual_ttl)
 
     async def cache_service_computation(
         self,
@@ -667,75 +894,54 @@ class CacheManager:
         ).hexdigest()[:COMPUTE_CACHE_KEY_LENGTH]
         cache_key = f"compute:{key_hash}"
 
-        # Try cache first
-        cached = await self.get(cache_key)
-        if cached is not None:
-            return cached
-
-        # Dual-read fallback for legacy MD5 keys during migration
-        # This ensures no cache hit regression during the hash transition
-        # TODO: Remove this dual-read logic after migration is complete
-        if ENABLE_CACHE_HASH_COMPAT:
-            try:
+        async def compute() -> Any:
+            # Dual-read fallback for legacy MD5 keys during migration
+            # This ensures no cache hit regression during the hash transition
+            # TODO: Remove this dual-read logic after migration is complete
+            if ENABLE_CACHE_HASH_COMPAT:
                 # Compute legacy MD5 key using same key_data structure
                 # noqa: S324 - MD5 needed for backward compatibility
                 legacy_hash = hashlib.md5(
                     json.dumps(key_data, sort_keys=True).encode()
                 ).hexdigest()[:LEGACY_MD5_HASH_LENGTH]
-                legacy_key = f"compute:{legacy_hash}"
-
-                # Try to get value from legacy key
-                # (direct Redis fetch to avoid recursion)
-                legacy_value = None
-                if self._redis_available and self._redis:
-                    try:
-                        serialized = await self._redis.get(legacy_key)
-                        if serialized:
-                            legacy_value = self._deserialize(serialized)
-                    except (
-                        RedisConnectionError,
-                        RedisTimeoutError,
-                        RedisError,
-                        OSError,
-                        ValueError
-                    ) as e:
-                        logger.debug(
-                            "Legacy MD5 fetch failed for %s: %s",
-                            legacy_key, e
-                        )
-                else:
-                    # Fallback to L1 cache
-                    legacy_value = await self._l1_cache.get(legacy_key)
+                legacy_value = await self._get_legacy_value(
+                    f"compute:{legacy_hash}"
+                )
                 if legacy_value is not None:
-                    logger.debug(
-                        "Found value in legacy MD5 key %s, "
-                        "promoting to SHA-256 key %s",
-                        legacy_key, cache_key
-                    )
-                    # Promote to new SHA-256 key
-                    actual_ttl = ttl or self.ttl_config.get(
-                        'computation', DEFAULT_COMPUTE_TTL
-                    )
-                    await self.set(cache_key, legacy_value, actual_ttl)
-                    # Note: set() already records the metric internally
+                    # Promoted to the SHA-256 key by get_or_compute
                     return legacy_value
-            except (
-                RedisConnectionError, RedisTimeoutError,
-                RedisError, OSError, ValueError
-            ) as e:
-                logger.debug("Legacy key check failed: %s", e)
 
-        # Execute computation
-        result = await compute_func()
+            # Execute computation
+            return await compute_func()
 
-        # Cache result
-        if result is not None:
-            actual_ttl = ttl or self.ttl_config.get(
-                'computation', DEFAULT_COMPUTE_TTL
-            )
-            await self.set(cache_key, result, actual_ttl)
+        actual_ttl = ttl or self.ttl_config.get(
+            'computation', DEFAULT_COMPUTE_TTL
+        )
+        return await self.get_or_compute(cache_key, compute, actual_ttl)
 
-        return result
+    async def _get_legacy_value(self, legacy_key: str) -> Optional[Any]:
+        """Read a legacy MD5-keyed value directly (no metrics, no promotion)"""
+        try:
+            if self._redis_available and self._redis:
+                serialized = await self._redis.get(legacy_key)
+                if serialized:
+                    legacy_value = self._split_tags(
+                        self._deserialize(serialized, legacy_key)
+                    )[0]
+                    if legacy_value is not None:
+                        logger.debug(
+                            "Found value in legacy MD5 key %s", legacy_key
+                        )
+                    return legacy_value
+                return None
+            # Fallback to L1 cache
+            return await self._l1_cache.get(legacy_key)
+        except (
+            RedisConnectionError, RedisTimeoutError,
+            RedisError, OSError, ValueError
+        ) as e:
+            logger.debug("Legacy MD5 fetch failed for %s: %s", legacy_key, e)
+            return None
 
     async def cache_external_api(
         self,
@@ -840,19 +1046,199 @@ class CacheManager:
         self,
         key: str,
         compute_func: Callable[[], Awaitable[Any]],
-        ttl: Optional[int] = None
+        ttl: Optional[int] = None,
+        stale_ttl: Optional[int] = None
     ) -> Any:
-        """Get from cache or compute and cache"""
-        # Try cache first
-        cached = await self.get(key)
+        """
+        Get from cache or compute and cache, with stampede protection.
+
+        - Concurrent misses for the same key in this process share one
+          computation (single-flight)
+        - With distributed_lock enabled, a short Redis lease lets only one
+          worker compute while the others wait for its result
+        - Values carry their compute time so hits may refresh early with
+          probability rising towards expiry (XFetch)
+        - For stale_ttl seconds after expiry the old value is still served
+          while one background task refreshes it (stale-while-revalidate)
+        """
+        if ttl is None:
+            # Without an expiry there is nothing to revalidate
+            cached = await self.get(key)
+            if cached is not None:
+                return cached
+            return await self._compute_single_flight(key, compute_func, ttl, 0)
+
+        stale_ttl = self.stale_ttl if stale_ttl is None else stale_ttl
+        cached = await self._get_stored(key)
         if cached is not None:
-            return cached
+            value, expires_at, delta = self._unwrap(cached)
+            if expires_at is None:
+                return value
 
-        # Compute
-        result = await compute_func()
+            now = time.time()
+            if now >= expires_at:
+                self.metrics.record_stale_serve()
+                self._refresh_in_background(key, compute_func, ttl, stale_ttl)
+            elif self._should_refresh_early(expires_at, delta, now):
+                self.metrics.record_early_refresh()
+                self._refresh_in_background(key, compute_func, ttl, stale_ttl)
+            return value
+
+        return await self._compute_single_flight(
+            key, compute_func, ttl, stale_ttl
+        )
 
-        # Cache result
-        if result is not None:
-            await self.set(key, result, ttl)
+    def _should_refresh_early(
+        self, expires_at: float, delta: float, now: float
+    ) -> bool:
+        """XFetch: recompute before expiry with probability rising to 1"""
+        if delta <= 0 or self.xfetch_beta <= 0:
+            return False
+        return now - delta * self.xfetch_beta * math.log(
+            1.0 - random.random()
+        ) >= expires_at
 
-        return result
+    async def _compute_single_flight(
+        self,
+        key: str,
+        compute_func: Callable[[], Awaitable[Any]],
+        ttl: Optional[int],
+        stale_ttl: int
+    ) -> Any:
+        task = self._inflight.get(key)
+        if task is not None:
+            self.metrics.record_coalesced_wait()
+        else:
+            task = asyncio.get_running_loop().create_task(
+                self._compute_and_store(key, compute_func, ttl, stale_ttl)
+            )
+            self._inflight[key] = task
+            task.add_done_callback(
+                lambda done, key=key: self._on_compute_done(key, done)
+            )
+        # Shield so a cancelled caller does not cancel the shared computation
+        return await asyncio.shield(task)
+
+    def _on_compute_done(self, key: str, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Mark exceptions retrieved when every waiter was cancelled
+        if not task.cancelled():
+            task.exception()
+
+    def _refresh_in_background(
+        self,
+        key: str,
+        compute_func: Callable[[], Awaitable[Any]],
+        ttl: int,
+        stale_ttl: int
+    ) -> None:
+        if key in self._inflight:
+            return
+
+        async def refresh() -> None:
+            try:
+                await self._compute_single_flight(
+                    key, compute_func, ttl, stale_ttl
+                )
+            except Exception:
+                logger.exception("Background refresh failed for key %s", key)
+
+        task = asyncio.get_running_loop().create_task(refresh())
+        self._refresh_tasks.add(task)
+        task.add_done_callback(self._refresh_tasks.discard)
+
+    async def _compute_and_store(
+        self,
+        key: str,
+        compute_func: Callable[[], Awaitable[Any]],
+        ttl: Optional[int],
+        stale_ttl: int
+    ) -> Any:
+        lock_token = None
+        if self.distributed_lock and self._redis_available and self._redis:
+            lock_token = uuid.uuid4().hex
+            try:
+                acquired = await self._redis.set(
+                    f"{LOCK_KEY_PREFIX}{key}", lock_token,
+                    nx=True, ex=self.lock_lease
+                )
+            except (RedisConnectionError, RedisTimeoutError, RedisError, OSError) as e:
+                logger.warning("Compute lock unavailable for %s: %s", key, e)
+                acquired = True
+                lock_token = None
+
+            if not acquired:
+                lock_token = None
+                value = await self._wait_for_remote_compute(key)
+                if value is not None:
+                    self.metrics.record_lock_wait()
+                    return value
+                # Lease expired without a result; compute locally
+
+        try:
+            start = time.perf_counter()
+            result = await compute_func()
+            delta = time.perf_counter() - start
+
+            if result is not None:
+                if ttl is None:
+                    await self.set(key, result)
+                else:
+                    envelope = {
+                        ENVELOPE_MARKER: True,
+                        "value": result,
+                        "expires_at": time.time() + ttl,
+                        "delta": delta,
+                    }
+                    await self.set(key, envelope, ttl + stale_ttl)
+            return result
+        finally:
+            if lock_token is not None:
+                await self._release_lock(key, lock_token)
+
+    async def _wait_for_remote_compute(self, key: str) -> Optional[Any]:
+        """Poll L2 until another worker stores key or its lease runs out"""
+        deadline = time.monotonic() + self.lock_lease
+        lock_key = f"{LOCK_KEY_PREFIX}{key}"
+        while time.monotonic() < deadline:
+            await asyncio.sleep(LOCK_POLL_INTERVAL)
+            try:
+                serialized = await self._redis.get(key)
+                if serialized:
+                    cached, tags = self._split_tags(
+                        self._deserialize(serialized, key)
+                    )
+                    if cached is not None:
+                        await self._l1_cache.set(
+                            key, cached, self._l1_ttl(self.lock_lease),
+                            tags=tags
+                        )
+                        return self._unwrap(cached)[0]
+                if not await self._redis.exists(lock_key):
+                    return None
+            except (RedisConnectionError, RedisTimeoutError, RedisError, OSError):
+                return None
+        return None
+
+    async def _release_lock(self, key: str, token: str) -> None:
+        try:
+            await self._redis.eval(
+                RELEASE_LOCK_SCRIPT, 1, f"{LOCK_KEY_PREFIX}{key}", token
+            )
+        except (RedisConnectionError, RedisTimeoutError, RedisError, OSError) as e:
+            logger.debug("Compute lock release failed for %s: %s", key, e)
+
+    @staticmethod
+    def _split_tags(stored: Any) -> Any:
+        """Split an L2 value into (value, tags) when it was stored tagged"""
+        if isinstance(stored, dict) and TAGS_MARKER in stored:
+            return stored["value"], stored[TAGS_MARKER]
+        return stored, None
+
+    @staticmethod
+    def _unwrap(cached: Any) -> Any:
+        """Split a stored value into (value, expires_at, compute_seconds)"""
+        if isinstance(cached, dict) and cached.get(ENVELOPE_MARKER):
+            return cached["value"], cached["expires_at"], cached["delta"]
+        return cached, None, 0.0
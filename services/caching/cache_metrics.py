@@ -55,6 +55,17 @@ class CacheMetrics:
     total_items: int = 0
     max_items: int = 0
 
+    # L1 (in-process) tier counters
+    l1_hits: int = 0
+    l1_misses: int = 0
+    l1_evictions: int = 0
+
+    # Stampede protection counters
+    coalesced_waits: int = 0
+    stale_serves: int = 0
+    early_refreshes: int = 0
+    lock_waits: int = 0
+
     def record_hit(self) -> None:
         """Record a cache hit"""
         self.hits += 1
@@ -79,6 +90,22 @@ class CacheMetrics:
         """Record response time for an operation"""
         self.response_times.append(response_time)
 
+    def record_coalesced_wait(self) -> None:
+        """Record a miss that waited on an in-flight computation"""
+        self.coalesced_waits += 1
+
+    def record_stale_serve(self) -> None:
+        """Record a stale value served while a refresh runs"""
+        self.stale_serves += 1
+
+    def record_early_refresh(self) -> None:
+        """Record a probabilistic early (XFetch) refresh"""
+        self.early_refreshes += 1
+
+    def record_lock_wait(self) -> None:
+        """Record a miss served by another worker's locked computation"""
+        self.lock_waits += 1
+
     def update_memory_usage(self, bytes_used: int) -> None:
         """Update memory usage tracking"""
         self.memory_usage_bytes = bytes_used
@@ -89,6 +116,19 @@ class CacheMetrics:
         self.total_items = item_count
         self.max_items = max(self.max_items, item_count)
 
+    def update_l1_stats(self, l1_stats: Dict[str, Any]) -> None:
+        """Sync L1 counters, size and memory from sharded cache statistics"""
+        self.l1_hits = l1_stats.get("hits", 0)
+        self.l1_misses = l1_stats.get("misses", 0)
+        self.l1_evictions = l1_stats.get("evictions", 0)
+        self.update_memory_usage(l1_stats.get("memory_usage_bytes", 0))
+        self.update_item_count(l1_stats.get("items", 0))
+
+    def get_l1_hit_rate(self) -> float:
+        """Calculate L1 tier hit rate"""
+        total = self.l1_hits + self.l1_misses
+        return self.l1_hits / total if total > 0 else 0.0
+
     def get_hit_rate(self) -> float:
         """Calculate current hit rate"""
         total_requests = self.hits + self.misses
@@ -138,6 +178,18 @@ class CacheMetrics:
             "total_items": self.total_items,
             "max_items": self.max_items,
 
+            # L1 tier metrics
+            "l1_hits": self.l1_hits,
+            "l1_misses": self.l1_misses,
+            "l1_evictions": self.l1_evictions,
+            "l1_hit_rate": self.get_l1_hit_rate(),
+
+            # Stampede protection
+            "coalesced_waits": self.coalesced_waits,
+            "stale_serves": self.stale_serves,
+            "early_refreshes": self.early_refreshes,
+            "lock_waits": self.lock_waits,
+
             # Performance indicators
             "cache_effectiveness_score": self._calculate_effectiveness_score(),
             "performance_trend": self._analyze_performance_trend(),
@@ -187,6 +239,13 @@ class CacheMetrics:
         self.max_memory_bytes = 0
         self.total_items = 0
         self.max_items = 0
+        self.l1_hits = 0
+        self.l1_misses = 0
+        self.l1_evictions = 0
+        self.coalesced_waits = 0
+        self.stale_serves = 0
+        self.early_refreshes = 0
+        self.lock_waits = 0
 
     def get_health_status(self) -> Dict[str, Any]:
         """Get cache health status assessment"""
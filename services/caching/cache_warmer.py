@@ -41,7 +41,7 @@ class CacheWarmer:
         Returns:
             Number of successfully warmed cache entries
         """
-        if not self.cache_manager._initialized:
+        if not self.cache_manager.initialized:
             await self.cache_manager.initialize()
 
         warmed_count = 0
@@ -84,7 +84,7 @@ class CacheWarmer:
         Returns:
             Number of successfully warmed cache entries
         """
-        if not self.cache_manager._initialized:
+        if not self.cache_manager.initialized:
             await self.cache_manager.initialize()
 
         warmed_count = 0
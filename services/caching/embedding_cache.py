@@ -0,0 +1,261 @@
+"""
+Shared Embedding Cache
+
+One cache for every RAG component that embeds text (RAGSystem,
+GraphRAGRetriever, AgenticRAGSystem), so the same regulation text is
+embedded once per model rather than once per component and process:
+
+- Keys are (model, full SHA-256 of the text); truncated hashes and
+  per-instance dicts are gone
+- Vectors are stored as packed float16 or float32 bytes, not Python lists
+- L1 is an in-process LRU bounded by a byte budget
+- L2 is Redis, so entries survive restarts and are shared across workers
+- get_many/get_or_embed resolve a whole ingest batch with one L1 pass, one
+  Redis MGET and one embedding call for the remaining misses
+- Hit rates are tracked per model
+"""
+
+import base64
+import hashlib
+import logging
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+from redis.exceptions import ConnectionError as RedisConnectionError
+from redis.exceptions import TimeoutError as RedisTimeoutError
+
+logger = logging.getLogger(__name__)
+
+# Storage Constants
+KEY_PREFIX = "embedding:v1"
+DEFAULT_MAX_MEMORY_BYTES = 64 * 1024 * 1024  # L1 byte budget
+DEFAULT_TTL_SECONDS = 30 * 24 * 3600  # Embeddings of unchanged text never go stale
+DTYPE_CODES = {"float16": b"h", "float32": b"f"}
+DTYPES_BY_CODE = {code: np.dtype(name) for name, code in DTYPE_CODES.items()}
+
+EmbedFn = Callable[[List[str]], Awaitable[List[List[float]]]]
+
+
+def content_hash(text: str) -> str:
+    """Full SHA-256 hex digest of the text."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def embedding_model_name(embeddings: Any) -> str:
+    """Cache namespace for a LangChain Embeddings object."""
+    for attribute in ("model", "model_name"):
+        name = getattr(embeddings, attribute, None)
+        if isinstance(name, str) and name:
+            return name
+    return type(embeddings).__name__
+
+
+@dataclass
+class ModelCacheStats:
+    """Lookup counters for one embedding model."""
+
+    l1_hits: int = 0
+    l2_hits: int = 0
+    misses: int = 0
+
+    @property
+    def lookups(self) -> int:
+        return self.l1_hits + self.l2_hits + self.misses
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert stats to dictionary with derived hit rate."""
+        return {
+            "l1_hits": self.l1_hits,
+            "l2_hits": self.l2_hits,
+            "misses": self.misses,
+            "hit_rate": (self.l1_hits + self.l2_hits) / self.lookups if self.lookups else 0.0,
+        }
+
+
+class EmbeddingCache:
+    """Two-tier (L1 LRU + Redis) cache of packed embedding vectors."""
+
+    def __init__(
+        self,
+        redis_client: Any = None,
+        max_memory_bytes: int = DEFAULT_MAX_MEMORY_BYTES,
+        dtype: str = "float16",
+        ttl_seconds: Optional[int] = DEFAULT_TTL_SECONDS,
+        text_safe: bool = True,
+    ) -> None:
+        """
+        Args:
+            redis_client: Async Redis client for the L2 tier (L1 only if None)
+            max_memory_bytes: Byte budget for the L1 tier
+            dtype: "float16" halves storage at ~1e-3 relative precision
+            ttl_seconds: Redis expiry for entries (None to keep forever)
+            text_safe: Base64 armor values for decode_responses=True clients
+        """
+        if dtype not in DTYPE_CODES:
+            raise ValueError(f"Unsupported embedding dtype: {dtype}")
+        self.redis = redis_client
+        self.max_memory_bytes = max_memory_bytes
+        self.dtype = np.dtype(dtype)
+        self.ttl_seconds = ttl_seconds
+        self.text_safe = text_safe
+        self._l1: "OrderedDict[str, bytes]" = OrderedDict()
+        self._l1_bytes = 0
+        self._stats: Dict[str, ModelCacheStats] = {}
+
+    @staticmethod
+    def make_key(model: str, text: str) -> str:
+        return f"{KEY_PREFIX}:{model}:{content_hash(text)}"
+
+    def pack(self, vector: Sequence[float]) -> bytes:
+        """Pack a vector as a dtype code byte followed by raw array bytes."""
+        return DTYPE_CODES[self.dtype.name] + np.asarray(vector, dtype=self.dtype).tobytes()
+
+    @staticmethod
+    def unpack(data: bytes) -> List[float]:
+        dtype = DTYPES_BY_CODE.get(data[:1])
+        if dtype is None:
+            raise ValueError("Unknown embedding encoding")
+        return np.frombuffer(data, dtype=dtype, offset=1).astype(np.float32).tolist()
+
+    async def get_many(self, model: str, texts: Sequence[str]) -> List[Optional[List[float]]]:
+        """
+        Look up embeddings for a batch of texts.
+
+        Returns:
+            One embedding per text, None where neither tier has it
+        """
+        stats = self._stats.setdefault(model, ModelCacheStats())
+        keys = [self.make_key(model, text) for text in texts]
+        results: List[Optional[List[float]]] = [None] * len(keys)
+        missing = []
+        for position, key in enumerate(keys):
+            data = self._l1.get(key)
+            if data is not None:
+                self._l1.move_to_end(key)
+                results[position] = self.unpack(data)
+                stats.l1_hits += 1
+            else:
+                missing.append(position)
+
+        if missing and self.redis is not None:
+            try:
+                values = await self.redis.mget([keys[position] for position in missing])
+            except (RedisConnectionError, RedisTimeoutError, OSError) as e:
+                logger.warning("Embedding cache Redis lookup failed: %s", e)
+                values = [None] * len(missing)
+            still_missing = []
+            for position, value in zip(missing, values):
+                data = self._decode_stored(value) if value else None
+                try:
+                    vector = self.unpack(data) if data else None
+                except ValueError as e:
+                    logger.warning("Corrupt embedding cache entry: %s", e)
+                    vector = None
+                if vector is None:
+                    still_missing.append(position)
+                    continue
+                self._l1_put(keys[position], data)
+                results[position] = vector
+                stats.l2_hits += 1
+            missing = still_missing
+
+        stats.misses += len(missing)
+        return results
+
+    async def set_many(self, model: str, texts: Sequence[str], vectors: Sequence[Sequence[float]]) -> None:
+        """Store embeddings for a batch of texts in both tiers."""
+        entries = {self.make_key(model, text): self.pack(vector) for text, vector in zip(texts, vectors)}
+        for key, data in entries.items():
+            self._l1_put(key, data)
+        if not entries or self.redis is None:
+            return
+        try:
+            pipe = self.redis.pipeline(transaction=False)
+            for key, data in entries.items():
+                pipe.set(key, self._encode_stored(data), ex=self.ttl_seconds)
+            await pipe.execute()
+        except (RedisConnectionError, RedisTimeoutError, OSError) as e:
+            logger.warning("Embedding cache Redis write failed: %s", e)
+
+    async def get_or_embed(self, model: str, texts: Sequence[str], embed: EmbedFn) -> List[List[float]]:
+        """
+        Resolve embeddings for texts, embedding only the cache misses.
+
+        Misses are deduplicated and sent to embed in a single call.
+        """
+        results = await self.get_many(model, texts)
+        pending: Dict[str, List[int]] = {}
+        for position, vector in enumerate(results):
+            if vector is None:
+                pending.setdefault(texts[position], []).append(position)
+        if pending:
+            missing_texts = list(pending)
+            vectors = await embed(missing_texts)
+            await self.set_many(model, missing_texts, vectors)
+            for text, vector in zip(missing_texts, vectors):
+                for position in pending[text]:
+                    results[position] = list(vector)
+        return results
+
+    async def get_or_embed_one(self, model: str, text: str, embed: Callable[[str], Awaitable[List[float]]]) -> List[float]:
+        """Single-text variant of get_or_embed for query-time lookups."""
+
+        async def embed_batch(texts: List[str]) -> List[List[float]]:
+            return [await embed(texts[0])]
+
+        return (await self.get_or_embed(model, [text], embed_batch))[0]
+
+    def _l1_put(self, key: str, data: bytes) -> None:
+        previous = self._l1.pop(key, None)
+        if previous is not None:
+            self._l1_bytes -= len(previous)
+        if len(data) > self.max_memory_bytes:
+            return
+        self._l1[key] = data
+        self._l1_bytes += len(data)
+        while self._l1_bytes > self.max_memory_bytes:
+            _, evicted = self._l1.popitem(last=False)
+            self._l1_bytes -= len(evicted)
+
+    def _encode_stored(self, data: bytes) -> Any:
+        return base64.b64encode(data).decode("ascii") if self.text_safe else data
+
+    def _decode_stored(self, value: Any) -> Optional[bytes]:
+        try:
+            return base64.b64decode(value) if self.text_safe else bytes(value)
+        except (ValueError, TypeError) as e:
+            logger.warning("Corrupt embedding cache entry: %s", e)
+            return None
+
+    def clear_l1(self) -> None:
+        self._l1.clear()
+        self._l1_bytes = 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get tier sizes and per-model hit rates."""
+        return {
+            "l1_entries": len(self._l1),
+            "l1_bytes": self._l1_bytes,
+            "l1_max_bytes": self.max_memory_bytes,
+            "l2_enabled": self.redis is not None,
+            "models": {model: stats.to_dict() for model, stats in self._stats.items()},
+        }
+
+
+_embedding_cache: Optional[EmbeddingCache] = None
+
+
+async def get_embedding_cache() -> EmbeddingCache:
+    """Get or create the shared embedding cache, using Redis when reachable."""
+    global _embedding_cache
+    if _embedding_cache is None:
+        redis_client = None
+        try:
+            from database.redis_client import get_redis_client
+            redis_client = await get_redis_client()
+        except (ImportError, RedisConnectionError, RedisTimeoutError, OSError) as e:
+            logger.warning("Redis unavailable, embedding cache is L1 only: %s", e)
+        _embedding_cache = EmbeddingCache(redis_client)
+    return _embedding_cache
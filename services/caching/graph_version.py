@@ -0,0 +1,76 @@
+"""
+Compliance Graph Version Counter
+
+The regulatory knowledge graph only changes through the ingestion pipeline
+and Neo4jGraphRAGService writes, so read-side caches (GraphRAG retrieval
+results) can key their entries on a version number instead of expiring them
+on a timer:
+
+- Both writers call bump() after every committed write; the counter lives in
+  Redis so every worker sees the new version on its next lookup
+- Cache keys include the version, so a bump invalidates every entry at once
+  without scanning or deleting keys; old entries age out via their TTL
+- get() returns None when Redis is configured but unreachable, telling
+  callers to bypass their cache rather than risk serving a stale version
+"""
+
+import logging
+from typing import Any, Optional
+
+from redis.exceptions import ConnectionError as RedisConnectionError
+from redis.exceptions import TimeoutError as RedisTimeoutError
+
+logger = logging.getLogger(__name__)
+
+GRAPH_VERSION_KEY = "graphrag:graph_version"
+
+
+class GraphVersion:
+    """Monotonic version number of the compliance graph."""
+
+    def __init__(self, redis_client: Any = None) -> None:
+        """
+        Args:
+            redis_client: Async Redis client (in-process counter only if None)
+        """
+        self.redis = redis_client
+        self._local_version = 0
+
+    async def get(self) -> Optional[int]:
+        """Current graph version, or None if it cannot be determined."""
+        if self.redis is None:
+            return self._local_version
+        try:
+            value = await self.redis.get(GRAPH_VERSION_KEY)
+        except (RedisConnectionError, RedisTimeoutError, OSError) as e:
+            logger.warning("Graph version lookup failed: %s", e)
+            return None
+        return int(value) if value else 0
+
+    async def bump(self) -> Optional[int]:
+        """Record a graph change; returns the new version."""
+        if self.redis is None:
+            self._local_version += 1
+            return self._local_version
+        try:
+            return int(await self.redis.incr(GRAPH_VERSION_KEY))
+        except (RedisConnectionError, RedisTimeoutError, OSError) as e:
+            logger.error("Graph version bump failed, retrieval caches may be stale: %s", e)
+            return None
+
+
+_graph_version: Optional[GraphVersion] = None
+
+
+async def get_graph_version() -> GraphVersion:
+    """Get or create the shared graph version counter, using Redis when reachable."""
+    global _graph_version
+    if _graph_version is None:
+        redis_client = None
+        try:
+            from database.redis_client import get_redis_client
+            redis_client = await get_redis_client()
+        except (ImportError, RedisConnectionError, RedisTimeoutError, OSError) as e:
+            logger.warning("Redis unavailable, graph version is per-process: %s", e)
+        _graph_version = GraphVersion(redis_client)
+    return _graph_version
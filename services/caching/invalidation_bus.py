@@ -0,0 +1,160 @@
+"""
+Cross-Worker L1 Invalidation Bus
+
+Every CacheManager keeps its own in-process L1 tier, so a delete on one
+worker leaves stale copies on the others. The bus publishes invalidations on
+a Redis pub/sub channel and every subscribed CacheManager evicts locally:
+
+- Keys, glob patterns and tags are coalesced into one message per flush
+  window (duplicates collapse, bursts become a single publish)
+- Messages carry the publishing worker's id so a worker ignores its own
+- When the subscription drops, the owner is notified so it can clear L1 and
+  cap L1 TTLs until the bus reconnects
+"""
+
+import asyncio
+import json
+import logging
+import uuid
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Set
+
+from redis.exceptions import RedisError
+
+from services.redis_pubsub import ReconnectingSubscriber
+
+logger = logging.getLogger(__name__)
+
+# Bus Constants
+DEFAULT_CHANNEL = "cache:invalidate"
+DEFAULT_FLUSH_INTERVAL = 0.02  # Seconds invalidations are coalesced before publish
+MAX_ITEMS_PER_MESSAGE = 256  # Split larger flushes into several messages
+
+MessageHandler = Callable[[Dict[str, List[str]]], Awaitable[None]]
+StateHandler = Callable[[bool], Awaitable[None]]
+
+_KINDS = ("keys", "patterns", "tags")
+
+
+class CacheInvalidationBus:
+    """Batched Redis pub/sub channel carrying L1 invalidations between workers"""
+
+    def __init__(
+        self,
+        redis_client: Any,
+        on_message: MessageHandler,
+        on_state_change: Optional[StateHandler] = None,
+        channel: str = DEFAULT_CHANNEL,
+        flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+    ) -> None:
+        self.redis = redis_client
+        self.on_message = on_message
+        self.on_state_change = on_state_change
+        self.channel = channel
+        self.flush_interval = flush_interval
+        self.source_id = uuid.uuid4().hex
+
+        self.messages_published = 0
+        self.messages_received = 0
+        self.items_coalesced = 0
+
+        self._pending: Dict[str, Set[str]] = {kind: set() for kind in _KINDS}
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._flush_tasks: Set[asyncio.Task] = set()
+        self._subscriber = ReconnectingSubscriber(
+            redis_client,
+            channels=lambda: [self.channel],
+            on_message=lambda _channel, data: self._handle(data),
+            on_state_change=on_state_change,
+            name="cache invalidation bus",
+        )
+
+    @property
+    def connected(self) -> bool:
+        """Whether the invalidation channel is currently subscribed"""
+        return self._subscriber.connected
+
+    async def start(self) -> None:
+        """Start the subscriber and wait for its first subscribe attempt"""
+        await self._subscriber.start()
+
+    async def stop(self) -> None:
+        """Flush pending invalidations and stop the subscriber"""
+        await self.flush()
+        await self._subscriber.stop()
+
+    def publish(
+        self,
+        keys: Iterable[str] = (),
+        patterns: Iterable[str] = (),
+        tags: Iterable[str] = (),
+    ) -> None:
+        """Queue invalidations; they are published at the next flush"""
+        for kind, items in (("keys", keys), ("patterns", patterns), ("tags", tags)):
+            pending = self._pending[kind]
+            for item in items:
+                if item in pending:
+                    self.items_coalesced += 1
+                pending.add(item)
+
+        if self._flush_handle is None and any(self._pending.values()):
+            self._flush_handle = asyncio.get_running_loop().call_later(
+                self.flush_interval, self._schedule_flush
+            )
+
+    async def flush(self) -> None:
+        """Publish everything queued so far"""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        pending, self._pending = self._pending, {kind: set() for kind in _KINDS}
+        for message in self._build_messages(pending):
+            try:
+                await self.redis.publish(self.channel, json.dumps(message))
+                self.messages_published += 1
+            except (RedisError, OSError) as e:
+                logger.warning("Failed to publish cache invalidation: %s", e)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get bus statistics"""
+        return {
+            "connected": self.connected,
+            "messages_published": self.messages_published,
+            "messages_received": self.messages_received,
+            "items_coalesced": self.items_coalesced,
+            "pending": sum(len(items) for items in self._pending.values()),
+        }
+
+    def _schedule_flush(self) -> None:
+        self._flush_handle = None
+        task = asyncio.create_task(self.flush())
+        self._flush_tasks.add(task)
+        task.add_done_callback(self._flush_tasks.discard)
+
+    def _build_messages(self, pending: Dict[str, Set[str]]) -> List[Dict[str, Any]]:
+        items = [(kind, item) for kind in _KINDS for item in sorted(pending[kind])]
+        messages = []
+        for start in range(0, len(items), MAX_ITEMS_PER_MESSAGE):
+            message: Dict[str, Any] = {"source": self.source_id}
+            for kind, item in items[start:start + MAX_ITEMS_PER_MESSAGE]:
+                message.setdefault(kind, []).append(item)
+            messages.append(message)
+        return messages
+
+    async def _handle(self, data: Any) -> None:
+        try:
+            message = json.loads(data)
+        except (TypeError, ValueError):
+            logger.warning("Ignoring malformed cache invalidation message")
+            return
+
+        if message.get("source") == self.source_id:
+            return
+
+        self.messages_received += 1
+        try:
+            await self.on_message(
+                {kind: message.get(kind, []) for kind in _KINDS}
+            )
+        except Exception:
+            logger.exception("Cache invalidation handler failed")
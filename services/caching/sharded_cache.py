@@ -0,0 +1,382 @@
+"""
+Sharded L1 In-Memory Cache
+
+This module provides the in-process L1 cache used by CacheManager. The cache
+is split into independent shards selected by key hash so that eviction and
+expiry bookkeeping stays small per shard:
+
+- No asyncio.Lock: every operation runs without awaiting, so it is atomic
+  with respect to the event loop
+- Entry size is estimated once on insert and stored alongside the value
+- TTL expiry is lazy: O(1) check on read plus a per-shard min-heap that is
+  drained opportunistically on write
+- Per-shard hit/miss/eviction counters for CacheMetrics
+- Per-shard key-prefix and tag indexes so pattern and tag invalidation only
+  evict matching entries instead of clearing the whole tier
+"""
+
+import heapq
+import json
+import logging
+import time
+from collections import OrderedDict
+from fnmatch import fnmatchcase
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Sharding Constants
+DEFAULT_SHARD_COUNT = 16  # Independent shards keyed by hash(key)
+DEFAULT_SIZE_ESTIMATE = 1024  # 1KB estimate for non-serializable values
+SCALAR_SIZE_ESTIMATE = 64  # Flat estimate for numbers, booleans and None
+HEAP_COMPACTION_FACTOR = 2  # Rebuild expiry heap when stale items dominate
+MAX_EXPIRED_PURGE_PER_WRITE = 32  # Bound on expired entries purged per set
+
+# Index Constants
+KEY_SEGMENT_SEPARATOR = ":"
+MAX_INDEXED_PREFIX_DEPTH = 4  # Key prefixes indexed per entry, e.g. "db:user:1:"
+GLOB_WILDCARDS = "*?["
+
+
+def key_prefixes(key: str) -> List[str]:
+    """Separator-terminated prefixes of key used by the prefix index"""
+    prefixes = []
+    end = key.find(KEY_SEGMENT_SEPARATOR)
+    while end != -1 and len(prefixes) < MAX_INDEXED_PREFIX_DEPTH:
+        prefixes.append(key[:end + 1])
+        end = key.find(KEY_SEGMENT_SEPARATOR, end + 1)
+    return prefixes
+
+
+def pattern_index_prefix(pattern: str) -> Optional[str]:
+    """Longest indexed prefix every key matching a glob pattern must share"""
+    wildcard = min(
+        (i for i in (pattern.find(c) for c in GLOB_WILDCARDS) if i != -1),
+        default=len(pattern),
+    )
+    prefixes = key_prefixes(pattern[:wildcard])
+    return prefixes[-1] if prefixes else None
+
+
+class _CacheEntry:
+    """Value stored in a shard together with its accounting data"""
+
+    __slots__ = ("value", "size", "expires_at", "tags")
+
+    def __init__(
+        self,
+        value: Any,
+        size: int,
+        expires_at: Optional[float],
+        tags: Tuple[str, ...] = (),
+    ) -> None:
+        self.value = value
+        self.size = size
+        self.expires_at = expires_at
+        self.tags = tags
+
+
+class CacheShard:
+    """
+    Single LRU shard with its own budget, expiry heap and counters.
+
+    Shards are not meant to be used directly; ShardedLRUCache routes keys to
+    shards and aggregates their statistics.
+    """
+
+    def __init__(self, max_items: int, max_memory_bytes: int) -> None:
+        self.max_items = max(1, max_items)
+        self.max_memory_bytes = max(1, max_memory_bytes)
+        self.entries: "OrderedDict[str, _CacheEntry]" = OrderedDict()
+        self.memory_usage = 0
+
+        # Lazy expiry heap of (expires_at, key); stale items are skipped
+        self._expiry_heap: List[Tuple[float, str]] = []
+
+        # Invalidation indexes: key prefix -> keys, tag -> keys
+        self._prefix_index: Dict[str, Set[str]] = {}
+        self._tag_index: Dict[str, Set[str]] = {}
+
+        # Counters
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: str, now: float) -> Tuple[bool, Any]:
+        """Return (found, value) for key, expiring it if its TTL has passed"""
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return False, None
+
+        if entry.expires_at is not None and now >= entry.expires_at:
+            self._remove(key, entry)
+            self.expirations += 1
+            self.misses += 1
+            return False, None
+
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return True, entry.value
+
+    def set(
+        self,
+        key: str,
+        value: Any,
+        size: int,
+        expires_at: Optional[float],
+        now: float,
+        tags: Tuple[str, ...] = (),
+    ) -> None:
+        """Insert or replace key, evicting LRU entries to stay within budget"""
+        existing = self.entries.get(key)
+        if existing is not None:
+            self._remove(key, existing)
+
+        self._purge_expired(now)
+
+        while self.entries and (
+            self.memory_usage + size > self.max_memory_bytes
+            or len(self.entries) >= self.max_items
+        ):
+            oldest_key, oldest_entry = next(iter(self.entries.items()))
+            self._remove(oldest_key, oldest_entry)
+            self.evictions += 1
+            logger.debug("Evicted L1 key %s", oldest_key)
+
+        self.entries[key] = _CacheEntry(value, size, expires_at, tags)
+        self.memory_usage += size
+        self._index(key, tags)
+
+        if expires_at is not None:
+            heapq.heappush(self._expiry_heap, (expires_at, key))
+            if len(self._expiry_heap) > HEAP_COMPACTION_FACTOR * len(self.entries) + 1:
+                self._compact_heap()
+
+    def delete(self, key: str) -> bool:
+        """Remove key if present"""
+        entry = self.entries.get(key)
+        if entry is None:
+            return False
+        self._remove(key, entry)
+        return True
+
+    def delete_matching(self, pattern: str) -> int:
+        """Remove keys matching a glob pattern, using the prefix index"""
+        prefix = pattern_index_prefix(pattern)
+        candidates = (
+            self._prefix_index.get(prefix, ()) if prefix is not None else self.entries
+        )
+        matched = [key for key in candidates if fnmatchcase(key, pattern)]
+        for key in matched:
+            self._remove(key, self.entries[key])
+        return len(matched)
+
+    def delete_tagged(self, tag: str) -> int:
+        """Remove every key registered under tag"""
+        keys = list(self._tag_index.get(tag, ()))
+        for key in keys:
+            self._remove(key, self.entries[key])
+        return len(keys)
+
+    def clear(self) -> None:
+        """Drop all entries (counters are preserved)"""
+        self.entries.clear()
+        self._expiry_heap.clear()
+        self._prefix_index.clear()
+        self._tag_index.clear()
+        self.memory_usage = 0
+
+    def _remove(self, key: str, entry: _CacheEntry) -> None:
+        del self.entries[key]
+        self.memory_usage -= entry.size
+        self._unindex(key, entry.tags)
+
+    def _index(self, key: str, tags: Tuple[str, ...]) -> None:
+        for prefix in key_prefixes(key):
+            self._prefix_index.setdefault(prefix, set()).add(key)
+        for tag in tags:
+            self._tag_index.setdefault(tag, set()).add(key)
+
+    def _unindex(self, key: str, tags: Tuple[str, ...]) -> None:
+        for index, names in (
+            (self._prefix_index, key_prefixes(key)),
+            (self._tag_index, tags),
+        ):
+            for name in names:
+                keys = index.get(name)
+                if keys is not None:
+                    keys.discard(key)
+                    if not keys:
+                        del index[name]
+
+    def _purge_expired(self, now: float) -> None:
+        """Drain a bounded number of expired entries from the heap top"""
+        heap = self._expiry_heap
+        purged = 0
+        while heap and heap[0][0] <= now and purged < MAX_EXPIRED_PURGE_PER_WRITE:
+            expires_at, key = heapq.heappop(heap)
+            entry = self.entries.get(key)
+            # Skip stale heap items left behind by overwrites/deletes
+            if entry is not None and entry.expires_at == expires_at:
+                self._remove(key, entry)
+                self.expirations += 1
+                purged += 1
+
+    def _compact_heap(self) -> None:
+        self._expiry_heap = [
+            (entry.expires_at, key)
+            for key, entry in self.entries.items()
+            if entry.expires_at is not None
+        ]
+        heapq.heapify(self._expiry_heap)
+
+    def get_stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "items": len(self.entries),
+            "memory_usage_bytes": self.memory_usage,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_rate": self.hits / total if total > 0 else 0.0,
+        }
+
+
+class ShardedLRUCache:
+    """
+    Sharded LRU cache with per-entry size accounting and lazy TTL expiry.
+
+    Exposes the same async get/set/delete/clear interface as the legacy
+    LRUCache so it can be used as a drop-in L1 tier. Item and memory budgets
+    are divided evenly between shards.
+    """
+
+    def __init__(
+        self,
+        max_items: int = 1000,
+        max_memory_mb: int = 50,
+        num_shards: int = DEFAULT_SHARD_COUNT,
+    ) -> None:
+        if num_shards < 1:
+            raise ValueError("num_shards must be at least 1")
+
+        self.max_items = max_items
+        self.max_memory_bytes = max_memory_mb * 1024 * 1024
+        self.num_shards = num_shards
+        self._shards = [
+            CacheShard(
+                max_items=-(-max_items // num_shards),
+                max_memory_bytes=self.max_memory_bytes // num_shards,
+            )
+            for _ in range(num_shards)
+        ]
+
+    def _shard_for(self, key: str) -> CacheShard:
+        return self._shards[hash(key) % self.num_shards]
+
+    async def get(self, key: str) -> Optional[Any]:
+        """Get value from cache"""
+        _, value = self._shard_for(key).get(key, time.time())
+        return value
+
+    async def set(
+        self,
+        key: str,
+        value: Any,
+        ttl: Optional[int] = None,
+        tags: Optional[Iterable[str]] = None,
+    ) -> None:
+        """Set value in cache, optionally registering it under tags"""
+        now = time.time()
+        expires_at = now + ttl if ttl else None
+        self._shard_for(key).set(
+            key, value, self._estimate_size(value), expires_at, now,
+            tuple(tags) if tags else (),
+        )
+
+    async def delete(self, key: str) -> bool:
+        """Delete key from cache"""
+        return self._shard_for(key).delete(key)
+
+    async def delete_pattern(self, pattern: str) -> int:
+        """Delete keys matching a Redis-style glob pattern"""
+        return sum(shard.delete_matching(pattern) for shard in self._shards)
+
+    async def delete_tags(self, tags: Iterable[str]) -> int:
+        """Delete keys registered under any of tags"""
+        return sum(
+            shard.delete_tagged(tag) for tag in tags for shard in self._shards
+        )
+
+    async def clear(self) -> None:
+        """Clear all cache entries"""
+        for shard in self._shards:
+            shard.clear()
+
+    # Mapping-style helpers for synchronous inspection
+
+    def __contains__(self, key: str) -> bool:
+        entry = self._shard_for(key).entries.get(key)
+        return entry is not None and (
+            entry.expires_at is None or time.time() < entry.expires_at
+        )
+
+    def __getitem__(self, key: str) -> Any:
+        found, value = self._shard_for(key).get(key, time.time())
+        if not found:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        now = time.time()
+        self._shard_for(key).set(key, value, self._estimate_size(value), None, now)
+
+    def __delitem__(self, key: str) -> None:
+        if not self._shard_for(key).delete(key):
+            raise KeyError(key)
+
+    def __len__(self) -> int:
+        return sum(len(shard.entries) for shard in self._shards)
+
+    @property
+    def memory_usage(self) -> int:
+        return sum(shard.memory_usage for shard in self._shards)
+
+    @staticmethod
+    def _estimate_size(obj: Any) -> int:
+        """Estimate memory usage of a value (computed once per insert)"""
+        if isinstance(obj, (str, bytes, bytearray)):
+            return len(obj)
+        if obj is None or isinstance(obj, (bool, int, float)):
+            return SCALAR_SIZE_ESTIMATE
+        try:
+            return len(json.dumps(obj, default=str).encode('utf-8'))
+        except (TypeError, ValueError, OverflowError) as e:
+            logger.debug("Size estimation failed: %s", e)
+            return DEFAULT_SIZE_ESTIMATE
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics aggregated over all shards"""
+        shard_stats = [shard.get_stats() for shard in self._shards]
+        hits = sum(s["hits"] for s in shard_stats)
+        misses = sum(s["misses"] for s in shard_stats)
+        memory_usage = sum(s["memory_usage_bytes"] for s in shard_stats)
+        total = hits + misses
+
+        return {
+            "items": sum(s["items"] for s in shard_stats),
+            "memory_usage_bytes": memory_usage,
+            "memory_usage_mb": memory_usage / (1024 * 1024),
+            "max_items": self.max_items,
+            "max_memory_mb": self.max_memory_bytes / (1024 * 1024),
+            "num_shards": self.num_shards,
+            "hits": hits,
+            "misses": misses,
+            "evictions": sum(s["evictions"] for s in shard_stats),
+            "expirations": sum(s["expirations"] for s in shard_stats),
+            "hit_rate": hits / total if total > 0 else 0.0,
+            "shards": shard_stats,
+        }
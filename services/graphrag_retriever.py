@@ -7,20 +7,181 @@ to the IQ agent from the Neo4j compliance knowledge graph. It provides:
 - Global GraphRAG for cross-jurisdictional synthesis
 - Hybrid retrieval combining graph traversal with vector search
 - Temporal awareness via Graphiti framework integration
+- Result caching keyed on the graph version, so entries stay valid until the
+  next ingestion and are invalidated exactly when it happens; results from a
+  degraded fallback are only cached briefly
+- Local retrieval through the regulation/requirement full-text indexes, with
+  the CONTAINS scan kept as a fallback while an index is missing
 """
 
 import logging
-from typing import Dict, List, Any, Optional
-from datetime import datetime, timezone
+import re
+import time
+from typing import Dict, List, Any, Optional, Tuple
+from datetime import date, datetime, timezone
 from dataclasses import dataclass
 from enum import Enum
 import hashlib
 
-from services.neo4j_service import Neo4jGraphRAGService
+from services.caching.cache_manager import CacheManager
+from services.caching.embedding_cache import embedding_model_name, get_embedding_cache
+from services.caching.graph_version import GraphVersion, get_graph_version
+from services.neo4j_service import (
+    REGULATION_FULLTEXT_INDEX,
+    REQUIREMENT_FULLTEXT_INDEX,
+    Neo4jGraphRAGService,
+)
 from langchain_openai import OpenAIEmbeddings
+from neo4j.exceptions import ClientError
 
 logger = logging.getLogger(__name__)
 
+# Retrieval Cache Constants
+RETRIEVAL_CACHE_TTL = 6 * 3600  # Bounds memory only; graph version bumps invalidate
+RETRIEVAL_CACHE_PREFIX = "graphrag:retrieval"
+DEGRADED_RETRIEVAL_CACHE_TTL = 30  # Fallback results are retried soon after the fault clears
+
+# Full-text Search Constants
+FULLTEXT_MAX_TERMS = 16
+FULLTEXT_RETRY_SECONDS = 300  # How long to use the CONTAINS fallback after a missing-index error
+FULLTEXT_STOPWORDS = frozenset(
+    {
+        "a", "about", "all", "an", "and", "any", "are", "as", "at", "be", "by", "can", "do",
+        "does", "for", "from", "give", "how", "i", "in", "is", "it", "me", "my", "of", "on",
+        "or", "our", "show", "that", "the", "their", "this", "to", "us", "we", "what", "when",
+        "which", "who", "with",
+    }
+)
+_TOKEN_PATTERN = re.compile(r"\w+")
+
+# Local retrieval over the full-text indexes: hits on a regulation name expand
+# to its requirements, hits on a requirement description join back to their
+# regulation, and a requirement matched both ways sums both scores
+LOCAL_FULLTEXT_QUERY = """
+CALL {
+    CALL db.index.fulltext.queryNodes($regulation_index, $search) YIELD node, score
+    MATCH (node)-[:CONTAINS]->(req:Requirement)
+    RETURN node AS r, req, score
+    UNION ALL
+    CALL db.index.fulltext.queryNodes($requirement_index, $search) YIELD node, score
+    MATCH (r:Regulation)-[:CONTAINS]->(node)
+    RETURN r, node AS req, score
+}
+WITH r, req, sum(score) AS score
+WHERE $jurisdiction IS NULL OR r.jurisdiction = $jurisdiction
+ORDER BY score DESC
+LIMIT $max_nodes
+OPTIONAL MATCH (req)-[:SATISFIED_BY]->(c:Control)
+OPTIONAL MATCH (c)-[:EVIDENCED_BY]->(e:Evidence)
+WITH r, req, score, collect(DISTINCT c) as controls, collect(DISTINCT e) as evidence
+ORDER BY score DESC
+RETURN {
+    regulation: {
+        name: r.name,
+        jurisdiction: r.jurisdiction,
+        effective_date: r.effective_date,
+        url: r.url,
+    },
+    requirement: {
+        id: req.id,
+        description: req.description,
+        mandatory: req.mandatory,
+        category: req.category,
+        score: score,
+    },
+    controls: [c IN controls | {
+        id: c.id,
+        name: c.name,
+        type: c.type,
+        status: c.implementation_status
+    }],
+    evidence: [e IN evidence | {
+        id: e.id,
+        type: e.type,
+        collected_at: e.collected_at
+    }]
+} as result
+"""
+
+# Substring scan over every Regulation-Requirement pair; used only when the
+# full-text indexes are unavailable or the query has no searchable terms
+LOCAL_CONTAINS_QUERY = """
+// Local retrieval for specific compliance entities
+MATCH (r:Regulation)-[:CONTAINS]->(req:Requirement)
+WHERE ($jurisdiction IS NULL OR r.jurisdiction = $jurisdiction)
+  AND (toLower(r.name) CONTAINS toLower($query_term)
+   OR toLower(req.description) CONTAINS toLower($query_term))
+OPTIONAL MATCH (req)-[:SATISFIED_BY]->(c:Control)
+OPTIONAL MATCH (c)-[:EVIDENCED_BY]->(e:Evidence)
+WITH r, req, collect(DISTINCT c) as controls, collect(DISTINCT e) as evidence
+LIMIT $max_nodes
+RETURN {
+    regulation: {
+        name: r.name,
+        jurisdiction: r.jurisdiction,
+        effective_date: r.effective_date,
+        url: r.url,
+    },
+    requirement: {
+        id: req.id,
+        description: req.description,
+        mandatory: req.mandatory,
+        category: req.category,
+    },
+    controls: [c IN controls | {
+        id: c.id,
+        name: c.name,
+        type: c.type,
+        status: c.implementation_status
+    }],
+    evidence: [e IN evidence | {
+        id: e.id,
+        type: e.type,
+        collected_at: e.collected_at
+    }]
+} as result
+"""
+
+
+def fulltext_search_terms(query: str) -> List[str]:
+    """
+    Tokenize a query into full-text search terms
+
+    Keeps word characters only, so Lucene syntax in user input (quotes,
+    wildcards, AND/OR) is never interpreted. Stopwords and single letters are
+    dropped; numbers such as article references are kept.
+    """
+    terms: List[str] = []
+    for token in _TOKEN_PATTERN.findall(query.lower()):
+        token = token.strip("_")
+        if not token or token in FULLTEXT_STOPWORDS or token in terms:
+            continue
+        if len(token) < 2 and not token.isdigit():
+            continue
+        terms.append(token)
+        if len(terms) == FULLTEXT_MAX_TERMS:
+            break
+    return terms
+
+
+def normalize_graph_values(value: Any) -> Any:
+    """
+    Convert Neo4j and Python temporal values to ISO 8601 strings
+
+    The L2 codec stores these as strings, so normalizing before caching keeps
+    L1 hits, L2 hits and fresh results the same shape.
+    """
+    if isinstance(value, dict):
+        return {k: normalize_graph_values(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [normalize_graph_values(v) for v in value]
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if hasattr(value, "iso_format"):
+        # neo4j.time.DateTime, Date, Time and Duration
+        return value.iso_format()
+    return value
+
 
 class RetrievalMode(Enum):
     """Retrieval strategies for different query types"""
@@ -116,11 +277,33 @@ Always return a ContextPack containing:
 - ALWAYS prefer primary sources over secondary
 """
 
-    def __init__(self, neo4j_service: Neo4jGraphRAGService) -> None:
-        """Initialize the GraphRAG Retriever"""
+    def __init__(
+        self,
+        neo4j_service: Neo4jGraphRAGService,
+        cache_manager: Optional[CacheManager] = None,
+        graph_version: Optional[GraphVersion] = None,
+        cache_ttl: int = RETRIEVAL_CACHE_TTL,
+        enable_cache: bool = True,
+    ) -> None:
+        """
+        Initialize the GraphRAG Retriever
+
+        Args:
+            neo4j_service: Graph database service
+            cache_manager: L1/L2 cache for retrieval results
+            graph_version: Graph version counter (shared instance if None)
+            cache_ttl: Retrieval cache TTL in seconds
+            enable_cache: Set False to always query the graph
+        """
         self.neo4j = neo4j_service
         self.embeddings = OpenAIEmbeddings()
-        self.retrieval_cache = {}
+        self.cache_manager = cache_manager or CacheManager()
+        self.graph_version = graph_version
+        self.cache_ttl = cache_ttl
+        self.enable_cache = enable_cache
+        self.cache_stats = {mode: {"hits": 0, "misses": 0, "bypassed": 0} for mode in RetrievalMode}
+        # Monotonic time until which local retrieval skips the full-text indexes
+        self._fulltext_unavailable_until = 0.0
 
     def get_system_prompt(self) -> str:
         """Return the retriever's system prompt"""
@@ -153,17 +336,7 @@ Always return a ContextPack containing:
         if mode is None:
             mode = self._select_retrieval_mode(query)
 
-        # Execute retrieval based on mode
-        if mode == RetrievalMode.LOCAL:
-            result = await self._local_retrieval(query, jurisdiction, max_nodes)
-        elif mode == RetrievalMode.GLOBAL:
-            result = await self._global_retrieval(query, jurisdiction, max_nodes)
-        elif mode == RetrievalMode.HYBRID:
-            result = await self._hybrid_retrieval(query, jurisdiction, max_nodes)
-        elif mode == RetrievalMode.TEMPORAL:
-            result = await self._temporal_retrieval(query, jurisdiction, max_nodes)
-        else:
-            raise ValueError(f"Unknown retrieval mode: {mode}")
+        result, cache_status = await self._cached_retrieval(query, mode, jurisdiction, max_nodes)
 
         # Structure as ContextPack
         return ContextPack(
@@ -180,9 +353,97 @@ Always return a ContextPack containing:
                 "query": query,
                 "jurisdiction": jurisdiction,
                 "max_nodes": max_nodes,
+                "cache": cache_status,
             },
         )
 
+    async def _cached_retrieval(
+        self,
+        query: str,
+        mode: RetrievalMode,
+        jurisdiction: Optional[str],
+        max_nodes: int,
+    ) -> Tuple[Dict[str, Any], str]:
+        """
+        Serve a retrieval result from cache or run it and cache the result
+
+        Returns:
+            Tuple of (retrieval result, "hit" | "miss" | "bypassed")
+        """
+        stats = self.cache_stats[mode]
+        version = await self._current_graph_version() if self.enable_cache else None
+        if version is None:
+            stats["bypassed"] += 1
+            return await self._run_retrieval(query, mode, jurisdiction, max_nodes), "bypassed"
+
+        if not self.cache_manager.initialized:
+            await self.cache_manager.initialize()
+
+        computed = False
+
+        async def compute() -> Dict[str, Any]:
+            nonlocal computed
+            computed = True
+            return await self._run_retrieval(query, mode, jurisdiction, max_nodes)
+
+        key = self._retrieval_cache_key(query, mode, jurisdiction, max_nodes, version)
+        # stale_ttl=0: an expired entry is recomputed, never served
+        result = await self.cache_manager.get_or_compute(key, compute, ttl=self.cache_ttl, stale_ttl=0)
+        if computed:
+            if result.get("degraded"):
+                # Don't keep a fallback result until the next graph version
+                await self.cache_manager.set(key, result, DEGRADED_RETRIEVAL_CACHE_TTL)
+            stats["misses"] += 1
+            return result, "miss"
+        stats["hits"] += 1
+        return result, "hit"
+
+    async def _current_graph_version(self) -> Optional[int]:
+        if self.graph_version is None:
+            self.graph_version = await get_graph_version()
+        return await self.graph_version.get()
+
+    @staticmethod
+    def _retrieval_cache_key(
+        query: str,
+        mode: RetrievalMode,
+        jurisdiction: Optional[str],
+        max_nodes: int,
+        version: int,
+    ) -> str:
+        """Cache key for (normalized query, mode, jurisdiction, max_nodes, graph version)"""
+        normalized = " ".join(query.lower().split())
+        query_hash = hashlib.sha256(normalized.encode()).hexdigest()[:32]
+        return f"{RETRIEVAL_CACHE_PREFIX}:v{version}:{mode.value}:{jurisdiction or '*'}:{max_nodes}:{query_hash}"
+
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Retrieval cache hit/miss counts and hit rate per retrieval mode"""
+        by_mode = {}
+        for mode, stats in self.cache_stats.items():
+            lookups = stats["hits"] + stats["misses"]
+            by_mode[mode.value] = {**stats, "hit_rate": stats["hits"] / lookups if lookups else 0.0}
+        return {"by_mode": by_mode, "cache_manager": self.cache_manager.get_stats()}
+
+    async def _run_retrieval(
+        self,
+        query: str,
+        mode: RetrievalMode,
+        jurisdiction: Optional[str],
+        max_nodes: int,
+    ) -> Dict[str, Any]:
+        """Run the graph retrieval strategy for a mode, with temporal values normalized"""
+        if mode == RetrievalMode.LOCAL:
+            result = await self._local_retrieval(query, jurisdiction, max_nodes)
+        elif mode == RetrievalMode.GLOBAL:
+            result = await self._global_retrieval(query, jurisdiction, max_nodes)
+        elif mode == RetrievalMode.HYBRID:
+            result = await self._hybrid_retrieval(query, jurisdiction, max_nodes)
+        elif mode == RetrievalMode.TEMPORAL:
+            result = await self._temporal_retrieval(query, jurisdiction, max_nodes)
+        else:
+            raise ValueError(f"Unknown retrieval mode: {mode}")
+        return normalize_graph_values(result)
+
     def _select_retrieval_mode(self, query: str) -> RetrievalMode:
         """Intelligently select retrieval mode based on query characteristics"""
         query_lower = query.lower()
@@ -223,53 +484,11 @@ Always return a ContextPack containing:
         """
         Local GraphRAG - retrieve specific entities and their immediate context
         """
-        # Parse query for specific regulation/requirement references
-        cypher_query = """
-        // Local retrieval for specific compliance entities
-        MATCH (r:Regulation)-[:CONTAINS]->(req:Requirement)
-        WHERE toLower(r.name) CONTAINS toLower($query_term)
-           OR toLower(req.description) CONTAINS toLower($query_term)
-        OPTIONAL MATCH (req)-[:SATISFIED_BY]->(c:Control)
-        OPTIONAL MATCH (c)-[:EVIDENCED_BY]->(e:Evidence)
-        WITH r, req, collect(DISTINCT c) as controls, collect(DISTINCT e) as evidence
-        LIMIT $max_nodes
-        RETURN {
-            regulation: {
-                name: r.name,
-                jurisdiction: r.jurisdiction,
-                effective_date: r.effective_date,
-                url: r.url,
-            },
-            requirement: {
-                id: req.id,
-                description: req.description,
-                mandatory: req.mandatory,
-                category: req.category,
-            },
-            controls: [c IN controls | {
-                id: c.id,
-                name: c.name,
-                type: c.type,
-                status: c.implementation_status
-            }],
-            evidence: [e IN evidence | {
-                id: e.id,
-                type: e.type,
-                collected_at: e.collected_at
-            }]
-        } as result
-        """
-
-        params = {"query_term": query, "max_nodes": max_nodes}
-
-        if jurisdiction:
-            cypher_query = cypher_query.replace(
-                "WHERE toLower(r.name)",
-                "WHERE r.jurisdiction = $jurisdiction AND toLower(r.name)",
-            )
-            params["jurisdiction"] = jurisdiction
-
-        results = await self.neo4j.execute_query(cypher_query, params)
+        results = await self._local_search(query, jurisdiction, max_nodes)
+        # The CONTAINS scan stood in for a full-text index that failed
+        used_fallback = bool(fulltext_search_terms(query)) and (
+            time.monotonic() < self._fulltext_unavailable_until
+        )
 
         # Process results
         nodes = []
@@ -319,8 +538,32 @@ Always return a ContextPack containing:
             "sources": sources,
             "gaps": gaps,
             "confidence": 0.9 if results else 0.1,
+            "degraded": used_fallback,
         }
 
+    async def _local_search(
+        self, query: str, jurisdiction: Optional[str], max_nodes: int
+    ) -> List[Dict[str, Any]]:
+        """Run the full-text local query, falling back to the CONTAINS scan"""
+        terms = fulltext_search_terms(query)
+        if terms and time.monotonic() >= self._fulltext_unavailable_until:
+            params = {
+                "regulation_index": REGULATION_FULLTEXT_INDEX,
+                "requirement_index": REQUIREMENT_FULLTEXT_INDEX,
+                "search": " ".join(terms),
+                "jurisdiction": jurisdiction,
+                "max_nodes": max_nodes,
+            }
+            try:
+                return await self.neo4j.execute_query(LOCAL_FULLTEXT_QUERY, params)
+            except ClientError as e:
+                # Typically the index does not exist yet (schema not initialized)
+                self._fulltext_unavailable_until = time.monotonic() + FULLTEXT_RETRY_SECONDS
+                logger.warning("Full-text local retrieval unavailable, using CONTAINS scan: %s", e)
+
+        params = {"query_term": query, "jurisdiction": jurisdiction, "max_nodes": max_nodes}
+        return await self.neo4j.execute_query(LOCAL_CONTAINS_QUERY, params)
+
     async def _global_retrieval(
         self, query: str, jurisdiction: Optional[str], max_nodes: int
     ) -> Dict[str, Any]:
@@ -442,7 +685,8 @@ Always return a ContextPack containing:
         except Exception as e:
             logger.warning(f"Vector search failed, falling back to text search: {e}")
             # Fallback to text-based search
-            return await self._local_retrieval(query, jurisdiction, max_nodes)
+            result = await self._local_retrieval(query, jurisdiction, max_nodes)
+            return {**result, "degraded": True}
 
         # Process hybrid results
         nodes = []
@@ -467,6 +711,8 @@ Always return a ContextPack containing:
             "sources": [{"type": "hybrid", "method": "vector+graph"}],
             "gaps": [],
             "confidence": 0.75,
+            # A zero vector means the embedding call failed
+            "degraded": not any(query_embedding),
         }
 
     async def _temporal_retrieval(
@@ -551,10 +797,12 @@ Always return a ContextPack containing:
         }
 
     async def _get_embedding(self, text: str) -> List[float]:
-        """Generate embedding for text using OpenAI"""
+        """Generate embedding for text using OpenAI, via the shared embedding cache"""
         try:
-            embedding = await self.embeddings.aembed_query(text)
-            return embedding
+            cache = await get_embedding_cache()
+            return await cache.get_or_embed_one(
+                embedding_model_name(self.embeddings), text, self.embeddings.aembed_query
+            )
         except Exception as e:
             logger.error(f"Failed to generate embedding: {e}")
             return [0.0] * 1536  # Return zero vector as fallback
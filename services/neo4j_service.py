@@ -4,16 +4,46 @@ from __future__ import annotations
 Neo4j GraphRAG Service for Compliance Intelligence
 Implements comprehensive graph database operations for CCO compliance knowledge
 """
+import hashlib
 import json
 import logging
 import os
-from typing import Any, Dict, List, Optional, Tuple
-from neo4j import GraphDatabase, Driver
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+from neo4j import AsyncDriver, AsyncGraphDatabase, AsyncManagedTransaction
 from neo4j.exceptions import ClientError
-import asyncio
-from concurrent.futures import ThreadPoolExecutor
+from services.caching.graph_version import get_graph_version
 logger = logging.getLogger(__name__)
 
+# Full-text indexes backing GraphRAG local retrieval
+REGULATION_FULLTEXT_INDEX = 'regulation_name_fulltext'
+REQUIREMENT_FULLTEXT_INDEX = 'requirement_description_fulltext'
+
+# Connection pool defaults, overridable via environment
+DEFAULT_MAX_POOL_SIZE = 50
+DEFAULT_ACQUISITION_TIMEOUT = 60.0  # Seconds to wait for a free pooled connection
+DEFAULT_MAX_TRANSACTION_RETRY_TIME = 15.0  # Seconds managed transactions retry transient errors
+MAX_CONNECTION_LIFETIME = 3600
+
+# Query timing metrics
+QUERY_TIMING_SAMPLES = 500  # Latencies kept per query for percentiles
+SLOW_QUERY_MS = float(os.getenv('NEO4J_SLOW_QUERY_MS', '1000'))
+
+
+def query_fingerprint(query: str) -> str:
+    """Stable label for a Cypher query: its first statement line plus a short hash"""
+    lines = [line.strip() for line in query.strip().splitlines()]
+    first = next((line for line in lines if line and not line.startswith('//')), '')
+    digest = hashlib.sha256(' '.join(query.split()).encode()).hexdigest()[:8]
+    return f'{first[:48]}#{digest}'
+
+
+async def _run_and_fetch(tx: AsyncManagedTransaction, query: str,
+    parameters: Dict[str, Any]) ->List[Dict[str, Any]]:
+    result = await tx.run(query, parameters)
+    return await result.data()
+
 
 class Neo4jGraphRAGService:
     """
@@ -22,15 +52,34 @@ class Neo4jGraphRAGService:
     All Neo4j credentials must be provided via environment variables (NEO4J_URI, NEO4J_USERNAME,
     NEO4J_PASSWORD). The service will fail to initialize if required credentials are not set.
     Use Doppler for production: doppler run -- python main.py
+
+    Queries run on the native async driver inside managed read/write
+    transactions, which retry transient errors (leader changes, deadlocks)
+    for up to max_transaction_retry_time. Sessions are cheap and borrow
+    connections from the driver's pool, so concurrency is bounded by
+    max_connection_pool_size rather than a thread pool. Pool settings come
+    from NEO4J_MAX_POOL_SIZE, NEO4J_ACQUISITION_TIMEOUT and
+    NEO4J_MAX_TRANSACTION_RETRY_TIME unless passed explicitly.
     """
 
-    def __init__(self) ->None:
-        self.driver: Optional[Driver] = None
+    def __init__(self, max_connection_pool_size: Optional[int]=None,
+        connection_acquisition_timeout: Optional[float]=None,
+        max_transaction_retry_time: Optional[float]=None) ->None:
+        self.driver: Optional[AsyncDriver] = None
         self.uri = os.getenv('NEO4J_URI')
         self.username = os.getenv('NEO4J_USERNAME')
         self.password = os.getenv('NEO4J_PASSWORD')
         self.database = os.getenv('NEO4J_DATABASE', 'neo4j')
-        self.executor = ThreadPoolExecutor(max_workers=10)
+        self.max_connection_pool_size = (max_connection_pool_size or
+            int(os.getenv('NEO4J_MAX_POOL_SIZE', DEFAULT_MAX_POOL_SIZE)))
+        self.connection_acquisition_timeout = (
+            connection_acquisition_timeout or float(os.getenv(
+            'NEO4J_ACQUISITION_TIMEOUT', DEFAULT_ACQUISITION_TIMEOUT)))
+        self.max_transaction_retry_time = (max_transaction_retry_time or
+            float(os.getenv('NEO4J_MAX_TRANSACTION_RETRY_TIME',
+            DEFAULT_MAX_TRANSACTION_RETRY_TIME)))
+        # query label -> count, errors, total/max latency and recent samples
+        self.query_timings: Dict[str, Dict[str, Any]] = {}
 
         # Validate required environment variables
         if not self.uri:
@@ -55,9 +104,12 @@ class Neo4jGraphRAGService:
     async def initialize(self) ->bool:
         """Initialize Neo4j connection and verify schema"""
         try:
-            self.driver = GraphDatabase.driver(self.uri, auth=(self.
-                username, self.password), max_connection_lifetime=3600,
-                max_connection_pool_size=50, connection_acquisition_timeout=60)
+            self.driver = AsyncGraphDatabase.driver(self.uri, auth=(self.
+                username, self.password), max_connection_lifetime=
+                MAX_CONNECTION_LIFETIME, max_connection_pool_size=self.
+                max_connection_pool_size, connection_acquisition_timeout=
+                self.connection_acquisition_timeout,
+                max_transaction_retry_time=self.max_transaction_retry_time)
             if not await self._verify_connection():
                 raise Exception('Neo4j connection verification failed')
             await self._initialize_schema()
@@ -69,18 +121,11 @@ class Neo4jGraphRAGService:
 
     async def _verify_connection(self) ->bool:
         """Verify Neo4j connection is working"""
-
-        def _test_connection() ->bool:
-            if self.driver is None:
-                return False
-            with self.driver.session(database=self.database) as session:
-                result = session.run('RETURN 1 AS test')
-                record = result.single()
-                return record is not None and record['test'] == 1
+        if self.driver is None:
+            return False
         try:
-            result = await asyncio.get_event_loop().run_in_executor(self.
-                executor, _test_connection)
-            return result
+            records = await self.execute_query('RETURN 1 AS test')
+            return bool(records) and records[0]['test'] == 1
         except Exception as e:
             logger.error('Neo4j connection test failed: %s' % e)
             return False
@@ -102,7 +147,11 @@ class Neo4jGraphRAGService:
             ,
             'CREATE INDEX milestone_timeline IF NOT EXISTS FOR (m:Milestone) ON (m.timeline)'
             ,
-            'CREATE INDEX domain_priority IF NOT EXISTS FOR (d:ComplianceDomain) ON (d.priority)',
+            'CREATE INDEX domain_priority IF NOT EXISTS FOR (d:ComplianceDomain) ON (d.priority)'
+            ,
+            f'CREATE FULLTEXT INDEX {REGULATION_FULLTEXT_INDEX} IF NOT EXISTS FOR (r:Regulation) ON EACH [r.name, r.full_name]'
+            ,
+            f'CREATE FULLTEXT INDEX {REQUIREMENT_FULLTEXT_INDEX} IF NOT EXISTS FOR (req:Requirement) ON EACH [req.description]',
             ]
         constraints = [
             'CREATE CONSTRAINT regulation_name IF NOT EXISTS FOR (r:Regulation) REQUIRE r.name IS UNIQUE'
@@ -116,73 +165,126 @@ class Neo4jGraphRAGService:
             'CREATE CONSTRAINT domain_name IF NOT EXISTS FOR (d:ComplianceDomain) REQUIRE d.name IS UNIQUE',
             ]
 
-        def _create_schema() ->None:
-            if self.driver is None:
-                return
-            with self.driver.session(database=self.database) as session:
+        if self.driver is None:
+            return
+        try:
+            # Schema commands run as auto-commit queries, one per statement
+            async with self.driver.session(database=self.database) as session:
                 for index_query in indexes:
                     try:
-                        session.run(index_query)
+                        await (await session.run(index_query)).consume()
                     except ClientError as e:
                         if 'already exists' not in str(e):
                             logger.warning('Index creation warning: %s' % e)
                 for constraint_query in constraints:
                     try:
-                        session.run(constraint_query)
+                        await (await session.run(constraint_query)).consume()
                     except ClientError as e:
                         if 'already exists' not in str(e):
                             logger.warning(
                                 'Constraint creation warning: %s' % e)
-        try:
-            await asyncio.get_event_loop().run_in_executor(self.executor,
-                _create_schema)
             logger.info('Neo4j schema initialized')
         except Exception as e:
             logger.error('Schema initialization failed: %s' % e)
             raise
 
     async def execute_query(self, query: str, parameters: Optional[Dict[str,
-        Any]]=None, read_only: bool=True) ->List[Dict[str, Any]]:
-        """Execute a Cypher query and return results"""
-
-        def _run_query() ->List[Dict[str, Any]]:
-            if self.driver is None:
-                return []
-            access_mode = 'READ' if read_only else 'WRITE'
-            with self.driver.session(database=self.database,
-                default_access_mode=access_mode) as session:
-                result = session.run(query, parameters or {})
-                return [record.data() for record in result]
+        Any]]=None, read_only: bool=True, query_name: Optional[str]=None
+        ) ->List[Dict[str, Any]]:
+        """
+        Execute a Cypher query in a managed transaction and return results
+
+        Read queries use execute_read (routable to followers in a cluster),
+        writes use execute_write; both retry transient failures, so write
+        queries should be idempotent. A committed write bumps the graph
+        version. Timings are recorded under query_name, or a fingerprint of
+        the query text.
+        """
+        if self.driver is None:
+            return []
+        start = time.perf_counter()
         try:
-            result = await asyncio.get_event_loop().run_in_executor(self.
-                executor, _run_query)
-            return result
+            async with self.driver.session(database=self.database) as session:
+                work = (session.execute_read if read_only else session.
+                    execute_write)
+                result = await work(_run_and_fetch, query, parameters or {})
         except Exception as e:
+            self._record_timing(query_name or query_fingerprint(query),
+                start, failed=True)
             logger.error('Query execution failed: %s' % e)
             logger.error('Query: %s' % query)
             logger.error('Parameters: %s' % parameters)
             raise
+        self._record_timing(query_name or query_fingerprint(query), start)
+        if not read_only:
+            await self._bump_graph_version()
+        return result
 
     async def execute_transaction(self, queries: List[Tuple[str, Dict[str,
         Any]]]) ->bool:
         """Execute multiple queries in a transaction"""
+        if self.driver is None:
+            return False
 
-        def _run_transaction() ->bool:
-            if self.driver is None:
-                return False
-            with self.driver.session(database=self.database) as session:
-                with session.begin_transaction() as tx:
-                    for query, params in queries:
-                        tx.run(query, params)
-                    tx.commit()
-                    return True
+        async def _run_all(tx: AsyncManagedTransaction) ->None:
+            for query, params in queries:
+                await (await tx.run(query, params)).consume()
+        start = time.perf_counter()
         try:
-            result = await asyncio.get_event_loop().run_in_executor(self.
-                executor, _run_transaction)
-            return result
+            async with self.driver.session(database=self.database) as session:
+                await session.execute_write(_run_all)
+            self._record_timing('transaction', start)
         except Exception as e:
+            self._record_timing('transaction', start, failed=True)
             logger.error('Transaction failed: %s' % e)
             return False
+        await self._bump_graph_version()
+        return True
+
+    @staticmethod
+    async def _bump_graph_version() ->None:
+        """
+        Bump the graph version after a committed write
+
+        Every write goes through execute_query or execute_transaction, so
+        GraphRAG retrieval caches are invalidated whichever caller changed
+        the graph (bulk loads, the graph initializer, knowledge scripts).
+        """
+        await (await get_graph_version()).bump()
+
+    def _record_timing(self, name: str, start: float, failed: bool=False
+        ) ->None:
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        timing = self.query_timings.get(name)
+        if timing is None:
+            timing = self.query_timings[name] = {'count': 0, 'errors': 0,
+                'total_ms': 0.0, 'max_ms': 0.0, 'samples': deque(maxlen=
+                QUERY_TIMING_SAMPLES)}
+        timing['count'] += 1
+        timing['errors'] += int(failed)
+        timing['total_ms'] += elapsed_ms
+        timing['max_ms'] = max(timing['max_ms'], elapsed_ms)
+        timing['samples'].append(elapsed_ms)
+        if elapsed_ms >= SLOW_QUERY_MS:
+            logger.warning('Slow Neo4j query %s took %.0fms' % (name,
+                elapsed_ms))
+
+    def get_query_metrics(self) ->Dict[str, Any]:
+        """Per-query call counts, errors and latency (avg, p50, p95, max in ms)"""
+        queries = {}
+        for name, timing in self.query_timings.items():
+            samples: Deque[float] = timing['samples']
+            ordered = sorted(samples)
+            queries[name] = {'count': timing['count'], 'errors': timing[
+                'errors'], 'avg_ms': timing['total_ms'] / timing['count'],
+                'p50_ms': ordered[len(ordered) // 2], 'p95_ms': ordered[
+                min(len(ordered) - 1, int(len(ordered) * 0.95))], 'max_ms':
+                timing['max_ms']}
+        return {'pool': {'max_connection_pool_size': self.
+            max_connection_pool_size, 'connection_acquisition_timeout':
+            self.connection_acquisition_timeout,
+            'max_transaction_retry_time': self.max_transaction_retry_time},
+            'queries': queries}
 
     async def get_compliance_coverage(self, domain_name: Optional[str]=None
         ) ->Dict[str, Any]:
@@ -488,8 +590,8 @@ class Neo4jGraphRAGService:
     async def close(self) ->None:
         """Close Neo4j connection"""
         if self.driver:
-            self.driver.close()
-            self.executor.shutdown(wait=True)
+            await self.driver.close()
+            self.driver = None
             logger.info('Neo4j service closed')
 
 
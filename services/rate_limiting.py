@@ -1,18 +1,219 @@
 """
-from __future__ import annotations
-
 Rate limiting service for AI features.
 Implements per-user daily limits for SMB users.
+
+Usage is counted in rolling 24h windows made of hourly counters held in
+Redis (or in process memory when Redis is unavailable). A check reads all
+counters with a single MGET instead of counting audit log rows, and the
+counters are periodically reconciled against the audit log, which stays the
+source of truth.
 """
 
+from __future__ import annotations
+
+import json
+import logging
+import time
 from datetime import datetime, timedelta, timezone
-from typing import Dict, Optional
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import redis.asyncio as redis
+from fastapi import HTTPException, status
+from sqlalchemy import and_, select
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_, func
-from database.user import User
+
 from database.rbac import AuditLog
-import json
-from fastapi import HTTPException, status
+from database.user import User
+
+logger = logging.getLogger(__name__)
+
+# Rolling window layout
+BUCKET_SECONDS = 3600
+WINDOW_BUCKETS = 24
+RECONCILE_INTERVAL_SECONDS = 900
+
+
+class UsageCounters:
+    """
+    Hourly usage counters per user and feature.
+
+    Each (user, feature, hour) is one integer key expiring after the window,
+    so memory is bounded by WINDOW_BUCKETS keys per active user and feature.
+    """
+
+    def __init__(
+        self,
+        redis_client: Optional[redis.Redis] = None,
+        key_prefix: str = "usage",
+        use_redis: bool = True,
+    ) -> None:
+        self.redis_client = redis_client
+        self.key_prefix = key_prefix
+        self.use_redis = use_redis
+        self._local: Dict[str, Tuple[int, float]] = {}
+
+    async def _get_redis(self) -> Optional[redis.Redis]:
+        if not self.use_redis:
+            return None
+        if self.redis_client is None:
+            try:
+                from database.redis_client import get_redis_client
+
+                self.redis_client = await get_redis_client()
+            except Exception as e:
+                logger.warning(f"Usage counters falling back to memory: {e}")
+        return self.redis_client
+
+    @staticmethod
+    def current_bucket(now: datetime) -> int:
+        """Index of the hourly bucket containing now."""
+        return int(now.timestamp() // BUCKET_SECONDS)
+
+    def _bucket_key(self, user_id: Any, feature: str, bucket: int) -> str:
+        return f"{self.key_prefix}:{user_id}:{feature}:{bucket}"
+
+    def _marker_key(self, user_id: Any) -> str:
+        return f"{self.key_prefix}:{user_id}:reconciled"
+
+    def _window_keys(self, user_id: Any, feature: str, now: datetime) -> List[str]:
+        """Bucket keys oldest first, ending with the current hour."""
+        current = self.current_bucket(now)
+        return [
+            self._bucket_key(user_id, feature, bucket)
+            for bucket in range(current - WINDOW_BUCKETS + 1, current + 1)
+        ]
+
+    async def get_counts(
+        self, user_id: Any, features: Iterable[str], now: datetime
+    ) -> Tuple[Dict[str, List[int]], bool]:
+        """
+        Read the hourly counts for several features in one round trip.
+
+        Returns:
+            Tuple of (counts per feature oldest bucket first, whether the
+            counters were reconciled within RECONCILE_INTERVAL_SECONDS)
+        """
+        features = list(features)
+        keys = [key for f in features for key in self._window_keys(user_id, f, now)]
+        keys.append(self._marker_key(user_id))
+
+        values = await self._mget(keys)
+
+        counts = {
+            feature: [
+                int(value or 0)
+                for value in values[i * WINDOW_BUCKETS:(i + 1) * WINDOW_BUCKETS]
+            ]
+            for i, feature in enumerate(features)
+        }
+        return counts, values[-1] is not None
+
+    async def increment(self, user_id: Any, feature: str, now: datetime) -> None:
+        """Count one use in the current hourly bucket."""
+        key = self._bucket_key(user_id, feature, self.current_bucket(now))
+        ttl = (WINDOW_BUCKETS + 1) * BUCKET_SECONDS
+
+        client = await self._get_redis()
+        if client is not None:
+            try:
+                pipe = client.pipeline(transaction=False)
+                pipe.incr(key)
+                pipe.expire(key, ttl)
+                await pipe.execute()
+                return
+            except redis.RedisError as e:
+                logger.warning(f"Usage counter increment failed, using memory: {e}")
+
+        count, _ = self._local_get(key) or (0, 0.0)
+        self._local[key] = (count + 1, time.time() + ttl)
+
+    async def replace(
+        self,
+        user_id: Any,
+        counts: Dict[str, Dict[int, int]],
+        now: datetime,
+        features: Iterable[str],
+    ) -> None:
+        """
+        Overwrite the window counters with authoritative counts.
+
+        Args:
+            user_id: User the counters belong to
+            counts: Per feature mapping of bucket index to count
+            now: Reference time for the window
+            features: Features to overwrite (missing buckets become zero)
+        """
+        current = self.current_bucket(now)
+        ttl = (WINDOW_BUCKETS + 1) * BUCKET_SECONDS
+        values: Dict[str, int] = {}
+        for feature in features:
+            feature_counts = counts.get(feature, {})
+            for bucket in range(current - WINDOW_BUCKETS + 1, current + 1):
+                values[self._bucket_key(user_id, feature, bucket)] = feature_counts.get(
+                    bucket, 0
+                )
+        marker = self._marker_key(user_id)
+
+        client = await self._get_redis()
+        if client is not None:
+            try:
+                pipe = client.pipeline(transaction=True)
+                for key, value in values.items():
+                    if value:
+                        pipe.set(key, value, ex=ttl)
+                    else:
+                        pipe.delete(key)
+                pipe.set(marker, int(now.timestamp()), ex=RECONCILE_INTERVAL_SECONDS)
+                await pipe.execute()
+                return
+            except redis.RedisError as e:
+                logger.warning(f"Usage counter reconcile failed, using memory: {e}")
+
+        expires_at = time.time() + ttl
+        for key, value in values.items():
+            if value:
+                self._local[key] = (value, expires_at)
+            else:
+                self._local.pop(key, None)
+        self._local[marker] = (
+            int(now.timestamp()),
+            time.time() + RECONCILE_INTERVAL_SECONDS,
+        )
+
+    async def clear(self, user_id: Any, features: Iterable[str], now: datetime) -> None:
+        """Drop the window counters and reconcile marker for a user."""
+        keys = [key for f in features for key in self._window_keys(user_id, f, now)]
+        keys.append(self._marker_key(user_id))
+
+        client = await self._get_redis()
+        if client is not None:
+            try:
+                await client.delete(*keys)
+            except redis.RedisError as e:
+                logger.warning(f"Usage counter clear failed: {e}")
+        for key in keys:
+            self._local.pop(key, None)
+
+    async def _mget(self, keys: List[str]) -> List[Optional[Any]]:
+        client = await self._get_redis()
+        if client is not None:
+            try:
+                return await client.mget(keys)
+            except redis.RedisError as e:
+                logger.warning(f"Usage counter read failed, using memory: {e}")
+
+        values = []
+        for key in keys:
+            entry = self._local_get(key)
+            values.append(entry[0] if entry else None)
+        return values
+
+    def _local_get(self, key: str) -> Optional[Tuple[int, float]]:
+        entry = self._local.get(key)
+        if entry is not None and entry[1] <= time.time():
+            del self._local[key]
+            return None
+        return entry
 
 
 class RateLimitService:
@@ -26,6 +227,30 @@ class RateLimitService:
         "ai_recommendation": {"daily": 15, "window": "24h"},
     }
 
+    counters = UsageCounters()
+
+    @staticmethod
+    def _seconds_until_release(counts: List[int], now: datetime) -> int:
+        """Seconds until the oldest non-empty bucket leaves the window."""
+        current = UsageCounters.current_bucket(now)
+        for offset, count in enumerate(counts):
+            if count:
+                bucket = current - WINDOW_BUCKETS + 1 + offset
+                release_at = (bucket + WINDOW_BUCKETS) * BUCKET_SECONDS
+                return max(0, int(release_at - now.timestamp()))
+        return 0
+
+    @classmethod
+    async def _load_counts(
+        cls, db: AsyncSession, user: User, features: List[str], now: datetime
+    ) -> Dict[str, List[int]]:
+        """Read window counters, reconciling first when they are stale."""
+        counts, reconciled = await cls.counters.get_counts(user.id, features, now)
+        if not reconciled:
+            await cls.reconcile_usage(db, user, now)
+            counts, _ = await cls.counters.get_counts(user.id, features, now)
+        return counts
+
     @classmethod
     async def check_rate_limit(
         cls, db: AsyncSession, user: User, feature: str, check_only: bool = False
@@ -52,52 +277,19 @@ class RateLimitService:
         limit_config = cls.LIMITS[feature]
         daily_limit = limit_config["daily"]
 
-        # Calculate time window (last 24 hours)
+        # Sum the hourly counters of the rolling 24h window
         now = datetime.now(timezone.utc)
-        window_start = now - timedelta(hours=24)
-
-        # Count usage in the window from audit logs
-        stmt = select(func.count(AuditLog.id)).where(
-            and_(
-                AuditLog.user_id == user.id,
-                AuditLog.action == f"{feature}_request",
-                AuditLog.timestamp >= window_start,
-            ),
-        )
-
-        result = await db.execute(stmt)
-        usage_count = result.scalar() or 0
+        counts = (await cls._load_counts(db, user, [feature], now))[feature]
+        usage_count = sum(counts)
 
         remaining = daily_limit - usage_count
         allowed = usage_count < daily_limit
 
-        # Calculate reset time
-        reset_time = window_start + timedelta(hours=24)
+        # Calculate reset time (when the oldest counted usage expires)
+        reset_in_seconds = cls._seconds_until_release(counts, now)
+        reset_time = now + timedelta(seconds=reset_in_seconds)
 
         if not allowed and not check_only:
-            # Calculate when the oldest request will expire
-            oldest_stmt = (
-                select(AuditLog.timestamp)
-                .where(
-                    and_(
-                        AuditLog.user_id == user.id,
-                        AuditLog.action == f"{feature}_request",
-                        AuditLog.timestamp >= window_start,
-                    ),
-                )
-                .order_by(AuditLog.timestamp)
-                .limit(1),
-            )
-
-            oldest_result = await db.execute(oldest_stmt)
-            oldest_request = oldest_result.scalar()
-
-            if oldest_request:
-                reset_time = oldest_request + timedelta(hours=24)
-                reset_in_seconds = int((reset_time - now).total_seconds())
-            else:
-                reset_in_seconds = 0
-
             raise HTTPException(
                 status_code=status.HTTP_429_TOO_MANY_REQUESTS,
                 detail={
@@ -152,6 +344,8 @@ class RateLimitService:
         db.add(audit_entry)
         await db.commit()
 
+        await cls.counters.increment(user.id, feature, audit_entry.timestamp)
+
     @classmethod
     async def get_usage_stats(cls, db: AsyncSession, user: User) -> Dict[str, any]:
         """
@@ -166,26 +360,19 @@ class RateLimitService:
         """
         stats = {}
         now = datetime.now(timezone.utc)
-        window_start = now - timedelta(hours=24)
+        features = list(cls.LIMITS)
+        counts = await cls._load_counts(db, user, features, now)
 
         for feature, config in cls.LIMITS.items():
-            # Count usage for this feature
-            stmt = select(func.count(AuditLog.id)).where(
-                and_(
-                    AuditLog.user_id == user.id,
-                    AuditLog.action == f"{feature}_request",
-                    AuditLog.timestamp >= window_start,
-                ),
-            )
-
-            result = await db.execute(stmt)
-            usage_count = result.scalar() or 0
+            usage_count = sum(counts[feature])
 
             stats[feature] = {
                 "limit": config["daily"],
                 "used": usage_count,
                 "remaining": config["daily"] - usage_count,
                 "window": config["window"],
+                "reset_time": now
+                + timedelta(seconds=cls._seconds_until_release(counts[feature], now)),
                 "percentage_used": (
                     round((usage_count / config["daily"]) * 100, 1)
                     if config["daily"] > 0
@@ -244,3 +431,53 @@ class RateLimitService:
             await db.delete(entry)
 
         await db.commit()
+
+        await cls.counters.clear(user.id, list(cls.LIMITS), datetime.now(timezone.utc))
+
+    @classmethod
+    async def reconcile_usage(
+        cls, db: AsyncSession, user: User, now: Optional[datetime] = None
+    ) -> Dict[str, int]:
+        """
+        Rebuild a user's window counters from the audit log.
+
+        Runs automatically when a check finds no recent reconciliation,
+        so counters recover from Redis restarts and drift.
+
+        Args:
+            db: Database session
+            user: User whose counters are rebuilt
+            now: Reference time (defaults to current UTC time)
+
+        Returns:
+            Dict of feature to usage count in the window
+        """
+        now = now or datetime.now(timezone.utc)
+        first_bucket = UsageCounters.current_bucket(now) - WINDOW_BUCKETS + 1
+        window_start = datetime.fromtimestamp(
+            first_bucket * BUCKET_SECONDS, tz=timezone.utc
+        )
+        actions = {f"{feature}_request": feature for feature in cls.LIMITS}
+
+        stmt = select(AuditLog.action, AuditLog.timestamp).where(
+            and_(
+                AuditLog.user_id == user.id,
+                AuditLog.action.in_(list(actions)),
+                AuditLog.timestamp >= window_start,
+            ),
+        )
+        result = await db.execute(stmt)
+
+        counts: Dict[str, Dict[int, int]] = {}
+        for action, timestamp in result.all():
+            if timestamp.tzinfo is None:
+                timestamp = timestamp.replace(tzinfo=timezone.utc)
+            bucket = UsageCounters.current_bucket(timestamp)
+            feature_counts = counts.setdefault(actions[action], {})
+            feature_counts[bucket] = feature_counts.get(bucket, 0) + 1
+
+        await cls.counters.replace(user.id, counts, now, cls.LIMITS)
+
+        return {
+            feature: sum(counts.get(feature, {}).values()) for feature in cls.LIMITS
+        }
@@ -4,11 +4,11 @@ Implements circuit breaker pattern for Redis with fallback strategies
 """
 import asyncio
 import time
-from typing import Optional, Any, Dict
+from typing import Optional, Any, Dict, List
 from enum import Enum
 from collections import OrderedDict
 import redis.asyncio as redis
-from redis.exceptions import RedisError, ConnectionError, TimeoutError
+from redis.exceptions import RedisError, ConnectionError, TimeoutError, ResponseError
 import logging
 from config.security_settings import get_security_settings, RedisFailureStrategy
 import contextlib
@@ -108,6 +108,9 @@ class RedisCircuitBreaker:
             ttl=self.redis_config.local_cache_ttl
         ) if self.redis_config.enable_local_cache else None
 
+        # Registered Lua scripts (EVALSHA with automatic SCRIPT LOAD)
+        self._scripts: Dict[str, Any] = {}
+
         # Health check task
         self.health_check_task: Optional[asyncio.Task] = None
 
@@ -338,6 +341,54 @@ class RedisCircuitBreaker:
 
         return False
 
+    async def eval_script(
+        self,
+        script_source: str,
+        keys: List[str],
+        args: List[Any]
+    ) -> Optional[Any]:
+        """
+        Run a Lua script atomically with circuit breaker protection.
+
+        Scripts are registered once per source and invoked with EVALSHA,
+        falling back to SCRIPT LOAD when the server has not cached them.
+        Returns None when Redis is unavailable so callers can fall back to
+        local state; there is no local-cache equivalent for scripts.
+        Server-side errors (ResponseError) are re-raised and do not count
+        towards tripping the circuit.
+        """
+        if not self._should_allow_request():
+            if self.failure_strategy == RedisFailureStrategy.FAIL_CLOSED:
+                raise RedisError("Circuit breaker open - Redis unavailable")
+            return None
+
+        try:
+            if self.redis_client and self.state != CircuitState.OPEN:
+                script = self._scripts.get(script_source)
+                if script is None:
+                    script = self.redis_client.register_script(script_source)
+                    self._scripts[script_source] = script
+
+                result = await script(keys=keys, args=args)
+
+                # Record success in half-open state
+                if self.state == CircuitState.HALF_OPEN:
+                    self.half_open_success_count += 1
+                    if self.half_open_success_count >= self.half_open_requests:
+                        self._close_circuit()
+
+                return result
+
+        except ResponseError:
+            # The server answered (e.g. WRONGTYPE or a script error), so Redis
+            # is healthy; let the caller handle it without tripping the breaker
+            raise
+        except (ConnectionError, TimeoutError, RedisError) as e:
+            logger.warning(f"Redis script execution failed: {e}")
+            self._record_failure()
+
+        return None
+
     def get_status(self) -> Dict[str, Any]:
         """Get circuit breaker status"""
         return {
@@ -0,0 +1,118 @@
+"""
+Reconnecting Redis Pub/Sub Subscriber
+
+One long-lived subscription shared by the cross-worker channels (the L1
+cache invalidation bus and the WebSocket topic relay):
+
+- A background task subscribes, hands every message to a callback and, when
+  the connection drops, resubscribes with exponential backoff
+- The channel list is re-read on every (re)subscribe, so channels added
+  while disconnected are picked up
+- The owner is told when the subscription goes up or down, and start()
+  waits for the first subscribe attempt so callers know the initial state
+"""
+
+import asyncio
+import contextlib
+import logging
+from typing import Any, Awaitable, Callable, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+# Subscriber Constants
+RECONNECT_BACKOFF_BASE = 0.5  # Seconds, doubled per failed attempt
+RECONNECT_BACKOFF_MAX = 30.0
+START_TIMEOUT = 5.0  # Seconds start() waits for the first subscribe attempt
+
+ChannelSource = Callable[[], Iterable[str]]
+MessageCallback = Callable[[Any, Any], Awaitable[None]]
+StateCallback = Callable[[bool], Awaitable[None]]
+
+
+class ReconnectingSubscriber:
+    """Redis pub/sub subscription that resubscribes with backoff after a drop"""
+
+    def __init__(
+        self,
+        redis_client: Any,
+        channels: ChannelSource,
+        on_message: MessageCallback,
+        on_state_change: Optional[StateCallback] = None,
+        name: str = "Redis subscription",
+    ) -> None:
+        """
+        Args:
+            redis_client: Async Redis client with pubsub()
+            channels: Returns the channels to subscribe to on each connect
+            on_message: Called with (channel, data) for every message
+            on_state_change: Called with the new state when connected changes
+            name: Used in log messages
+        """
+        self.redis = redis_client
+        self.channels = channels
+        self.on_message = on_message
+        self.on_state_change = on_state_change
+        self.name = name
+
+        self.connected = False
+        self.pubsub: Any = None
+        self._listener: Optional[asyncio.Task] = None
+        self._first_attempt = asyncio.Event()
+
+    async def start(self) -> None:
+        """Start the subscriber and wait for its first subscribe attempt"""
+        if self._listener is None:
+            self._listener = asyncio.create_task(self._listen())
+        try:
+            await asyncio.wait_for(self._first_attempt.wait(), timeout=START_TIMEOUT)
+        except asyncio.TimeoutError:
+            logger.warning("%s did not subscribe in time", self.name)
+
+    async def stop(self) -> None:
+        """Stop the subscriber"""
+        if self._listener is not None:
+            self._listener.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._listener
+            self._listener = None
+        self.connected = False
+
+    async def _listen(self) -> None:
+        attempt = 0
+        while True:
+            pubsub = None
+            try:
+                pubsub = self.redis.pubsub()
+                await pubsub.subscribe(*self.channels())
+                self.pubsub = pubsub
+                attempt = 0
+                await self._set_connected(True)
+                self._first_attempt.set()
+
+                async for message in pubsub.listen():
+                    if message.get("type") == "message":
+                        await self.on_message(message.get("channel"), message.get("data"))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("%s disconnected: %s", self.name, e)
+            finally:
+                self.pubsub = None
+                if pubsub is not None:
+                    try:
+                        await pubsub.aclose()
+                    except Exception as e:
+                        logger.debug("Closing %s failed: %s", self.name, e)
+
+            self._first_attempt.set()
+            await self._set_connected(False)
+            delay = min(RECONNECT_BACKOFF_BASE * 2 ** attempt, RECONNECT_BACKOFF_MAX)
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    async def _set_connected(self, connected: bool) -> None:
+        if connected == self.connected:
+            return
+        self.connected = connected
+        if self.on_state_change is not None:
+            await self.on_state_change(connected)
@@ -0,0 +1,282 @@
+"""
+WebSocket Fan-out Primitives
+
+Building blocks for broadcasting one message to thousands of WebSocket
+connections without a slow client stalling everyone else:
+
+- ConnectionOutbox gives every connection a bounded send queue drained by
+  its own sender task, so sends to different clients run concurrently and a
+  broadcast only enqueues the already-serialized text
+- A full queue drops its oldest message; a client that keeps overflowing
+  or whose send exceeds the send timeout is evicted
+- TopicRelay carries topic messages between instances over Redis pub/sub,
+  one channel per topic. An instance only subscribes to topics it has local
+  subscribers for, so PUBSUB NUMSUB tells a publisher whether anyone,
+  anywhere, is listening, and a Redis lease elects one instance to run each
+  periodic producer
+"""
+
+import asyncio
+import contextlib
+import logging
+import uuid
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, Set
+
+from redis.exceptions import RedisError
+
+from services.redis_pubsub import ReconnectingSubscriber
+
+logger = logging.getLogger(__name__)
+
+# Outbox Constants
+DEFAULT_QUEUE_SIZE = 64  # Messages buffered per connection before the oldest is dropped
+DEFAULT_SEND_TIMEOUT = 5.0  # Seconds one send may take before the client is evicted
+DEFAULT_MAX_DROPPED = 256  # Drops since the last successful send before the client is evicted
+
+# Relay Constants
+CHANNEL_PREFIX = 'ws:topic:'
+CONTROL_TOPIC = '__relay__'  # Always subscribed so the listener has a channel
+LEADER_KEY_PREFIX = 'ws:leader:'
+
+Sender = Callable[[str], Awaitable[None]]
+EvictHandler = Callable[[str, str], Awaitable[None]]
+RelayHandler = Callable[[str, str], Awaitable[None]]
+
+
+@dataclass
+class FanoutStats:
+    """Delivery counters shared by every outbox of a connection manager."""
+
+    messages_published: int = 0
+    messages_enqueued: int = 0
+    messages_sent: int = 0
+    messages_dropped: int = 0
+    send_failures: int = 0
+    evictions: int = 0
+    publishes_skipped: int = 0
+    relayed_out: int = 0
+    relayed_in: int = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert stats to dictionary."""
+        return {
+            'messages_published': self.messages_published,
+            'messages_enqueued': self.messages_enqueued,
+            'messages_sent': self.messages_sent,
+            'messages_dropped': self.messages_dropped,
+            'send_failures': self.send_failures,
+            'evictions': self.evictions,
+            'publishes_skipped': self.publishes_skipped,
+            'relayed_out': self.relayed_out,
+            'relayed_in': self.relayed_in,
+        }
+
+
+class ConnectionOutbox:
+    """Bounded, drop-oldest send queue with its own sender task."""
+
+    def __init__(
+        self,
+        connection_id: str,
+        send: Sender,
+        on_evict: EvictHandler,
+        *,
+        stats: Optional[FanoutStats] = None,
+        max_size: int = DEFAULT_QUEUE_SIZE,
+        send_timeout: float = DEFAULT_SEND_TIMEOUT,
+        max_dropped: int = DEFAULT_MAX_DROPPED,
+    ) -> None:
+        self.connection_id = connection_id
+        self.send = send
+        self.on_evict = on_evict
+        self.stats = stats or FanoutStats()
+        self.send_timeout = send_timeout
+        self.max_dropped = max_dropped
+
+        self.closed = False
+        self.evicted_reason: Optional[str] = None
+        self.dropped_since_send = 0
+        self._queue: Deque[str] = deque(maxlen=max_size)
+        self._sender: Optional[asyncio.Task] = None
+        self._evict_task: Optional[asyncio.Task] = None
+
+    @property
+    def depth(self) -> int:
+        """Messages waiting to be sent."""
+        return len(self._queue)
+
+    def put(self, text: str) -> bool:
+        """Queue serialized text; returns False if the outbox is closed."""
+        if self.closed:
+            return False
+        if len(self._queue) == self._queue.maxlen:
+            # deque(maxlen) discards the oldest entry on append
+            self.dropped_since_send += 1
+            self.stats.messages_dropped += 1
+            if self.dropped_since_send > self.max_dropped:
+                self._evict('queue overflow')
+                return False
+        self._queue.append(text)
+        self.stats.messages_enqueued += 1
+        if self._sender is None or self._sender.done():
+            self._sender = asyncio.get_running_loop().create_task(self._run())
+        return True
+
+    async def close(self) -> None:
+        """Stop sending; queued messages are discarded."""
+        self.closed = True
+        self._queue.clear()
+        sender, self._sender = self._sender, None
+        if sender is not None and sender is not asyncio.current_task() and not sender.done():
+            sender.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await sender
+
+    async def _run(self) -> None:
+        # Exits once the queue is empty; put() starts a new run when needed
+        while self._queue and not self.closed:
+            text = self._queue.popleft()
+            try:
+                await asyncio.wait_for(self.send(text), self.send_timeout)
+            except asyncio.TimeoutError:
+                self._evict('send timeout')
+                return
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.stats.send_failures += 1
+                self._evict(f'send failed: {e}')
+                return
+            self.stats.messages_sent += 1
+            self.dropped_since_send = 0
+
+    def _evict(self, reason: str) -> None:
+        if self.closed:
+            return
+        self.closed = True
+        self.evicted_reason = reason
+        self._queue.clear()
+        self.stats.evictions += 1
+        self._evict_task = asyncio.get_running_loop().create_task(
+            self.on_evict(self.connection_id, reason))
+
+
+class TopicRelay:
+    """Redis pub/sub relay carrying serialized topic messages between instances."""
+
+    def __init__(
+        self,
+        redis_client: Any,
+        on_message: RelayHandler,
+        stats: Optional[FanoutStats] = None,
+        channel_prefix: str = CHANNEL_PREFIX,
+    ) -> None:
+        self.redis = redis_client
+        self.on_message = on_message
+        self.stats = stats or FanoutStats()
+        self.channel_prefix = channel_prefix
+        self.source_id = uuid.uuid4().hex
+
+        self.topics: Set[str] = set()
+        self._subscriber = ReconnectingSubscriber(
+            redis_client,
+            channels=lambda: [self.channel(topic) for topic in {CONTROL_TOPIC, *self.topics}],
+            on_message=self._handle,
+            name='WebSocket topic relay',
+        )
+
+    @property
+    def connected(self) -> bool:
+        """Whether the topic channels are currently subscribed."""
+        return self._subscriber.connected
+
+    def channel(self, topic: str) -> str:
+        """Redis channel for a topic."""
+        return f'{self.channel_prefix}{topic}'
+
+    async def start(self) -> None:
+        """Start the subscriber and wait for its first subscribe attempt."""
+        await self._subscriber.start()
+
+    async def stop(self) -> None:
+        """Stop the subscriber."""
+        await self._subscriber.stop()
+
+    async def subscribe(self, topic: str) -> None:
+        """Receive a topic from other instances (first local subscriber)."""
+        self.topics.add(topic)
+        pubsub = self._subscriber.pubsub
+        if pubsub is not None and self.connected:
+            try:
+                await pubsub.subscribe(self.channel(topic))
+            except (RedisError, OSError) as e:
+                logger.warning('Failed to subscribe to topic %s: %s', topic, e)
+
+    async def unsubscribe(self, topic: str) -> None:
+        """Stop receiving a topic (last local subscriber left)."""
+        self.topics.discard(topic)
+        pubsub = self._subscriber.pubsub
+        if pubsub is not None and self.connected:
+            try:
+                await pubsub.unsubscribe(self.channel(topic))
+            except (RedisError, OSError) as e:
+                logger.warning('Failed to unsubscribe from topic %s: %s', topic, e)
+
+    async def publish(self, topic: str, text: str) -> None:
+        """Publish serialized text to the other instances."""
+        try:
+            await self.redis.publish(self.channel(topic), f'{self.source_id}\n{text}')
+            self.stats.relayed_out += 1
+        except (RedisError, OSError) as e:
+            logger.warning('Failed to relay topic %s: %s', topic, e)
+
+    async def remote_subscribers(self, topic: str) -> int:
+        """Instances other than this one subscribed to a topic."""
+        try:
+            counts = dict(await self.redis.pubsub_numsub(self.channel(topic)))
+        except (RedisError, OSError) as e:
+            logger.warning('Failed to count subscribers for topic %s: %s', topic, e)
+            # Unknown: assume someone is listening rather than go silent
+            return 1
+        count = next(iter(counts.values()), 0)
+        if topic in self.topics and self.connected:
+            count -= 1
+        return max(int(count), 0)
+
+    async def acquire_lease(self, name: str, ttl: int) -> bool:
+        """Hold a named lease so one instance runs a periodic producer."""
+        key = f'{LEADER_KEY_PREFIX}{name}'
+        try:
+            if await self.redis.set(key, self.source_id, nx=True, ex=ttl):
+                return True
+            holder = await self.redis.get(key)
+            if isinstance(holder, bytes):
+                holder = holder.decode()
+            if holder == self.source_id:
+                await self.redis.expire(key, ttl)
+                return True
+            return False
+        except (RedisError, OSError) as e:
+            # Without Redis every instance produces for its own clients
+            logger.warning('Failed to acquire lease %s: %s', name, e)
+            return True
+
+    async def _handle(self, channel: Any, data: Any) -> None:
+        if isinstance(channel, bytes):
+            channel = channel.decode()
+        if isinstance(data, bytes):
+            data = data.decode()
+        source, separator, text = (data or '').partition('\n')
+        if not separator:
+            logger.warning('Ignoring malformed WebSocket relay message')
+            return
+        if source == self.source_id:
+            return
+
+        self.stats.relayed_in += 1
+        try:
+            await self.on_message(channel[len(self.channel_prefix):], text)
+        except Exception:
+            logger.exception('WebSocket relay handler failed')
@@ -0,0 +1,180 @@
+"""
+Integration tests for cross-worker L1 cache coherence.
+
+Two CacheManager instances stand in for two uvicorn workers: each has its own
+L1 tier and both share one Redis (a fakeredis server acting as the broker).
+The tests measure the stale-read window on the second worker after the
+first one deletes a key, with and without the invalidation bus.
+"""
+
+import asyncio
+import time
+
+import pytest
+import pytest_asyncio
+
+from services.caching.cache_manager import CacheManager
+
+fakeredis = pytest.importorskip("fakeredis")
+
+STALE_WINDOW_LIMIT = 0.5  # seconds
+
+
+@pytest_asyncio.fixture
+async def redis_server():
+    return fakeredis.FakeServer()
+
+
+async def start_worker(redis_server, enable_bus=True):
+    manager = CacheManager(enable_invalidation_bus=enable_bus)
+    manager._redis = fakeredis.aioredis.FakeRedis(
+        server=redis_server, decode_responses=True
+    )
+    manager._redis_available = True
+    if enable_bus:
+        await manager.start_invalidation_bus()
+    manager._initialized = True
+    return manager
+
+
+async def stale_read_window(reader, key, timeout=2.0):
+    """Seconds until reader stops serving key from its L1 tier."""
+    start = time.perf_counter()
+    while time.perf_counter() - start < timeout:
+        if await reader._l1_cache.get(key) is None:
+            return time.perf_counter() - start
+        await asyncio.sleep(0.001)
+    return None
+
+
+@pytest.mark.integration
+class TestCacheInvalidationBus:
+    """L1 coherence across workers"""
+
+    @pytest.mark.asyncio
+    async def test_without_bus_other_worker_serves_stale(self, redis_server):
+        writer = await start_worker(redis_server, enable_bus=False)
+        reader = await start_worker(redis_server, enable_bus=False)
+        await writer.set("evidence:1", {"status": "draft"}, ttl=300)
+        assert await reader.get("evidence:1") == {"status": "draft"}
+
+        await writer.delete("evidence:1")
+
+        assert await stale_read_window(reader, "evidence:1", timeout=0.2) is None
+        assert await reader.get("evidence:1") == {"status": "draft"}
+
+    @pytest.mark.asyncio
+    async def test_delete_evicts_other_worker_l1(self, redis_server):
+        writer = await start_worker(redis_server)
+        reader = await start_worker(redis_server)
+        try:
+            await writer.set("evidence:1", {"status": "draft"}, ttl=300)
+            assert await reader.get("evidence:1") == {"status": "draft"}
+
+            await writer.delete("evidence:1")
+            window = await stale_read_window(reader, "evidence:1")
+
+            print(f"\nStale-read window with invalidation bus: {window * 1000:.1f}ms")
+            assert window is not None and window < STALE_WINDOW_LIMIT
+            assert await reader.get("evidence:1") is None
+        finally:
+            await writer.close()
+            await reader.close()
+
+    @pytest.mark.asyncio
+    async def test_pattern_and_tag_invalidation_propagate(self, redis_server):
+        writer = await start_worker(redis_server)
+        reader = await start_worker(redis_server)
+        try:
+            await writer.set("db:user:1:profile", 1, ttl=300)
+            await writer.set("report:7", 2, ttl=300, tags=["company:7"])
+            await reader.get("db:user:1:profile")
+            await reader.get("report:7")
+
+            await writer.invalidate_db_entity("user", "1")
+            await writer.invalidate_tags(["company:7"])
+
+            assert await stale_read_window(reader, "db:user:1:profile") is not None
+            assert await stale_read_window(reader, "report:7") is not None
+        finally:
+            await writer.close()
+            await reader.close()
+
+    @pytest.mark.asyncio
+    async def test_tag_invalidation_evicts_values_promoted_from_l2(
+        self, redis_server
+    ):
+        writer = await start_worker(redis_server)
+        reader = await start_worker(redis_server)
+        try:
+            await writer.set("report:7", {"score": 1}, ttl=300, tags=["company:7"])
+            # The reader has never written the key; its L1 copy comes from L2
+            assert await reader.get("report:7") == {"score": 1}
+            entry = reader._l1_cache._shard_for("report:7").entries["report:7"]
+            assert entry.tags == ("company:7",)
+            assert entry.expires_at - time.time() <= reader.l1_promoted_ttl
+
+            await writer.invalidate_tags(["company:7"])
+
+            assert await stale_read_window(reader, "report:7") is not None
+            assert await reader.get("report:7") is None
+        finally:
+            await writer.close()
+            await reader.close()
+
+    @pytest.mark.asyncio
+    async def test_tag_invalidation_publishes_unlinked_keys(self, redis_server):
+        writer = await start_worker(redis_server)
+        reader = await start_worker(redis_server)
+        try:
+            await writer.set("report:8", 2, ttl=300, tags=["company:8"])
+            # Untagged L1 copy, e.g. promoted by an older release
+            await reader._l1_cache.set("report:8", 2, 300)
+
+            await writer.invalidate_tags(["company:8"])
+
+            assert await stale_read_window(reader, "report:8") is not None
+        finally:
+            await writer.close()
+            await reader.close()
+
+    @pytest.mark.asyncio
+    async def test_invalidations_are_coalesced(self, redis_server):
+        writer = await start_worker(redis_server)
+        reader = await start_worker(redis_server)
+        try:
+            # Keep the whole burst inside one flush window on slow machines
+            writer._bus.flush_interval = 10
+            for i in range(100):
+                await writer.delete(f"evidence:{i % 10}")
+            await writer._bus.flush()
+            await asyncio.sleep(0.05)
+
+            stats = writer.get_stats()["invalidation_bus"]
+            assert stats["messages_published"] == 1
+            assert stats["items_coalesced"] == 90
+            assert reader.get_stats()["invalidation_bus"]["messages_received"] == 1
+        finally:
+            await writer.close()
+            await reader.close()
+
+    @pytest.mark.asyncio
+    async def test_lost_subscription_bounds_l1_ttl(self, redis_server):
+        reader = await start_worker(redis_server)
+        try:
+            await reader.set("policy:1", "v1", ttl=300)
+
+            await reader._bus._subscriber._set_connected(False)
+
+            # Anything cached before the disconnect may have been invalidated
+            assert await reader._l1_cache.get("policy:1") is None
+            await reader.set("policy:2", "v2", ttl=300)
+            entry = reader._l1_cache._shard_for("policy:2").entries["policy:2"]
+            assert entry.expires_at - time.time() <= reader.l1_degraded_ttl
+
+            await reader._bus._subscriber._set_connected(True)
+            await reader.set("policy:3", "v3", ttl=300)
+            entry = reader._l1_cache._shard_for("policy:3").entries["policy:3"]
+            assert entry.expires_at - time.time() > reader.l1_degraded_ttl
+        finally:
+            await reader.close()
@@ -221,6 +221,11 @@ class MockPipeline:
         self.operations.append(("expire", key, seconds))
         return self
 
+    def hgetall(self, key: str):
+        """Queue hgetall operation."""
+        self.operations.append(("hgetall", key))
+        return self
+
     async def execute(self):
         """Execute all queued operations."""
         results = []
@@ -255,6 +260,9 @@ class MockPipeline:
                 _, key, seconds = op
                 await self.redis_client.expire(key, seconds)
                 results.append(True)
+            elif op[0] == "hgetall":
+                _, key = op
+                results.append(await self.redis_client.hgetall(key))
         return results
 
     def reset(self):
@@ -0,0 +1,156 @@
+"""
+Simulation of sequential (mSPRT) early stopping for A/B experiments.
+
+Synthetic two-variant experiments with normally distributed quality scores
+are checked after every pair of observations, the way record_metric looks
+at running statistics, up to the futility cap of MAX_SAMPLE_MULTIPLIER times
+the fixed-horizon sample size. Runs are vectorized with NumPy over the same
+statistic the framework uses, and a handful are replayed through
+ABTestingFramework.record_metric to check they stop at the same point.
+
+Reported per scenario:
+
+- null (no effect): how often the mSPRT falsely stops, against a t-test
+  peeked at after every observation
+- effects of 1x, 2x and 3x the minimum detectable effect: power and the
+  average sample size at stopping, against the fixed-horizon sample size
+"""
+
+import numpy as np
+import pytest
+
+from services.ai.ab_testing_framework import (
+    ABTestingFramework,
+    ExperimentConfig,
+    ExperimentMetricType,
+    ExperimentStatus,
+    ExperimentType,
+)
+from services.ai.ab_testing_sequential import (
+    BURN_IN_SAMPLE_SIZE,
+    MAX_SAMPLE_MULTIPLIER,
+    msprt_log_likelihood_ratio,
+)
+
+ALPHA = 0.05
+MIN_EFFECT_SIZE = 0.1
+NULL_RUNS = 2000
+ALTERNATIVE_RUNS = 1000
+BATCH = 250
+REPLAYED_RUNS = 5
+Z_CRITICAL = 1.959964  # Two-sided 5% normal quantile
+
+
+def make_framework():
+    framework = ABTestingFramework()
+    framework._schedule_coro = lambda coro: coro.close()
+    config = ExperimentConfig(
+        name="Sequential simulation",
+        description="Synthetic mSPRT simulation",
+        experiment_type=ExperimentType.AI_MODEL_COMPARISON,
+        metric_type=ExperimentMetricType.CONTINUOUS,
+        primary_metric="quality",
+        significance_level=ALPHA,
+        min_effect_size=MIN_EFFECT_SIZE,
+    )
+    experiment_id = framework.create_experiment(config)["experiment_id"]
+    framework.start_experiment(experiment_id)
+    return framework, experiment_id
+
+
+def running_moments(values, n):
+    """Running mean and sample variance along each row."""
+    mean = np.cumsum(values, axis=1) / n
+    variance = (np.cumsum(values * values, axis=1) - n * mean * mean) / np.maximum(n - 1, 1)
+    return mean, variance
+
+
+def simulate(control, treatment):
+    """
+    Sequential looks after every pair of observations.
+
+    Returns:
+        Tuple of (stopped for significance, pairs used, peeked t-test rejected)
+    """
+    n = np.arange(1, control.shape[1] + 1)
+    control_mean, control_var = running_moments(control, n)
+    treatment_mean, treatment_var = running_moments(treatment, n)
+    looks = slice(BURN_IN_SAMPLE_SIZE - 1, None)
+
+    difference = (treatment_mean - control_mean)[:, looks]
+    variance = ((control_var + treatment_var) / n)[:, looks]
+    # Mixing variance fixed at the first look, as SequentialTest does
+    tau2 = MIN_EFFECT_SIZE ** 2 * variance[:, :1] * n[BURN_IN_SAMPLE_SIZE - 1] / 2
+
+    crossed = msprt_log_likelihood_ratio(difference, variance, tau2) >= np.log(1 / ALPHA)
+    stopped = crossed.any(axis=1)
+    pairs = np.where(stopped, crossed.argmax(axis=1) + BURN_IN_SAMPLE_SIZE, control.shape[1])
+    peeked = (np.abs(difference) >= Z_CRITICAL * np.sqrt(variance)).any(axis=1)
+    return stopped, pairs, peeked
+
+
+def run_scenario(rng, effect, runs, max_pairs):
+    stopped, pairs, peeked = [], [], []
+    for _ in range(runs // BATCH):
+        control = rng.normal(0.0, 1.0, (BATCH, max_pairs))
+        treatment = rng.normal(effect, 1.0, (BATCH, max_pairs))
+        batch = simulate(control, treatment)
+        stopped.append(batch[0])
+        pairs.append(batch[1])
+        peeked.append(batch[2])
+    return np.concatenate(stopped), np.concatenate(pairs), np.concatenate(peeked)
+
+
+@pytest.mark.performance
+class TestSequentialSimulation:
+    """Type I error control and sample savings of mSPRT early stopping"""
+
+    def test_type_one_error_and_sample_savings(self):
+        framework, experiment_id = make_framework()
+        fixed_horizon = framework._calculate_sample_size(framework.experiments[experiment_id])
+        max_pairs = int(np.ceil(fixed_horizon * MAX_SAMPLE_MULTIPLIER))
+        rng = np.random.default_rng(25)
+
+        stopped, pairs, peeked = run_scenario(rng, 0.0, NULL_RUNS, max_pairs)
+        false_stop_rate, peeking_rate = stopped.mean(), peeked.mean()
+        lines = [
+            f"\nSynthetic runs, alpha={ALPHA}, minimum effect {MIN_EFFECT_SIZE} sd, "
+            f"fixed horizon {fixed_horizon} per variant, cap {max_pairs}",
+            f"  no effect ({NULL_RUNS} runs): mSPRT false stops {false_stop_rate:.1%}, "
+            f"t-test peeked every observation {peeking_rate:.1%}",
+        ]
+
+        savings = {}
+        for multiple in (1, 2, 3):
+            stopped, pairs, _peeked = run_scenario(rng, multiple * MIN_EFFECT_SIZE, ALTERNATIVE_RUNS, max_pairs)
+            savings[multiple] = 1 - pairs.mean() / fixed_horizon
+            lines.append(
+                f"  effect {multiple}x ({ALTERNATIVE_RUNS} runs): power {stopped.mean():.1%}, "
+                f"average {pairs.mean():.0f} per variant at stop ({pairs.mean() / fixed_horizon:.0%} of fixed horizon)"
+            )
+        print("\n".join(lines))
+
+        assert false_stop_rate <= ALPHA
+        assert peeking_rate > 3 * ALPHA
+        assert savings[2] > 0.5
+        assert savings[3] > savings[2] > savings[1]
+
+    def test_framework_stops_where_the_simulation_does(self):
+        rng = np.random.default_rng(26)
+        for _ in range(REPLAYED_RUNS):
+            control = rng.normal(0.0, 1.0, (1, 2000))
+            treatment = rng.normal(3 * MIN_EFFECT_SIZE, 1.0, (1, 2000))
+            stopped, pairs, _peeked = simulate(control, treatment)
+            assert stopped[0]
+
+            framework, experiment_id = make_framework()
+            for i, (a, b) in enumerate(zip(control[0], treatment[0])):
+                framework.record_metric(experiment_id, "control", f"user_{i}", a)
+                framework.record_metric(experiment_id, "treatment", f"user_{i}", b)
+                if framework.experiment_status[experiment_id] != ExperimentStatus.RUNNING:
+                    break
+
+            decision = framework.get_traffic_decision(experiment_id)
+            assert decision.winner == "treatment"
+            # record_metric also looks between the two observations of a pair
+            assert pairs[0] - 1 <= decision.sample_sizes["treatment"] <= pairs[0]
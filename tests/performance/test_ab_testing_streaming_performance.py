@@ -0,0 +1,138 @@
+"""
+Benchmark for A/B experiment analysis over 5M observations.
+
+A synthetic continuous-metric experiment (two variants, normally distributed
+quality scores) is loaded into the Parquet segment backend and summarized
+into running per-variant statistics. Three costs are measured:
+
+- analyze_experiment from the running statistics at 5M observations
+- rebuilding those statistics from the Parquet segments (what a restarted
+  process pays once)
+- the previous analysis path, which re-reads every ExperimentData object and
+  regroups it into NumPy arrays on each call. Holding 5M ExperimentData
+  objects does not fit a test machine, so it runs on LEGACY_OBSERVATIONS
+  and is extrapolated linearly for comparison.
+"""
+
+import time
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from services.ai.ab_testing_framework import (
+    ABTestingFramework,
+    ExperimentConfig,
+    ExperimentData,
+    ExperimentMetricType,
+    ExperimentType,
+    InMemoryStorageBackend,
+)
+from services.ai.ab_testing_stats import VariantStats
+
+OBSERVATIONS = 5_000_000
+CHUNK = 500_000
+LEGACY_OBSERVATIONS = 200_000
+VARIANTS = ["control", "treatment"]
+
+
+def make_framework(storage_backend):
+    framework = ABTestingFramework(storage_backend=storage_backend)
+    framework._schedule_coro = lambda coro: coro.close()
+    config = ExperimentConfig(
+        name="Prompt quality at scale",
+        description="Synthetic 5M observation benchmark",
+        experiment_type=ExperimentType.PROMPT_OPTIMIZATION,
+        metric_type=ExperimentMetricType.CONTINUOUS,
+        primary_metric="quality",
+        min_sample_size=1000,
+    )
+    experiment_id = framework.create_experiment(config)["experiment_id"]
+    framework.start_experiment(experiment_id)
+    return framework, experiment_id
+
+
+def synthetic_chunk(rng, size):
+    variants = rng.integers(0, 2, size)
+    values = rng.normal(0.70, 0.15, size) + variants * 0.002
+    return variants, values
+
+
+@pytest.mark.performance
+class TestABTestingStreamingPerformance:
+    """Analysis at 5M observations: running statistics vs regrouping raw data"""
+
+    def test_five_million_observations(self, tmp_path):
+        pa = pytest.importorskip("pyarrow")
+        from services.ai.ab_testing_storage import ParquetStorageBackend
+
+        backend = ParquetStorageBackend(str(tmp_path))
+        framework, experiment_id = make_framework(backend)
+        running = {variant: VariantStats() for variant in VARIANTS}
+        rng = np.random.default_rng(24)
+
+        start = time.perf_counter()
+        for _ in range(OBSERVATIONS // CHUNK):
+            variants, values = synthetic_chunk(rng, CHUNK)
+            for index, variant in enumerate(VARIANTS):
+                running[variant].merge(VariantStats.from_array(values[variants == index]))
+            backend.append_table(experiment_id, pa.table({
+                "variant": pa.DictionaryArray.from_arrays(variants.astype(np.int8), VARIANTS),
+                "value": values,
+                "value_type": pa.repeat("float", CHUNK),
+            }))
+        backend.flush()
+        ingest_s = time.perf_counter() - start
+        disk_mb = sum(path.stat().st_size for path in tmp_path.rglob("*.parquet")) / 1e6
+
+        # Cost of one record_metric's statistics update
+        summary = VariantStats()
+        sample = rng.normal(0.7, 0.15, 100_000).tolist()
+        start = time.perf_counter()
+        for value in sample:
+            summary.update(value)
+        update_us = (time.perf_counter() - start) / len(sample) * 1e6
+
+        framework.variant_stats[experiment_id] = running
+        start = time.perf_counter()
+        result = framework.analyze_experiment(experiment_id)
+        streaming_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        rebuilt = backend.variant_stats(experiment_id)
+        rebuild_ms = (time.perf_counter() - start) * 1000
+
+        legacy_storage = InMemoryStorageBackend()
+        legacy, legacy_id = make_framework(legacy_storage)
+        variants, values = synthetic_chunk(rng, LEGACY_OBSERVATIONS)
+        now = datetime.now()
+        for i, (variant, value) in enumerate(zip(variants.tolist(), values.tolist())):
+            legacy_storage.append(legacy_id, ExperimentData(
+                experiment_id=legacy_id, variant=VARIANTS[variant], user_id=f"user_{i}",
+                session_id=None, timestamp=now, primary_metric_value=value,
+            ))
+        start = time.perf_counter()
+        # analyze_experiment before running statistics
+        variant_data = legacy._group_data_by_variant(legacy_storage.query(legacy_id))
+        test_type = legacy._select_statistical_test(ExperimentMetricType.CONTINUOUS, variant_data)
+        legacy._execute_statistical_test(test_type, variant_data, legacy.experiments[legacy_id], 0.95)
+        legacy_ms = (time.perf_counter() - start) * 1000
+        legacy_extrapolated_ms = legacy_ms * OBSERVATIONS / LEGACY_OBSERVATIONS
+
+        print(
+            f"\n{OBSERVATIONS:,} observations, {backend.count(experiment_id):,} stored in "
+            f"{len(backend._load_segments(experiment_id))} segments ({disk_mb:.1f}MB), ingest {ingest_s:.1f}s\n"
+            f"  running stats: analyze_experiment {streaming_ms:.2f}ms ({result.test_name}), "
+            f"{update_us:.2f}us per record_metric update\n"
+            f"  rebuild from Parquet: {rebuild_ms:.0f}ms\n"
+            f"  regrouping raw data: {legacy_ms:.0f}ms at {LEGACY_OBSERVATIONS:,} observations, "
+            f"~{legacy_extrapolated_ms / 1000:.1f}s extrapolated to {OBSERVATIONS:,}"
+        )
+
+        assert backend.count(experiment_id) == OBSERVATIONS
+        assert sum(result.sample_sizes.values()) == OBSERVATIONS
+        for variant in VARIANTS:
+            assert rebuilt[variant].count == running[variant].count
+            assert rebuilt[variant].mean == pytest.approx(running[variant].mean)
+            assert rebuilt[variant].variance == pytest.approx(running[variant].variance)
+        assert streaming_ms * 10 < legacy_ms
@@ -0,0 +1,146 @@
+"""
+Event-loop latency under concurrent AgenticRAGSystem queries.
+
+Before: the search methods ran synchronous SQLAlchemy calls inside async
+functions, so every query blocked the loop for its full database round trip
+and hybrid search ran its two legs back to back. After: queries go through
+the async engine and the hybrid legs run concurrently.
+
+Both sides use fake engines with the same per-query latency. A ticker task
+measures how late the loop wakes it up while the queries run.
+"""
+
+import asyncio
+import statistics
+import time
+
+import pytest
+
+for module in ("openai", "mistralai", "supabase", "neo4j", "redis", "sqlalchemy"):
+    pytest.importorskip(module)
+
+from services.agentic_rag import AgenticRAGSystem  # noqa: E402
+
+CONCURRENT_QUERIES = 50
+QUERY_LATENCY = 0.02
+TICK_INTERVAL = 0.005
+EMBEDDING = [0.1] * 8
+
+
+def _rows(count=5):
+    return [(f"chunk_{i}", f"content {i}", {"section": "intro"}, "langgraph", "documentation", 0.9 - i * 0.1) for i in range(count)]
+
+
+class _Result:
+    def __init__(self, rows):
+        self._rows = rows
+
+    def fetchall(self):
+        return self._rows
+
+
+class BlockingConnection:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, statement, params=None):
+        time.sleep(QUERY_LATENCY)
+        return _Result(_rows())
+
+
+class BlockingEngine:
+    def connect(self):
+        return BlockingConnection()
+
+
+class AsyncConnection:
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, statement, params=None):
+        await asyncio.sleep(QUERY_LATENCY)
+        return _Result(_rows())
+
+
+class AsyncEngine:
+    def connect(self):
+        return AsyncConnection()
+
+
+def make_system():
+    system = AgenticRAGSystem.__new__(AgenticRAGSystem)
+    system.engine = BlockingEngine()
+    system.async_engine = AsyncEngine()
+    return system
+
+
+async def blocking_hybrid_search(system):
+    """The previous hybrid path: two sequential, loop-blocking queries."""
+    for _ in range(2):
+        with system.engine.connect() as conn:
+            conn.execute("SELECT ...", {}).fetchall()
+
+
+async def measure_loop_lag(queries):
+    lags = []
+    done = asyncio.Event()
+
+    async def ticker():
+        while not done.is_set():
+            start = time.perf_counter()
+            await asyncio.sleep(TICK_INTERVAL)
+            lags.append(time.perf_counter() - start - TICK_INTERVAL)
+
+    tick_task = asyncio.create_task(ticker())
+    await asyncio.sleep(0)
+    start = time.perf_counter()
+    await asyncio.gather(*queries)
+    elapsed = time.perf_counter() - start
+    done.set()
+    await tick_task
+    lags.sort()
+    return {
+        "elapsed_ms": elapsed * 1000,
+        "p50_lag_ms": statistics.median(lags) * 1000,
+        "max_lag_ms": lags[-1] * 1000,
+    }
+
+
+@pytest.mark.performance
+class TestAgenticRAGEventLoop:
+    """Loop responsiveness with the sync vs async search path"""
+
+    @pytest.mark.asyncio
+    async def test_async_search_keeps_loop_responsive(self):
+        system = make_system()
+
+        before = await measure_loop_lag([blocking_hybrid_search(system) for _ in range(CONCURRENT_QUERIES)])
+        after = await measure_loop_lag([
+            system._hybrid_search(EMBEDDING, "state graph", None, 5) for _ in range(CONCURRENT_QUERIES)
+        ])
+
+        print(
+            f"\n{CONCURRENT_QUERIES} concurrent hybrid queries: "
+            f"sync elapsed={before['elapsed_ms']:.0f}ms max lag={before['max_lag_ms']:.0f}ms | "
+            f"async elapsed={after['elapsed_ms']:.0f}ms max lag={after['max_lag_ms']:.1f}ms"
+        )
+
+        # Blocking path serializes every query on the loop thread
+        assert before["max_lag_ms"] >= CONCURRENT_QUERIES * 2 * QUERY_LATENCY * 1000 * 0.9
+        assert after["max_lag_ms"] < QUERY_LATENCY * 1000
+        assert after["elapsed_ms"] < before["elapsed_ms"] / 10
+
+    @pytest.mark.asyncio
+    async def test_hybrid_search_merges_both_legs(self):
+        system = make_system()
+
+        results = await system._hybrid_search(EMBEDDING, "state graph", "langgraph", 3)
+
+        assert [r["id"] for r in results] == ["chunk_0", "chunk_1", "chunk_2"]
+        assert results[0]["metadata"] == {"section": "intro"}
@@ -0,0 +1,128 @@
+"""
+Benchmark for the L2 cache value codec.
+
+Compares the legacy JSON text encoding with the msgpack + zstd codec on
+payloads shaped like what the cache actually holds: AI assessment responses
+and evidence lists built from EvidenceItem columns. Reports stored bytes
+(including the base64 armor needed by the decode_responses=True client) and
+encode/decode time per value.
+"""
+
+import json
+import random
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+import pytest
+
+from services.caching.cache_codec import CacheCodec
+
+pytest.importorskip("msgpack")
+pytest.importorskip("zstandard")
+
+ITERATIONS = 200
+
+CONTROL_TEXT = (
+    "The organisation shall determine and provide the resources needed for "
+    "the establishment, implementation, maintenance and continual improvement "
+    "of the information security management system."
+)
+
+
+def evidence_list(count: int = 150):
+    rng = random.Random(7)
+    now = datetime(2025, 3, 1, tzinfo=timezone.utc)
+    user_id, profile_id, framework_id = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+    return [
+        {
+            "id": uuid.UUID(int=rng.getrandbits(128)),
+            "user_id": user_id,
+            "business_profile_id": profile_id,
+            "framework_id": framework_id,
+            "evidence_name": f"Access review record {i}",
+            "evidence_type": rng.choice(["document", "screenshot", "log_export"]),
+            "control_reference": f"A.{rng.randint(5, 18)}.{rng.randint(1, 30)}",
+            "description": CONTROL_TEXT,
+            "required_for_audit": True,
+            "collection_frequency": rng.choice(["once", "monthly", "quarterly"]),
+            "collection_method": "manual",
+            "status": rng.choice(["not_started", "in_progress", "collected", "approved"]),
+            "collected_at": now - timedelta(days=rng.randint(0, 365)),
+            "priority": rng.choice(["low", "medium", "high"]),
+            "effort_estimate": "2-4 hours",
+            "compliance_score_impact": Decimal(f"{rng.uniform(0, 5):.2f}"),
+            "ai_metadata": {"confidence": rng.random(), "model": "gemini-2.5-flash"},
+        }
+        for i in range(count)
+    ]
+
+
+def ai_response():
+    rng = random.Random(11)
+    return {
+        "request_id": uuid.uuid4(),
+        "framework": "ISO27001",
+        "generated_at": datetime(2025, 3, 1, 9, 15, tzinfo=timezone.utc),
+        "overall_score": Decimal("72.40"),
+        "summary": " ".join([CONTROL_TEXT] * 4),
+        "gaps": [
+            {
+                "control": f"A.{rng.randint(5, 18)}.{rng.randint(1, 30)}",
+                "severity": rng.choice(["low", "medium", "high", "critical"]),
+                "finding": CONTROL_TEXT,
+                "recommendation": "Document the process, assign an owner and "
+                                  "schedule a quarterly review.",
+                "estimated_effort_hours": rng.randint(1, 40),
+            }
+            for _ in range(40)
+        ],
+        "usage": {"input_tokens": 5123, "output_tokens": 2210, "cost": Decimal("0.0123")},
+    }
+
+
+FIXTURES = {
+    "ai_response": ("compute:assessment", ai_response),
+    "evidence_list": ("cache:evidence:list", evidence_list),
+}
+
+
+def _time_per_call(func, *args, **kwargs) -> float:
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        func(*args, **kwargs)
+    return (time.perf_counter() - start) / ITERATIONS * 1e6
+
+
+@pytest.mark.performance
+class TestCacheCodecPerformance:
+    """Stored bytes and codec speed against the legacy JSON encoding"""
+
+    @pytest.mark.parametrize("fixture", sorted(FIXTURES))
+    def test_bytes_and_speed(self, fixture):
+        key, build = FIXTURES[fixture]
+        value = build()
+        codec = CacheCodec()
+        binary_codec = CacheCodec(text_safe=False)
+
+        legacy = json.dumps(value, default=str)
+        framed = codec.encode(value, key)
+        binary = binary_codec.encode(value, key)
+
+        legacy_bytes = len(legacy.encode())
+        framed_bytes = len(framed.encode())
+        json_encode = _time_per_call(json.dumps, value, default=str)
+        json_decode = _time_per_call(json.loads, legacy)
+        codec_encode = _time_per_call(codec.encode, value, key)
+        codec_decode = _time_per_call(codec.decode, framed)
+
+        print(
+            f"\n{fixture}: JSON {legacy_bytes:,}B -> codec {framed_bytes:,}B "
+            f"({framed_bytes / legacy_bytes:.1%}, binary client {len(binary):,}B); "
+            f"encode {json_encode:.0f}us -> {codec_encode:.0f}us, "
+            f"decode {json_decode:.0f}us -> {codec_decode:.0f}us"
+        )
+
+        assert codec.decode(framed) == value
+        assert framed_bytes < legacy_bytes / 3
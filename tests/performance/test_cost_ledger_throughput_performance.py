@@ -0,0 +1,170 @@
+"""
+Throughput benchmark for the AI usage ledger.
+
+Drives CostTrackingService.track_usage at 2k calls/sec, open loop, for a
+realistic mix of services, models and users, and compares the ledger with
+the previous design, which made three Redis round trips per call (HSET and
+EXPIRE of a per-request hash, then a ~20 command counter pipeline) on the
+request path. Redis is the repo's MockRedis with a fixed round-trip latency
+added to every command or pipeline execute, so the numbers show what the
+request path waits for and how many commands reach Redis, not Redis
+server throughput.
+"""
+
+import asyncio
+import random
+import statistics
+import time
+
+import pytest
+
+from services.ai.cost_ledger import usage_counter_keys
+from services.ai.cost_management import CostTrackingService
+from tests.mocks.mock_redis import MockPipeline, MockRedis
+
+CALLS_PER_SECOND = 2000
+DURATION_SECONDS = 1.0
+TICK = 0.01  # Calls are released in bursts every TICK seconds
+ROUND_TRIP = 0.0005
+
+SERVICES = ["policy_generation", "assessment_analysis", "chat", "evidence_review"]
+MODELS = ["gemini-2.5-flash", "gemini-2.5-pro", "gpt-4o"]
+
+
+class LatencyRedis(MockRedis):
+    """MockRedis where every round trip costs ROUND_TRIP seconds."""
+
+    def __init__(self):
+        super().__init__()
+        self.round_trips = 0
+        self.commands = 0
+
+    async def _round_trip(self, commands=1):
+        self.round_trips += 1
+        self.commands += commands
+        await asyncio.sleep(ROUND_TRIP)
+
+    async def hset(self, key, mapping=None, **kwargs):
+        await self._round_trip()
+        return await super().hset(key, mapping, **kwargs)
+
+    async def expire(self, key, seconds):
+        await self._round_trip()
+        return await super().expire(key, seconds)
+
+    def pipeline(self):
+        redis = self
+
+        class Pipeline(MockPipeline):
+            async def execute(self):
+                await redis._round_trip(len(self.operations))
+                # Apply the queued commands without charging them again
+                self.redis_client = MockRedisView(redis)
+                return await super().execute()
+
+        return Pipeline(self)
+
+
+class MockRedisView(MockRedis):
+    """Latency-free access to a LatencyRedis keyspace for pipeline execution."""
+
+    def __init__(self, redis):
+        self.data = redis.data
+        self.expires = redis.expires
+
+
+async def discard_records(records):
+    """Postgres stand-in; the benchmark measures the Redis side."""
+
+
+async def legacy_store_usage(redis, usage):
+    """The per-call writes that track_usage made before the ledger."""
+    usage_id = usage.request_id
+    await redis.hset(f"ai_usage:record:{usage_id}", mapping={"service_name": usage.service_name})
+    await redis.expire(f"ai_usage:record:{usage_id}", 86400 * 30)
+    pipe = redis.pipeline()
+    for key, ttl in usage_counter_keys(usage):
+        pipe.hincrbyfloat(key, "total_cost", float(usage.cost_usd))
+        pipe.hincrby(key, "total_requests", 1)
+        pipe.hincrby(key, "total_tokens", usage.total_tokens)
+        pipe.expire(key, ttl)
+    await pipe.execute()
+
+
+async def drive(tracker, rng):
+    """Release CALLS_PER_SECOND track_usage calls per second; return latencies."""
+    latencies = []
+
+    async def call(i):
+        start = time.perf_counter()
+        await tracker.track_usage(
+            rng.choice(SERVICES),
+            rng.choice(MODELS),
+            rng.randint(200, 4000),
+            rng.randint(50, 1500),
+            user_id=f"user_{rng.randint(1, 50)}",
+            request_id=f"req-{i}",
+        )
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    per_tick = int(CALLS_PER_SECOND * TICK)
+    tasks = []
+    start = time.perf_counter()
+    for tick in range(int(DURATION_SECONDS / TICK)):
+        tasks.extend(asyncio.create_task(call(tick * per_tick + n)) for n in range(per_tick))
+        await asyncio.sleep(max(0.0, start + (tick + 1) * TICK - time.perf_counter()))
+    await asyncio.gather(*tasks)
+    return latencies, time.perf_counter() - start
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def summary(label, latencies, elapsed, redis):
+    return (
+        f"  {label}: {len(latencies) / elapsed:.0f} calls/s, track_usage p50={statistics.median(latencies):.2f}ms "
+        f"p95={percentile(latencies, 0.95):.2f}ms, {redis.round_trips} round trips, {redis.commands} commands"
+    )
+
+
+@pytest.mark.performance
+class TestCostLedgerThroughputPerformance:
+    """track_usage at 2k calls/sec: ledger vs per-call Redis writes"""
+
+    @pytest.mark.asyncio
+    async def test_two_thousand_calls_per_second(self, monkeypatch):
+        legacy_redis = LatencyRedis()
+        legacy = CostTrackingService(redis_client=legacy_redis, record_writer=discard_records)
+
+        async def legacy_record(usage):
+            await legacy_store_usage(legacy_redis, usage)
+
+        monkeypatch.setattr(legacy.ledger, "record", legacy_record)
+        legacy_latencies, legacy_elapsed = await drive(legacy, random.Random(21))
+
+        ledger_redis = LatencyRedis()
+        tracker = CostTrackingService(redis_client=ledger_redis, record_writer=discard_records)
+        latencies, elapsed = await drive(tracker, random.Random(21))
+        await tracker.close()
+
+        stats = tracker.get_ledger_stats()
+        print(
+            f"\n{int(CALLS_PER_SECOND * DURATION_SECONDS)} calls at {CALLS_PER_SECOND}/s, "
+            f"{ROUND_TRIP * 1000:.1f}ms Redis round trip:\n"
+            f"{summary('per-call writes', legacy_latencies, legacy_elapsed, legacy_redis)}\n"
+            f"{summary('ledger', latencies, elapsed, ledger_redis)}, "
+            f"{stats['batches_flushed']} batches, avg batch={stats['average_batch_size']:.0f}, "
+            f"max queue depth={stats['max_queue_depth']}"
+        )
+
+        calls = len(latencies)
+        assert stats["records_flushed"] == calls
+        # Same counters either way
+        daily_key = next(key for key in ledger_redis.data if key.startswith("ai_usage:daily:"))
+        assert int(ledger_redis.data[daily_key]["total_requests"]) == calls
+        assert int(legacy_redis.data[daily_key]["total_requests"]) == calls
+        assert ledger_redis.round_trips * 100 < legacy_redis.round_trips
+        assert ledger_redis.commands * 5 < legacy_redis.commands
+        assert percentile(latencies, 0.95) < statistics.median(legacy_latencies)
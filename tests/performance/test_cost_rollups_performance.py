@@ -0,0 +1,108 @@
+"""
+Benchmark for 90-day AI cost trends served from daily rollups.
+
+Loads 90 days of usage for a mix of services and models through the usage
+ledger, then reads a 90-day trend with per-day service and model breakdowns
+two ways: the previous calculate_daily_costs loop (HGETALL of the daily
+hash, KEYS for the day's service and model hashes, one HGETALL per key) and
+CostTrackingService.get_cost_range over the rollup hashes. Redis is the
+throughput benchmark's LatencyRedis, with KEYS matched over the whole
+keyspace as the server does, so round trips and wall time are comparable.
+"""
+
+import fnmatch
+import random
+import time
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+import pytest
+
+from services.ai.cost_ledger import UsageLedger
+from services.ai.cost_management import AIUsageMetrics, CostTrackingService
+from tests.performance.test_cost_ledger_throughput_performance import MODELS, SERVICES, LatencyRedis
+
+TREND_DAYS = 90
+CALLS_PER_DAY = 200
+
+
+class ScanningRedis(LatencyRedis):
+    """LatencyRedis that also charges HGETALL and a full-keyspace KEYS."""
+
+    async def hgetall(self, key):
+        await self._round_trip()
+        return await super().hgetall(key)
+
+    async def keys(self, pattern="*"):
+        await self._round_trip()
+        return [key for key in self.data if fnmatch.fnmatchcase(key, pattern)]
+
+
+async def load_history(redis, today, rng):
+    ledger = UsageLedger(redis, None, flush_batch_size=1000, flush_interval=10)
+    for offset in range(TREND_DAYS):
+        day = today - timedelta(days=offset)
+        for _ in range(CALLS_PER_DAY):
+            await ledger.record(AIUsageMetrics(
+                service_name=rng.choice(SERVICES),
+                model_name=rng.choice(MODELS),
+                input_tokens=1000,
+                output_tokens=500,
+                total_tokens=1500,
+                request_count=1,
+                cost_usd=Decimal("0.002"),
+                timestamp=datetime.combine(day, datetime.min.time()) + timedelta(hours=rng.randint(0, 23)),
+                user_id=f"user_{rng.randint(1, 50)}",
+            ))
+    await ledger.close()
+
+
+async def legacy_daily_costs(redis, target_date):
+    """calculate_daily_costs before rollups (str keys, decode_responses=True)."""
+    daily = await redis.hgetall(f"ai_usage:daily:{target_date}")
+    breakdowns = {}
+    for dimension in ("service", "model"):
+        breakdown = breakdowns[dimension] = {}
+        for key in await redis.keys(f"ai_usage:{dimension}:*:{target_date}"):
+            data = await redis.hgetall(key)
+            breakdown[key.split(":")[2]] = int(data.get("total_requests", 0))
+    return int(daily.get("total_requests", 0)), breakdowns
+
+
+@pytest.mark.performance
+class TestCostRollupsPerformance:
+    """90-day trend: rollup range read vs per-day KEYS scans"""
+
+    @pytest.mark.asyncio
+    async def test_ninety_day_trend(self):
+        today = date.today()
+        redis = ScanningRedis()
+        await load_history(redis, today, random.Random(22))
+        tracker = CostTrackingService(redis_client=redis, record_writer=None, compacted_loader=None)
+
+        redis.round_trips = redis.commands = 0
+        start = time.perf_counter()
+        legacy = [await legacy_daily_costs(redis, today - timedelta(days=offset)) for offset in reversed(range(TREND_DAYS))]
+        legacy_ms = (time.perf_counter() - start) * 1000
+        legacy_round_trips = redis.round_trips
+
+        redis.round_trips = redis.commands = 0
+        start = time.perf_counter()
+        days = await tracker.get_cost_range(today - timedelta(days=TREND_DAYS - 1), today)
+        rollup_ms = (time.perf_counter() - start) * 1000
+        rollup_round_trips = redis.round_trips
+        await tracker.close()
+
+        print(
+            f"\n{TREND_DAYS}-day trend with breakdowns, {len(redis.data)} keys: "
+            f"KEYS scans {legacy_round_trips} round trips {legacy_ms:.1f}ms, "
+            f"rollups {rollup_round_trips} round trips ({redis.commands} commands) {rollup_ms:.1f}ms"
+        )
+
+        assert [day["total_requests"] for day in days] == [requests for requests, _ in legacy]
+        assert all(
+            {name: entry["requests"] for name, entry in day["service_breakdown"].items()} == breakdowns["service"]
+            for day, (_, breakdowns) in zip(days, legacy)
+        )
+        assert rollup_round_trips < 10
+        assert legacy_round_trips > 10 * rollup_round_trips
@@ -0,0 +1,249 @@
+"""
+Benchmark for full-text backed GraphRAG local retrieval.
+
+Builds a synthetic compliance graph of 100k requirements spread over 200
+regulations and runs a set of local queries through GraphRAGRetriever with
+the full-text path and with the CONTAINS fallback, reporting p50/p95
+latency and hit counts for each.
+
+By default the graph lives in an embedded stand-in: the CONTAINS query
+lowercases and substring-matches every Regulation-Requirement pair, as the
+Neo4j planner does without a usable index, and the full-text query looks
+terms up in an inverted index scored by summed IDF, as Lucene does. Set
+NEO4J_BENCHMARK_URI (plus NEO4J_BENCHMARK_USER / NEO4J_BENCHMARK_PASSWORD)
+to also run against a disposable Neo4j instance; the benchmark creates the
+schema through Neo4jGraphRAGService, loads the same graph and deletes it
+afterwards.
+"""
+
+import math
+import os
+import random
+import statistics
+import time
+from collections import defaultdict
+
+import pytest
+
+pytest.importorskip("langchain_openai")
+
+from services.graphrag_retriever import (
+    LOCAL_CONTAINS_QUERY,
+    LOCAL_FULLTEXT_QUERY,
+    GraphRAGRetriever,
+    fulltext_search_terms,
+)
+
+REQUIREMENTS = 100_000
+REGULATIONS = 200
+WORDS_PER_REQUIREMENT = 14
+ROUNDS = 5
+
+DOMAIN_WORDS = [
+    "breach", "notification", "retention", "encryption", "access", "review", "consent",
+    "processor", "controller", "transfer", "incident", "reporting", "vendor", "risk",
+    "assessment", "audit", "logging", "erasure", "portability", "marketing",
+    "cardholder", "vulnerability", "scan", "authentication", "backup", "resilience",
+    "outsourcing", "sanctions", "screening", "customer", "diligence", "record",
+]
+# Filler vocabulary so term frequencies follow a realistic long tail
+FILLER_WORDS = [f"term{i}" for i in range(3000)]
+
+QUERIES = [
+    "GDPR Article 33 breach notification requirement",
+    "Which control for encryption at rest applies to cardholder data?",
+    "Specific requirement for vendor risk assessment",
+    "Article 17 erasure requirement",
+    "Requirement for quarterly vulnerability scan",
+    "Customer due diligence and sanctions screening requirement",
+    "Section 5 incident reporting",
+    "Requirement for multi factor authentication",
+]
+
+
+def build_graph(rng):
+    regulations = [
+        {"name": f"REG-{i:03d} {rng.choice(['Data Protection', 'Payments', 'Resilience', 'AML'])} Act", "jurisdiction": rng.choice(["UK", "EU", "US"])}
+        for i in range(REGULATIONS)
+    ]
+    requirements = []
+    for i in range(REQUIREMENTS):
+        words = [rng.choice(DOMAIN_WORDS) if rng.random() < 0.3 else rng.choice(FILLER_WORDS) for _ in range(WORDS_PER_REQUIREMENT)]
+        if rng.random() < 0.1:
+            words[:0] = ["Article", str(rng.randint(1, 99))]
+        requirements.append(
+            {
+                "id": f"REQ-{i:06d}",
+                "description": " ".join(words),
+                "regulation": i % REGULATIONS,
+            }
+        )
+    return regulations, requirements
+
+
+class InvertedIndex:
+    """Term -> node postings with IDF scoring, standing in for a Lucene index."""
+
+    def __init__(self, texts):
+        self.postings = defaultdict(list)
+        for node_id, text in enumerate(texts):
+            for term in set(fulltext_search_terms(text)):
+                self.postings[term].append(node_id)
+        self.size = len(texts)
+
+    def query(self, search):
+        scores = defaultdict(float)
+        for term in search.split():
+            postings = self.postings.get(term, ())
+            if postings:
+                idf = math.log(1.0 + self.size / len(postings))
+                for node_id in postings:
+                    scores[node_id] += idf
+        return scores
+
+
+class EmbeddedGraphService:
+    """Answers the two local retrieval queries over an in-memory graph."""
+
+    def __init__(self, regulations, requirements):
+        self.regulations = regulations
+        self.requirements = requirements
+        self.regulation_index = InvertedIndex([r["name"] for r in regulations])
+        self.requirement_index = InvertedIndex([req["description"] for req in requirements])
+        self.by_regulation = defaultdict(list)
+        for req_id, req in enumerate(requirements):
+            self.by_regulation[req["regulation"]].append(req_id)
+
+    def _record(self, req_id, score=None):
+        req = self.requirements[req_id]
+        regulation = self.regulations[req["regulation"]]
+        requirement = {"id": req["id"], "description": req["description"]}
+        if score is not None:
+            requirement["score"] = score
+        return {"result": {"regulation": dict(regulation), "requirement": requirement, "controls": [], "evidence": []}}
+
+    async def execute_query(self, query, params=None, read_only=True):
+        jurisdiction = params["jurisdiction"]
+        if query == LOCAL_FULLTEXT_QUERY:
+            scores = self.requirement_index.query(params["search"])
+            for reg_id, score in self.regulation_index.query(params["search"]).items():
+                for req_id in self.by_regulation[reg_id]:
+                    scores[req_id] += score
+            matches = [
+                (score, req_id)
+                for req_id, score in scores.items()
+                if jurisdiction is None or self.regulations[self.requirements[req_id]["regulation"]]["jurisdiction"] == jurisdiction
+            ]
+            matches.sort(reverse=True)
+            return [self._record(req_id, score) for score, req_id in matches[: params["max_nodes"]]]
+
+        assert query == LOCAL_CONTAINS_QUERY
+        term = params["query_term"].lower()
+        records = []
+        for req_id, req in enumerate(self.requirements):
+            regulation = self.regulations[req["regulation"]]
+            if jurisdiction is not None and regulation["jurisdiction"] != jurisdiction:
+                continue
+            if term in regulation["name"].lower() or term in req["description"].lower():
+                records.append(self._record(req_id))
+                if len(records) == params["max_nodes"]:
+                    break
+        return records
+
+
+async def run_queries(retriever, use_fulltext):
+    latencies = []
+    hits = 0
+    for _ in range(ROUNDS):
+        for query in QUERIES:
+            # Force the fallback by marking the index unavailable
+            retriever._fulltext_unavailable_until = 0.0 if use_fulltext else float("inf")
+            start = time.perf_counter()
+            results = await retriever._local_search(query, None, 20)
+            latencies.append((time.perf_counter() - start) * 1000)
+            hits += len(results)
+    return latencies, hits // ROUNDS
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def report(label, contains, fulltext):
+    (contains_latencies, contains_hits), (fulltext_latencies, fulltext_hits) = contains, fulltext
+    print(
+        f"\n{label}, {REQUIREMENTS} requirements, {len(QUERIES)} queries x {ROUNDS}: "
+        f"CONTAINS p50={statistics.median(contains_latencies):.2f}ms p95={percentile(contains_latencies, 0.95):.2f}ms "
+        f"hits={contains_hits}, full-text p50={statistics.median(fulltext_latencies):.2f}ms "
+        f"p95={percentile(fulltext_latencies, 0.95):.2f}ms hits={fulltext_hits}"
+    )
+
+
+@pytest.mark.performance
+class TestGraphRAGFullTextPerformance:
+    """Local retrieval latency, full-text index vs CONTAINS scan"""
+
+    @pytest.mark.asyncio
+    async def test_embedded_stand_in(self, monkeypatch):
+        monkeypatch.setenv("OPENAI_API_KEY", "test")
+        service = EmbeddedGraphService(*build_graph(random.Random(19)))
+        retriever = GraphRAGRetriever(service, enable_cache=False)
+
+        contains = await run_queries(retriever, use_fulltext=False)
+        fulltext = await run_queries(retriever, use_fulltext=True)
+        report("Embedded stand-in", contains, fulltext)
+
+        # Whole-question substrings almost never occur verbatim; term search does
+        assert fulltext[1] > contains[1]
+        assert statistics.median(fulltext[0]) < statistics.median(contains[0])
+
+    @pytest.mark.asyncio
+    @pytest.mark.skipif(not os.getenv("NEO4J_BENCHMARK_URI"), reason="NEO4J_BENCHMARK_URI not set")
+    async def test_neo4j(self, monkeypatch):
+        from services.neo4j_service import Neo4jGraphRAGService
+
+        monkeypatch.setenv("OPENAI_API_KEY", "test")
+        monkeypatch.setenv("NEO4J_URI", os.environ["NEO4J_BENCHMARK_URI"])
+        monkeypatch.setenv("NEO4J_USERNAME", os.getenv("NEO4J_BENCHMARK_USER", "neo4j"))
+        monkeypatch.setenv("NEO4J_PASSWORD", os.getenv("NEO4J_BENCHMARK_PASSWORD", "neo4j"))
+        service = Neo4jGraphRAGService()
+        assert await service.initialize()
+
+        regulations, requirements = build_graph(random.Random(19))
+        load = """
+        UNWIND $batch AS row
+        MERGE (r:Regulation {name: row.regulation})
+        SET r.jurisdiction = row.jurisdiction, r.benchmark = true
+        CREATE (r)-[:CONTAINS]->(:Requirement {id: row.id, description: row.description, benchmark: true})
+        """
+        try:
+            for start in range(0, REQUIREMENTS, 5000):
+                batch = [
+                    {
+                        "regulation": regulations[req["regulation"]]["name"],
+                        "jurisdiction": regulations[req["regulation"]]["jurisdiction"],
+                        "id": req["id"],
+                        "description": req["description"],
+                    }
+                    for req in requirements[start:start + 5000]
+                ]
+                await service.execute_query(load, {"batch": batch}, read_only=False)
+            await service.execute_query("CALL db.awaitIndexes(300)", read_only=False)
+
+            retriever = GraphRAGRetriever(service, enable_cache=False)
+            contains = await run_queries(retriever, use_fulltext=False)
+            fulltext = await run_queries(retriever, use_fulltext=True)
+            report("Neo4j", contains, fulltext)
+
+            assert fulltext[1] > contains[1]
+        finally:
+            delete = """
+            MATCH (n) WHERE n.benchmark = true
+            WITH n LIMIT 10000
+            DETACH DELETE n
+            RETURN count(*) AS deleted
+            """
+            while (await service.execute_query(delete, read_only=False))[0]["deleted"]:
+                pass
+            await service.close()
@@ -0,0 +1,139 @@
+"""
+Benchmark for the GraphRAG retrieval cache.
+
+Replays a fixed chat session through GraphRAGRetriever against a
+fake graph whose multi-hop queries take a few milliseconds, once with the
+cache disabled and once enabled, and reports p50/p95 latency and the hit
+rate per retrieval mode. Users rephrase the same questions with different
+casing and spacing, and popular questions recur far more often than rare
+ones, so turns are drawn with a Zipf-like skew. One ingestion (graph
+version bump) happens halfway through the replay.
+"""
+
+import asyncio
+import random
+import statistics
+import time
+
+import pytest
+
+pytest.importorskip("langchain_openai")
+
+from services.caching.cache_manager import CacheManager
+from services.caching.graph_version import GraphVersion
+from services.graphrag_retriever import GraphRAGRetriever
+
+TURNS = 400
+GRAPH_QUERY_LATENCY = 0.004
+
+# Representative compliance chat questions; the replay draws turns from these
+RECORDED_QUERIES = [
+    "What are the GDPR Article 33 breach notification requirements?",
+    "Which controls satisfy the requirement for access reviews under ISO 27001?",
+    "Show me the specific requirement for data retention in UK GDPR",
+    "What changed in the FCA consumer duty rules in 2024?",
+    "Any recent amendments to the Money Laundering Regulations?",
+    "Compare AML obligations across UK and EU",
+    "Give me an overview of the data protection landscape",
+    "How do we handle subject access requests?",
+    "What evidence do auditors expect for vendor risk management?",
+    "Article 30 records of processing requirement",
+    "What are the new DORA requirements for ICT incident reporting?",
+    "Compare operational resilience rules across all jurisdictions",
+    "Which control for encryption at rest applies to cardholder data?",
+    "What does PCI DSS require for quarterly vulnerability scans?",
+    "How should we document a data protection impact assessment?",
+    "Section 172 directors duties and ESG reporting",
+    "What updates were made to the NIS2 directive?",
+    "Is consent required for marketing emails to existing customers?",
+    "Overview of cyber security obligations for financial services",
+    "What is the specific requirement for MFA under Cyber Essentials?",
+]
+
+
+class LatencyNeo4jService:
+    """Fake graph whose queries take GRAPH_QUERY_LATENCY seconds."""
+
+    def __init__(self):
+        self.queries = 0
+
+    async def execute_query(self, query, params=None, read_only=True):
+        self.queries += 1
+        await asyncio.sleep(GRAPH_QUERY_LATENCY)
+        return [{"result": {"regulation": {"name": "GDPR", "jurisdiction": "EU"}, "controls": []}}]
+
+
+def _replay_turns(rng):
+    weights = [1.0 / (rank + 1) for rank in range(len(RECORDED_QUERIES))]
+    turns = []
+    for query in rng.choices(RECORDED_QUERIES, weights=weights, k=TURNS):
+        # Rephrasings that normalize to the same question
+        if rng.random() < 0.3:
+            query = query.lower()
+        if rng.random() < 0.2:
+            query = f"  {query.replace(' ', '  ')} "
+        turns.append(query)
+    return turns
+
+
+async def _replay(retriever, version, turns):
+    latencies = []
+    for turn, query in enumerate(turns):
+        if turn == len(turns) // 2:
+            await version.bump()
+        start = time.perf_counter()
+        await retriever.retrieve(query)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def _make_retriever(monkeypatch, enable_cache):
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    manager = CacheManager(enable_invalidation_bus=False)
+    # L1 only - no Redis connection
+    manager._initialized = True
+    version = GraphVersion()
+    retriever = GraphRAGRetriever(LatencyNeo4jService(), cache_manager=manager, graph_version=version, enable_cache=enable_cache)
+
+    async def fake_embedding(text):
+        return [0.0] * 8
+
+    # Hybrid mode embeds the query; keep the benchmark off the network
+    monkeypatch.setattr(retriever, "_get_embedding", fake_embedding)
+    return retriever, version
+
+
+def _percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+@pytest.mark.performance
+class TestGraphRAGRetrievalCachePerformance:
+    """Replay of a chat session with and without the retrieval cache"""
+
+    @pytest.mark.asyncio
+    async def test_chat_session_replay(self, monkeypatch):
+        turns = _replay_turns(random.Random(7))
+
+        uncached, uncached_version = _make_retriever(monkeypatch, enable_cache=False)
+        baseline = await _replay(uncached, uncached_version, turns)
+
+        cached, cached_version = _make_retriever(monkeypatch, enable_cache=True)
+        latencies = await _replay(cached, cached_version, turns)
+
+        stats = cached.get_cache_stats()["by_mode"]
+        print(
+            f"\nReplayed {TURNS} turns ({len(RECORDED_QUERIES)} distinct questions): "
+            f"uncached p50={statistics.median(baseline):.2f}ms p95={_percentile(baseline, 0.95):.2f}ms "
+            f"({uncached.neo4j.queries} graph queries), "
+            f"cached p50={statistics.median(latencies):.2f}ms p95={_percentile(latencies, 0.95):.2f}ms "
+            f"({cached.neo4j.queries} graph queries)"
+        )
+        for mode, mode_stats in stats.items():
+            print(f"  {mode}: hits={mode_stats['hits']} misses={mode_stats['misses']} hit_rate={mode_stats['hit_rate']:.2f}")
+
+        # At most one miss per distinct question per graph version
+        assert cached.neo4j.queries <= 2 * len(RECORDED_QUERIES)
+        assert sum(mode_stats["hits"] for mode_stats in stats.values()) >= TURNS - 2 * len(RECORDED_QUERIES)
+        assert statistics.median(latencies) < statistics.median(baseline) / 5
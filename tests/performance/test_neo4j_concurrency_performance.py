@@ -0,0 +1,150 @@
+"""
+Concurrency benchmark for Neo4jGraphRAGService.
+
+Fires 100 parallel graph queries, as the IQ agent does when it fans out
+retrieval calls, and compares the async driver path with the previous
+design: a sync driver wrapped in run_in_executor on a 10-thread pool with
+a new session per query.
+
+By default both paths run against a stand-in whose queries take a fixed
+server-side latency and whose connection pool admits at most
+max_connection_pool_size concurrent queries. Set NEO4J_BENCHMARK_URI (plus
+NEO4J_BENCHMARK_USER / NEO4J_BENCHMARK_PASSWORD) to also run both paths
+against a local Neo4j.
+"""
+
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+pytest.importorskip("neo4j")
+
+from services.neo4j_service import Neo4jGraphRAGService, query_fingerprint
+
+PARALLEL_QUERIES = 100
+LEGACY_EXECUTOR_WORKERS = 10
+QUERY_LATENCY = 0.01
+BENCHMARK_QUERY = "MATCH (n) RETURN count(n) AS nodes"
+
+
+class PooledResult:
+    async def data(self):
+        return [{"nodes": 0}]
+
+
+class PooledTransaction:
+    def __init__(self, pool):
+        self.pool = pool
+
+    async def run(self, query, parameters=None):
+        async with self.pool:
+            await asyncio.sleep(QUERY_LATENCY)
+        return PooledResult()
+
+
+class PooledSession:
+    def __init__(self, pool):
+        self.pool = pool
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute_read(self, work, *args):
+        return await work(PooledTransaction(self.pool), *args)
+
+
+class PooledAsyncDriver:
+    """Async driver stand-in; the semaphore plays the connection pool."""
+
+    def __init__(self, pool_size):
+        self.pool = asyncio.Semaphore(pool_size)
+
+    def session(self, database=None):
+        return PooledSession(self.pool)
+
+
+def make_service(monkeypatch, uri="bolt://localhost:7687", user="neo4j", password="test"):
+    monkeypatch.setenv("NEO4J_URI", uri)
+    monkeypatch.setenv("NEO4J_USERNAME", user)
+    monkeypatch.setenv("NEO4J_PASSWORD", password)
+    return Neo4jGraphRAGService()
+
+
+async def run_parallel(execute):
+    start = time.perf_counter()
+    results = await asyncio.gather(*(execute() for _ in range(PARALLEL_QUERIES)))
+    assert len(results) == PARALLEL_QUERIES
+    return (time.perf_counter() - start) * 1000
+
+
+async def legacy_parallel(run_sync_query):
+    """Previous design: every query hops onto a fixed-size thread pool."""
+    executor = ThreadPoolExecutor(max_workers=LEGACY_EXECUTOR_WORKERS)
+    loop = asyncio.get_running_loop()
+    try:
+        return await run_parallel(lambda: loop.run_in_executor(executor, run_sync_query))
+    finally:
+        executor.shutdown(wait=True)
+
+
+def report(label, legacy_ms, async_ms, service):
+    metrics = service.get_query_metrics()
+    timing = metrics["queries"][query_fingerprint(BENCHMARK_QUERY)]
+    print(
+        f"\n{label}, {PARALLEL_QUERIES} parallel queries: "
+        f"executor({LEGACY_EXECUTOR_WORKERS} threads) wall={legacy_ms:.1f}ms, "
+        f"async driver(pool={metrics['pool']['max_connection_pool_size']}) wall={async_ms:.1f}ms, "
+        f"per-query p50={timing['p50_ms']:.1f}ms p95={timing['p95_ms']:.1f}ms"
+    )
+
+
+@pytest.mark.performance
+class TestNeo4jConcurrencyPerformance:
+    """100 parallel queries: async driver vs thread pool executor"""
+
+    @pytest.mark.asyncio
+    async def test_stand_in(self, monkeypatch):
+        service = make_service(monkeypatch)
+        service.driver = PooledAsyncDriver(service.max_connection_pool_size)
+
+        legacy_ms = await legacy_parallel(lambda: time.sleep(QUERY_LATENCY))
+        async_ms = await run_parallel(lambda: service.execute_query(BENCHMARK_QUERY))
+        report("Stand-in", legacy_ms, async_ms, service)
+
+        # 100 queries over 10 threads need at least 10 sequential rounds;
+        # a 50-connection pool needs 2
+        assert legacy_ms >= (PARALLEL_QUERIES / LEGACY_EXECUTOR_WORKERS) * QUERY_LATENCY * 1000
+        assert async_ms < legacy_ms / 2
+        timing = service.get_query_metrics()["queries"][query_fingerprint(BENCHMARK_QUERY)]
+        assert timing["count"] == PARALLEL_QUERIES
+        assert timing["p50_ms"] >= QUERY_LATENCY * 1000
+
+    @pytest.mark.asyncio
+    @pytest.mark.skipif(not os.getenv("NEO4J_BENCHMARK_URI"), reason="NEO4J_BENCHMARK_URI not set")
+    async def test_neo4j(self, monkeypatch):
+        from neo4j import GraphDatabase
+
+        uri = os.environ["NEO4J_BENCHMARK_URI"]
+        auth = (os.getenv("NEO4J_BENCHMARK_USER", "neo4j"), os.getenv("NEO4J_BENCHMARK_PASSWORD", "neo4j"))
+        service = make_service(monkeypatch, uri, *auth)
+        assert await service.initialize()
+
+        sync_driver = GraphDatabase.driver(uri, auth=auth, max_connection_pool_size=50)
+
+        def run_sync_query():
+            with sync_driver.session(database=service.database) as session:
+                return [record.data() for record in session.run(BENCHMARK_QUERY)]
+
+        try:
+            legacy_ms = await legacy_parallel(run_sync_query)
+            async_ms = await run_parallel(lambda: service.execute_query(BENCHMARK_QUERY))
+            report("Neo4j", legacy_ms, async_ms, service)
+        finally:
+            sync_driver.close()
+            await service.close()
@@ -0,0 +1,99 @@
+"""
+Benchmark for RAGSystem semantic retrieval.
+
+Compares the per-company NumPy vector index with the previous retrieval
+loop (pure-Python cosine similarity over every chunk, then a full sort) at
+10k, 100k and 1M chunks, reporting p50/p99 query latency for each.
+
+The Python loop is linear in the number of chunks, and holding a million
+embeddings as Python float lists needs several GB, so above
+BASELINE_MAX_CHUNKS its latency is measured on a slice and scaled up.
+"""
+
+import math
+import statistics
+import time
+from uuid import uuid4
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from langgraph_agent.agents.vector_index import VectorIndex
+
+DIMENSION = 128
+TOP_K = 10
+INDEX_QUERIES = 200
+BASELINE_QUERIES = 5
+BASELINE_MAX_CHUNKS = 100_000
+
+
+def _cosine_similarity(a, b):
+    """Copy of RAGSystem._cosine_similarity, the loop being replaced."""
+    dot_product = sum((x * y for x, y in zip(a, b)))
+    magnitude_a = math.sqrt(sum((x * x for x in a)))
+    magnitude_b = math.sqrt(sum((x * x for x in b)))
+    if magnitude_a == 0 or magnitude_b == 0:
+        return 0.0
+    return dot_product / (magnitude_a * magnitude_b)
+
+
+def _baseline_search(embeddings, query, k):
+    similarities = [(position, _cosine_similarity(query, embedding)) for position, embedding in enumerate(embeddings)]
+    similarities.sort(key=lambda x: x[1], reverse=True)
+    return similarities[:k]
+
+
+def _percentiles(latencies):
+    latencies = sorted(latencies)
+    p50 = statistics.median(latencies) * 1000
+    p99 = latencies[max(math.ceil(len(latencies) * 0.99) - 1, 0)] * 1000
+    return p50, p99
+
+
+@pytest.mark.performance
+@pytest.mark.slow
+class TestRAGVectorIndexPerformance:
+    """Semantic retrieval latency, vector index vs Python loop"""
+
+    @pytest.mark.parametrize("chunks", [10_000, 100_000, 1_000_000])
+    def test_retrieval_latency(self, chunks):
+        rng = np.random.default_rng(42)
+        company_id = uuid4()
+        vectors = rng.standard_normal((chunks, DIMENSION), dtype=np.float32)
+        queries = rng.standard_normal((INDEX_QUERIES, DIMENSION), dtype=np.float32)
+
+        # Exact search only, so the numbers measure the flat matrix path
+        index = VectorIndex(ann_threshold=None)
+        index.add(company_id, [f"chunk_{position}" for position in range(chunks)], vectors)
+
+        index_latencies = []
+        for query in queries:
+            start = time.perf_counter()
+            index.search(company_id, query, TOP_K)
+            index_latencies.append(time.perf_counter() - start)
+
+        baseline_chunks = min(chunks, BASELINE_MAX_CHUNKS)
+        embeddings = vectors[:baseline_chunks].tolist()
+        scale = chunks / baseline_chunks
+        baseline_latencies = []
+        for query in queries[:BASELINE_QUERIES].tolist():
+            start = time.perf_counter()
+            _baseline_search(embeddings, query, TOP_K)
+            baseline_latencies.append((time.perf_counter() - start) * scale)
+
+        index_p50, index_p99 = _percentiles(index_latencies)
+        loop_p50, loop_p99 = _percentiles(baseline_latencies)
+        note = " (extrapolated)" if scale > 1 else ""
+        print(
+            f"\nSemantic retrieval @ {chunks:,} chunks: "
+            f"index p50={index_p50:.2f}ms p99={index_p99:.2f}ms | "
+            f"python loop p50={loop_p50:.1f}ms p99={loop_p99:.1f}ms{note}"
+        )
+
+        # Top-k must agree with the exact loop on the measured slice
+        if scale == 1:
+            expected = [f"chunk_{position}" for position, _ in _baseline_search(embeddings, queries[0].tolist(), TOP_K)]
+            assert [chunk_id for chunk_id, _ in index.search(company_id, queries[0], TOP_K)] == expected
+
+        assert index_p50 < loop_p50
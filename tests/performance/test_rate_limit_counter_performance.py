@@ -0,0 +1,97 @@
+"""
+Benchmark for counter-backed AI feature rate limit checks.
+
+RateLimitService.check_rate_limit used to COUNT(*) the caller's audit log
+rows on every AI request. It now sums hourly counters read with one MGET and
+only touches the audit log during periodic reconciliation. This benchmark
+grows a simulated audit table and shows that check latency and database
+work stay flat.
+"""
+
+import statistics
+import time
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock, patch
+from uuid import uuid4
+
+import pytest
+import pytest_asyncio
+
+from services.rate_limiting import RateLimitService, UsageCounters
+
+fakeredis = pytest.importorskip("fakeredis")
+
+CHECKS = 500
+
+
+class AuditTableSession:
+    """Session stand-in whose queries scan a simulated audit table."""
+
+    def __init__(self, user_id, rows: int):
+        now = datetime.now(timezone.utc)
+        other = uuid4()
+        # Only a handful of rows belong to the benchmarked user
+        self.rows = [
+            (user_id if i % 1000 == 0 else other, "ai_assessment_request",
+             now - timedelta(minutes=i % 1200))
+            for i in range(rows)
+        ]
+        self.user_id = user_id
+        self.executes = 0
+
+    async def execute(self, stmt):
+        self.executes += 1
+        result = MagicMock()
+        result.all.return_value = [
+            (action, timestamp) for owner, action, timestamp in self.rows
+            if owner == self.user_id
+        ]
+        return result
+
+
+@pytest_asyncio.fixture
+async def redis_client():
+    client = fakeredis.aioredis.FakeRedis(decode_responses=True)
+    yield client
+    await client.aclose()
+
+
+@pytest.mark.performance
+class TestRateLimitCounterPerformance:
+    """Check latency against audit table size"""
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("audit_rows", [1_000, 100_000, 1_000_000])
+    async def test_check_latency_is_independent_of_audit_size(
+        self, redis_client, audit_rows
+    ):
+        user = MagicMock()
+        user.id = uuid4()
+        db = AuditTableSession(user.id, audit_rows)
+
+        with patch.object(RateLimitService, "counters",
+                          UsageCounters(redis_client=redis_client)):
+            # First check reconciles from the audit log
+            first = await RateLimitService.check_rate_limit(
+                db, user, "ai_assessment", check_only=True
+            )
+            db.executes = 0
+
+            latencies = []
+            for _ in range(CHECKS):
+                start = time.perf_counter()
+                result = await RateLimitService.check_rate_limit(
+                    db, user, "ai_assessment", check_only=True
+                )
+                latencies.append(time.perf_counter() - start)
+
+        p50 = statistics.median(latencies) * 1000
+        p99 = sorted(latencies)[int(CHECKS * 0.99) - 1] * 1000
+        print(
+            f"\nAudit table {audit_rows:,} rows: check p50={p50:.3f}ms "
+            f"p99={p99:.3f}ms, audit queries during checks={db.executes}"
+        )
+
+        assert result["used_today"] == first["used_today"] == audit_rows // 1000
+        assert db.executes == 0
+        assert p50 < 5
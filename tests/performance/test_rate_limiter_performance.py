@@ -0,0 +1,88 @@
+"""
+Benchmark for RedisRateLimiter algorithms.
+
+Compares the sorted-set sliding log with the sliding-window counter on
+Redis commands per request and on stored bytes, extrapolated to 100k
+identifiers. Stored bytes are measured with DUMP (serialized value plus key
+name), a stable proxy for MEMORY USAGE that also works against fakeredis.
+"""
+
+import time
+
+import pytest
+import pytest_asyncio
+
+from api.middleware.redis_rate_limiter import (
+    SLIDING_LOG,
+    SLIDING_WINDOW,
+    RedisRateLimiter,
+)
+
+fakeredis = pytest.importorskip("fakeredis")
+pytest.importorskip("lupa")
+
+SAMPLE_IDENTIFIERS = 1_000
+REQUESTS_PER_IDENTIFIER = 20
+REPORTED_IDENTIFIERS = 100_000
+
+
+class CountingRedis(fakeredis.aioredis.FakeRedis):
+    """FakeRedis that counts commands sent by the limiter."""
+
+    commands = 0
+
+    async def execute_command(self, *args, **options):
+        self.commands += 1
+        return await super().execute_command(*args, **options)
+
+
+@pytest_asyncio.fixture
+async def redis_client():
+    client = CountingRedis(decode_responses=True)
+    yield client
+    await client.aclose()
+
+
+async def _stored_bytes(redis_client) -> int:
+    total = 0
+    async for key in redis_client.scan_iter(count=1000):
+        dumped = await redis_client.dump(key)
+        total += len(key) + len(dumped or b"")
+    return total
+
+
+@pytest.mark.performance
+class TestRateLimiterAlgorithms:
+    """Redis cost of each rate limit algorithm"""
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("algorithm", [SLIDING_LOG, SLIDING_WINDOW])
+    async def test_ops_and_memory(self, redis_client, algorithm):
+        limiter = RedisRateLimiter(
+            requests_per_window=1000, window_seconds=60,
+            key_prefix="bench", algorithm=algorithm
+        )
+        limiter.redis_client = redis_client
+
+        requests = 0
+        start = time.perf_counter()
+        for request in range(REQUESTS_PER_IDENTIFIER):
+            for identifier in range(SAMPLE_IDENTIFIERS):
+                await limiter.check_rate_limit(f"10.0.{identifier // 256}.{identifier % 256}")
+                requests += 1
+        elapsed = time.perf_counter() - start
+
+        ops_per_request = redis_client.commands / requests
+        stored = await _stored_bytes(redis_client)
+        per_100k_mb = stored / SAMPLE_IDENTIFIERS * REPORTED_IDENTIFIERS / (1024 * 1024)
+        print(
+            f"\n{algorithm}: {ops_per_request:.2f} Redis commands/request, "
+            f"~{per_100k_mb:.1f}MB per {REPORTED_IDENTIFIERS:,} identifiers "
+            f"at {REQUESTS_PER_IDENTIFIER} requests each, "
+            f"{requests / elapsed:,.0f} checks/s (fakeredis)"
+        )
+
+        if algorithm == SLIDING_WINDOW:
+            # One EVALSHA per request, one counter per active window
+            assert ops_per_request <= 1.01
+            assert stored / SAMPLE_IDENTIFIERS < 100
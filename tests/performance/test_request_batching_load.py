@@ -0,0 +1,101 @@
+"""
+Load test for AI request coalescing and micro-batching.
+
+Simulates an assessment burst: many concurrent callers, most of them asking
+one of a small set of common questions, against a fake provider with
+realistic latency. Reports how much provider call volume drops compared to
+calling the provider directly.
+"""
+
+import asyncio
+import random
+import time
+
+import pytest
+
+from services.ai.providers.base import AIProvider, ProviderConfig, ProviderResponse
+from services.ai.request_batcher import RequestBatcher
+
+CALLERS = 1000
+DISTINCT_PROMPTS = 120
+HOT_PROMPTS = 20
+HOT_TRAFFIC_SHARE = 0.7
+PROVIDER_LATENCY = 0.05
+
+
+class CountingProvider(AIProvider):
+    """Fake provider with a native batch endpoint that counts upstream calls."""
+
+    supports_batching = True
+
+    def __init__(self):
+        self.upstream_calls = 0
+        self.prompts_served = 0
+
+    async def generate(self, prompt, config):
+        self.upstream_calls += 1
+        self.prompts_served += 1
+        await asyncio.sleep(PROVIDER_LATENCY)
+        return ProviderResponse(text=prompt[::-1], model_used=config.model_name)
+
+    async def generate_batch(self, prompts, config):
+        self.upstream_calls += 1
+        self.prompts_served += len(prompts)
+        await asyncio.sleep(PROVIDER_LATENCY)
+        return [ProviderResponse(text=p[::-1], model_used=config.model_name) for p in prompts]
+
+    async def generate_stream(self, prompt, config):
+        yield prompt
+
+    def is_available(self):
+        return True
+
+    def get_model_name(self):
+        return 'fake-model'
+
+
+def _burst_prompts(seed: int = 7):
+    rng = random.Random(seed)
+    prompts = []
+    for _ in range(CALLERS):
+        if rng.random() < HOT_TRAFFIC_SHARE:
+            question = rng.randrange(HOT_PROMPTS)
+        else:
+            question = rng.randrange(DISTINCT_PROMPTS)
+        prompts.append(f"Assessment question {question}: explain the control requirement")
+    return prompts
+
+
+@pytest.mark.performance
+@pytest.mark.load
+class TestRequestBatchingLoad:
+    """Provider call volume with and without the batcher"""
+
+    @pytest.mark.asyncio
+    async def test_provider_call_volume_drops(self):
+        prompts = _burst_prompts()
+        config = ProviderConfig(model_name='fake-model')
+
+        direct = CountingProvider()
+        start = time.perf_counter()
+        await asyncio.gather(*(direct.generate(p, config) for p in prompts))
+        direct_elapsed = time.perf_counter() - start
+
+        batched = CountingProvider()
+        batcher = RequestBatcher(lambda name: batched, max_batch_size=16,
+                                 max_wait_seconds=0.02, max_concurrent_batches=8)
+        start = time.perf_counter()
+        responses = await asyncio.gather(*(batcher.submit(p, config) for p in prompts))
+        batched_elapsed = time.perf_counter() - start
+
+        assert [r.text for r in responses] == [p[::-1] for p in prompts]
+
+        reduction = 1 - batched.upstream_calls / direct.upstream_calls
+        print(
+            f"\nBurst of {CALLERS} callers: direct={direct.upstream_calls} calls "
+            f"({direct_elapsed:.2f}s), batched={batched.upstream_calls} calls "
+            f"carrying {batched.prompts_served} prompts ({batched_elapsed:.2f}s), "
+            f"call reduction={reduction:.1%}, stats={batcher.get_stats()}"
+        )
+        assert batched.prompts_served <= DISTINCT_PROMPTS
+        assert reduction > 0.9
@@ -0,0 +1,52 @@
+"""
+Performance tests for the semantic AI response cache index.
+
+Measures p50/p99 lookup latency of a single (framework, content_type)
+partition holding 10k and 100k cached prompt embeddings.
+"""
+
+import statistics
+import time
+
+import numpy as np
+import pytest
+
+from services.ai.semantic_cache import (
+    DEFAULT_EMBEDDING_DIMENSION,
+    SemanticVectorIndex,
+    hashing_embedding,
+)
+
+LOOKUPS = 200
+
+
+@pytest.mark.performance
+class TestSemanticCachePerformance:
+    """Lookup latency for the semantic cache index"""
+
+    @pytest.mark.parametrize("entries", [10_000, 100_000])
+    def test_lookup_latency(self, entries):
+        rng = np.random.default_rng(42)
+        index = SemanticVectorIndex(
+            DEFAULT_EMBEDDING_DIMENSION, max_entries=entries
+        )
+        vectors = rng.standard_normal(
+            (entries, DEFAULT_EMBEDDING_DIMENSION), dtype=np.float32
+        )
+        for position, vector in enumerate(vectors):
+            index.add(f"ai_response:{position:016x}", vector)
+
+        latencies = []
+        for position in rng.integers(0, entries, LOOKUPS):
+            query = hashing_embedding(f"compliance question {position}")
+            start = time.perf_counter()
+            index.search(query, threshold=0.85)
+            latencies.append(time.perf_counter() - start)
+
+        latencies.sort()
+        p50 = statistics.median(latencies) * 1000
+        p99 = latencies[int(len(latencies) * 0.99) - 1] * 1000
+        print(f"\nSemantic lookup @ {entries:,} prompts: p50={p50:.2f}ms p99={p99:.2f}ms")
+
+        # A semantic lookup must stay far cheaper than an LLM call
+        assert p50 < 100
@@ -0,0 +1,120 @@
+"""
+Load test for AI cost WebSocket fan-out with 2k simulated clients.
+
+Connects 2,000 in-process WebSocket stand-ins to the AI cost
+ConnectionManager; each send costs SEND_LATENCY seconds and a handful of
+slow clients take SLOW_SEND_LATENCY per send. A cost update is delivered two
+ways: the previous broadcast loop (json.dumps and an awaited send_text per
+connection, one after another) and ConnectionManager.publish (serialize
+once, enqueue into per-connection outboxes drained concurrently). The
+numbers show how long the producer is held up and when the last healthy
+client has the message, not real network throughput.
+"""
+
+import asyncio
+import json
+import time
+
+import pytest
+
+CLIENTS = 2000
+SLOW_CLIENTS = 10
+SEND_LATENCY = 0.0002
+SLOW_SEND_LATENCY = 0.2
+SEND_TIMEOUT = 0.05  # Evicts the slow clients quickly in the benchmark
+
+
+class SimulatedWebSocket:
+    """WebSocket stand-in with a fixed per-send latency."""
+
+    def __init__(self, latency):
+        self.latency = latency
+        self.received = 0
+        self.closed_with = None
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text):
+        await asyncio.sleep(self.latency)
+        self.received += 1
+
+    async def close(self, code=1000):
+        self.closed_with = code
+
+
+async def legacy_broadcast(clients, message):
+    """ConnectionManager.broadcast before the outboxes."""
+    for websocket in clients:
+        await websocket.send_text(json.dumps(message))
+
+
+async def wait_until(condition, timeout):
+    deadline = time.perf_counter() + timeout
+    while not condition() and time.perf_counter() < deadline:
+        await asyncio.sleep(0.001)
+    return condition()
+
+
+def make_clients():
+    return [
+        SimulatedWebSocket(SLOW_SEND_LATENCY if i < SLOW_CLIENTS else SEND_LATENCY)
+        for i in range(CLIENTS)
+    ]
+
+
+@pytest.mark.performance
+class TestWebSocketFanoutLoad:
+    """Cost update to 2k clients: outbox fan-out vs sequential sends"""
+
+    @pytest.mark.asyncio
+    async def test_two_thousand_clients(self, monkeypatch):
+        router = pytest.importorskip("api.routers.ai_cost_websocket")
+        message = {
+            "type": "cost_update",
+            "timestamp": "2026-10-16T12:00:00",
+            "data": {"current_daily_cost": "42.17", "requests_today": 1250, "cost_trend": "stable"},
+        }
+
+        legacy_clients = make_clients()
+        start = time.perf_counter()
+        await legacy_broadcast(legacy_clients, message)
+        legacy_ms = (time.perf_counter() - start) * 1000
+
+        manager = router.ConnectionManager(send_timeout=SEND_TIMEOUT)
+
+        async def no_initial_data(connection_id):
+            pass
+
+        monkeypatch.setattr(manager, "_send_initial_data", no_initial_data)
+        clients = make_clients()
+        for i, websocket in enumerate(clients):
+            await manager.connect(websocket, f"user_{i % 500}", "dashboard_general")
+        healthy = clients[SLOW_CLIENTS:]
+
+        start = time.perf_counter()
+        delivered = await manager.publish("cost_update", message)
+        publish_ms = (time.perf_counter() - start) * 1000
+        assert await wait_until(lambda: all(ws.received == 1 for ws in healthy), timeout=5)
+        delivery_ms = (time.perf_counter() - start) * 1000
+        assert await wait_until(lambda: len(manager.active_connections) == len(healthy), timeout=5)
+
+        stats = manager.get_connection_stats()
+        print(
+            f"\n{CLIENTS} clients ({SLOW_CLIENTS} slow), {SEND_LATENCY * 1000:.1f}ms per send:\n"
+            f"  sequential broadcast: {legacy_ms:.0f}ms until the producer is free and the last client is served\n"
+            f"  outbox fan-out: publish returned in {publish_ms:.1f}ms, "
+            f"{len(healthy)} healthy clients served in {delivery_ms:.0f}ms, "
+            f"{stats['fanout']['evictions']} slow clients evicted"
+        )
+
+        assert delivered == CLIENTS
+        assert stats["fanout"]["evictions"] == SLOW_CLIENTS
+        assert all(ws.closed_with == router.status.WS_1013_TRY_AGAIN_LATER for ws in clients[:SLOW_CLIENTS])
+        assert publish_ms * 10 < legacy_ms
+        assert delivery_ms * 2 < legacy_ms
+
+        # With no subscribers left the producer has nothing to compute for
+        for connection_id in list(manager.active_connections):
+            await manager.disconnect(connection_id)
+        assert not await manager.has_subscribers("cost_update")
@@ -0,0 +1,146 @@
+"""
+Tests for the atomic Redis-scripted token bucket in EnhancedRateLimiter
+"""
+
+import asyncio
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+import pytest_asyncio
+from fastapi import FastAPI
+from redis.exceptions import ResponseError
+
+from middleware.rate_limiter_enhanced import EnhancedRateLimiter
+from services.redis_circuit_breaker import (
+    CircuitState,
+    RedisCircuitBreaker,
+    RedisFailureStrategy,
+)
+
+
+@pytest_asyncio.fixture
+async def redis_client():
+    fakeredis = pytest.importorskip("fakeredis")
+    pytest.importorskip("lupa")  # fakeredis needs lupa to run Lua scripts
+    client = fakeredis.aioredis.FakeRedis()
+    yield client
+    await client.aclose()
+
+
+@pytest_asyncio.fixture
+async def rate_limiter(redis_client):
+    limiter = EnhancedRateLimiter(FastAPI())
+    limiter.redis_breaker = RedisCircuitBreaker(
+        redis_client=redis_client,
+        failure_strategy=RedisFailureStrategy.FAIL_OPEN
+    )
+    return limiter
+
+
+class TestAtomicTokenBucket:
+    """Test the Lua-scripted bucket under concurrency"""
+
+    @pytest.mark.asyncio
+    async def test_no_over_admission_under_concurrency(self, rate_limiter):
+        """500 concurrent checks admit exactly limit + burst requests"""
+        results = await asyncio.gather(*(
+            rate_limiter._check_bucket("rate:tb:ip:10.0.0.1:/api/v1/ai", limit=20, burst=5)
+            for _ in range(500)
+        ))
+
+        assert sum(r["allowed"] for r in results) == 25
+        assert min(r["remaining"] for r in results) == 0
+
+    @pytest.mark.asyncio
+    async def test_bucket_state_is_stored_in_redis(self, rate_limiter, redis_client):
+        await rate_limiter._check_bucket("rate:tb:ip:10.0.0.2:/x", limit=60, burst=0)
+
+        state = await redis_client.hgetall("rate:tb:ip:10.0.0.2:/x")
+        assert float(state[b"tokens"]) == pytest.approx(59, abs=0.1)
+        assert 0 < await redis_client.ttl("rate:tb:ip:10.0.0.2:/x") <= 61
+        assert rate_limiter.local_buckets == {}
+
+    @pytest.mark.asyncio
+    async def test_combined_buckets_consume_all_or_nothing(self, rate_limiter, redis_client):
+        ip_key, user_key = "rate:tb:ip:10.0.0.3:/x", "rate:tb:user:u1:/x"
+        # Drain the user bucket through a different IP
+        await rate_limiter._check_buckets([user_key], limit=2, burst=0)
+        await rate_limiter._check_buckets([user_key], limit=2, burst=0)
+
+        results = await rate_limiter._check_buckets(
+            [ip_key, user_key], limit=2, burst=0, all_or_nothing=True
+        )
+
+        assert [r["allowed"] for r in results] == [False, False]
+        # The IP bucket was not charged for the rejected request
+        assert results[0]["remaining"] == 2
+
+    @pytest.mark.asyncio
+    async def test_falls_back_to_local_buckets_when_redis_fails(self, rate_limiter):
+        async def broken(*args, **kwargs):
+            return None
+
+        rate_limiter.redis_breaker.eval_script = broken
+
+        result = await rate_limiter._check_bucket("rate:tb:ip:10.0.0.4:/x", limit=10, burst=0)
+
+        assert result["allowed"] is True
+        assert "rate:tb:ip:10.0.0.4:/x" in rate_limiter.local_buckets
+
+
+class TestBucketKeys:
+    """Test bucket key naming and server-side script errors"""
+
+    @pytest.mark.asyncio
+    async def test_buckets_use_dedicated_key_prefix(self):
+        """Hash buckets never reuse the legacy JSON-string key names"""
+        limiter = EnhancedRateLimiter(FastAPI())
+        limiter.use_ip_based = True
+        limiter.use_user_based = True
+        limiter.combine_limits = True
+        limiter.redis_breaker = Mock()
+        limiter.redis_breaker.eval_script = AsyncMock(return_value=[1, 9, 1, 1, 9, 1])
+        request = Mock()
+        request.url.path = "/x"
+
+        await limiter._check_rate_limit(request, "10.0.2.1", "u1", {"limit": 10, "burst": 0})
+
+        keys = limiter.redis_breaker.eval_script.call_args.args[1]
+        assert keys == ["rate:tb:ip:10.0.2.1:/x", "rate:tb:user:u1:/x"]
+
+    @pytest.mark.asyncio
+    async def test_response_error_does_not_trip_breaker(self):
+        """WRONGTYPE and script errors are not Redis outages"""
+        script = AsyncMock(side_effect=ResponseError("WRONGTYPE"))
+        client = Mock()
+        client.register_script = Mock(return_value=script)
+        breaker = RedisCircuitBreaker(
+            redis_client=client,
+            failure_strategy=RedisFailureStrategy.FAIL_OPEN,
+            failure_threshold=1
+        )
+
+        with pytest.raises(ResponseError):
+            await breaker.eval_script("return 1", ["k"], [])
+
+        assert breaker.state == CircuitState.CLOSED
+        assert breaker.failure_count == 0
+
+
+class TestLocalBucketBound:
+    """Test degraded-mode bucket memory bound"""
+
+    @pytest.mark.asyncio
+    async def test_local_buckets_are_lru_bounded(self):
+        limiter = EnhancedRateLimiter(FastAPI())
+        limiter.local_bucket_max_entries = 3
+
+        for i in range(5):
+            await limiter._check_bucket(f"rate:tb:ip:10.0.1.{i}:/x", limit=10, burst=0)
+        # Touch the oldest survivor so it becomes most recently used
+        await limiter._check_bucket("rate:tb:ip:10.0.1.2:/x", limit=10, burst=0)
+        await limiter._check_bucket("rate:tb:ip:10.0.1.9:/x", limit=10, burst=0)
+
+        assert list(limiter.local_buckets) == [
+            "rate:tb:ip:10.0.1.4:/x", "rate:tb:ip:10.0.1.2:/x", "rate:tb:ip:10.0.1.9:/x"
+        ]
@@ -0,0 +1,107 @@
+"""
+Tests for RedisRateLimiter sliding-window counter and sliding-log algorithms
+"""
+
+from unittest.mock import patch
+
+import pytest
+import pytest_asyncio
+
+from api.middleware.redis_rate_limiter import (
+    SLIDING_LOG,
+    SLIDING_WINDOW,
+    RedisRateLimiter,
+)
+
+fakeredis = pytest.importorskip("fakeredis")
+pytest.importorskip("lupa")  # fakeredis needs lupa to run Lua scripts
+
+WINDOW_START = 1_700_000_040.0  # aligned to a 60 second window
+
+
+@pytest_asyncio.fixture
+async def redis_client():
+    client = fakeredis.aioredis.FakeRedis(decode_responses=True)
+    yield client
+    await client.aclose()
+
+
+def make_limiter(redis_client, algorithm, limit=10):
+    limiter = RedisRateLimiter(
+        requests_per_window=limit, window_seconds=60,
+        key_prefix="test", algorithm=algorithm
+    )
+    limiter.redis_client = redis_client
+    return limiter
+
+
+class TestSlidingWindowCounter:
+    """Test the sliding-window counter algorithm"""
+
+    @pytest.mark.asyncio
+    async def test_admits_up_to_limit_within_window(self, redis_client):
+        limiter = make_limiter(redis_client, SLIDING_WINDOW)
+
+        with patch("time.time", return_value=WINDOW_START + 5):
+            results = [await limiter.check_rate_limit("1.2.3.4") for _ in range(12)]
+
+        assert [allowed for allowed, _ in results] == [True] * 10 + [False] * 2
+        assert 1 <= results[-1][1] <= 55
+
+    @pytest.mark.asyncio
+    async def test_previous_window_is_weighted(self, redis_client):
+        limiter = make_limiter(redis_client, SLIDING_WINDOW)
+
+        with patch("time.time", return_value=WINDOW_START + 30):
+            for _ in range(10):
+                await limiter.check_rate_limit("1.2.3.4")
+
+        # 45s into the next window a quarter of the previous count still applies
+        with patch("time.time", return_value=WINDOW_START + 105):
+            allowed = [(await limiter.check_rate_limit("1.2.3.4"))[0] for _ in range(9)]
+            remaining = await limiter.get_remaining_requests("1.2.3.4")
+
+        assert allowed == [True] * 8 + [False]
+        assert remaining == 0
+
+    @pytest.mark.asyncio
+    async def test_memory_is_constant_per_identifier(self, redis_client):
+        limiter = make_limiter(redis_client, SLIDING_WINDOW, limit=1000)
+
+        with patch("time.time", return_value=WINDOW_START + 1):
+            for _ in range(200):
+                await limiter.check_rate_limit("1.2.3.4")
+
+            keys = await redis_client.keys("test:1.2.3.4*")
+            assert len(keys) == 1
+            assert await redis_client.get(keys[0]) == "200"
+            assert 0 < await redis_client.ttl(keys[0]) <= 120
+
+    @pytest.mark.asyncio
+    async def test_reset_limit_clears_counters(self, redis_client):
+        limiter = make_limiter(redis_client, SLIDING_WINDOW, limit=1)
+
+        with patch("time.time", return_value=WINDOW_START + 1):
+            await limiter.check_rate_limit("1.2.3.4")
+            assert (await limiter.check_rate_limit("1.2.3.4"))[0] is False
+            assert await limiter.reset_limit("1.2.3.4") is True
+            assert (await limiter.check_rate_limit("1.2.3.4"))[0] is True
+
+    def test_unknown_algorithm_rejected(self):
+        with pytest.raises(ValueError):
+            RedisRateLimiter(algorithm="leaky")
+
+
+class TestSlidingLog:
+    """Test the sorted-set sliding log"""
+
+    @pytest.mark.asyncio
+    async def test_same_second_requests_are_all_counted(self, redis_client):
+        limiter = make_limiter(redis_client, SLIDING_LOG, limit=3)
+
+        with patch("time.time", return_value=WINDOW_START):
+            results = [(await limiter.check_rate_limit("1.2.3.4"))[0] for _ in range(4)]
+            count = await redis_client.zcard("test:1.2.3.4")
+
+        assert results == [True, True, True, False]
+        assert count == 3
@@ -1,8 +1,4 @@
 """
-
-# Constants
-DEFAULT_RETRIES = 5
-
 Test security features including rate limiting, audit logging, and email alerts.
 """
 import pytest
@@ -12,24 +8,39 @@ from uuid import uuid4
 from fastapi import HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from services.rate_limiting import RateLimitService
+from services.rate_limiting import RateLimitService, UsageCounters
 from services.security_alerts import SecurityAlertService
 from database.user import User
 from database.rbac import AuditLog
 
+# Constants
+DEFAULT_RETRIES = 5
+
+
+def _audit_rows(count, feature='ai_assessment', age=timedelta(hours=1)):
+    """Rows returned by the reconciliation query."""
+    timestamp = datetime.now(timezone.utc) - age
+    result = MagicMock()
+    result.all.return_value = [(f'{feature}_request', timestamp)] * count
+    return result
+
 
 @pytest.mark.asyncio
 class TestRateLimiting:
     """Test AI feature rate limiting."""
 
+    @pytest.fixture(autouse=True)
+    def memory_counters(self):
+        with patch.object(RateLimitService, 'counters', UsageCounters(
+            use_redis=False)):
+            yield
+
     async def test_rate_limit_check_allowed(self):
         """Test rate limit check when usage is within limits."""
         mock_db = AsyncMock(spec=AsyncSession)
         mock_user = MagicMock(spec=User)
         mock_user.id = uuid4()
-        mock_result = MagicMock()
-        mock_result.scalar.return_value = 5
-        mock_db.execute.return_value = mock_result
+        mock_db.execute.return_value = _audit_rows(5)
         result = await RateLimitService.check_rate_limit(db=mock_db, user=
             mock_user, feature='ai_assessment', check_only=True)
         assert result['allowed'] is True
@@ -42,9 +53,7 @@ class TestRateLimiting:
         mock_db = AsyncMock(spec=AsyncSession)
         mock_user = MagicMock(spec=User)
         mock_user.id = uuid4()
-        mock_result = MagicMock()
-        mock_result.scalar.return_value = 10
-        mock_db.execute.return_value = mock_result
+        mock_db.execute.return_value = _audit_rows(10)
         result = await RateLimitService.check_rate_limit(db=mock_db, user=
             mock_user, feature='ai_assessment', check_only=True)
         assert result['allowed'] is False
@@ -57,17 +66,57 @@ class TestRateLimiting:
         mock_db = AsyncMock(spec=AsyncSession)
         mock_user = MagicMock(spec=User)
         mock_user.id = uuid4()
-        mock_count_result = MagicMock()
-        mock_count_result.scalar.return_value = 11
-        mock_oldest_result = MagicMock()
-        mock_oldest_result.scalar.return_value = datetime.now(timezone.utc
-            ) - timedelta(hours=12)
-        mock_db.execute.side_effect = [mock_count_result, mock_oldest_result]
+        mock_db.execute.return_value = _audit_rows(11, age=timedelta(hours=12))
         with pytest.raises(HTTPException) as exc_info:
             await RateLimitService.check_rate_limit(db=mock_db, user=
                 mock_user, feature='ai_assessment', check_only=False)
         assert exc_info.value.status_code == 429
         assert 'Rate limit exceeded' in exc_info.value.detail['error']
+        assert 10 * 3600 < exc_info.value.detail['reset_in_seconds'] <= 12 * 3600
+
+    async def test_counters_answer_without_querying_audit_log(self):
+        """Test that checks after reconciliation only read the counters."""
+        mock_db = AsyncMock(spec=AsyncSession)
+        mock_user = MagicMock(spec=User)
+        mock_user.id = uuid4()
+        mock_db.execute.return_value = _audit_rows(2)
+        await RateLimitService.check_rate_limit(db=mock_db, user=mock_user,
+            feature='ai_assessment', check_only=True)
+        await RateLimitService.track_usage(db=mock_db, user=mock_user,
+            feature='ai_assessment')
+        mock_db.execute.reset_mock()
+        result = await RateLimitService.check_rate_limit(db=mock_db, user=
+            mock_user, feature='ai_assessment', check_only=True)
+        stats = await RateLimitService.get_usage_stats(db=mock_db, user=
+            mock_user)
+        assert result['used_today'] == 3
+        assert stats['features']['ai_assessment']['used'] == 3
+        assert stats['features']['ai_policy_generation']['used'] == 0
+        mock_db.execute.assert_not_called()
+
+    async def test_reconciliation_restores_lost_counters(self):
+        """Test that counters are rebuilt from the audit log when stale."""
+        mock_db = AsyncMock(spec=AsyncSession)
+        mock_user = MagicMock(spec=User)
+        mock_user.id = uuid4()
+        mock_db.execute.return_value = _audit_rows(4)
+        await RateLimitService.check_rate_limit(db=mock_db, user=mock_user,
+            feature='ai_assessment', check_only=True)
+        RateLimitService.counters._local.clear()
+        result = await RateLimitService.check_rate_limit(db=mock_db, user=
+            mock_user, feature='ai_assessment', check_only=True)
+        assert result['used_today'] == 4
+        assert mock_db.execute.await_count == 2
+
+    async def test_usage_outside_window_is_not_counted(self):
+        """Test that audit rows older than the window are ignored."""
+        mock_db = AsyncMock(spec=AsyncSession)
+        mock_user = MagicMock(spec=User)
+        mock_user.id = uuid4()
+        mock_db.execute.return_value = _audit_rows(3, age=timedelta(hours=30))
+        result = await RateLimitService.check_rate_limit(db=mock_db, user=
+            mock_user, feature='ai_assessment', check_only=True)
+        assert result['used_today'] == 0
 
 
 @pytest.mark.asyncio
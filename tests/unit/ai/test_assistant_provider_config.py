@@ -0,0 +1,60 @@
+"""
+Unit tests for the legacy assistant's provider request config
+
+Tests that model, system instruction and tools are passed to the provider
+layer explicitly rather than read back from a configured model.
+"""
+
+from unittest.mock import Mock
+
+import pytest
+
+from config.ai_config import ModelType
+from services.ai.assistant_legacy import ComplianceAssistant
+from services.ai.exceptions import ModelUnavailableException
+
+
+@pytest.fixture
+def assistant():
+    """Assistant with only the collaborators config selection needs."""
+    assistant = ComplianceAssistant.__new__(ComplianceAssistant)
+    assistant.instruction_manager = Mock()
+    assistant.instruction_manager.get_instruction_with_monitoring.return_value = (
+        'general_instruction', 'Be brief.'
+    )
+    assistant.circuit_breaker = Mock()
+    assistant.circuit_breaker.is_model_available.return_value = True
+    return assistant
+
+
+class TestTaskProviderConfig:
+    """Test _get_task_provider_config."""
+
+    def test_instruction_and_tools_are_passed_through(self, assistant):
+        tools = [{'name': 'lookup_industry_regulations'}]
+
+        config, instruction_id = assistant._get_task_provider_config(
+            'analysis', {'framework': 'GDPR'}, tools=tools, temperature=0.3, max_tokens=800,
+        )
+
+        assert instruction_id == 'general_instruction'
+        assert config.model_name == ModelType.GEMINI_25_PRO.value
+        assert config.system_instruction == 'Be brief.'
+        assert config.tools == tools
+        assert (config.temperature, config.max_tokens) == (0.3, 800)
+
+    def test_unavailable_model_falls_back_to_default(self, assistant):
+        assistant.circuit_breaker.is_model_available.side_effect = (
+            lambda name: name != ModelType.GEMINI_25_PRO.value
+        )
+
+        config, instruction_id = assistant._get_task_provider_config('analysis')
+
+        assert config.model_name == ModelType.GEMINI_25_FLASH.value
+        assert instruction_id == 'fallback_default'
+
+    def test_no_available_model_raises(self, assistant):
+        assistant.circuit_breaker.is_model_available.return_value = False
+
+        with pytest.raises(ModelUnavailableException):
+            assistant._get_task_provider_config('analysis')
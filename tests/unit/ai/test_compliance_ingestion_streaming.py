@@ -0,0 +1,299 @@
+"""
+Unit tests for streaming compliance manifest ingestion
+
+Tests the incremental manifest parser, the producer/consumer write pipeline
+and delta-only re-ingestion using a fake Neo4j driver.
+"""
+
+import asyncio
+import json
+from pathlib import Path
+from typing import Any, Dict, List
+
+import pytest
+
+pytest.importorskip("neo4j")
+
+from services.ai import compliance_ingestion_pipeline as pipeline_module
+from services.ai.compliance_ingestion_pipeline import (
+    REGULATION_MERGE_QUERY,
+    UNCHANGED_REGULATIONS_QUERY,
+    Neo4jComplianceIngestion,
+    iter_manifest_items,
+)
+from services.caching.graph_version import GraphVersion
+
+REAL_MANIFEST = Path(__file__).parents[3] / "data" / "manifests" / "uk_obligations_extracted.json"
+
+
+def make_items(count: int, version: str = "v1") -> List[Dict[str, Any]]:
+    return [
+        {
+            "id": f"REG-{i:04d}",
+            "title": f"Regulation {i} {version}",
+            "url": f"https://example.org/reg/{i}",
+            "priority": i % 5 + 1,
+            "tags": ["uk", f"tag-{i % 3}"],
+            "automation_potential": 0.5,
+        }
+        for i in range(count)
+    ]
+
+
+class FakeResult:
+    def __init__(self, records: List[Dict[str, Any]]):
+        self.records = records
+
+    async def data(self):
+        return self.records
+
+
+class FakeGraph:
+    """Stores Regulation data_hash by id and records MERGE batches."""
+
+    def __init__(self, write_delay: float = 0.0, fail_ids=()):
+        self.hashes: Dict[str, str] = {}
+        self.merged: List[List[str]] = []
+        self.write_delay = write_delay
+        self.fail_ids = set(fail_ids)
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+
+class FakeTransaction:
+    def __init__(self, graph: FakeGraph):
+        self.graph = graph
+
+    async def run(self, query, **params):
+        if query == UNCHANGED_REGULATIONS_QUERY:
+            return FakeResult(
+                [
+                    {"id": item["id"]}
+                    for item in params["items"]
+                    if self.graph.hashes.get(item["id"]) == item["data_hash"]
+                ]
+            )
+        assert query == REGULATION_MERGE_QUERY
+        batch = params["batch"]
+        await asyncio.sleep(self.graph.write_delay)
+        if self.graph.fail_ids.intersection(item["id"] for item in batch):
+            raise RuntimeError("write failed")
+        records = []
+        for item in batch:
+            created = item["id"] not in self.graph.hashes
+            self.graph.hashes[item["id"]] = item["data_hash"]
+            records.append({"id": item["id"], "created": created, "updated": not created})
+        self.graph.merged.append([item["id"] for item in batch])
+        return FakeResult(records)
+
+
+class FakeSession:
+    def __init__(self, graph: FakeGraph):
+        self.graph = graph
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def run(self, query, **params):
+        return FakeResult([])
+
+    async def execute_write(self, work):
+        self.graph.in_flight += 1
+        self.graph.max_in_flight = max(self.graph.max_in_flight, self.graph.in_flight)
+        try:
+            return await work(FakeTransaction(self.graph))
+        finally:
+            self.graph.in_flight -= 1
+
+
+class FakeDriver:
+    def __init__(self, graph: FakeGraph):
+        self.graph = graph
+
+    def session(self, database=None):
+        return FakeSession(self.graph)
+
+    async def close(self):
+        pass
+
+
+def make_pipeline(graph: FakeGraph, batch_size: int = 10) -> Neo4jComplianceIngestion:
+    pipeline = Neo4jComplianceIngestion(
+        neo4j_uri="bolt://localhost:7687",
+        neo4j_user="neo4j",
+        neo4j_password="test",
+        batch_size=batch_size,
+    )
+    pipeline.driver = FakeDriver(graph)
+    return pipeline
+
+
+def write_manifest(tmp_path: Path, items: List[Dict[str, Any]]) -> Path:
+    path = tmp_path / "manifest.json"
+    path.write_text(json.dumps({"version": "2", "meta": {"note": "} ] {"}, "items": items, "count": len(items)}))
+    return path
+
+
+@pytest.mark.unit
+class TestManifestStreaming:
+    """Incremental manifest parser"""
+
+    @pytest.fixture(autouse=True)
+    def stdlib_parser(self, monkeypatch):
+        monkeypatch.setattr(pipeline_module, "ijson", None)
+
+    @pytest.mark.parametrize("read_size", [1, 7, 4096])
+    def test_matches_json_load(self, tmp_path, read_size):
+        items = make_items(25) + [{"id": "x", "nested": {"a": [1, 2.5e-3, None, True]}, "text": 'quote " and \\\\'}]
+        path = write_manifest(tmp_path, items)
+
+        streamed = list(iter_manifest_items(path, read_size=read_size))
+
+        assert streamed == json.loads(path.read_text())["items"]
+
+    def test_bare_array_and_empty_array(self, tmp_path):
+        path = tmp_path / "bare.json"
+        path.write_text(json.dumps([1, 22, 333]))
+        assert list(iter_manifest_items(path, read_size=2)) == [1, 22, 333]
+
+        path.write_text('{"items": [ ]}')
+        assert list(iter_manifest_items(path)) == []
+
+    def test_missing_key_yields_nothing(self, tmp_path):
+        path = write_manifest(tmp_path, make_items(3))
+        assert list(iter_manifest_items(path, items_key="obligations")) == []
+
+    def test_truncated_manifest_raises(self, tmp_path):
+        path = tmp_path / "truncated.json"
+        path.write_text('{"items": [{"id": "a"}, {"id": "b"')
+        with pytest.raises(ValueError):
+            list(iter_manifest_items(path, read_size=4))
+
+    @pytest.mark.skipif(not REAL_MANIFEST.exists(), reason="manifest not present")
+    def test_real_manifest(self):
+        expected = json.loads(REAL_MANIFEST.read_text())["obligations"]
+        assert list(iter_manifest_items(REAL_MANIFEST, items_key="obligations")) == expected
+
+
+@pytest.mark.unit
+class TestStreamingIngestion:
+    """Producer/consumer ingestion with delta writes"""
+
+    @pytest.fixture(autouse=True)
+    def graph_version(self, monkeypatch):
+        version = GraphVersion()
+
+        async def get_graph_version():
+            return version
+
+        monkeypatch.setattr(pipeline_module, "get_graph_version", get_graph_version)
+        return version
+
+    @pytest.mark.asyncio
+    async def test_ingests_all_items_with_concurrent_writers(self, tmp_path):
+        graph = FakeGraph(write_delay=0.01)
+        pipeline = make_pipeline(graph, batch_size=10)
+        path = write_manifest(tmp_path, make_items(95))
+
+        metrics = await pipeline.ingest_compliance_manifest_streaming(path, write_concurrency=3)
+
+        assert len(graph.hashes) == 95
+        assert sorted(len(batch) for batch in graph.merged) == [5] + [10] * 9
+        assert graph.max_in_flight == 3
+        assert metrics.total_items == 95
+        assert metrics.successful_items == 95
+        assert metrics.nodes_created == 95
+        stats = metrics.to_dict()
+        assert stats["items_per_second"] > 0
+        assert stats["peak_rss_mb"] is None or stats["peak_rss_mb"] > 0
+
+    @pytest.mark.asyncio
+    async def test_reingestion_writes_only_changed_items(self, tmp_path, graph_version):
+        graph = FakeGraph()
+        items = make_items(30)
+        await make_pipeline(graph).ingest_compliance_manifest_streaming(write_manifest(tmp_path, items))
+        graph.merged.clear()
+
+        await make_pipeline(graph).ingest_compliance_manifest_streaming(write_manifest(tmp_path, items))
+        assert graph.merged == []
+        # Nothing written, so retrieval caches stay valid
+        assert await graph_version.get() == 1
+
+        items[7]["title"] = "Regulation 7 amended"
+        metrics = await make_pipeline(graph).ingest_compliance_manifest_streaming(write_manifest(tmp_path, items))
+
+        assert graph.merged == [["REG-0007"]]
+        assert await graph_version.get() == 2
+        assert metrics.nodes_unchanged == 29
+        assert metrics.nodes_updated == 1
+        assert metrics.successful_items == 30
+
+    @pytest.mark.asyncio
+    async def test_failed_batch_does_not_stop_pipeline(self, tmp_path):
+        graph = FakeGraph(fail_ids={"REG-0012"})
+        pipeline = make_pipeline(graph, batch_size=10)
+
+        metrics = await pipeline.ingest_compliance_manifest_streaming(write_manifest(tmp_path, make_items(30)))
+
+        assert metrics.failed_items == 10
+        assert metrics.successful_items == 20
+        assert "REG-0012" in pipeline._failed_ids
+        assert len(graph.hashes) == 20
+
+    @pytest.mark.asyncio
+    async def test_writer_failure_cancels_producer_and_propagates(self, tmp_path):
+        class BrokenSession(FakeSession):
+            async def __aenter__(self):
+                raise ConnectionError("session unavailable")
+
+        graph = FakeGraph()
+        pipeline = make_pipeline(graph, batch_size=1)
+        await pipeline.create_indexes_and_constraints()
+        pipeline.create_indexes_and_constraints = lambda: asyncio.sleep(0)
+        # Writers fail to open their sessions
+        pipeline.driver.session = lambda database=None: BrokenSession(graph)
+        path = write_manifest(tmp_path, make_items(20))
+
+        with pytest.raises(ConnectionError):
+            await asyncio.wait_for(
+                pipeline.ingest_compliance_manifest_streaming(path, max_pending_batches=1),
+                timeout=5,
+            )
+
+        assert graph.hashes == {}
+        # The producer does not stay blocked on the full queue
+        assert asyncio.all_tasks() == {asyncio.current_task()}
+
+    @pytest.mark.asyncio
+    async def test_parser_failure_cancels_writers_and_propagates(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(pipeline_module, "ijson", None)
+        path = tmp_path / "truncated.json"
+        path.write_text(json.dumps({"items": make_items(3)})[:-20])
+
+        with pytest.raises(ValueError):
+            await asyncio.wait_for(make_pipeline(FakeGraph()).ingest_compliance_manifest_streaming(path), timeout=5)
+
+    @pytest.mark.asyncio
+    async def test_invalid_items_are_not_written(self, tmp_path):
+        graph = FakeGraph()
+        items = make_items(5) + [{"id": "bad", "title": "No priority"}]
+
+        metrics = await make_pipeline(graph).ingest_compliance_manifest_streaming(write_manifest(tmp_path, items))
+
+        assert metrics.total_items == 6
+        assert metrics.failed_items == 1
+        assert "bad" not in graph.hashes
+
+    def test_data_hash_ignores_ingest_time_fields(self):
+        pipeline = make_pipeline(FakeGraph())
+        item = make_items(1)[0]
+
+        first = pipeline._validate_batch([dict(item)])[0]
+        second = pipeline._validate_batch([dict(item)])[0]
+        changed = pipeline._validate_batch([dict(item, tags=["uk"])])[0]
+
+        assert first["data_hash"] == second["data_hash"]
+        assert first["data_hash"] != changed["data_hash"]
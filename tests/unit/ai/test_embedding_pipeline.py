@@ -0,0 +1,167 @@
+"""
+Unit tests for the batched embedding pipeline
+
+Tests batch sizing, ordering, retries, the prepare/store stages and the
+LangChain adapter using a fake embedding model.
+"""
+
+import asyncio
+from typing import List
+
+import pytest
+
+from services.ai.embedding_pipeline import (
+    EmbeddingPipeline,
+    EmbeddingPipelineConfig,
+    EmbeddingPipelineError,
+)
+
+
+class FakeEmbeddingModel:
+    """Embeds text as [len(text), index of first char] and records calls."""
+
+    def __init__(self, delay: float = 0.0, failures: int = 0):
+        self.delay = delay
+        self.failures = failures
+        self.calls: List[List[str]] = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def embed_batch(self, texts):
+        self.calls.append(list(texts))
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+            if self.failures:
+                self.failures -= 1
+                raise RuntimeError("rate limited")
+            return [[float(len(text)), float(ord(text[0]))] for text in texts]
+        finally:
+            self.in_flight -= 1
+
+    def embed_documents(self, texts):
+        self.calls.append(list(texts))
+        return [[float(len(text))] for text in texts]
+
+
+def _config(**overrides):
+    return EmbeddingPipelineConfig(**{'base_delay': 0.0, **overrides})
+
+
+@pytest.mark.unit
+class TestBatching:
+    """Test how texts are grouped into provider calls"""
+
+    def test_batches_bounded_by_count(self):
+        pipeline = EmbeddingPipeline(FakeEmbeddingModel().embed_batch, _config(batch_size=2))
+        assert pipeline.make_batches(['a', 'b', 'c', 'd', 'e']) == [range(0, 2), range(2, 4), range(4, 5)]
+
+    def test_batches_bounded_by_characters(self):
+        pipeline = EmbeddingPipeline(FakeEmbeddingModel().embed_batch, _config(max_batch_chars=5))
+        assert pipeline.make_batches(['aaa', 'bb', 'c', 'dddddddd']) == [range(0, 2), range(2, 3), range(3, 4)]
+
+    @pytest.mark.asyncio
+    async def test_embeddings_keep_input_order(self):
+        model = FakeEmbeddingModel(delay=0.001)
+        pipeline = EmbeddingPipeline(model.embed_batch, _config(batch_size=3, max_concurrency=4))
+        texts = [chr(ord('a') + i) * (i + 1) for i in range(10)]
+
+        embeddings = await pipeline.embed(texts)
+
+        assert embeddings == [[float(len(text)), float(ord(text[0]))] for text in texts]
+        assert len(model.calls) == 4
+
+    @pytest.mark.asyncio
+    async def test_concurrency_is_bounded(self):
+        model = FakeEmbeddingModel(delay=0.01)
+        pipeline = EmbeddingPipeline(model.embed_batch, _config(batch_size=1, max_concurrency=3))
+
+        await pipeline.embed([f'text {i}' for i in range(12)])
+
+        assert model.max_in_flight == 3
+
+
+@pytest.mark.unit
+class TestRetries:
+    """Test per-batch retry with backoff"""
+
+    @pytest.mark.asyncio
+    async def test_failed_batch_is_retried(self):
+        model = FakeEmbeddingModel(failures=2)
+        pipeline = EmbeddingPipeline(model.embed_batch, _config(max_attempts=3))
+
+        result = await pipeline.run(['policy'], text_of=lambda text: text)
+
+        assert result.embeddings == [[6.0, float(ord('p'))]]
+        assert result.stats.retries == 2
+
+    @pytest.mark.asyncio
+    async def test_raises_after_max_attempts(self):
+        model = FakeEmbeddingModel(failures=5)
+        pipeline = EmbeddingPipeline(model.embed_batch, _config(max_attempts=2))
+
+        with pytest.raises(EmbeddingPipelineError):
+            await pipeline.embed(['policy'])
+        assert len(model.calls) == 2
+
+    @pytest.mark.asyncio
+    async def test_wrong_embedding_count_is_an_error(self):
+        async def short_batch(texts):
+            return [[0.0]]
+
+        pipeline = EmbeddingPipeline(short_batch, _config(max_attempts=1))
+        with pytest.raises(EmbeddingPipelineError):
+            await pipeline.embed(['a', 'b'])
+
+
+@pytest.mark.unit
+class TestStages:
+    """Test the prepare and store stages, progress and stats"""
+
+    @pytest.mark.asyncio
+    async def test_prepare_store_and_progress(self):
+        model = FakeEmbeddingModel()
+        pipeline = EmbeddingPipeline(model.embed_batch, _config(batch_size=2))
+        items = [{'id': i, 'content': f'chunk {i}'} for i in range(5)]
+        stored = []
+        progress = []
+
+        async def prepare(item):
+            return f"context: {item['content']}"
+
+        async def store(batch, embeddings):
+            stored.append(([item['id'] for item in batch], embeddings))
+
+        result = await pipeline.run(
+            items,
+            text_of=lambda item: item['content'],
+            prepare=prepare,
+            store=store,
+            progress=lambda done, total: progress.append((done, total)),
+        )
+
+        assert all(text.startswith('context: ') for call in model.calls for text in call)
+        assert sorted(item_id for ids, _ in stored for item_id in ids) == [0, 1, 2, 3, 4]
+        assert len(stored) == 3
+        assert progress[-1] == (5, 5)
+        stats = result.stats.to_dict()
+        assert stats['items'] == 5
+        assert stats['batches'] == 3
+        assert set(stats['stage_seconds']) == {'prepare', 'embed', 'store'}
+
+    @pytest.mark.asyncio
+    async def test_empty_input(self):
+        model = FakeEmbeddingModel()
+        pipeline = EmbeddingPipeline(model.embed_batch, _config())
+
+        assert await pipeline.embed([]) == []
+        assert model.calls == []
+
+    @pytest.mark.asyncio
+    async def test_from_langchain_uses_embed_documents(self):
+        model = FakeEmbeddingModel()
+        pipeline = EmbeddingPipeline.from_langchain(model, _config(batch_size=10))
+
+        assert await pipeline.embed(['ab', 'abc']) == [[2.0], [3.0]]
+        assert model.calls == [['ab', 'abc']]
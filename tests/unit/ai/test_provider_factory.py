@@ -8,6 +8,13 @@ import pytest
 from unittest.mock import Mock, MagicMock, patch
 from typing import Dict, Any
 
+from config.ai_config import ModelType
+from services.ai.ab_testing_framework import (
+    ABTestingFramework,
+    ExperimentConfig,
+    ExperimentMetricType,
+    ExperimentType,
+)
 from services.ai.providers.factory import ProviderFactory, TASK_COMPLEXITY_MAP
 from services.ai.providers.base import AIProvider
 from services.ai.exceptions import ModelUnavailableException
@@ -34,7 +41,7 @@ def mock_circuit_breaker():
 @pytest.fixture
 def provider_factory(mock_instruction_manager, mock_circuit_breaker):
     """Create provider factory with mocks."""
-    return ProviderFactory(mock_instruction_manager, mock_circuit_breaker)
+    return ProviderFactory(mock_instruction_manager, mock_circuit_breaker, ab_testing=ABTestingFramework())
 
 
 class TestProviderFactory:
@@ -169,6 +176,132 @@ class TestProviderFactory:
         assert 'Model selection failed' in str(exc_info.value.reason)
 
 
+VARIANT_MODELS = {'control': ModelType.GEMINI_25_FLASH, 'treatment': ModelType.GEMINI_25_PRO}
+
+
+@pytest.fixture
+def ab_testing():
+    """A/B testing framework with a running model experiment."""
+    framework = ABTestingFramework()
+    framework._schedule_coro = lambda coro: coro.close()
+    config = ExperimentConfig(
+        name='Flash vs Pro',
+        description='Model experiment',
+        experiment_type=ExperimentType.AI_MODEL_COMPARISON,
+        metric_type=ExperimentMetricType.CONTINUOUS,
+        primary_metric='response_quality',
+        min_effect_size=0.2,
+    )
+    experiment_id = framework.create_experiment(config)['experiment_id']
+    framework.start_experiment(experiment_id)
+    return framework
+
+
+@pytest.fixture
+def experiment_id(ab_testing):
+    """ID of the running model experiment."""
+    return next(iter(ab_testing.experiments))
+
+
+class TestProviderFactoryModelExperiments:
+    """Test routing tasks through model A/B experiments."""
+
+    @pytest.fixture
+    def experiment_factory(self, mock_instruction_manager, mock_circuit_breaker, ab_testing, experiment_id):
+        factory = ProviderFactory(mock_instruction_manager, mock_circuit_breaker, ab_testing=ab_testing)
+        factory.register_model_experiment('analysis', experiment_id, VARIANT_MODELS)
+        return factory
+
+    def requested_model(self, mock_instruction_manager):
+        return mock_instruction_manager.get_model_with_instruction.call_args[1]['model_type']
+
+    def test_register_requires_experiment_and_models(self, provider_factory, ab_testing, experiment_id):
+        """Test registration is validated."""
+        with pytest.raises(ValueError):
+            provider_factory.register_model_experiment('analysis', experiment_id, VARIANT_MODELS)
+
+        factory = ProviderFactory(Mock(), Mock(), ab_testing=ab_testing)
+        with pytest.raises(ValueError) as exc_info:
+            factory.register_model_experiment(
+                'analysis', experiment_id, {'control': ModelType.GEMINI_25_FLASH},
+            )
+        assert 'treatment' in str(exc_info.value)
+
+    def test_request_gets_assigned_variant_model(
+        self, experiment_factory, mock_instruction_manager, ab_testing, experiment_id
+    ):
+        """Test the assigned variant's model is requested."""
+        model, _ = experiment_factory.get_provider_for_task('analysis', {'user_id': 'user_1'})
+
+        variant = ab_testing.assign_variant(experiment_id, 'user_1')
+        assert self.requested_model(mock_instruction_manager) == VARIANT_MODELS[variant]
+        assert model._experiment_variant == (experiment_id, variant)
+
+    def test_requests_outside_experiment_use_default_selection(
+        self, experiment_factory, mock_instruction_manager
+    ):
+        """Test tasks without a unit id or experiment are not routed."""
+        experiment_factory.get_provider_for_task('analysis')
+        assert self.requested_model(mock_instruction_manager) is None
+
+        experiment_factory.get_provider_for_task('help', {'user_id': 'user_1'})
+        assert self.requested_model(mock_instruction_manager) is None
+
+    def test_registration_is_shared_through_framework(
+        self, experiment_factory, mock_instruction_manager, ab_testing
+    ):
+        """Test every factory on the framework routes a registered task."""
+        other_factory = ProviderFactory(mock_instruction_manager, Mock(), ab_testing=ab_testing)
+
+        other_factory.get_provider_for_task('analysis', {'user_id': 'user_1'})
+
+        assert self.requested_model(mock_instruction_manager) in VARIANT_MODELS.values()
+
+    def test_outcome_is_recorded_for_variant(self, experiment_factory, ab_testing, experiment_id):
+        """Test the primary and secondary metrics land on the assigned variant."""
+        ab_testing.experiments[experiment_id].secondary_metrics = ['response_time']
+        context = {'user_id': 'user_1'}
+        model, _ = experiment_factory.get_provider_for_task('analysis', context)
+        variant = model._experiment_variant[1]
+
+        recorded = experiment_factory.record_experiment_outcome(
+            model, context, {'response_quality': 0.8, 'response_time': 1.5, 'error_rate': 0.0},
+        )
+
+        assert recorded is True
+        assert ab_testing.variant_stats[experiment_id][variant].count == 1
+        data = ab_testing.storage_backend.query(experiment_id)
+        assert [(d.variant, d.user_id, d.primary_metric_value) for d in data] == [(variant, 'user_1', 0.8)]
+        assert data[0].secondary_metrics == {'response_time': 1.5}
+
+    def test_outcome_without_experiment_or_primary_metric_is_skipped(
+        self, experiment_factory, ab_testing, experiment_id
+    ):
+        """Test requests outside the experiment or missing its metric record nothing."""
+        model, _ = experiment_factory.get_provider_for_task('analysis', {'user_id': 'user_1'})
+        other_model, _ = experiment_factory.get_provider_for_task('help', {'user_id': 'user_1'})
+        other_model._experiment_variant = None
+
+        assert not experiment_factory.record_experiment_outcome(model, {'user_id': 'user_1'}, {'error_rate': 1.0})
+        assert not experiment_factory.record_experiment_outcome(
+            other_model, {'user_id': 'user_1'}, {'response_quality': 0.8},
+        )
+        assert ab_testing.storage_backend.count(experiment_id) == 0
+
+    def test_stopped_experiment_serves_winner(
+        self, experiment_factory, mock_instruction_manager, ab_testing, experiment_id
+    ):
+        """Test an early-stopped experiment routes everyone to the winner."""
+        for i in range(200):
+            ab_testing.record_metric(experiment_id, 'control', f'user_{i}', 0.5 + (i % 5) * 0.01)
+            ab_testing.record_metric(experiment_id, 'treatment', f'user_{i}', 0.6 + (i % 5) * 0.01)
+        assert ab_testing.get_traffic_decision(experiment_id).stopped
+
+        for i in range(20):
+            experiment_factory.get_provider_for_task('analysis', {'session_id': f'session_{i}'})
+            assert self.requested_model(mock_instruction_manager) == ModelType.GEMINI_25_PRO
+
+
 @pytest.mark.integration
 class TestProviderFactoryIntegration:
     """Integration tests for provider factory."""
@@ -179,6 +312,7 @@ class TestProviderFactoryIntegration:
 
         assert factory.instruction_manager is not None
         assert factory.circuit_breaker is not None
+        assert factory.ab_testing is not None
 
     @pytest.mark.skip(reason="Requires AI API keys")
     def test_real_model_selection(self):
@@ -0,0 +1,268 @@
+"""
+Unit tests for the AI request batcher
+
+Tests single-flight coalescing, micro-batch dispatch and the
+AIPerformanceOptimizer execution path using a fake provider.
+"""
+
+import asyncio
+from typing import List
+from unittest.mock import AsyncMock, Mock, patch
+
+import pytest
+
+from services.ai.performance_optimizer import (
+    AIPerformanceOptimizer,
+    OptimizationStrategy,
+)
+from services.ai.providers.base import AIProvider, ProviderConfig, ProviderResponse
+from services.ai.providers.gemini_provider import GeminiProvider
+from services.ai.request_batcher import RequestBatcher
+
+
+class FakeProvider(AIProvider):
+    """Provider that records calls and answers after a small delay."""
+
+    supports_batching = True
+
+    def __init__(self, delay: float = 0.01, fail_on: str = None):
+        self.delay = delay
+        self.fail_on = fail_on
+        self.generate_calls: List[str] = []
+        self.batch_calls: List[List[str]] = []
+
+    async def generate(self, prompt, config):
+        self.generate_calls.append(prompt)
+        await asyncio.sleep(self.delay)
+        if prompt == self.fail_on:
+            raise RuntimeError("provider failure")
+        return ProviderResponse(text=f"answer:{prompt}", model_used=config.model_name, tokens_used=10)
+
+    async def generate_batch(self, prompts, config):
+        self.batch_calls.append(list(prompts))
+        await asyncio.sleep(self.delay)
+        return [
+            RuntimeError("provider failure") if prompt == self.fail_on
+            else ProviderResponse(text=f"answer:{prompt}", model_used=config.model_name)
+            for prompt in prompts
+        ]
+
+    async def generate_stream(self, prompt, config):
+        yield prompt
+
+    def is_available(self):
+        return True
+
+    def get_model_name(self):
+        return 'fake-model'
+
+
+@pytest.fixture
+def provider():
+    return FakeProvider()
+
+
+@pytest.fixture
+def config():
+    return ProviderConfig(model_name='fake-model')
+
+
+class TestRequestBatcher:
+    """Test coalescing and batching behaviour."""
+
+    @pytest.mark.asyncio
+    async def test_identical_prompts_share_one_call(self, provider, config):
+        batcher = RequestBatcher(lambda name: provider, max_wait_seconds=0.01)
+
+        results = await asyncio.gather(*(
+            batcher.submit("What is GDPR?  ", config) for _ in range(20)
+        ))
+
+        assert all(r.text == "answer:What is GDPR?  " for r in results)
+        assert sum(len(batch) for batch in provider.batch_calls) + len(provider.generate_calls) == 1
+        assert batcher.stats.coalesced == 19
+        assert batcher.inflight_count == 0
+
+    @pytest.mark.asyncio
+    async def test_distinct_prompts_are_batched(self, provider, config):
+        batcher = RequestBatcher(lambda name: provider, max_batch_size=4, max_wait_seconds=0.01)
+
+        results = await asyncio.gather(*(
+            batcher.submit(f"prompt {i}", config) for i in range(8)
+        ))
+
+        assert [r.text for r in results] == [f"answer:prompt {i}" for i in range(8)]
+        assert [len(batch) for batch in provider.batch_calls] == [4, 4]
+        assert batcher.stats.provider_calls == 2
+
+    @pytest.mark.asyncio
+    async def test_partial_batch_flushes_after_window(self, provider, config):
+        batcher = RequestBatcher(lambda name: provider, max_batch_size=10, max_wait_seconds=0.01)
+
+        result = await asyncio.wait_for(batcher.submit("lonely prompt", config), timeout=1)
+
+        assert result.text == "answer:lonely prompt"
+        assert provider.generate_calls == ["lonely prompt"]
+
+    @pytest.mark.asyncio
+    async def test_incompatible_configs_not_batched_together(self, provider):
+        batcher = RequestBatcher(lambda name: provider, max_batch_size=2, max_wait_seconds=0.01)
+
+        await asyncio.gather(
+            batcher.submit("a", ProviderConfig(model_name='fake-model', temperature=0.1)),
+            batcher.submit("b", ProviderConfig(model_name='fake-model', temperature=0.9)),
+        )
+
+        assert provider.batch_calls == []
+        assert sorted(provider.generate_calls) == ["a", "b"]
+
+    @pytest.mark.asyncio
+    async def test_each_caller_gets_own_error(self, config):
+        provider = FakeProvider(fail_on="bad")
+        batcher = RequestBatcher(lambda name: provider, max_batch_size=2, max_wait_seconds=0.01)
+
+        good, bad = await asyncio.gather(
+            batcher.submit("good", config),
+            batcher.submit("bad", config),
+            return_exceptions=True,
+        )
+
+        assert good.text == "answer:good"
+        assert isinstance(bad, RuntimeError)
+        assert batcher.stats.failures == 1
+
+    @pytest.mark.asyncio
+    async def test_cancelled_leader_does_not_cancel_followers(self, provider, config):
+        batcher = RequestBatcher(lambda name: provider, max_wait_seconds=0.01)
+
+        leader = asyncio.create_task(batcher.submit("shared", config))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(batcher.submit("shared", config))
+        await asyncio.sleep(0)
+        leader.cancel()
+
+        result = await follower
+        assert result.text == "answer:shared"
+
+    @pytest.mark.asyncio
+    async def test_flush_dispatches_pending(self, provider, config):
+        batcher = RequestBatcher(lambda name: provider, max_batch_size=10, max_wait_seconds=10)
+
+        task = asyncio.create_task(batcher.submit("waiting", config))
+        await asyncio.sleep(0)
+        assert batcher.pending_count == 1
+
+        await batcher.flush()
+
+        assert (await task).text == "answer:waiting"
+
+    @pytest.mark.asyncio
+    async def test_provider_without_native_batching_skips_window(self, config):
+        provider = FakeProvider()
+        provider.supports_batching = False
+        batcher = RequestBatcher(lambda name: provider, max_batch_size=10, max_wait_seconds=10)
+
+        results = await asyncio.wait_for(asyncio.gather(
+            batcher.submit("first", config),
+            batcher.submit("second", config),
+        ), timeout=1)
+
+        assert [r.text for r in results] == ["answer:first", "answer:second"]
+        assert provider.batch_calls == []
+        assert batcher.pending_count == 0
+
+
+class TestOptimizerExecution:
+    """Test AIPerformanceOptimizer routing through the batcher."""
+
+    def test_strategies_defined(self):
+        assert OptimizationStrategy.BATCH_PROCESSING.value == 'batch_processing'
+        assert OptimizationStrategy.PROMPT_COMPRESSION.value == 'prompt_compression'
+        assert OptimizationStrategy.PARALLEL_EXECUTION.value == 'parallel_execution'
+
+    @pytest.mark.asyncio
+    async def test_execute_request_coalesces(self, provider, config):
+        factory = type('Factory', (), {'get_provider_by_name': lambda self, name: provider})()
+        optimizer = AIPerformanceOptimizer(provider_factory=factory)
+
+        responses = await asyncio.gather(*(
+            optimizer.execute_request("Summarise ISO 27001 Annex A", config,
+                                      {"framework": "ISO27001"})
+            for _ in range(10)
+        ))
+
+        assert {r.text for r in responses} == {"answer:Summarise ISO27001 Annex A"}
+        metrics = await optimizer.get_performance_metrics()
+        assert metrics['batching']['coalesced'] == 9
+        assert metrics['batching']['provider_calls'] == 1
+
+    @pytest.mark.asyncio
+    async def test_high_priority_dispatches_immediately(self, provider, config):
+        factory = type('Factory', (), {'get_provider_by_name': lambda self, name: provider})()
+        optimizer = AIPerformanceOptimizer(provider_factory=factory)
+        optimizer.request_batcher.max_wait_seconds = 10
+
+        response = await asyncio.wait_for(
+            optimizer.execute_request("urgent", config, priority=9), timeout=1
+        )
+
+        assert response.text == "answer:urgent"
+
+
+class FakeGeminiModel:
+    """Stand-in for a GenerativeModel that records generate_content calls."""
+
+    def __init__(self):
+        self.calls = []
+
+    def generate_content(self, prompt, safety_settings=None, generation_config=None):
+        self.calls.append(prompt)
+        return type('Response', (), {'text': f"answer:{prompt}"})()
+
+
+class TestGeminiRequests:
+    """Test Gemini requests through the batcher stay per prompt."""
+
+    @pytest.fixture
+    def gemini(self):
+        circuit_breaker = Mock()
+        circuit_breaker.is_model_available.return_value = True
+        analytics = Mock()
+        analytics.record_metric = AsyncMock()
+        return GeminiProvider(circuit_breaker=circuit_breaker, analytics_monitor=analytics)
+
+    @pytest.mark.asyncio
+    async def test_distinct_prompts_are_never_combined(self, gemini):
+        model = FakeGeminiModel()
+        batcher = RequestBatcher(lambda name: gemini, max_batch_size=8, max_wait_seconds=0.05)
+        config = ProviderConfig(model_name='gemini-2.5-flash')
+
+        with patch('services.ai.providers.gemini_provider.get_ai_model', return_value=model):
+            results = await asyncio.gather(
+                batcher.submit("user a question", config),
+                batcher.submit("user b question", config),
+                batcher.submit("user b question", config),
+            )
+
+        assert [r.text for r in results] == [
+            "answer:user a question", "answer:user b question", "answer:user b question"
+        ]
+        # Identical prompts are coalesced; distinct ones each get their own request
+        assert sorted(model.calls) == ["user a question", "user b question"]
+
+    @pytest.mark.asyncio
+    async def test_config_instruction_and_tools_reach_model(self, gemini):
+        tools = [{'name': 'lookup_industry_regulations', 'parameters': {}}]
+        config = ProviderConfig(
+            model_name='gemini-2.5-flash', system_instruction='Be brief.', tools=tools,
+        )
+
+        with patch(
+            'services.ai.providers.gemini_provider.get_ai_model', return_value=FakeGeminiModel()
+        ) as get_model:
+            await gemini.generate("q", config)
+            await gemini.generate("q2", config)
+
+        get_model.assert_called_once_with(
+            'gemini-2.5-flash', system_instruction='Be brief.', tools=tools,
+        )
@@ -280,6 +280,22 @@ class TestResponseGenerator:
         # Should return empty or error response
         assert response is not None
 
+    async def test_outcome_is_recorded_for_experiment(self, response_generator, mock_provider_factory):
+        """Test response time and errors are passed on for model experiments."""
+        model = mock_provider_factory.get_provider_for_task.return_value[0]
+        model.generate_content_async = AsyncMock(return_value=Mock(text="Test response"))
+        context = {'user_id': '123'}
+
+        await response_generator.generate_simple("Test", "Test", task_type='help', context=context)
+        recorded_model, recorded_context, outcome = mock_provider_factory.record_experiment_outcome.call_args.args
+        assert (recorded_model, recorded_context) == (model, context)
+        assert outcome['error_rate'] == 0.0
+        assert outcome['response_time'] >= 0
+
+        model.generate_content_async.side_effect = RuntimeError("quota exceeded")
+        await response_generator.generate_simple("Test", "Test", task_type='help', context=context)
+        assert mock_provider_factory.record_experiment_outcome.call_args.args[2] == {'error_rate': 1.0}
+
 
 @pytest.mark.integration
 class TestResponseModulesIntegration:
@@ -0,0 +1,305 @@
+"""
+Unit Tests for Sequential Testing and Early Stopping
+
+Covers the mSPRT statistic and its stop/ramp/futility decisions, and the
+ABTestingFramework integration: looks on every recorded metric, completing
+stopped experiments and assigning traffic from the latest decision.
+"""
+
+import contextlib
+
+import numpy as np
+import pytest
+
+from services.ai.ab_testing_framework import (
+    ABTestingFramework,
+    AnalyticsFacade,
+    ExperimentConfig,
+    ExperimentMetricType,
+    ExperimentStatus,
+    ExperimentType,
+)
+from services.ai.ab_testing_sequential import (
+    BURN_IN_SAMPLE_SIZE,
+    SequentialAction,
+    SequentialTest,
+    msprt_confidence_sequence,
+    msprt_log_likelihood_ratio,
+)
+from services.ai.ab_testing_stats import VariantStats
+from services.ai.analytics_monitor import MetricType as AnalyticsMetricType
+
+pytestmark = pytest.mark.unit
+
+
+def make_test(**kwargs):
+    options = dict(
+        control="control",
+        treatment="treatment",
+        traffic_split={"control": 0.5, "treatment": 0.5},
+        alpha=0.05,
+        min_effect_size=0.2,
+        max_sample_size=10_000,
+    )
+    options.update(kwargs)
+    return SequentialTest(**options)
+
+
+def summary(count, mean, std=1.0):
+    """Running statistics with the given moments."""
+    return VariantStats(count=count, mean=mean, m2=std ** 2 * (count - 1))
+
+
+class RecordingFacade(AnalyticsFacade):
+    """Keeps (metric type, name) of every analytics call."""
+
+    def __init__(self):
+        self.events = []
+
+    async def record_metric(self, metric_type, name, value, metadata):
+        self.events.append((metric_type, name))
+
+
+def run_now(coro):
+    """Run a coroutine that never suspends."""
+    with contextlib.suppress(StopIteration):
+        coro.send(None)
+
+
+def make_framework():
+    framework = ABTestingFramework()
+    # Analytics calls are fire-and-forget; drop them in unit tests
+    framework._schedule_coro = lambda coro: coro.close()
+    return framework
+
+
+def start_experiment(framework, metric_type=ExperimentMetricType.CONTINUOUS, **kwargs):
+    config = ExperimentConfig(
+        name="Sequential",
+        description="Unit test experiment",
+        experiment_type=ExperimentType.AI_MODEL_COMPARISON,
+        metric_type=metric_type,
+        primary_metric="quality",
+        min_effect_size=0.2,
+        **kwargs,
+    )
+    experiment_id = framework.create_experiment(config)["experiment_id"]
+    framework.start_experiment(experiment_id)
+    return experiment_id
+
+
+def record_until_stopped(framework, experiment_id, control, treatment):
+    """Record pairs of observations until the experiment stops; returns pairs used."""
+    for i, (a, b) in enumerate(zip(control, treatment)):
+        framework.record_metric(experiment_id, "control", f"user_{i}", a)
+        framework.record_metric(experiment_id, "treatment", f"user_{i}", b)
+        if framework.experiment_status[experiment_id] != ExperimentStatus.RUNNING:
+            return i + 1
+    return len(control)
+
+
+class TestMixtureSPRT:
+    """Test the mSPRT statistic and confidence sequence"""
+
+    def test_no_evidence_without_a_difference(self):
+        assert msprt_log_likelihood_ratio(0.0, 0.01, 0.04) < 0
+
+    def test_evidence_grows_with_the_difference(self):
+        ratios = msprt_log_likelihood_ratio(np.array([0.1, 0.3, 0.5]), 0.01, 0.04)
+        assert np.all(np.diff(ratios) > 0)
+
+    def test_confidence_sequence_excludes_zero_when_significant(self):
+        alpha, variance, tau2 = 0.05, 0.01, 0.04
+        significant = 0.5
+        assert msprt_log_likelihood_ratio(significant, variance, tau2) > np.log(1 / alpha)
+
+        lower, upper = msprt_confidence_sequence(significant, variance, tau2, alpha)
+        assert 0 < lower < significant < upper
+
+
+class TestSequentialTest:
+    """Test stop, ramp and futility decisions"""
+
+    def test_burn_in_continues_with_configured_split(self):
+        test = make_test()
+        decision = test.update(summary(BURN_IN_SAMPLE_SIZE - 1, 0.0), summary(BURN_IN_SAMPLE_SIZE - 1, 5.0))
+
+        assert decision.action == SequentialAction.CONTINUE
+        assert decision.traffic_split == {"control": 0.5, "treatment": 0.5}
+        assert decision.p_value == 1.0
+
+    def test_clear_winner_stops_and_takes_all_traffic(self):
+        test = make_test()
+        decision = test.update(summary(200, 0.0), summary(200, 0.5))
+
+        assert decision.action == SequentialAction.STOP_WINNER
+        assert decision.winner == "treatment"
+        assert decision.traffic_split == {"treatment": 1.0, "control": 0.0}
+        assert decision.p_value <= 0.05
+        assert decision.stopped
+
+    def test_lower_is_better_metric_picks_the_cheaper_variant(self):
+        test = make_test(higher_is_better=False)
+        decision = test.update(summary(200, 0.0), summary(200, 0.5))
+
+        assert decision.winner == "control"
+
+    def test_stop_is_sticky(self):
+        test = make_test()
+        stopped = test.update(summary(200, 0.0), summary(200, 0.5))
+
+        assert test.update(summary(400, 0.0), summary(400, 0.0)) is stopped
+
+    def test_weak_evidence_ramps_towards_the_leader(self):
+        test = make_test()
+        test.update(summary(100, 0.0), summary(100, 0.0))  # Fixes the mixing variance
+        variance = 2 / 100
+        # A difference whose likelihood ratio lies between 1/0.2 and 1/alpha
+        effect = next(
+            d for d in np.linspace(0.0, 1.0, 1001)
+            if msprt_log_likelihood_ratio(d, variance, test.tau2) > np.log(1 / 0.2)
+        )
+        assert msprt_log_likelihood_ratio(effect, variance, test.tau2) < np.log(1 / 0.05)
+
+        decision = test.update(summary(100, effect), summary(100, 0.0))
+
+        assert decision.action == SequentialAction.RAMP
+        assert decision.traffic_split == {"control": pytest.approx(0.9), "treatment": pytest.approx(0.1)}
+        assert decision.winner is None
+
+        # The ramp is sticky: weaker or reversed evidence does not undo it
+        decision = test.update(summary(200, 0.0), summary(200, 0.0))
+        assert decision.action == SequentialAction.RAMP
+        assert decision.traffic_split == {"control": pytest.approx(0.9), "treatment": pytest.approx(0.1)}
+        assert 0.05 < decision.p_value <= 0.2
+
+        decision = test.update(summary(100, 0.0), summary(100, effect))
+        assert decision.action == SequentialAction.RAMP
+        assert decision.traffic_split == {"control": pytest.approx(0.9), "treatment": pytest.approx(0.1)}
+
+    def test_futility_stop_keeps_the_control(self):
+        test = make_test(max_sample_size=300)
+        decision = test.update(summary(300, 0.0), summary(300, 0.01))
+
+        assert decision.action == SequentialAction.STOP_FUTILITY
+        assert decision.winner == "control"
+        assert decision.traffic_split == {"control": 1.0, "treatment": 0.0}
+
+
+class TestFrameworkSequential:
+    """Test early stopping through ABTestingFramework"""
+
+    def test_record_metric_stops_a_clear_experiment_early(self):
+        framework = make_framework()
+        experiment_id = start_experiment(framework)
+        rng = np.random.default_rng(25)
+        fixed_horizon = framework._calculate_sample_size(framework.experiments[experiment_id])
+
+        pairs = record_until_stopped(
+            framework, experiment_id, rng.normal(1.0, 1.0, fixed_horizon), rng.normal(1.6, 1.0, fixed_horizon),
+        )
+
+        decision = framework.get_traffic_decision(experiment_id)
+        assert pairs < fixed_horizon
+        assert decision.action == SequentialAction.STOP_WINNER
+        assert framework.experiment_status[experiment_id] == ExperimentStatus.COMPLETED
+        assert framework.assign_variant(experiment_id, "new_user") == "treatment"
+        assert framework.get_experiment_summary(experiment_id)["sequential"]["winner"] == "treatment"
+
+    def test_binary_metric_stops_on_conversion_rates(self):
+        framework = make_framework()
+        experiment_id = start_experiment(framework, ExperimentMetricType.BINARY)
+        rng = np.random.default_rng(26)
+
+        record_until_stopped(
+            framework, experiment_id, (rng.random(2000) < 0.6).tolist(), (rng.random(2000) < 0.3).tolist(),
+        )
+
+        assert framework.get_traffic_decision(experiment_id).winner == "control"
+
+    def test_ramped_split_drives_assignment(self):
+        framework = make_framework()
+        experiment_id = start_experiment(framework)
+        test = framework.sequential_tests[experiment_id] = make_test()
+        test.decision = test._decide(
+            SequentialAction.RAMP, {"control": 0.1, "treatment": 0.9}, None, 0.3, None, {},
+        )
+
+        assignments = [framework.assign_variant(experiment_id, f"user_{i}") for i in range(2000)]
+
+        assert assignments.count("treatment") / len(assignments) == pytest.approx(0.9, abs=0.03)
+
+    def test_ramp_does_not_move_assigned_users(self):
+        framework = make_framework()
+        experiment_id = start_experiment(framework)
+        before = [framework.assign_variant(experiment_id, f"user_{i}") for i in range(1000)]
+        test = framework.sequential_tests[experiment_id] = make_test()
+        test.decision = test._decide(
+            SequentialAction.RAMP, {"control": 0.1, "treatment": 0.9}, None, 0.3, None, {},
+        )
+
+        after = [framework.assign_variant(experiment_id, f"user_{i}") for i in range(1000)]
+        new_users = [framework.assign_variant(experiment_id, f"new_user_{i}") for i in range(1000)]
+
+        assert after == before
+        assert before.count("treatment") / len(before) == pytest.approx(0.5, abs=0.05)
+        assert new_users.count("treatment") / len(new_users) == pytest.approx(0.9, abs=0.03)
+
+    def test_sticky_assignments_are_bounded(self):
+        framework = make_framework()
+        framework.max_assignments = 100
+        experiment_id = start_experiment(framework)
+        before = [framework.assign_variant(experiment_id, f"user_{i}") for i in range(1000)]
+        test = framework.sequential_tests[experiment_id] = make_test()
+        test.decision = test._decide(
+            SequentialAction.RAMP, {"control": 0.1, "treatment": 0.9}, None, 0.3, None, {},
+        )
+
+        remembered = [framework.assign_variant(experiment_id, f"user_{i}") for i in range(900, 1000)]
+        forgotten = [framework.assign_variant(experiment_id, f"user_{i}") for i in range(900)]
+
+        assert len(framework.assignments[experiment_id]) == 100
+        assert remembered == before[900:]
+        # Forgotten users are re-hashed, which only ever moves them to the leader
+        assert all(a == b or a == "treatment" for a, b in zip(forgotten, before))
+        assert forgotten != before[:900]
+
+    def test_stopping_drops_sticky_assignments(self):
+        framework = make_framework()
+        experiment_id = start_experiment(framework)
+        framework.assign_variant(experiment_id, "user_0")
+        rng = np.random.default_rng(29)
+
+        record_until_stopped(framework, experiment_id, rng.normal(1.0, 1.0, 1000), rng.normal(1.6, 1.0, 1000))
+
+        assert experiment_id not in framework.assignments
+        assert framework.assign_variant(experiment_id, "user_0") == "treatment"
+
+    def test_early_stop_is_not_reported_as_an_error(self):
+        facade = RecordingFacade()
+        framework = ABTestingFramework(analytics_facade=facade)
+        framework._schedule_coro = run_now
+        experiment_id = start_experiment(framework)
+        rng = np.random.default_rng(28)
+
+        record_until_stopped(framework, experiment_id, rng.normal(1.0, 1.0, 1000), rng.normal(1.6, 1.0, 1000))
+
+        assert (AnalyticsMetricType.EXPERIMENT, "experiment_stopped_early") in facade.events
+        assert all(metric_type != AnalyticsMetricType.ERROR for metric_type, _ in facade.events)
+
+    def test_disabled_early_stopping_never_stops(self):
+        framework = make_framework()
+        experiment_id = start_experiment(framework, early_stopping_enabled=False)
+        rng = np.random.default_rng(27)
+
+        record_until_stopped(framework, experiment_id, rng.normal(1.0, 1.0, 300), rng.normal(2.0, 1.0, 300))
+
+        assert framework.get_traffic_decision(experiment_id) is None
+        assert framework.experiment_status[experiment_id] == ExperimentStatus.RUNNING
+
+    def test_categorical_metrics_are_not_sequential(self):
+        framework = make_framework()
+        experiment_id = start_experiment(framework, ExperimentMetricType.CATEGORICAL)
+        framework.record_metric(experiment_id, "control", "user_1", "a")
+
+        assert framework.evaluate_sequential(experiment_id) is None
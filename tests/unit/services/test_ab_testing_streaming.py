@@ -0,0 +1,342 @@
+"""
+Unit Tests for Streaming A/B Test Statistics and Parquet Storage
+
+Covers the running per-variant statistics kept by record_metric, analysis
+from those statistics (matching the raw-data tests), and the append-only
+Parquet segment backend with compaction.
+"""
+
+import os
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+import pytest
+from scipy.stats import chi2_contingency, ttest_ind
+
+from services.ai.ab_testing_framework import (
+    ABTestingFramework,
+    ExperimentConfig,
+    ExperimentData,
+    ExperimentMetricType,
+    ExperimentType,
+    InMemoryStorageBackend,
+    StorageBackend,
+)
+from services.ai.ab_testing_stats import VariantStats
+
+pytestmark = pytest.mark.unit
+
+
+def make_framework(storage_backend=None):
+    framework = ABTestingFramework(storage_backend=storage_backend or InMemoryStorageBackend())
+    # Analytics calls are fire-and-forget; drop them in unit tests
+    framework._schedule_coro = lambda coro: coro.close()
+    return framework
+
+
+def start_experiment(framework, metric_type, min_sample_size=10):
+    config = ExperimentConfig(
+        name="Streaming stats",
+        description="Unit test experiment",
+        experiment_type=ExperimentType.AI_MODEL_COMPARISON,
+        metric_type=metric_type,
+        primary_metric="quality",
+        min_sample_size=min_sample_size,
+    )
+    experiment_id = framework.create_experiment(config)["experiment_id"]
+    framework.start_experiment(experiment_id)
+    return experiment_id
+
+
+def record(framework, experiment_id, control, treatment):
+    for i, (a, b) in enumerate(zip(control, treatment)):
+        framework.record_metric(experiment_id, "control", f"user_{i}", a)
+        framework.record_metric(experiment_id, "treatment", f"user_{i}", b)
+
+
+class TestVariantStats:
+    """Test Welford updates and exact merges"""
+
+    def test_running_update_matches_numpy(self):
+        values = np.random.default_rng(7).normal(3.0, 2.0, 1000)
+        summary = VariantStats()
+        for value in values:
+            summary.update(value)
+
+        assert summary.count == 1000
+        assert summary.mean == pytest.approx(values.mean())
+        assert summary.variance == pytest.approx(values.var(ddof=1))
+
+    def test_merge_equals_single_pass(self):
+        values = np.random.default_rng(8).exponential(2.0, 1000)
+        merged = VariantStats.from_array(values[:300]).merge(VariantStats.from_array(values[300:]))
+
+        assert merged.count == 1000
+        assert merged.mean == pytest.approx(values.mean())
+        assert merged.variance == pytest.approx(values.var(ddof=1))
+
+    def test_binary_and_categorical_histograms(self):
+        binary = VariantStats.from_values([True, False, True, True])
+        categorical = VariantStats.from_values(["a", "b", "a"])
+
+        assert binary.categories == {"True": 3, "False": 1}
+        assert binary.mean == pytest.approx(0.75)
+        assert categorical.categories == {"a": 2, "b": 1}
+        assert categorical.count == 3
+
+
+class TestStreamingAnalysis:
+    """Test analysis from running statistics"""
+
+    def test_continuous_analysis_matches_raw_t_test(self, monkeypatch):
+        framework = make_framework()
+        experiment_id = start_experiment(framework, ExperimentMetricType.CONTINUOUS)
+        rng = np.random.default_rng(11)
+        control, treatment = rng.normal(1.0, 1.0, 400), rng.normal(1.25, 1.0, 400)
+        record(framework, experiment_id, control, treatment)
+
+        def no_scan(*args, **kwargs):
+            raise AssertionError("analysis should not read observations")
+
+        monkeypatch.setattr(framework.storage_backend, "query", no_scan)
+        result = framework.analyze_experiment(experiment_id)
+
+        expected = ttest_ind(control, treatment, equal_var=True)
+        assert result.test_name == "Two-sample t-test (equal variances)"
+        assert result.statistic == pytest.approx(expected.statistic)
+        assert result.p_value == pytest.approx(expected.pvalue)
+        assert result.sample_sizes == {"control": 400, "treatment": 400}
+        assert result.means["treatment"] == pytest.approx(treatment.mean())
+        assert result.metadata["streaming"] is True
+
+    def test_unequal_variances_use_welch(self):
+        framework = make_framework()
+        experiment_id = start_experiment(framework, ExperimentMetricType.CONTINUOUS)
+        rng = np.random.default_rng(12)
+        control, treatment = rng.normal(1.0, 0.5, 400), rng.normal(1.1, 3.0, 400)
+        record(framework, experiment_id, control, treatment)
+
+        result = framework.analyze_experiment(experiment_id)
+
+        assert result.test_name == "Welch's t-test (unequal variances)"
+        assert result.p_value == pytest.approx(ttest_ind(control, treatment, equal_var=False).pvalue)
+
+    def test_binary_analysis_matches_chi_squared(self):
+        framework = make_framework()
+        experiment_id = start_experiment(framework, ExperimentMetricType.BINARY)
+        rng = np.random.default_rng(13)
+        control, treatment = rng.random(500) < 0.30, rng.random(500) < 0.40
+        record(framework, experiment_id, control.tolist(), treatment.tolist())
+
+        result = framework.analyze_experiment(experiment_id)
+
+        table = [[int((~control).sum()), int((~treatment).sum())], [int(control.sum()), int(treatment.sum())]]
+        assert result.p_value == pytest.approx(chi2_contingency(table)[1])
+        assert result.effect_size == pytest.approx(treatment.mean() - control.mean())
+
+    def test_small_samples_keep_raw_data_checks(self):
+        framework = make_framework()
+        experiment_id = start_experiment(framework, ExperimentMetricType.CONTINUOUS)
+        rng = np.random.default_rng(14)
+        record(framework, experiment_id, rng.normal(1.0, 1.0, 20), rng.normal(1.5, 1.0, 20))
+
+        result = framework.analyze_experiment(experiment_id)
+
+        assert "streaming" not in result.metadata
+        assert result.sample_sizes == {"control": 20, "treatment": 20}
+
+    def test_summary_reports_variant_counts_without_loading_data(self):
+        framework = make_framework()
+        experiment_id = start_experiment(framework, ExperimentMetricType.CONTINUOUS)
+        record(framework, experiment_id, [1.0, 2.0, 3.0], [2.0, 3.0, 4.0])
+
+        summary = framework.get_experiment_summary(experiment_id)
+
+        assert summary["data_summary"]["variant_counts"] == {"control": 3, "treatment": 3}
+        assert summary["data_summary"]["total_observations"] == 6
+
+
+class TestParquetStorageBackend:
+    """Test the append-only Parquet segment backend"""
+
+    @pytest.fixture
+    def storage(self, tmp_path):
+        pytest.importorskip("pyarrow")
+        storage_module = pytest.importorskip("services.ai.ab_testing_storage")
+
+        def make(**kwargs):
+            kwargs.setdefault("flush_interval", None)
+            return storage_module.ParquetStorageBackend(str(tmp_path), **kwargs)
+
+        return make
+
+    def test_round_trip_and_count(self, storage):
+        backend = storage(segment_rows=4)
+        framework = make_framework(backend)
+        experiment_id = start_experiment(framework, ExperimentMetricType.COUNT)
+        for i in range(10):
+            framework.record_metric(experiment_id, "control" if i % 2 else "treatment", f"user_{i}", i,
+                                    secondary_metrics={"latency_ms": 100 + i}, context={"session_id": f"s{i}"})
+
+        data = backend.query(experiment_id)
+        assert backend.count(experiment_id) == 10
+        assert [point.primary_metric_value for point in data] == list(range(10))
+        assert data[3].secondary_metrics == {"latency_ms": 103}
+        assert data[3].session_id == "s3"
+        assert [point.user_id for point in backend.query(experiment_id, {"variant": "control"})] == [
+            f"user_{i}" for i in range(1, 10, 2)
+        ]
+
+    def test_rebuilt_stats_match_running_stats(self, storage):
+        backend = storage(segment_rows=50)
+        framework = make_framework(backend)
+        experiment_id = start_experiment(framework, ExperimentMetricType.BINARY)
+        rng = np.random.default_rng(15)
+        record(framework, experiment_id, (rng.random(120) < 0.3).tolist(), (rng.random(120) < 0.5).tolist())
+
+        rebuilt = backend.variant_stats(experiment_id)
+        running = framework.variant_stats[experiment_id]
+
+        assert list(rebuilt) == list(running)
+        for variant in running:
+            assert rebuilt[variant].count == running[variant].count
+            assert rebuilt[variant].mean == pytest.approx(running[variant].mean)
+            assert rebuilt[variant].m2 == pytest.approx(running[variant].m2)
+            assert rebuilt[variant].categories == running[variant].categories
+
+    def test_data_survives_restart(self, storage):
+        backend = storage(segment_rows=8)
+        framework = make_framework(backend)
+        experiment_id = start_experiment(framework, ExperimentMetricType.CATEGORICAL)
+        record(framework, experiment_id, ["a", "b", "a"] * 10, ["b", "b", "c"] * 10)
+        backend.flush()
+        expected = framework.analyze_experiment(experiment_id)
+
+        framework.variant_stats.pop(experiment_id)
+        framework.storage_backend = storage(segment_rows=8)
+        result = framework.analyze_experiment(experiment_id)
+
+        assert result.p_value == pytest.approx(expected.p_value)
+        assert framework.storage_backend.count(experiment_id) == 60
+
+    def test_small_segments_are_compacted(self, storage, tmp_path):
+        backend = storage(segment_rows=5, compact_target_rows=40, compact_min_segments=4)
+        framework = make_framework(backend)
+        experiment_id = start_experiment(framework, ExperimentMetricType.CONTINUOUS)
+        for i in range(100):
+            framework.record_metric(experiment_id, "control", f"user_{i}", float(i))
+        backend.flush()
+
+        segments = sorted(os.listdir(tmp_path / experiment_id))
+        assert len(segments) < 20
+        assert backend.count(experiment_id) == 100
+        assert [point.primary_metric_value for point in backend.query(experiment_id)] == [float(i) for i in range(100)]
+
+    def test_interrupted_compaction_is_cleaned_up(self, storage, tmp_path, monkeypatch):
+        backend = storage(segment_rows=5, compact_min_segments=100)
+        framework = make_framework(backend)
+        experiment_id = start_experiment(framework, ExperimentMetricType.CONTINUOUS)
+        for i in range(20):
+            framework.record_metric(experiment_id, "control", f"user_{i}", float(i))
+        backend.flush()
+        directory = tmp_path / experiment_id
+        inputs = sorted(os.listdir(directory))
+
+        # Simulate a crash after the merged segment was renamed into place
+        with monkeypatch.context() as patch:
+            patch.setattr(os, "remove", lambda path: None)
+            assert backend.compact(experiment_id) == 4
+        assert set(inputs) < set(os.listdir(directory))
+
+        reopened = storage()
+        assert reopened.count(experiment_id) == 20
+        assert sorted(os.listdir(directory)) == ["segment-00000000-00000003.parquet"]
+
+    def test_buffered_rows_are_flushed_in_the_background(self, storage):
+        backend = storage(flush_interval=0.01)
+        framework = make_framework(backend)
+        experiment_id = start_experiment(framework, ExperimentMetricType.CONTINUOUS)
+        for i in range(5):
+            framework.record_metric(experiment_id, "control", f"user_{i}", float(i))
+
+        deadline = time.monotonic() + 5
+        while not backend._segments.get(experiment_id) and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        assert storage().count(experiment_id) == 5
+        backend.close()
+
+    def test_append_leaves_writes_to_the_flusher(self, storage, monkeypatch):
+        backend = storage(segment_rows=5)
+        writers = []
+        write_segment = backend._write_segment
+
+        def record_writer(*args):
+            writers.append(threading.current_thread())
+            return write_segment(*args)
+
+        monkeypatch.setattr(backend, "_write_segment", record_writer)
+        framework = make_framework(backend)
+        experiment_id = start_experiment(framework, ExperimentMetricType.CONTINUOUS)
+        for i in range(12):
+            framework.record_metric(experiment_id, "control", f"user_{i}", float(i))
+
+        deadline = time.monotonic() + 5
+        while len(writers) < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        # Full segments are written in the background; the partial one stays buffered
+        assert len(writers) == 2
+        assert threading.current_thread() not in writers
+        assert len(backend._buffers[experiment_id]["variant"]) == 2
+        assert backend.count(experiment_id) == 12
+        backend.close()
+
+    def test_close_writes_buffered_rows(self, storage):
+        backend = storage(flush_interval=60)
+        framework = make_framework(backend)
+        experiment_id = start_experiment(framework, ExperimentMetricType.CONTINUOUS)
+        for i in range(5):
+            framework.record_metric(experiment_id, "control", f"user_{i}", float(i))
+        assert storage().count(experiment_id) == 0
+
+        framework.close()
+
+        assert storage().count(experiment_id) == 5
+        assert not backend._flusher
+
+    def test_reads_survive_concurrent_compaction(self, storage):
+        backend = storage(segment_rows=5, compact_min_segments=100)
+        framework = make_framework(backend)
+        experiment_id = start_experiment(framework, ExperimentMetricType.CONTINUOUS)
+        for i in range(20):
+            framework.record_metric(experiment_id, "control", f"user_{i}", float(i))
+        backend.flush()
+
+        tables = backend._tables(experiment_id)
+        first = next(tables)
+        # Removes the segments the reader has not read yet
+        assert backend.compact(experiment_id) == 4
+
+        assert first.num_rows + sum(table.num_rows for table in tables) == 20
+
+    def test_stats_of_mixed_value_types(self, storage):
+        backend = storage(segment_rows=100)
+        values = [3, True, 5, False, True, 2.5]
+        for i, value in enumerate(values):
+            backend.append("mixed", ExperimentData(
+                experiment_id="mixed", variant="control", user_id=f"user_{i}", session_id=None,
+                timestamp=datetime(2026, 10, 16), primary_metric_value=value,
+                secondary_metrics={}, user_segments={}, metadata={},
+            ))
+        backend.flush()
+
+        rebuilt = backend.variant_stats("mixed")["control"]
+        scanned = StorageBackend.variant_stats(backend, "mixed")["control"]
+
+        assert rebuilt.count == scanned.count == 6
+        assert rebuilt.mean == pytest.approx(scanned.mean)
+        assert rebuilt.m2 == pytest.approx(scanned.m2)
+        assert rebuilt.categories == scanned.categories == {"True": 2, "False": 1}
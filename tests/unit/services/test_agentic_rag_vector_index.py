@@ -0,0 +1,111 @@
+"""
+Unit Tests for the AgenticRAGSystem Vector Index
+
+Covers HNSW index creation, replacement of an existing IVFFlat index with a
+concurrent build and swap, and the IVFFlat fallback on pgvector < 0.5.
+"""
+
+import pytest
+
+pytest.importorskip("mistralai")
+
+from services.agentic_rag import AgenticRAGSystem
+
+IVFFLAT_DEF = (
+    "CREATE INDEX documentation_chunks_embedding_idx ON public.documentation_chunks "
+    "USING ivfflat (embedding vector_cosine_ops) WITH (lists='100')"
+)
+HNSW_DEF = (
+    "CREATE INDEX documentation_chunks_embedding_idx ON public.documentation_chunks "
+    "USING hnsw (embedding vector_cosine_ops) WITH (m='16', ef_construction='64')"
+)
+
+
+class FakeResult:
+    def __init__(self, value):
+        self.value = value
+
+    def scalar(self):
+        return self.value
+
+
+class FakeConnection:
+    """Records executed SQL; pg_indexes lookups return the given indexdef."""
+
+    def __init__(self, indexdef, hnsw_supported=True):
+        self.indexdef = indexdef
+        self.hnsw_supported = hnsw_supported
+        self.statements = []
+        self.options = {}
+
+    def execution_options(self, **options):
+        self.options.update(options)
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, statement, params=None):
+        sql = " ".join(str(statement).split())
+        if "pg_indexes" in sql:
+            return FakeResult(self.indexdef)
+        if "USING hnsw" in sql and not self.hnsw_supported:
+            raise RuntimeError('access method "hnsw" does not exist')
+        self.statements.append(sql)
+        return FakeResult(None)
+
+
+class FakeEngine:
+    def __init__(self, connection):
+        self.connection = connection
+
+    def connect(self):
+        return self.connection
+
+
+def create_index(connection):
+    system = AgenticRAGSystem.__new__(AgenticRAGSystem)
+    system.engine = FakeEngine(connection)
+    system._create_vector_index("documentation_chunks")
+    return connection.statements
+
+
+@pytest.mark.unit
+class TestVectorIndex:
+    """Test the HNSW vector index lifecycle"""
+
+    def test_existing_hnsw_index_is_left_alone(self):
+        assert create_index(FakeConnection(HNSW_DEF)) == []
+
+    def test_ivfflat_index_is_replaced_concurrently(self):
+        connection = FakeConnection(IVFFLAT_DEF)
+
+        statements = create_index(connection)
+
+        assert connection.options == {"isolation_level": "AUTOCOMMIT"}
+        assert statements[1].startswith(
+            "CREATE INDEX CONCURRENTLY documentation_chunks_embedding_hnsw_idx"
+        )
+        assert "USING hnsw" in statements[1]
+        assert statements[2:] == [
+            "DROP INDEX CONCURRENTLY IF EXISTS documentation_chunks_embedding_idx",
+            "ALTER INDEX documentation_chunks_embedding_hnsw_idx "
+            "RENAME TO documentation_chunks_embedding_idx",
+        ]
+
+    def test_missing_index_is_created_as_hnsw(self):
+        statements = create_index(FakeConnection(None))
+
+        assert "USING hnsw" in statements[1]
+        assert not any(sql.startswith("DROP INDEX CONCURRENTLY IF EXISTS documentation_chunks_embedding_idx")
+                       for sql in statements)
+
+    def test_without_hnsw_support_ivfflat_is_kept_or_created(self):
+        kept = create_index(FakeConnection(IVFFLAT_DEF, hnsw_supported=False))
+        created = create_index(FakeConnection(None, hnsw_supported=False))
+
+        assert not any("RENAME" in sql or "USING ivfflat" in sql for sql in kept)
+        assert "USING ivfflat" in created[-1]
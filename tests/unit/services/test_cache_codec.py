@@ -0,0 +1,168 @@
+"""
+Unit Tests for the L2 Cache Value Codec
+
+Covers msgpack extension types, compression thresholds, the versioned frame
+header, legacy JSON compatibility and per-namespace codec selection.
+"""
+
+import json
+import uuid
+from datetime import date, datetime, timezone
+from decimal import Decimal
+
+import pytest
+
+from services.caching.cache_codec import (
+    CODEC_JSON,
+    COMPRESSION_NONE,
+    FLAG_BASE64,
+    FLAG_MSGPACK,
+    FLAG_ZSTD,
+    CacheCodec,
+    CodecError,
+    CodecPolicy,
+)
+from services.caching.cache_keys import CacheKeyBuilder, CacheNamespace
+from services.caching.cache_manager import CacheManager
+
+pytest.importorskip("msgpack")
+
+
+def header_flags(encoded):
+    header = encoded[0] if isinstance(encoded, bytes) else ord(encoded[0])
+    assert header >> 4 == 1
+    return header & 0x0F
+
+
+@pytest.mark.unit
+class TestCacheCodec:
+    """Test encoding and decoding of cache values"""
+
+    def test_extension_types_round_trip(self):
+        codec = CacheCodec(text_safe=False)
+        value = {
+            "id": uuid.uuid4(),
+            "score": Decimal("87.125"),
+            "collected_at": datetime(2025, 3, 1, 12, 30, tzinfo=timezone.utc),
+            "due": date(2025, 6, 30),
+            "naive": datetime(2025, 3, 1, 12, 30),
+            "tags": ["gdpr", "iso27001"],
+        }
+
+        decoded = codec.decode(codec.encode(value, "evidence:1"))
+
+        assert decoded == value
+        assert isinstance(decoded["score"], Decimal)
+        assert decoded["collected_at"].tzinfo is not None
+
+    def test_small_values_are_not_compressed(self):
+        codec = CacheCodec(text_safe=False)
+        encoded = codec.encode({"status": "ok"}, "api:abc")
+
+        assert header_flags(encoded) == FLAG_MSGPACK
+
+    def test_uncompressed_text_safe_values_stay_plain_json(self):
+        codec = CacheCodec()
+        value = {"control": "A.5.1", "owner": "security", "scores": list(range(40))}
+
+        encoded = codec.encode(value, "api:abc")
+
+        assert encoded == json.dumps(value)
+        assert codec.decode(encoded) == value
+
+    def test_large_values_are_compressed(self):
+        codec = CacheCodec()
+        value = [{"control": f"A.{i}", "description": "Access control policy"} for i in range(200)]
+
+        encoded = codec.encode(value, "compute:abc")
+
+        assert header_flags(encoded) & FLAG_ZSTD
+        assert len(encoded) < len(json.dumps(value)) / 4
+        assert codec.decode(encoded) == value
+
+    def test_binary_frames_for_binary_clients(self):
+        codec = CacheCodec(text_safe=False)
+        value = {"items": list(range(1000))}
+
+        encoded = codec.encode(value, "db:evidence")
+
+        assert isinstance(encoded, bytes)
+        assert not header_flags(encoded) & FLAG_BASE64
+        assert codec.decode(encoded) == value
+
+    def test_large_text_safe_values_are_framed(self):
+        codec = CacheCodec()
+        value = {"text": "Access control policy " * 100}
+
+        encoded = codec.encode(value, "api:abc")
+
+        assert header_flags(encoded) == FLAG_MSGPACK | FLAG_ZSTD | FLAG_BASE64
+        assert len(encoded) < len(json.dumps(value))
+
+    def test_text_frames_survive_utf8_round_trip(self):
+        codec = CacheCodec()
+        encoded = codec.encode({"text": "données " * 300}, "api:x")
+
+        # What a decode_responses=True client hands back
+        assert codec.decode(encoded.encode("utf-8").decode("utf-8")) == {"text": "données " * 300}
+
+    def test_legacy_json_still_decodes(self):
+        codec = CacheCodec()
+        for value in ({"a": 1}, [1, 2], "text", 42, None, True):
+            assert codec.decode(json.dumps(value)) == value
+            assert codec.decode(json.dumps(value).encode()) == value
+
+    def test_unknown_frame_version_is_rejected(self):
+        codec = CacheCodec()
+        with pytest.raises(CodecError):
+            codec.decode(chr(0x0F) + "AAAA")
+        with pytest.raises(CodecError):
+            codec.decode(chr(0x19) + "not base64!")
+
+
+@pytest.mark.unit
+class TestNamespacePolicies:
+    """Test per-namespace codec selection"""
+
+    def test_namespace_from_key(self):
+        assert CacheKeyBuilder.get_namespace("cache:evidence:1") == CacheNamespace.EVIDENCE
+        assert CacheKeyBuilder.get_namespace("compute:abc") == CacheNamespace.COMPUTE
+        assert CacheKeyBuilder.get_namespace("report:7") is None
+
+    def test_session_namespace_stays_plain_json(self):
+        codec = CacheCodec()
+        key = CacheKeyBuilder.build_session_key("abc")
+        value = {"user_id": "u1", "payload": "x" * 5000}
+
+        encoded = codec.encode(value, key)
+
+        assert json.loads(encoded) == value
+
+    def test_custom_policy_overrides_default(self):
+        codec = CacheCodec(text_safe=False, namespace_policies={
+            CacheNamespace.API: CodecPolicy(codec=CODEC_JSON, compression=COMPRESSION_NONE)
+        })
+
+        assert json.loads(codec.encode({"a": 1}, "api:abc")) == {"a": 1}
+        assert header_flags(codec.encode({"a": 1}, "db:abc")) & FLAG_MSGPACK
+
+
+@pytest.mark.unit
+class TestCacheManagerCodec:
+    """Test CacheManager storing codec frames in Redis"""
+
+    @pytest.mark.asyncio
+    async def test_l2_round_trip_and_legacy_entries(self):
+        fakeredis = pytest.importorskip("fakeredis")
+        manager = CacheManager(enable_invalidation_bus=False)
+        manager._redis = fakeredis.aioredis.FakeRedis(decode_responses=True)
+        manager._redis_available = True
+        manager._initialized = True
+        value = {"id": uuid.uuid4(), "amount": Decimal("1.10"), "items": ["x"] * 500}
+
+        await manager.set("evidence:1", value, ttl=60)
+        await manager._l1_cache.clear()
+        await manager._redis.set("evidence:legacy", json.dumps({"status": "draft"}))
+
+        assert await manager.get("evidence:1") == value
+        assert await manager.get("evidence:legacy") == {"status": "draft"}
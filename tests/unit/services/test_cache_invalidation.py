@@ -0,0 +1,103 @@
+"""
+Unit Tests for Cache Invalidation
+
+Covers pattern invalidation with SCAN/UNLINK and cross-worker tag
+invalidation through CacheManager and CacheInvalidator, using fakeredis as
+the shared L2 tier.
+"""
+
+import pytest
+import pytest_asyncio
+
+from services.caching.cache_invalidator import CacheInvalidator
+from services.caching.cache_manager import TAG_KEY_PREFIX, CacheManager
+
+fakeredis = pytest.importorskip("fakeredis")
+
+
+@pytest_asyncio.fixture
+async def redis_client():
+    client = fakeredis.aioredis.FakeRedis(decode_responses=True)
+    yield client
+    await client.aclose()
+
+
+def make_manager(redis_client):
+    manager = CacheManager()
+    manager._redis = redis_client
+    manager._redis_available = True
+    manager._initialized = True
+    return manager
+
+
+@pytest.mark.unit
+class TestPatternInvalidation:
+    """Test CacheManager.invalidate_pattern"""
+
+    @pytest.mark.asyncio
+    async def test_l1_keeps_unrelated_entries(self, redis_client):
+        manager = make_manager(redis_client)
+        await manager.set("db:evidence:1:item", {"v": 1})
+        await manager.set("db:evidence:2:item", {"v": 2})
+
+        assert await manager.invalidate_pattern("db:evidence:1:*") == 1
+
+        assert await manager._l1_cache.get("db:evidence:2:item") == {"v": 2}
+        assert await manager._l1_cache.get("db:evidence:1:item") is None
+        assert await redis_client.exists("db:evidence:1:item") == 0
+
+    @pytest.mark.asyncio
+    async def test_l2_uses_scan_and_unlink(self, redis_client, monkeypatch):
+        manager = make_manager(redis_client)
+        for i in range(1200):
+            await redis_client.set(f"api:list:{i}", "x")
+        await redis_client.set("other", "x")
+
+        async def no_keys(*args, **kwargs):
+            raise AssertionError("KEYS must not be used")
+
+        monkeypatch.setattr(redis_client, "keys", no_keys)
+
+        assert await manager.invalidate_pattern("api:list:*") == 1200
+        assert await redis_client.dbsize() == 1
+
+
+@pytest.mark.unit
+class TestTagInvalidation:
+    """Test tag sets shared through Redis"""
+
+    @pytest.mark.asyncio
+    async def test_tags_invalidate_across_workers(self, redis_client):
+        writer = make_manager(redis_client)
+        other_worker = make_manager(redis_client)
+        await writer.set("evidence:1", {"v": 1}, ttl=60, tags=["company:42"])
+        await writer.set("dashboard:42", {"v": 2}, ttl=60, tags=["company:42"])
+        await writer.set("dashboard:43", {"v": 3}, ttl=60, tags=["company:43"])
+
+        invalidated = await CacheInvalidator(other_worker).invalidate_by_tags(
+            ["company:42"]
+        )
+
+        assert invalidated == 2
+        assert await redis_client.exists("evidence:1", "dashboard:42") == 0
+        assert await redis_client.exists(f"{TAG_KEY_PREFIX}company:42") == 0
+        assert await other_worker.get("dashboard:43") == {"v": 3}
+
+    @pytest.mark.asyncio
+    async def test_tag_set_outlives_entry_ttl(self, redis_client):
+        manager = make_manager(redis_client)
+        await manager.set("k", 1, ttl=30, tags=["t"])
+
+        assert await redis_client.smembers(f"{TAG_KEY_PREFIX}t") == {"k"}
+        assert await redis_client.ttl(f"{TAG_KEY_PREFIX}t") > 30
+
+    @pytest.mark.asyncio
+    async def test_locally_registered_tags_still_work(self):
+        manager = CacheManager()
+        manager._initialized = True
+        invalidator = CacheInvalidator(manager)
+        await manager.set("legacy", 1)
+        invalidator.register_tag("legacy", ["old"])
+
+        assert await invalidator.invalidate_by_tags(["old"]) == 1
+        assert await manager.get("legacy") is None
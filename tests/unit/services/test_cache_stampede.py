@@ -0,0 +1,212 @@
+"""
+Unit Tests for Cache Stampede Protection
+
+Covers single-flight computation, stale-while-revalidate, probabilistic
+early expiration and the cross-worker Redis compute lock in
+CacheManager.get_or_compute.
+"""
+
+import asyncio
+import time
+from unittest.mock import patch
+
+import pytest
+
+from services.caching.cache_manager import CacheManager
+
+
+def make_manager(**kwargs):
+    manager = CacheManager(enable_invalidation_bus=False, **kwargs)
+    # L1 only - no Redis connection
+    manager._initialized = True
+    return manager
+
+
+class CountingCompute:
+    """Async computation that counts calls and takes a little time"""
+
+    def __init__(self, delay=0.05, value="fresh"):
+        self.calls = 0
+        self.delay = delay
+        self.value = value
+
+    async def __call__(self):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return {"value": self.value, "call": self.calls}
+
+
+@pytest.mark.unit
+class TestSingleFlight:
+    """Test in-process coalescing of concurrent misses"""
+
+    @pytest.mark.asyncio
+    async def test_200_concurrent_misses_compute_once(self):
+        manager = make_manager()
+        compute = CountingCompute()
+
+        results = await asyncio.gather(*(
+            manager.get_or_compute("framework:gdpr", compute, ttl=300)
+            for _ in range(200)
+        ))
+
+        assert compute.calls == 1
+        assert all(r == {"value": "fresh", "call": 1} for r in results)
+        assert manager.metrics.coalesced_waits == 199
+        assert manager._inflight == {}
+
+    @pytest.mark.asyncio
+    async def test_errors_reach_every_waiter_and_are_not_cached(self):
+        manager = make_manager()
+        calls = 0
+
+        async def failing():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            raise RuntimeError("database down")
+
+        results = await asyncio.gather(*(
+            manager.get_or_compute("dashboard:1", failing, ttl=60)
+            for _ in range(10)
+        ), return_exceptions=True)
+
+        assert calls == 1
+        assert all(isinstance(r, RuntimeError) for r in results)
+        assert await manager.get("dashboard:1") is None
+
+    @pytest.mark.asyncio
+    async def test_plain_get_returns_value_not_envelope(self):
+        manager = make_manager()
+
+        await manager.get_or_compute("framework:iso", CountingCompute(delay=0), ttl=300)
+
+        assert await manager.get("framework:iso") == {"value": "fresh", "call": 1}
+
+    @pytest.mark.asyncio
+    async def test_cancelled_caller_does_not_cancel_computation(self):
+        manager = make_manager()
+        compute = CountingCompute()
+
+        first = asyncio.create_task(manager.get_or_compute("k", compute, ttl=60))
+        await asyncio.sleep(0)
+        second = asyncio.create_task(manager.get_or_compute("k", compute, ttl=60))
+        await asyncio.sleep(0)
+        first.cancel()
+
+        assert (await second)["value"] == "fresh"
+        assert compute.calls == 1
+
+    @pytest.mark.asyncio
+    async def test_api_and_service_helpers_are_protected(self):
+        manager = make_manager()
+        compute = CountingCompute()
+
+        await asyncio.gather(*(
+            manager.cache_service_computation("score", {"company": 1}, compute, ttl=60)
+            for _ in range(20)
+        ), *(
+            manager.cache_api_response("GET", "/frameworks", {}, compute, ttl=60)
+            for _ in range(20)
+        ))
+
+        assert compute.calls == 2
+
+
+@pytest.mark.unit
+class TestStaleWhileRevalidate:
+    """Test serving stale values during refresh"""
+
+    @pytest.mark.asyncio
+    async def test_expired_value_served_while_one_refresh_runs(self):
+        manager = make_manager(stale_ttl=60, xfetch_beta=0)
+        compute = CountingCompute(value="v1")
+        await manager.get_or_compute("dashboard:7", compute, ttl=10)
+        compute.value = "v2"
+
+        with patch("time.time", return_value=time.time() + 15):
+            results = await asyncio.gather(*(
+                manager.get_or_compute("dashboard:7", compute, ttl=10)
+                for _ in range(50)
+            ))
+
+        assert all(r["value"] == "v1" for r in results)
+        assert manager.metrics.stale_serves == 50
+        await asyncio.gather(*manager._refresh_tasks)
+        assert compute.calls == 2
+        assert (await manager.get_or_compute("dashboard:7", compute, ttl=10))["value"] == "v2"
+
+    @pytest.mark.asyncio
+    async def test_value_past_stale_window_is_recomputed(self):
+        manager = make_manager(stale_ttl=5, xfetch_beta=0)
+        compute = CountingCompute()
+        await manager.get_or_compute("k", compute, ttl=10)
+
+        with patch("time.time", return_value=time.time() + 20):
+            result = await manager.get_or_compute("k", compute, ttl=10)
+
+        assert result["call"] == 2
+        assert manager.metrics.stale_serves == 0
+
+
+@pytest.mark.unit
+class TestEarlyExpiration:
+    """Test XFetch probabilistic early refresh"""
+
+    @pytest.mark.asyncio
+    async def test_refreshes_early_near_expiry(self):
+        manager = make_manager(xfetch_beta=1.0)
+        compute = CountingCompute(delay=0.2)
+        await manager.get_or_compute("k", compute, ttl=10)
+
+        # 9.9s in, a 0.2s computation and a low draw trigger a refresh
+        with patch("time.time", return_value=time.time() + 9.9), \
+                patch("random.random", return_value=0.9):
+            result = await manager.get_or_compute("k", compute, ttl=10)
+
+        assert result["call"] == 1
+        assert manager.metrics.early_refreshes == 1
+        await asyncio.gather(*manager._refresh_tasks)
+        assert compute.calls == 2
+
+    @pytest.mark.asyncio
+    async def test_no_early_refresh_when_far_from_expiry(self):
+        manager = make_manager(xfetch_beta=1.0)
+        compute = CountingCompute(delay=0.01)
+        await manager.get_or_compute("k", compute, ttl=300)
+
+        with patch("random.random", return_value=0.9):
+            await manager.get_or_compute("k", compute, ttl=300)
+
+        assert manager.metrics.early_refreshes == 0
+        assert compute.calls == 1
+
+
+@pytest.mark.unit
+class TestDistributedLock:
+    """Test cross-worker dedupe through the Redis compute lock"""
+
+    @pytest.mark.asyncio
+    async def test_workers_share_one_computation(self):
+        fakeredis = pytest.importorskip("fakeredis")
+        pytest.importorskip("lupa")
+        server = fakeredis.FakeServer()
+        workers = []
+        for _ in range(2):
+            manager = make_manager(distributed_lock=True, lock_lease=5)
+            manager._redis = fakeredis.aioredis.FakeRedis(
+                server=server, decode_responses=True
+            )
+            manager._redis_available = True
+            workers.append(manager)
+        compute = CountingCompute(delay=0.1)
+
+        results = await asyncio.gather(*(
+            worker.get_or_compute("framework:iso27001", compute, ttl=300)
+            for worker in workers for _ in range(50)
+        ))
+
+        assert compute.calls == 1
+        assert all(r["value"] == "fresh" for r in results)
+        assert sum(w.metrics.lock_waits for w in workers) == 1
+        assert await workers[0]._redis.exists("cache:lock:framework:iso27001") == 0
@@ -0,0 +1,241 @@
+"""
+Unit Tests for the Write-behind AI Usage Ledger
+
+Covers counter coalescing across a batch, read-your-writes through
+CostTrackingService, backpressure when the queue is full, retries after
+Redis or Postgres failures and draining on close.
+"""
+
+import asyncio
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+
+from services.ai.cost_ledger import UsageLedger, usage_log_row
+from services.ai.cost_management import AIUsageMetrics, CostTrackingService
+from tests.mocks.mock_redis import MockPipeline, MockRedis
+
+pytestmark = pytest.mark.unit
+
+
+class CountingRedis(MockRedis):
+    """MockRedis that counts pipeline round trips and can fail them."""
+
+    def __init__(self, fail_pipelines=0):
+        super().__init__()
+        self.pipelines_executed = 0
+        self.commands = 0
+        self.fail_pipelines = fail_pipelines
+
+    def pipeline(self):
+        redis = self
+
+        class Pipeline(MockPipeline):
+            async def execute(self):
+                if redis.fail_pipelines:
+                    redis.fail_pipelines -= 1
+                    raise ConnectionError("redis down")
+                redis.pipelines_executed += 1
+                redis.commands += len(self.operations)
+                return await super().execute()
+
+        return Pipeline(self)
+
+
+class RecordingWriter:
+    def __init__(self, fail_times=0, delay=0.0):
+        self.batches = []
+        self.fail_times = fail_times
+        self.delay = delay
+
+    async def __call__(self, records):
+        await asyncio.sleep(self.delay)
+        if self.fail_times:
+            self.fail_times -= 1
+            raise OSError("database unavailable")
+        self.batches.append([usage.request_id for usage in records])
+
+    @property
+    def request_ids(self):
+        return [request_id for batch in self.batches for request_id in batch]
+
+
+def make_usage(i, service="policy_generation", user_id="user_1"):
+    return AIUsageMetrics(
+        service_name=service,
+        model_name="gemini-2.5-flash",
+        input_tokens=100,
+        output_tokens=50,
+        total_tokens=150,
+        request_count=1,
+        cost_usd=Decimal("0.001"),
+        timestamp=datetime(2026, 10, 16, 9, 30),
+        user_id=user_id,
+        request_id=f"req-{i}",
+        provider="google",
+    )
+
+
+class TestUsageLedger:
+    """Test batching, coalescing and failure handling"""
+
+    @pytest.mark.asyncio
+    async def test_batch_is_coalesced_into_one_pipeline(self):
+        redis = CountingRedis()
+        writer = RecordingWriter()
+        ledger = UsageLedger(redis, writer, flush_interval=10)
+
+        for i in range(200):
+            await ledger.record(make_usage(i, service=f"service_{i % 2}"))
+        await ledger.flush()
+
+        # daily, hourly, 2 services, model and user keys, plus total,
+        # 2 services and model in the day's rollup; 3 increments each and
+        # one EXPIRE per key
+        assert redis.pipelines_executed == 1
+        assert redis.commands == (6 + 4) * 3 + 7
+        daily = redis.data["ai_usage:daily:2026-10-16"]
+        assert int(daily["total_requests"]) == 200
+        assert int(daily["total_tokens"]) == 200 * 150
+        assert float(daily["total_cost"]) == pytest.approx(0.2)
+        assert int(redis.data["ai_usage:service:service_1:2026-10-16"]["total_requests"]) == 100
+        assert int(redis.data["ai_usage:rollup:2026-10-16"]["service:service_1:requests"]) == 100
+        assert writer.request_ids == [f"req-{i}" for i in range(200)]
+        stats = ledger.get_stats()
+        assert stats["records_flushed"] == 200
+        assert stats["commands_per_record"] == pytest.approx(37 / 200)
+        await ledger.close()
+
+    @pytest.mark.asyncio
+    async def test_background_flusher_writes_after_interval(self):
+        redis = CountingRedis()
+        ledger = UsageLedger(redis, None, flush_interval=0.01)
+
+        await ledger.record(make_usage(1))
+        await asyncio.sleep(0.05)
+
+        assert redis.pipelines_executed == 1
+        assert ledger.queue_depth == 0
+        await ledger.close()
+
+    @pytest.mark.asyncio
+    async def test_full_queue_applies_backpressure(self):
+        writer = RecordingWriter(delay=0.01)
+        ledger = UsageLedger(CountingRedis(), writer, max_queue_size=5, flush_batch_size=5, flush_interval=0.001)
+
+        await asyncio.gather(*(ledger.record(make_usage(i)) for i in range(40)))
+        await ledger.flush()
+
+        stats = ledger.get_stats()
+        assert stats["enqueue_waits"] > 0
+        assert stats["max_queue_depth"] <= 5
+        assert sorted(writer.request_ids) == sorted(f"req-{i}" for i in range(40))
+        await ledger.close()
+
+    @pytest.mark.asyncio
+    async def test_redis_failure_is_retried_without_double_counting(self):
+        redis = CountingRedis(fail_pipelines=1)
+        ledger = UsageLedger(redis, None, flush_interval=10)
+
+        for i in range(3):
+            await ledger.record(make_usage(i))
+        await ledger.flush()
+        assert "ai_usage:daily:2026-10-16" not in redis.data
+        assert ledger.get_stats()["pending_retry_keys"] == 6
+
+        await ledger.record(make_usage(3))
+        await ledger.flush()
+
+        assert int(redis.data["ai_usage:daily:2026-10-16"]["total_requests"]) == 4
+        assert ledger.get_stats()["redis_failures"] == 1
+        assert ledger.get_stats()["pending_retry_keys"] == 0
+        await ledger.close()
+
+    @pytest.mark.asyncio
+    async def test_record_writer_failure_is_retried(self):
+        writer = RecordingWriter(fail_times=1)
+        ledger = UsageLedger(CountingRedis(), writer, flush_interval=10)
+
+        await ledger.record(make_usage(1))
+        await ledger.flush()
+        assert writer.batches == []
+
+        await ledger.flush()
+        assert writer.request_ids == ["req-1"]
+        assert ledger.get_stats()["record_write_failures"] == 1
+        await ledger.close()
+
+    @pytest.mark.asyncio
+    async def test_missing_table_is_not_retried(self, caplog):
+        class ProgrammingError(Exception):
+            pass
+
+        calls = []
+
+        async def writer(records):
+            calls.append(len(records))
+            raise ProgrammingError('relation "ai_usage_logs" does not exist')
+
+        ledger = UsageLedger(CountingRedis(), writer, flush_interval=10)
+
+        await ledger.record(make_usage(1))
+        await ledger.flush()
+        await ledger.record(make_usage(2))
+        await ledger.flush()
+
+        assert calls == [1, 1]
+        stats = ledger.get_stats()
+        assert stats["pending_retry_records"] == 0
+        assert stats["records_dropped"] == 2
+        assert caplog.text.count("cannot be persisted") == 1
+        await ledger.close()
+
+    @pytest.mark.asyncio
+    async def test_close_drains_queue_and_writes_late_records_through(self):
+        redis = CountingRedis()
+        writer = RecordingWriter()
+        ledger = UsageLedger(redis, writer, flush_interval=10)
+        for i in range(10):
+            await ledger.record(make_usage(i))
+
+        await ledger.close()
+        assert len(writer.request_ids) == 10
+
+        await ledger.record(make_usage(10))
+        assert writer.request_ids[-1] == "req-10"
+        assert int(redis.data["ai_usage:daily:2026-10-16"]["total_requests"]) == 11
+
+    def test_log_row_keeps_user_reference_in_metadata(self):
+        usage = make_usage(1)
+        usage.metadata = {"endpoint": "/api/v1/ai/generate-policy"}
+        usage.request_id = None
+
+        row = usage_log_row(usage)
+
+        assert row["endpoint"] == "/api/v1/ai/generate-policy"
+        assert '"user_id": "user_1"' in row["metadata"]
+        assert row["request_id"]
+        assert row["hour_key"] == 9
+
+
+class TestCostTrackingServiceLedger:
+    """Test track_usage through the ledger"""
+
+    @pytest.mark.asyncio
+    async def test_track_usage_is_write_behind_with_read_your_writes(self):
+        redis = CountingRedis()
+        writer = RecordingWriter()
+        tracker = CostTrackingService(redis_client=redis, record_writer=writer)
+
+        for i in range(20):
+            await tracker.track_usage("policy_generation", "gemini-2.5-flash", 1000, 500, request_id=f"r{i}")
+        assert redis.pipelines_executed == 0
+
+        daily = await tracker.calculate_daily_costs(datetime.now().date())
+
+        assert daily["total_requests"] == 20
+        # One counter write, one rollup read
+        assert redis.pipelines_executed == 2
+        assert len(writer.request_ids) == 20
+        await tracker.close()
@@ -0,0 +1,319 @@
+"""
+Unit Tests for Pre-aggregated AI Cost Rollups
+
+Covers the per-day rollup hash written by the usage ledger, pipelined range
+reads, the fallback to legacy daily totals and compacted Postgres rows,
+monthly compaction (manual and scheduled), late writes to compacted days and
+the CostTrackingService read paths built on them.
+"""
+
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+import pytest
+
+from services.ai.cost_ledger import UsageLedger
+from services.ai.cost_management import AIUsageMetrics, CostTrackingService
+from services.ai.cost_rollups import (
+    COMPACTION_LOCK_KEY,
+    compact_month,
+    compact_previous_month,
+    read_daily_rollups,
+    rollup_key,
+)
+from tests.mocks.mock_redis import MockPipeline, MockRedis
+
+pytestmark = pytest.mark.unit
+
+
+class RoundTripRedis(MockRedis):
+    """MockRedis that counts round trips (pipelines and plain commands)."""
+
+    def __init__(self):
+        super().__init__()
+        self.round_trips = 0
+
+    def pipeline(self):
+        redis = self
+
+        class Pipeline(MockPipeline):
+            async def execute(self):
+                redis.round_trips += 1
+                return await super().execute()
+
+        return Pipeline(self)
+
+    async def keys(self, pattern="*"):
+        self.round_trips += 1
+        return await super().keys(pattern)
+
+    async def delete(self, *keys):
+        self.round_trips += 1
+        return await super().delete(*keys)
+
+
+class CompactedStore:
+    """In-memory cost_aggregations stand-in for compaction and reads."""
+
+    def __init__(self):
+        self.rows = []
+        self.loads = []
+
+    async def write(self, start_date, end_date, rows):
+        self.rows = [row for row in self.rows if not start_date <= row["date_key"] <= end_date] + rows
+
+    async def load(self, start_date, end_date):
+        self.loads.append((start_date, end_date))
+        days = {}
+        for row in self.rows:
+            if row["aggregation_type"] != "daily" or not start_date <= row["date_key"] <= end_date:
+                continue
+            day = days.setdefault(row["date_key"], {
+                "total_cost": Decimal("0"), "total_requests": 0, "total_tokens": 0,
+                "service_breakdown": {}, "model_breakdown": {},
+            })
+            entry = {"cost": row["total_cost"], "requests": row["total_requests"], "tokens": row["total_tokens"]}
+            if row["service_name"]:
+                day["service_breakdown"][row["service_name"]] = entry
+            elif row["model_name"]:
+                day["model_breakdown"][row["model_name"]] = entry
+            else:
+                day.update(total_cost=entry["cost"], total_requests=entry["requests"], total_tokens=entry["tokens"])
+        return days
+
+
+def make_usage(day, service="policy_generation", model="gemini-2.5-flash", cost="0.01"):
+    return AIUsageMetrics(
+        service_name=service,
+        model_name=model,
+        input_tokens=100,
+        output_tokens=50,
+        total_tokens=150,
+        request_count=1,
+        cost_usd=Decimal(cost),
+        timestamp=datetime.combine(day, datetime.min.time()) + timedelta(hours=10),
+    )
+
+
+async def record_days(redis, days, per_day=3):
+    ledger = UsageLedger(redis, None, flush_interval=10)
+    for day in days:
+        for i in range(per_day):
+            await ledger.record(make_usage(day, service=f"service_{i % 2}"))
+    await ledger.close()
+
+
+class TestDailyRollups:
+    """Test rollup writes, range reads and compaction"""
+
+    @pytest.mark.asyncio
+    async def test_range_read_returns_breakdowns_in_one_round_trip(self):
+        redis = RoundTripRedis()
+        today = date(2026, 10, 16)
+        days = [today - timedelta(days=offset) for offset in range(90)]
+        await record_days(redis, days)
+        redis.round_trips = 0
+
+        summaries = await read_daily_rollups(redis, days[-1], today, None, today=today)
+
+        assert redis.round_trips == 1
+        assert list(summaries) == sorted(days)
+        day = summaries[today]
+        assert day["total_requests"] == 3
+        assert float(day["total_cost"]) == pytest.approx(0.03)
+        assert day["service_breakdown"]["service_0"]["requests"] == 2
+        assert day["service_breakdown"]["service_0"]["tokens"] == 300
+        assert day["model_breakdown"]["gemini-2.5-flash"]["requests"] == 3
+
+    @pytest.mark.asyncio
+    async def test_days_without_rollups_fall_back_to_daily_totals(self):
+        redis = RoundTripRedis()
+        await redis.hset("ai_usage:daily:2026-10-01", mapping={"total_cost": "1.5", "total_requests": "4", "total_tokens": "900"})
+
+        summaries = await read_daily_rollups(redis, date(2026, 10, 1), date(2026, 10, 2), None, today=date(2026, 10, 16))
+
+        assert summaries[date(2026, 10, 1)]["total_cost"] == Decimal("1.5")
+        assert summaries[date(2026, 10, 1)]["service_breakdown"] == {}
+        assert summaries[date(2026, 10, 2)]["total_requests"] == 0
+
+    @pytest.mark.asyncio
+    async def test_compacted_rows_are_only_loaded_for_finished_months(self):
+        redis = RoundTripRedis()
+        store = CompactedStore()
+
+        await read_daily_rollups(redis, date(2026, 10, 1), date(2026, 10, 16), store.load, today=date(2026, 10, 16))
+        assert store.loads == []
+
+        await read_daily_rollups(redis, date(2026, 9, 25), date(2026, 10, 16), store.load, today=date(2026, 10, 16))
+        assert store.loads == [(date(2026, 9, 25), date(2026, 9, 30))]
+
+    @pytest.mark.asyncio
+    async def test_compact_month_moves_rollups_to_postgres(self):
+        redis = RoundTripRedis()
+        store = CompactedStore()
+        september = [date(2026, 9, 1) + timedelta(days=offset) for offset in range(30)]
+        await record_days(redis, september + [date(2026, 10, 1)])
+        before = await read_daily_rollups(redis, september[0], september[-1], None, today=date(2026, 10, 16))
+
+        result = await compact_month(redis, 2026, 9, store.write, today=date(2026, 10, 16), compacted_loader=store.load)
+
+        assert result == {"period": "2026-09", "days_compacted": 30, "rows_written": 30 * 4 + 4}
+        assert rollup_key(date(2026, 9, 15)) not in redis.data
+        assert rollup_key(date(2026, 10, 1)) in redis.data
+        monthly_total = next(
+            row for row in store.rows
+            if row["aggregation_type"] == "monthly" and row["service_name"] is None and row["model_name"] is None
+        )
+        assert monthly_total["date_key"] == date(2026, 9, 1)
+        assert monthly_total["total_requests"] == 90
+
+        after = await read_daily_rollups(redis, september[0], september[-1], store.load, today=date(2026, 10, 16))
+        assert after == before
+
+    @pytest.mark.asyncio
+    async def test_compact_month_refuses_unfinished_month(self):
+        with pytest.raises(ValueError):
+            await compact_month(RoundTripRedis(), 2026, 10, CompactedStore().write, today=date(2026, 10, 31))
+
+    @pytest.mark.asyncio
+    async def test_rerun_after_failed_delete_does_not_double_count(self):
+        redis = RoundTripRedis()
+        store = CompactedStore()
+        await record_days(redis, [date(2026, 9, 3)])
+
+        async def failing_delete(*keys):
+            raise ConnectionError("redis down")
+
+        redis.delete = failing_delete
+        with pytest.raises(ConnectionError):
+            await compact_month(redis, 2026, 9, store.write, today=date(2026, 10, 16), compacted_loader=store.load)
+        del redis.delete
+        await compact_month(redis, 2026, 9, store.write, today=date(2026, 10, 16), compacted_loader=store.load)
+
+        daily_totals = [
+            row for row in store.rows
+            if row["aggregation_type"] == "daily" and row["service_name"] is None and row["model_name"] is None
+        ]
+        assert [row["total_requests"] for row in daily_totals] == [3]
+        assert rollup_key(date(2026, 9, 3)) not in redis.data
+
+    @pytest.mark.asyncio
+    async def test_late_write_does_not_shadow_compacted_day(self):
+        redis = RoundTripRedis()
+        store = CompactedStore()
+        today = date(2026, 10, 16)
+        await record_days(redis, [date(2026, 9, 3)])
+        await compact_month(redis, 2026, 9, store.write, today=today, compacted_loader=store.load)
+
+        # A worker flushes a September event after the month was compacted
+        await record_days(redis, [date(2026, 9, 3)], per_day=1)
+        assert rollup_key(date(2026, 9, 3)) in redis.data
+
+        day = (await read_daily_rollups(redis, date(2026, 9, 3), date(2026, 9, 3), store.load, today=today))[date(2026, 9, 3)]
+        assert day["total_requests"] == 4
+
+        await compact_month(redis, 2026, 9, store.write, today=today, compacted_loader=store.load)
+        await redis.delete("ai_usage:daily:2026-09-03")
+
+        day = (await read_daily_rollups(redis, date(2026, 9, 3), date(2026, 9, 3), store.load, today=today))[date(2026, 9, 3)]
+        assert day["total_requests"] == 4
+
+    @pytest.mark.asyncio
+    async def test_partial_rollup_on_deploy_day_keeps_daily_totals(self):
+        redis = RoundTripRedis()
+        store = CompactedStore()
+        today = date(2026, 10, 16)
+        # Usage tracked before rollups existed only reached the daily totals
+        await redis.hset("ai_usage:daily:2026-09-20", mapping={"total_cost": "1.0", "total_requests": "10", "total_tokens": "1500"})
+        await record_days(redis, [date(2026, 9, 20)])
+
+        day = (await read_daily_rollups(redis, date(2026, 9, 20), date(2026, 9, 20), None, today=today))[date(2026, 9, 20)]
+        assert day["total_requests"] == 13
+
+        await compact_month(redis, 2026, 9, store.write, today=today, compacted_loader=store.load)
+        compacted = await store.load(date(2026, 9, 20), date(2026, 9, 20))
+        assert compacted[date(2026, 9, 20)]["total_requests"] == 13
+
+    @pytest.mark.asyncio
+    async def test_scheduled_compaction_runs_once_across_workers(self):
+        fakeredis = pytest.importorskip("fakeredis")
+        redis = fakeredis.aioredis.FakeRedis(decode_responses=True)
+        months = []
+
+        async def compact(year, month):
+            months.append((year, month))
+            return {"period": f"{year}-{month:02d}", "days_compacted": 0, "rows_written": 0}
+
+        await redis.set(COMPACTION_LOCK_KEY, "1")
+        assert await compact_previous_month(redis, compact, today=date(2026, 1, 2)) is None
+
+        await redis.delete(COMPACTION_LOCK_KEY)
+        result = await compact_previous_month(redis, compact, today=date(2026, 1, 2))
+
+        assert result["period"] == "2025-12"
+        assert months == [(2025, 12)]
+        assert await redis.exists(COMPACTION_LOCK_KEY) == 0
+
+
+class TestCostTrackingServiceRollups:
+    """Test the tracker read paths on top of the rollups"""
+
+    @pytest.fixture
+    def tracker(self):
+        return CostTrackingService(redis_client=RoundTripRedis(), record_writer=None, compacted_loader=None)
+
+    @pytest.mark.asyncio
+    async def test_daily_costs_include_service_and_model_breakdowns(self, tracker):
+        for i in range(6):
+            await tracker.track_usage(f"service_{i % 3}", "gemini-2.5-pro", 1000, 500)
+
+        daily = await tracker.calculate_daily_costs(date.today())
+
+        assert daily["total_requests"] == 6
+        assert set(daily["service_breakdown"]) == {"service_0", "service_1", "service_2"}
+        assert daily["model_breakdown"]["gemini-2.5-pro"]["requests"] == 6
+        assert float(sum(entry["cost"] for entry in daily["service_breakdown"].values())) == pytest.approx(float(daily["total_cost"]))
+        await tracker.close()
+
+    @pytest.mark.asyncio
+    async def test_usage_by_service_reads_legacy_days_from_service_hashes(self, tracker):
+        legacy_day = date.today() - timedelta(days=1)
+        await tracker.redis.hset(f"ai_usage:daily:{legacy_day}", mapping={"total_cost": "1.5", "total_requests": "4", "total_tokens": "900"})
+        await tracker.redis.hset(
+            f"ai_usage:service:policy_generation:{legacy_day}",
+            mapping={"total_cost": "1.0", "total_requests": "3", "total_tokens": "600"},
+        )
+        await tracker.track_usage("policy_generation", "gemini-2.5-flash", 1000, 500)
+
+        usage = await tracker.get_usage_by_service("policy_generation", legacy_day, date.today())
+
+        assert [metric.timestamp.date() for metric in usage] == [legacy_day, date.today()]
+        assert usage[0].request_count == 3
+        assert usage[0].cost_usd == Decimal("1.0")
+        assert usage[1].request_count == 1
+        await tracker.close()
+
+    @pytest.mark.asyncio
+    async def test_ninety_day_trend_takes_single_digit_round_trips(self, tracker):
+        await tracker.track_usage("policy_generation", "gemini-2.5-flash", 1000, 500)
+        await tracker.flush()
+        tracker.redis.round_trips = 0
+
+        trends = await tracker.get_cost_trends(90)
+
+        assert len(trends) == 90
+        assert trends[-1]["requests"] == 1
+        assert tracker.redis.round_trips < 10
+        await tracker.close()
+
+    @pytest.mark.asyncio
+    async def test_anomalies_reuse_fetched_trends(self, tracker):
+        trends = [{"date": f"2026-10-{day:02d}", "cost": Decimal("1"), "requests": 1, "tokens": 10} for day in range(1, 16)]
+        trends.append({"date": "2026-10-16", "cost": Decimal("5"), "requests": 1, "tokens": 10})
+
+        anomalies = await tracker.identify_cost_anomalies(trends=trends)
+
+        assert tracker.redis.round_trips == 0
+        assert anomalies[0]["date"] == "2026-10-16"
+        assert anomalies[0]["severity"] == "high"
+        await tracker.close()
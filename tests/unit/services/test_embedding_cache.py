@@ -0,0 +1,145 @@
+"""
+Unit Tests for the Shared Embedding Cache
+
+Covers packing, the byte-budgeted L1 tier, batched lookups through a
+fakeredis L2 tier shared by two cache instances, and per-model hit rates.
+"""
+
+import numpy as np
+import pytest
+
+from services.caching.embedding_cache import (
+    EmbeddingCache,
+    content_hash,
+    embedding_model_name,
+)
+
+
+class CountingEmbedder:
+    """Fake embedding model that records every batch it is asked for."""
+
+    def __init__(self):
+        self.calls = []
+
+    async def __call__(self, texts):
+        self.calls.append(list(texts))
+        return [[float(len(text)), 0.5, -0.25] for text in texts]
+
+
+@pytest.mark.unit
+class TestPacking:
+    """Test vector encoding"""
+
+    def test_float16_round_trip_is_close(self):
+        cache = EmbeddingCache()
+        vector = [0.123456, -0.5, 0.0, 1.0]
+
+        data = cache.pack(vector)
+
+        assert len(data) == 1 + 2 * len(vector)
+        assert np.allclose(EmbeddingCache.unpack(data), vector, atol=1e-3)
+
+    def test_float32_round_trip_is_exact(self):
+        cache = EmbeddingCache(dtype="float32")
+        vector = [0.123456, -0.5]
+
+        assert EmbeddingCache.unpack(cache.pack(vector)) == list(np.asarray(vector, dtype=np.float32))
+
+    def test_rejects_unknown_dtype(self):
+        with pytest.raises(ValueError):
+            EmbeddingCache(dtype="int8")
+
+    def test_key_uses_model_and_full_hash(self):
+        key = EmbeddingCache.make_key("mistral-embed", "GDPR Article 5")
+        assert key.endswith(f"mistral-embed:{content_hash('GDPR Article 5')}")
+        assert len(content_hash("x")) == 64
+
+    def test_model_name_from_embeddings_object(self):
+        class OpenAIStyle:
+            model = "text-embedding-3-small"
+
+        class Unnamed:
+            pass
+
+        assert embedding_model_name(OpenAIStyle()) == "text-embedding-3-small"
+        assert embedding_model_name(Unnamed()) == "Unnamed"
+
+
+@pytest.mark.unit
+class TestL1Tier:
+    """Test the in-process tier"""
+
+    @pytest.mark.asyncio
+    async def test_get_or_embed_only_embeds_misses_once(self):
+        cache = EmbeddingCache()
+        embedder = CountingEmbedder()
+        await cache.get_or_embed("m", ["a", "bb"], embedder)
+
+        vectors = await cache.get_or_embed("m", ["a", "ccc", "ccc", "bb"], embedder)
+
+        assert embedder.calls == [["a", "bb"], ["ccc"]]
+        assert [vector[0] for vector in vectors] == [1.0, 3.0, 3.0, 2.0]
+
+    @pytest.mark.asyncio
+    async def test_models_do_not_share_entries(self):
+        cache = EmbeddingCache()
+        embedder = CountingEmbedder()
+        await cache.get_or_embed("model-a", ["text"], embedder)
+
+        assert await cache.get_many("model-b", ["text"]) == [None]
+
+    @pytest.mark.asyncio
+    async def test_byte_budget_evicts_least_recently_used(self):
+        entry_bytes = 1 + 2 * 3
+        cache = EmbeddingCache(max_memory_bytes=entry_bytes * 2)
+        embedder = CountingEmbedder()
+        await cache.get_or_embed("m", ["a", "b"], embedder)
+        await cache.get_many("m", ["a"])
+        await cache.get_or_embed("m", ["c"], embedder)
+
+        assert cache.get_stats()["l1_bytes"] == entry_bytes * 2
+        found = await cache.get_many("m", ["a", "b", "c"])
+        assert [vector is not None for vector in found] == [True, False, True]
+
+    @pytest.mark.asyncio
+    async def test_hit_rate_per_model(self):
+        cache = EmbeddingCache()
+        embedder = CountingEmbedder()
+        await cache.get_or_embed("m", ["a", "b"], embedder)
+        await cache.get_or_embed("m", ["a", "b"], embedder)
+
+        stats = cache.get_stats()["models"]["m"]
+        assert stats["l1_hits"] == 2
+        assert stats["misses"] == 2
+        assert stats["hit_rate"] == 0.5
+
+
+@pytest.mark.unit
+class TestRedisTier:
+    """Test the shared Redis tier"""
+
+    @pytest.mark.asyncio
+    async def test_second_instance_reads_from_redis(self):
+        fakeredis = pytest.importorskip("fakeredis")
+        server = fakeredis.FakeServer()
+        writer = EmbeddingCache(fakeredis.aioredis.FakeRedis(server=server, decode_responses=True))
+        reader = EmbeddingCache(fakeredis.aioredis.FakeRedis(server=server, decode_responses=True))
+        embedder = CountingEmbedder()
+        await writer.get_or_embed("m", ["policy", "control"], embedder)
+
+        vectors = await reader.get_or_embed("m", ["policy", "control"], embedder)
+
+        assert len(embedder.calls) == 1
+        assert vectors[1][0] == 7.0
+        assert reader.get_stats()["models"]["m"]["l2_hits"] == 2
+        assert (await reader.get_many("m", ["policy"]))[0] is not None
+        assert reader.get_stats()["models"]["m"]["l1_hits"] == 1
+
+    @pytest.mark.asyncio
+    async def test_corrupt_entry_is_a_miss(self):
+        fakeredis = pytest.importorskip("fakeredis")
+        client = fakeredis.aioredis.FakeRedis(decode_responses=True)
+        cache = EmbeddingCache(client)
+        await client.set(EmbeddingCache.make_key("m", "text"), "not base64 !!")
+
+        assert await cache.get_many("m", ["text"]) == [None]
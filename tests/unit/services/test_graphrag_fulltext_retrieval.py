@@ -0,0 +1,135 @@
+"""
+Unit Tests for Full-text GraphRAG Local Retrieval
+
+Covers query tokenization, the full-text local query and its parameters,
+score propagation and the CONTAINS fallback when the index is missing.
+"""
+
+import pytest
+
+pytest.importorskip("langchain_openai")
+
+from neo4j.exceptions import ClientError
+
+from services.graphrag_retriever import (
+    FULLTEXT_MAX_TERMS,
+    LOCAL_CONTAINS_QUERY,
+    LOCAL_FULLTEXT_QUERY,
+    GraphRAGRetriever,
+    fulltext_search_terms,
+)
+from services.neo4j_service import REGULATION_FULLTEXT_INDEX, REQUIREMENT_FULLTEXT_INDEX
+
+RECORD = {
+    "result": {
+        "regulation": {"name": "GDPR", "jurisdiction": "EU"},
+        "requirement": {"id": "art33", "description": "Notify breaches", "score": 2.5},
+        "controls": [],
+    },
+}
+
+
+class FakeNeo4jService:
+    """Records queries; optionally fails full-text queries like a missing index."""
+
+    def __init__(self, index_missing=False):
+        self.index_missing = index_missing
+        self.calls = []
+
+    async def execute_query(self, query, params=None, read_only=True):
+        self.calls.append((query, params))
+        if query == LOCAL_FULLTEXT_QUERY and self.index_missing:
+            raise ClientError("There is no such fulltext schema index: requirement_description_fulltext")
+        return [RECORD]
+
+
+def make_retriever(monkeypatch, service):
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    return GraphRAGRetriever(service, enable_cache=False)
+
+
+@pytest.mark.unit
+class TestFullTextSearchTerms:
+    """Test query tokenization for the full-text indexes"""
+
+    def test_drops_stopwords_punctuation_and_duplicates(self):
+        terms = fulltext_search_terms("What are the GDPR Article 33 breach-notification rules for a breach?")
+        assert terms == ["gdpr", "article", "33", "breach", "notification", "rules"]
+
+    def test_lucene_syntax_is_not_passed_through(self):
+        assert fulltext_search_terms('encrypt* AND "data" OR title:(x~2)') == ["encrypt", "data", "title", "2"]
+
+    def test_keeps_single_digits_and_caps_terms(self):
+        assert fulltext_search_terms("Article 5 (b)") == ["article", "5"]
+        assert len(fulltext_search_terms(" ".join(f"word{i}" for i in range(40)))) == FULLTEXT_MAX_TERMS
+
+    def test_only_stopwords(self):
+        assert fulltext_search_terms("what is it?") == []
+
+
+@pytest.mark.unit
+class TestFullTextLocalRetrieval:
+    """Test full-text local retrieval and the CONTAINS fallback"""
+
+    @pytest.mark.asyncio
+    async def test_uses_fulltext_indexes(self, monkeypatch):
+        service = FakeNeo4jService()
+        retriever = make_retriever(monkeypatch, service)
+
+        result = await retriever._local_retrieval("GDPR Article 33 requirement", "EU", 10)
+
+        query, params = service.calls[0]
+        assert query == LOCAL_FULLTEXT_QUERY
+        assert params == {
+            "regulation_index": REGULATION_FULLTEXT_INDEX,
+            "requirement_index": REQUIREMENT_FULLTEXT_INDEX,
+            "search": "gdpr article 33 requirement",
+            "jurisdiction": "EU",
+            "max_nodes": 10,
+        }
+        requirement = next(node for node in result["nodes"] if node["type"] == "Requirement")
+        assert requirement["properties"]["score"] == 2.5
+
+    @pytest.mark.asyncio
+    async def test_missing_index_falls_back_and_is_remembered(self, monkeypatch):
+        service = FakeNeo4jService(index_missing=True)
+        retriever = make_retriever(monkeypatch, service)
+
+        result = await retriever._local_retrieval("breach notification", None, 10)
+        await retriever._local_retrieval("data retention", None, 10)
+
+        assert [query for query, _ in service.calls] == [LOCAL_FULLTEXT_QUERY, LOCAL_CONTAINS_QUERY, LOCAL_CONTAINS_QUERY]
+        assert service.calls[1][1] == {"query_term": "breach notification", "jurisdiction": None, "max_nodes": 10}
+        assert result["confidence"] == 0.9
+
+    @pytest.mark.asyncio
+    async def test_retries_fulltext_after_backoff(self, monkeypatch):
+        service = FakeNeo4jService(index_missing=True)
+        retriever = make_retriever(monkeypatch, service)
+        await retriever._local_retrieval("breach notification", None, 10)
+
+        service.index_missing = False
+        retriever._fulltext_unavailable_until = 0.0
+        await retriever._local_retrieval("breach notification", None, 10)
+
+        assert service.calls[-1][0] == LOCAL_FULLTEXT_QUERY
+
+    @pytest.mark.asyncio
+    async def test_query_without_terms_uses_contains(self, monkeypatch):
+        service = FakeNeo4jService()
+        retriever = make_retriever(monkeypatch, service)
+
+        await retriever._local_retrieval("what is it?", None, 10)
+
+        assert [query for query, _ in service.calls] == [LOCAL_CONTAINS_QUERY]
+
+    @pytest.mark.asyncio
+    async def test_other_errors_propagate(self, monkeypatch):
+        class DownService(FakeNeo4jService):
+            async def execute_query(self, query, params=None, read_only=True):
+                raise ConnectionError("neo4j unavailable")
+
+        retriever = make_retriever(monkeypatch, DownService())
+
+        with pytest.raises(ConnectionError):
+            await retriever._local_retrieval("breach notification", None, 10)
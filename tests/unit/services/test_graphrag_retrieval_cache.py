@@ -0,0 +1,209 @@
+"""
+Unit Tests for the GraphRAG Retrieval Cache
+
+Covers cache keys (normalized query, mode, jurisdiction, max_nodes, graph
+version), exact invalidation by graph version bumps, bypass when the
+version is unknown, per-mode hit/miss metrics, short-lived caching of
+degraded results and temporal value normalization.
+"""
+
+import time
+from datetime import datetime, timezone
+
+import pytest
+
+pytest.importorskip("langchain_openai")
+
+from services.caching.cache_manager import CacheManager
+from services.caching.graph_version import GraphVersion
+from services.graphrag_retriever import (
+    DEGRADED_RETRIEVAL_CACHE_TTL,
+    GraphRAGRetriever,
+    RetrievalMode,
+)
+
+
+class FakeNeo4jService:
+    """Counts graph queries and returns one regulation/requirement record."""
+
+    def __init__(self):
+        self.queries = 0
+
+    async def execute_query(self, query, params=None, read_only=True):
+        self.queries += 1
+        return [
+            {
+                "result": {
+                    "regulation": {"name": "GDPR", "jurisdiction": "EU", "url": "https://gdpr.eu"},
+                    "requirement": {"id": "art33", "description": "Notify breaches"},
+                    "controls": [],
+                },
+            },
+        ]
+
+
+class FailingVectorNeo4jService(FakeNeo4jService):
+    """Vector index queries fail; everything else succeeds."""
+
+    async def execute_query(self, query, params=None, read_only=True):
+        if "db.index.vector" in query:
+            self.queries += 1
+            raise RuntimeError("vector index unavailable")
+        return await super().execute_query(query, params, read_only)
+
+
+class TemporalNeo4jService(FakeNeo4jService):
+    """Returns a regulation change with a datetime property."""
+
+    async def execute_query(self, query, params=None, read_only=True):
+        self.queries += 1
+        return [
+            {
+                "change": {
+                    "current": {
+                        "name": "GDPR",
+                        "last_updated": datetime(2025, 3, 1, 9, 30, tzinfo=timezone.utc),
+                    },
+                    "change_type": "amendment",
+                },
+            },
+        ]
+
+
+class UnavailableGraphVersion(GraphVersion):
+    async def get(self):
+        return None
+
+
+def make_retriever(monkeypatch, graph_version=None, neo4j_service=None):
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    manager = CacheManager(enable_invalidation_bus=False)
+    # L1 only - no Redis connection
+    manager._initialized = True
+    return GraphRAGRetriever(
+        neo4j_service or FakeNeo4jService(),
+        cache_manager=manager,
+        graph_version=graph_version or GraphVersion(),
+    )
+
+
+def cached_expiry(retriever):
+    """Seconds until the single cached retrieval entry expires."""
+    entries = [
+        entry
+        for shard in retriever.cache_manager._l1_cache._shards
+        for entry in shard.entries.values()
+    ]
+    assert len(entries) == 1
+    return entries[0].expires_at - time.time()
+
+
+@pytest.mark.unit
+class TestGraphRAGRetrievalCache:
+    """Test retrieval result caching keyed on graph version"""
+
+    @pytest.mark.asyncio
+    async def test_repeated_query_is_served_from_cache(self, monkeypatch):
+        retriever = make_retriever(monkeypatch)
+
+        first = await retriever.retrieve("GDPR article 33 requirement", mode=RetrievalMode.LOCAL)
+        second = await retriever.retrieve("  gdpr ARTICLE 33   requirement ", mode=RetrievalMode.LOCAL)
+
+        assert retriever.neo4j.queries == 1
+        assert first.query_metadata["cache"] == "miss"
+        assert second.query_metadata["cache"] == "hit"
+        assert second.nodes == first.nodes
+        assert second.query_id != first.query_id
+
+    @pytest.mark.asyncio
+    async def test_key_includes_mode_jurisdiction_and_max_nodes(self, monkeypatch):
+        retriever = make_retriever(monkeypatch)
+
+        await retriever.retrieve("breach notification", mode=RetrievalMode.LOCAL)
+        await retriever.retrieve("breach notification", mode=RetrievalMode.LOCAL, jurisdiction="UK")
+        await retriever.retrieve("breach notification", mode=RetrievalMode.LOCAL, max_nodes=10)
+        await retriever.retrieve("breach notification", mode=RetrievalMode.TEMPORAL)
+
+        assert retriever.neo4j.queries == 4
+
+    @pytest.mark.asyncio
+    async def test_graph_version_bump_invalidates(self, monkeypatch):
+        version = GraphVersion()
+        retriever = make_retriever(monkeypatch, version)
+
+        await retriever.retrieve("data retention", mode=RetrievalMode.LOCAL)
+        await version.bump()
+        result = await retriever.retrieve("data retention", mode=RetrievalMode.LOCAL)
+
+        assert retriever.neo4j.queries == 2
+        assert result.query_metadata["cache"] == "miss"
+
+    @pytest.mark.asyncio
+    async def test_unknown_graph_version_bypasses_cache(self, monkeypatch):
+        retriever = make_retriever(monkeypatch, UnavailableGraphVersion())
+
+        await retriever.retrieve("data retention", mode=RetrievalMode.LOCAL)
+        result = await retriever.retrieve("data retention", mode=RetrievalMode.LOCAL)
+
+        assert retriever.neo4j.queries == 2
+        assert result.query_metadata["cache"] == "bypassed"
+        assert retriever.cache_stats[RetrievalMode.LOCAL]["bypassed"] == 2
+
+    @pytest.mark.asyncio
+    async def test_stats_are_tracked_per_mode(self, monkeypatch):
+        retriever = make_retriever(monkeypatch)
+
+        for _ in range(3):
+            await retriever.retrieve("article 5 requirement", mode=RetrievalMode.LOCAL)
+        await retriever.retrieve("changes in 2025", mode=RetrievalMode.TEMPORAL)
+
+        stats = retriever.get_cache_stats()["by_mode"]
+        assert stats["local"] == {"hits": 2, "misses": 1, "bypassed": 0, "hit_rate": pytest.approx(2 / 3)}
+        assert stats["temporal"]["misses"] == 1
+        assert stats["global"]["hit_rate"] == 0.0
+
+    @pytest.mark.asyncio
+    async def test_vector_search_fallback_is_cached_briefly(self, monkeypatch):
+        retriever = make_retriever(monkeypatch, neo4j_service=FailingVectorNeo4jService())
+
+        async def embedding(text):
+            return [0.1] * 1536
+
+        monkeypatch.setattr(retriever, "_get_embedding", embedding)
+
+        result = await retriever.retrieve("data retention", mode=RetrievalMode.HYBRID)
+
+        assert result.nodes
+        assert cached_expiry(retriever) <= DEGRADED_RETRIEVAL_CACHE_TTL
+
+    @pytest.mark.asyncio
+    async def test_zero_vector_result_is_cached_briefly(self, monkeypatch):
+        retriever = make_retriever(monkeypatch)
+
+        async def failed_embedding(text):
+            return [0.0] * 1536
+
+        monkeypatch.setattr(retriever, "_get_embedding", failed_embedding)
+
+        await retriever.retrieve("data retention", mode=RetrievalMode.HYBRID)
+
+        assert cached_expiry(retriever) <= DEGRADED_RETRIEVAL_CACHE_TTL
+
+    @pytest.mark.asyncio
+    async def test_healthy_result_keeps_full_ttl(self, monkeypatch):
+        retriever = make_retriever(monkeypatch)
+
+        await retriever.retrieve("GDPR article 33 requirement", mode=RetrievalMode.LOCAL)
+
+        assert cached_expiry(retriever) > DEGRADED_RETRIEVAL_CACHE_TTL
+
+    @pytest.mark.asyncio
+    async def test_temporal_values_match_between_miss_and_hit(self, monkeypatch):
+        retriever = make_retriever(monkeypatch, neo4j_service=TemporalNeo4jService())
+
+        first = await retriever.retrieve("changes in 2025", mode=RetrievalMode.TEMPORAL)
+        second = await retriever.retrieve("changes in 2025", mode=RetrievalMode.TEMPORAL)
+
+        assert second.query_metadata["cache"] == "hit"
+        assert first.nodes[0]["properties"]["last_updated"] == "2025-03-01T09:30:00+00:00"
+        assert second.nodes == first.nodes
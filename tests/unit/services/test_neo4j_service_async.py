@@ -0,0 +1,194 @@
+"""
+Unit Tests for the Async Neo4j GraphRAG Service
+
+Covers managed read/write transactions, multi-query transactions, pool
+configuration, per-query timing metrics and the shared implementation
+behind the langgraph_agent import path.
+"""
+
+import pytest
+
+pytest.importorskip("neo4j")
+
+from services import neo4j_service as neo4j_module
+from services.caching.graph_version import GraphVersion
+from services.neo4j_service import Neo4jGraphRAGService, query_fingerprint
+
+
+class FakeResult:
+    def __init__(self, records):
+        self.records = records
+
+    async def data(self):
+        return self.records
+
+    async def consume(self):
+        return None
+
+
+class FakeTransaction:
+    def __init__(self, driver):
+        self.driver = driver
+
+    async def run(self, query, parameters=None):
+        if "FAIL" in query:
+            raise RuntimeError("query failed")
+        self.driver.queries.append((query, parameters))
+        return FakeResult([{"test": 1}] if "AS test" in query else [{"value": 1}])
+
+
+class FakeSession:
+    def __init__(self, driver):
+        self.driver = driver
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def run(self, query):
+        self.driver.schema.append(query)
+        return FakeResult([])
+
+    async def execute_read(self, work, *args):
+        self.driver.modes.append("read")
+        return await work(FakeTransaction(self.driver), *args)
+
+    async def execute_write(self, work, *args):
+        self.driver.modes.append("write")
+        return await work(FakeTransaction(self.driver), *args)
+
+
+class FakeAsyncDriver:
+    def __init__(self):
+        self.queries = []
+        self.modes = []
+        self.schema = []
+        self.closed = False
+
+    def session(self, database=None):
+        return FakeSession(self)
+
+    async def close(self):
+        self.closed = True
+
+
+@pytest.fixture(autouse=True)
+def graph_version(monkeypatch):
+    version = GraphVersion()
+
+    async def get_graph_version():
+        return version
+
+    monkeypatch.setattr(neo4j_module, "get_graph_version", get_graph_version)
+    return version
+
+
+@pytest.fixture
+def service(monkeypatch):
+    monkeypatch.setenv("NEO4J_URI", "bolt://localhost:7687")
+    monkeypatch.setenv("NEO4J_USERNAME", "neo4j")
+    monkeypatch.setenv("NEO4J_PASSWORD", "test")
+    service = Neo4jGraphRAGService()
+    service.driver = FakeAsyncDriver()
+    return service
+
+
+@pytest.mark.unit
+class TestAsyncNeo4jService:
+    """Test the async driver integration"""
+
+    @pytest.mark.asyncio
+    async def test_reads_and_writes_use_managed_transactions(self, service):
+        assert await service.execute_query("MATCH (n) RETURN 1 AS value") == [{"value": 1}]
+        await service.execute_query("CREATE (n:Test)", {"x": 1}, read_only=False)
+
+        assert service.driver.modes == ["read", "write"]
+        assert service.driver.queries[1] == ("CREATE (n:Test)", {"x": 1})
+
+    @pytest.mark.asyncio
+    async def test_timings_recorded_per_query(self, service):
+        for _ in range(3):
+            await service.execute_query("MATCH (n) RETURN 1 AS value")
+        await service.execute_query("MATCH (r) RETURN 1 AS value", query_name="regulations")
+        with pytest.raises(RuntimeError):
+            await service.execute_query("FAIL", query_name="regulations")
+
+        metrics = service.get_query_metrics()["queries"]
+        assert metrics[query_fingerprint("MATCH (n) RETURN 1 AS value")]["count"] == 3
+        assert metrics["regulations"]["count"] == 2
+        assert metrics["regulations"]["errors"] == 1
+        assert 0 <= metrics["regulations"]["p50_ms"] <= metrics["regulations"]["max_ms"]
+
+    @pytest.mark.asyncio
+    async def test_transaction_runs_all_queries_in_one_write(self, service):
+        assert await service.execute_transaction([("CREATE (a)", {}), ("CREATE (b)", {})])
+        assert service.driver.modes == ["write"]
+        assert [query for query, _ in service.driver.queries] == ["CREATE (a)", "CREATE (b)"]
+
+        assert not await service.execute_transaction([("FAIL", {})])
+        assert service.get_query_metrics()["queries"]["transaction"]["errors"] == 1
+
+    @pytest.mark.asyncio
+    async def test_committed_writes_bump_graph_version(self, service, graph_version):
+        await service.execute_query("MATCH (n) RETURN 1 AS value")
+        assert await graph_version.get() == 0
+
+        await service.execute_query("MATCH (n) DETACH DELETE n", read_only=False)
+        assert await service.execute_transaction([("CREATE (a)", {})])
+        assert await graph_version.get() == 2
+
+        with pytest.raises(RuntimeError):
+            await service.execute_query("FAIL", read_only=False)
+        assert not await service.execute_transaction([("FAIL", {})])
+        assert await graph_version.get() == 2
+
+    @pytest.mark.asyncio
+    async def test_no_driver_returns_empty(self, service):
+        service.driver = None
+        assert await service.execute_query("MATCH (n) RETURN n") == []
+
+    @pytest.mark.asyncio
+    async def test_close_closes_driver(self, service):
+        driver = service.driver
+        await service.close()
+        assert driver.closed
+        assert service.driver is None
+
+    def test_fingerprint_ignores_indentation_and_comments(self):
+        first = query_fingerprint("\n  // comment\n  MATCH (n)\n  RETURN n\n")
+        assert first == query_fingerprint("// comment\nMATCH (n)\nRETURN   n")
+        assert first.startswith("MATCH (n)#")
+        assert first != query_fingerprint("MATCH (n) RETURN n.name")
+
+
+@pytest.mark.unit
+class TestPoolConfiguration:
+    """Test connection pool sizing"""
+
+    @pytest.mark.asyncio
+    async def test_pool_settings_from_env_and_arguments(self, service, monkeypatch):
+        captured = {}
+
+        def fake_driver(uri, **kwargs):
+            captured.update(kwargs)
+            return FakeAsyncDriver()
+
+        monkeypatch.setattr(neo4j_module.AsyncGraphDatabase, "driver", fake_driver)
+        monkeypatch.setenv("NEO4J_MAX_POOL_SIZE", "120")
+        configured = Neo4jGraphRAGService(connection_acquisition_timeout=5)
+
+        assert await configured.initialize()
+        assert any("FULLTEXT" in query for query in configured.driver.schema)
+        assert captured["max_connection_pool_size"] == 120
+        assert captured["connection_acquisition_timeout"] == 5
+        assert captured["max_transaction_retry_time"] == neo4j_module.DEFAULT_MAX_TRANSACTION_RETRY_TIME
+        assert configured.get_query_metrics()["pool"]["max_connection_pool_size"] == 120
+
+
+def test_langgraph_agent_path_shares_implementation():
+    from langgraph_agent.core import neo4j_service as agent_module
+
+    assert agent_module.Neo4jGraphRAGService is Neo4jGraphRAGService
+    assert agent_module.get_neo4j_service is neo4j_module.get_neo4j_service
@@ -0,0 +1,115 @@
+"""
+Unit tests for the reconnecting Redis pub/sub subscriber.
+
+A fake pub/sub client fails on demand so the tests can drive the subscriber
+through a drop and a resubscribe.
+"""
+
+import asyncio
+
+import pytest
+
+from services import redis_pubsub
+from services.redis_pubsub import ReconnectingSubscriber
+
+pytestmark = pytest.mark.unit
+
+
+class FakePubSub:
+    def __init__(self, redis):
+        self.redis = redis
+        self.channels = []
+        self.closed = False
+
+    async def subscribe(self, *channels):
+        if self.redis.fail_subscribes:
+            self.redis.fail_subscribes -= 1
+            raise ConnectionError("connection refused")
+        self.channels.extend(channels)
+
+    async def listen(self):
+        while True:
+            message = await self.redis.messages.get()
+            if isinstance(message, Exception):
+                raise message
+            yield message
+
+    async def aclose(self):
+        self.closed = True
+        if self.redis.fail_close:
+            raise ConnectionError("already closed")
+
+
+class FakeRedis:
+    def __init__(self, fail_subscribes=0, fail_close=False):
+        self.fail_subscribes = fail_subscribes
+        self.fail_close = fail_close
+        self.messages: asyncio.Queue = asyncio.Queue()
+        self.pubsubs = []
+
+    def pubsub(self):
+        pubsub = FakePubSub(self)
+        self.pubsubs.append(pubsub)
+        return pubsub
+
+
+@pytest.fixture(autouse=True)
+def fast_backoff(monkeypatch):
+    monkeypatch.setattr(redis_pubsub, "RECONNECT_BACKOFF_BASE", 0.001)
+
+
+async def wait_until(condition, timeout=1.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition() and asyncio.get_running_loop().time() < deadline:
+        await asyncio.sleep(0.001)
+
+
+class TestReconnectingSubscriber:
+    """Test delivery, reconnects and state notifications"""
+
+    @pytest.mark.asyncio
+    async def test_delivers_messages_and_resubscribes_after_drop(self):
+        redis = FakeRedis(fail_subscribes=1, fail_close=True)
+        channels = ["a"]
+        received, states = [], []
+
+        async def on_message(channel, data):
+            received.append((channel, data))
+
+        async def on_state_change(connected):
+            states.append(connected)
+
+        subscriber = ReconnectingSubscriber(redis, lambda: list(channels), on_message, on_state_change)
+        await subscriber.start()
+        await wait_until(lambda: subscriber.connected)
+        assert subscriber.pubsub is redis.pubsubs[-1]
+
+        await redis.messages.put({"type": "subscribe", "channel": "a", "data": 1})
+        await redis.messages.put({"type": "message", "channel": "a", "data": "hello"})
+        await wait_until(lambda: received)
+        assert received == [("a", "hello")]
+
+        channels.append("b")
+        await redis.messages.put(ConnectionError("connection reset"))
+        await wait_until(lambda: states == [True, False, True])
+
+        assert states == [True, False, True]
+        assert redis.pubsubs[-1].channels == ["a", "b"]
+        # Failed closes are logged, not raised
+        assert all(pubsub.closed for pubsub in redis.pubsubs[:-1])
+        await subscriber.stop()
+        assert not subscriber.connected
+
+    @pytest.mark.asyncio
+    async def test_start_returns_after_failed_first_attempt(self):
+        redis = FakeRedis(fail_subscribes=1000)
+
+        async def on_message(channel, data):
+            pass
+
+        subscriber = ReconnectingSubscriber(redis, lambda: ["a"], on_message)
+        await subscriber.start()
+
+        assert not subscriber.connected
+        assert subscriber.pubsub is None
+        await subscriber.stop()
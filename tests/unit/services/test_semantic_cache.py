@@ -0,0 +1,330 @@
+"""
+Unit Tests for Semantic AI Response Caching
+
+Tests the partitioned vector index and the semantic lookup path of
+AIResponseCache, with the offline hashing embedding plugged in as the model.
+"""
+
+import time
+
+import numpy as np
+import pytest
+
+from services.ai.response_cache import AIResponseCache
+from services.ai.semantic_cache import (
+    SemanticCacheIndex,
+    SemanticVectorIndex,
+    hashing_embedding,
+)
+
+SIMILAR = {"enable_similarity_matching": True}
+
+
+class FakeCacheManager:
+    """Dict-backed stand-in for the cache manager"""
+
+    def __init__(self):
+        self.data = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def set(self, key, value, ttl=None):
+        self.data[key] = value
+        return True
+
+
+@pytest.mark.unit
+class TestSemanticVectorIndex:
+    """Test the NumPy vector index"""
+
+    def test_search_returns_best_match_above_threshold(self):
+        index = SemanticVectorIndex(dimension=3)
+        index.add("x", [1.0, 0.0, 0.0])
+        index.add("y", [0.0, 1.0, 0.0])
+
+        key, score = index.search([0.9, 0.1, 0.0], threshold=0.5)
+        assert key == "x"
+        assert score == pytest.approx(0.9 / np.sqrt(0.82), rel=1e-5)
+        assert index.search([0.0, 0.0, 1.0], threshold=0.5) is None
+
+    def test_remove_swaps_last_row(self):
+        index = SemanticVectorIndex(dimension=2, initial_capacity=1)
+        index.add("a", [1.0, 0.0])
+        index.add("b", [0.0, 1.0])
+        index.add("c", [1.0, 1.0])
+
+        assert index.remove("a") is True
+        assert len(index) == 2
+        assert "a" not in index
+        assert index.search([0.0, 1.0], threshold=0.99)[0] == "b"
+        assert index.search([1.0, 1.0], threshold=0.99)[0] == "c"
+
+    def test_expired_rows_are_ignored(self):
+        index = SemanticVectorIndex(dimension=2)
+        index.add("old", [1.0, 0.0], expires_at=time.time() - 1)
+
+        assert index.search([1.0, 0.0], threshold=0.5) is None
+
+    def test_capacity_bound_evicts_soonest_expiring(self):
+        index = SemanticVectorIndex(dimension=2, max_entries=2)
+        index.add("short", [1.0, 0.0], expires_at=time.time() + 10)
+        index.add("long", [0.0, 1.0], expires_at=time.time() + 1000)
+        index.add("new", [1.0, 1.0], expires_at=time.time() + 500)
+
+        assert len(index) == 2
+        assert "short" not in index
+
+    def test_zero_vector_is_rejected(self):
+        index = SemanticVectorIndex(dimension=2)
+        assert index.add("empty", [0.0, 0.0]) is False
+
+    def test_dimension_mismatch_raises(self):
+        index = SemanticVectorIndex(dimension=2)
+        index.add("a", [1.0, 0.0])
+
+        with pytest.raises(ValueError, match="3 dimensions"):
+            index.add("b", [1.0, 0.0, 0.0])
+        with pytest.raises(ValueError, match="3 dimensions"):
+            index.search([1.0, 0.0, 0.0], threshold=0.5)
+
+
+@pytest.mark.unit
+class TestSemanticCacheIndex:
+    """Test partitioning and snapshots"""
+
+    def test_hashing_embedding_is_deterministic(self):
+        first = hashing_embedding("GDPR data retention policy")
+        second = hashing_embedding("gdpr   data retention POLICY")
+        np.testing.assert_array_equal(first, second)
+
+    def test_partitions_are_isolated(self):
+        index = SemanticCacheIndex()
+        vector = index.embed("access control policy")
+        partition = SemanticCacheIndex.partition_key("ISO27001", "policy", "finance", 200)
+        index.add(partition, "k1", vector)
+
+        assert index.search(partition, vector, 0.9)[0] == "k1"
+        assert index.search(SemanticCacheIndex.partition_key("GDPR", "policy", "finance", 200), vector, 0.9) is None
+        assert index.search(SemanticCacheIndex.partition_key("ISO27001", "policy", "retail", 200), vector, 0.9) is None
+
+    def test_dimension_is_taken_from_first_embedding(self):
+        index = SemanticCacheIndex(embedding_function=lambda text: [1.0] * 1536)
+        partition = SemanticCacheIndex.partition_key("GDPR", "policy")
+
+        assert index.add(partition, "k1", index.embed("retention")) is True
+        assert index.dimension == 1536
+        assert index.search(partition, [1.0] * 1536, 0.99)[0] == "k1"
+
+    def test_snapshot_round_trip(self, tmp_path):
+        index = SemanticCacheIndex()
+        vector = index.embed("incident response plan")
+        partition = SemanticCacheIndex.partition_key("GDPR", "guidance", "retail", 100)
+        index.add(partition, "k1", vector, time.time() + 600)
+        index.add(partition, "stale", index.embed("other"), time.time() - 1)
+
+        snapshot = tmp_path / "semantic.npz"
+        index.save(snapshot)
+
+        restored = SemanticCacheIndex()
+        assert restored.load(snapshot) == 1
+        assert restored.search(partition, vector, 0.99)[0] == "k1"
+
+
+@pytest.mark.unit
+@pytest.mark.ai
+class TestAIResponseCacheSemanticLookup:
+    """Test semantic hits through AIResponseCache"""
+
+    @pytest.fixture
+    def cache_instance(self):
+        cache = AIResponseCache(embedding_function=hashing_embedding)
+        cache.cache_manager = FakeCacheManager()
+        return cache
+
+    @pytest.mark.asyncio
+    async def test_semantic_matching_is_off_without_embedding_model(self):
+        cache = AIResponseCache()
+        cache.cache_manager = FakeCacheManager()
+        context = {"framework": "GDPR", "content_type": "guidance", **SIMILAR}
+        await cache.cache_response("Is a DPO required for us?", "Yes", context)
+
+        result = await cache.get_cached_response("Is a DPO not required for us?", context)
+
+        assert result is None
+        assert len(cache.semantic_index) == 0
+        assert (await cache.get_cache_metrics())["semantic_enabled"] is False
+
+    @pytest.mark.asyncio
+    async def test_near_identical_prompt_hits(self, cache_instance):
+        context = {"framework": "GDPR", "content_type": "guidance", **SIMILAR}
+        await cache_instance.cache_response(
+            "What are the GDPR requirements for data retention periods?",
+            "Guidance on retention periods...",
+            context,
+        )
+
+        result = await cache_instance.get_cached_response(
+            "what are the GDPR requirements for data retention periods",
+            context,
+            similarity_threshold=0.85,
+        )
+
+        assert result is not None
+        assert result["response"] == "Guidance on retention periods..."
+        metrics = await cache_instance.get_cache_metrics()
+        assert metrics["semantic_hits"] == 1
+        assert metrics["exact_hits"] == 0
+
+    @pytest.mark.asyncio
+    async def test_unrelated_prompt_misses(self, cache_instance):
+        context = {"framework": "GDPR", "content_type": "guidance", **SIMILAR}
+        await cache_instance.cache_response(
+            "What are the GDPR requirements for data retention periods?",
+            "Guidance on retention periods...",
+            context,
+        )
+
+        result = await cache_instance.get_cached_response(
+            "How do I configure multi-factor authentication?", context
+        )
+
+        assert result is None
+        assert cache_instance.metrics["misses"] == 1
+
+    @pytest.mark.asyncio
+    async def test_other_framework_partition_misses(self, cache_instance):
+        prompt = "Summarise the breach notification requirements"
+        await cache_instance.cache_response(
+            prompt, "Notify within 72 hours", {"framework": "GDPR", **SIMILAR}
+        )
+
+        result = await cache_instance.get_cached_response(
+            prompt + " please", {"framework": "HIPAA", **SIMILAR}
+        )
+
+        assert result is None
+
+    @pytest.mark.asyncio
+    async def test_other_business_context_partition_misses(self, cache_instance):
+        prompt = "What security controls do we need for customer data?"
+        await cache_instance.cache_response(prompt, "Healthcare controls", {
+            "framework": "ISO27001", **SIMILAR,
+            "business_context": {"industry": "healthcare", "employee_count": 40},
+        })
+
+        other_industry = await cache_instance.get_cached_response(prompt + " please", {
+            "framework": "ISO27001", **SIMILAR,
+            "business_context": {"industry": "retail", "employee_count": 40},
+        })
+        other_size = await cache_instance.get_cached_response(prompt + " please", {
+            "framework": "ISO27001", **SIMILAR,
+            "business_context": {"industry": "healthcare", "employee_count": 4000},
+        })
+
+        assert other_industry is None
+        assert other_size is None
+
+    @pytest.mark.asyncio
+    async def test_evicted_entry_is_dropped_from_index(self, cache_instance):
+        context = {"framework": "ISO27001", "content_type": "policy", **SIMILAR}
+        await cache_instance.cache_response(
+            "Draft an access control policy", "Policy text", context
+        )
+        cache_instance.cache_manager.data.clear()
+
+        result = await cache_instance.get_cached_response(
+            "Draft an access control policy now", context
+        )
+
+        assert result is None
+        assert len(cache_instance.semantic_index) == 0
+
+    @pytest.mark.asyncio
+    async def test_pluggable_embedding_function(self):
+        calls = []
+
+        async def embed(text):
+            calls.append(text)
+            return [1.0] + [0.0] * 1535
+
+        cache = AIResponseCache(embedding_function=embed)
+        cache.cache_manager = FakeCacheManager()
+        context = {"framework": "SOC2", **SIMILAR}
+        await cache.cache_response("first prompt", "answer", context)
+
+        result = await cache.get_cached_response("second prompt", context)
+
+        assert result["response"] == "answer"
+        assert calls == ["first prompt", "second prompt"]
+        assert cache.semantic_index.dimension == 1536
+
+    @pytest.mark.asyncio
+    async def test_mismatched_embedding_is_logged_not_indexed(self, caplog):
+        cache = AIResponseCache(embedding_function=lambda text: [1.0] * 1536,
+                                embedding_dimension=768)
+        cache.cache_manager = FakeCacheManager()
+
+        assert await cache.cache_response("prompt", "answer", {"framework": "SOC2", **SIMILAR})
+
+        assert len(cache.semantic_index) == 0
+        assert "1536 dimensions, index expects 768" in caplog.text
+
+    @pytest.mark.asyncio
+    async def test_semantic_matching_is_opt_in_per_call(self, cache_instance):
+        context = {"framework": "GDPR", "content_type": "guidance"}
+        await cache_instance.cache_response(
+            "What are the GDPR requirements for data retention periods?",
+            "Guidance on retention periods...",
+            context,
+        )
+
+        result = await cache_instance.get_cached_response(
+            "what are the GDPR requirements for data retention periods",
+            {**context, **SIMILAR},
+        )
+
+        assert result is None
+        assert len(cache_instance.semantic_index) == 0
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("cached_prompt, prompt", [
+        ("Is a DPO required for 250 employees?", "Is a DPO required for 25 employees?"),
+        ("Is a DPO required for our company?", "Is a DPO not required for our company?"),
+        ("Do we need to encrypt backups?", "Don't we need to encrypt backups?"),
+    ])
+    async def test_number_or_negation_mismatch_misses(
+        self, cache_instance, cached_prompt, prompt
+    ):
+        context = {"framework": "GDPR", **SIMILAR}
+        await cache_instance.cache_response(cached_prompt, "Yes", context)
+
+        result = await cache_instance.get_cached_response(
+            prompt, context, similarity_threshold=0.0
+        )
+
+        assert result is None
+        assert cache_instance.metrics["semantic_hits"] == 0
+
+    @pytest.mark.asyncio
+    async def test_embedding_function_factory_runs_on_initialize(self, monkeypatch):
+        calls = []
+
+        def factory():
+            calls.append(True)
+            return hashing_embedding
+
+        async def get_cache_manager():
+            return FakeCacheManager()
+
+        monkeypatch.setattr(
+            "services.ai.response_cache.get_cache_manager", get_cache_manager
+        )
+        cache = AIResponseCache(embedding_function_factory=factory)
+        assert calls == [] and cache.semantic_enabled is False
+
+        await cache.initialize()
+        await cache.initialize()
+
+        assert calls == [True]
+        assert cache.semantic_enabled is True
@@ -0,0 +1,207 @@
+"""
+Unit Tests for the Sharded L1 Cache
+
+Covers LRU eviction, per-entry size accounting, lazy TTL expiry and the
+hit/miss counters surfaced through CacheManager statistics.
+"""
+
+import time
+from unittest.mock import patch
+
+import pytest
+
+from services.caching.cache_manager import CacheManager
+from services.caching.cache_metrics import CacheMetrics
+from services.caching.sharded_cache import ShardedLRUCache
+
+
+@pytest.mark.unit
+class TestShardedLRUCache:
+    """Test sharded L1 cache behaviour"""
+
+    @pytest.mark.asyncio
+    async def test_get_set_delete(self):
+        cache = ShardedLRUCache(max_items=100, num_shards=4)
+
+        await cache.set("a", {"v": 1})
+        assert await cache.get("a") == {"v": 1}
+        assert "a" in cache
+
+        assert await cache.delete("a") is True
+        assert await cache.get("a") is None
+        assert await cache.delete("a") is False
+
+    @pytest.mark.asyncio
+    async def test_lru_eviction_per_shard(self):
+        cache = ShardedLRUCache(max_items=3, num_shards=1)
+
+        await cache.set("a", 1)
+        await cache.set("b", 2)
+        await cache.set("c", 3)
+        # Touch "a" so "b" becomes least recently used
+        await cache.get("a")
+        await cache.set("d", 4)
+
+        assert await cache.get("b") is None
+        assert await cache.get("a") == 1
+        assert cache.get_stats()["evictions"] == 1
+
+    @pytest.mark.asyncio
+    async def test_size_is_estimated_once_per_insert(self):
+        cache = ShardedLRUCache(max_items=10, num_shards=2)
+
+        with patch.object(
+            ShardedLRUCache, "_estimate_size", return_value=100
+        ) as estimate:
+            await cache.set("a", {"payload": "x"})
+            await cache.get("a")
+            await cache.delete("a")
+
+        assert estimate.call_count == 1
+        assert cache.memory_usage == 0
+
+    @pytest.mark.asyncio
+    async def test_memory_budget_evicts(self):
+        cache = ShardedLRUCache(max_items=100, max_memory_mb=1, num_shards=1)
+        big_value = "x" * (600 * 1024)
+
+        await cache.set("a", big_value)
+        await cache.set("b", big_value)
+
+        assert await cache.get("a") is None
+        assert await cache.get("b") == big_value
+        assert cache.memory_usage == len(big_value)
+
+    @pytest.mark.asyncio
+    async def test_ttl_expiry_is_lazy_and_counted(self):
+        cache = ShardedLRUCache(max_items=10, num_shards=1)
+        now = time.time()
+
+        await cache.set("short", "v", ttl=1)
+        await cache.set("long", "v", ttl=60)
+
+        with patch("services.caching.sharded_cache.time.time", return_value=now + 2):
+            assert await cache.get("short") is None
+            assert await cache.get("long") == "v"
+
+        stats = cache.get_stats()
+        assert stats["expirations"] == 1
+        assert stats["items"] == 1
+
+    @pytest.mark.asyncio
+    async def test_expired_entries_purged_on_write(self):
+        cache = ShardedLRUCache(max_items=100, num_shards=1)
+        now = time.time()
+
+        for i in range(10):
+            await cache.set(f"k{i}", i, ttl=1)
+
+        with patch("services.caching.sharded_cache.time.time", return_value=now + 2):
+            await cache.set("fresh", "v")
+
+        assert len(cache) == 1
+        assert cache.get_stats()["expirations"] == 10
+
+    @pytest.mark.asyncio
+    async def test_overwrite_leaves_no_stale_expiry(self):
+        cache = ShardedLRUCache(max_items=10, num_shards=1)
+        now = time.time()
+
+        await cache.set("a", "old", ttl=1)
+        await cache.set("a", "new", ttl=60)
+
+        with patch("services.caching.sharded_cache.time.time", return_value=now + 2):
+            await cache.set("b", "v")
+            assert await cache.get("a") == "new"
+
+    @pytest.mark.asyncio
+    async def test_hit_miss_counters(self):
+        cache = ShardedLRUCache(max_items=10, num_shards=4)
+
+        await cache.set("a", 1)
+        await cache.get("a")
+        await cache.get("a")
+        await cache.get("missing")
+
+        stats = cache.get_stats()
+        assert stats["hits"] == 2
+        assert stats["misses"] == 1
+        assert stats["hit_rate"] == pytest.approx(2 / 3)
+        assert len(stats["shards"]) == 4
+
+    def test_rejects_zero_shards(self):
+        with pytest.raises(ValueError):
+            ShardedLRUCache(num_shards=0)
+
+
+@pytest.mark.unit
+class TestShardedLRUCacheInvalidation:
+    """Test prefix- and tag-indexed invalidation"""
+
+    @pytest.mark.asyncio
+    async def test_delete_pattern_only_evicts_matches(self):
+        cache = ShardedLRUCache(max_items=100, num_shards=4)
+        for key in ["db:user:1:profile", "db:user:1:roles", "db:user:10:profile",
+                    "db:evidence:1:item", "api:abc"]:
+            await cache.set(key, key)
+
+        assert await cache.delete_pattern("db:user:1:*") == 2
+
+        assert len(cache) == 3
+        assert "db:user:10:profile" in cache
+        assert "db:user:1:profile" not in cache
+
+    @pytest.mark.asyncio
+    async def test_delete_pattern_with_leading_wildcard(self):
+        cache = ShardedLRUCache(max_items=100, num_shards=2)
+        await cache.set("api:GET:evidence:list", 1)
+        await cache.set("api:GET:policies:list", 2)
+
+        assert await cache.delete_pattern("*evidence*") == 1
+        assert "api:GET:policies:list" in cache
+
+    @pytest.mark.asyncio
+    async def test_delete_tags(self):
+        cache = ShardedLRUCache(max_items=100, num_shards=4)
+        await cache.set("a", 1, tags=["company:7"])
+        await cache.set("b", 2, tags=["company:7", "framework:gdpr"])
+        await cache.set("c", 3, tags=["framework:gdpr"])
+
+        assert await cache.delete_tags(["company:7"]) == 2
+        assert await cache.delete_tags(["company:7"]) == 0
+        assert "c" in cache
+
+    @pytest.mark.asyncio
+    async def test_indexes_follow_eviction_and_overwrite(self):
+        cache = ShardedLRUCache(max_items=1, num_shards=1)
+        await cache.set("x:1", 1, tags=["t"])
+        await cache.set("x:1", 2)
+        await cache.set("y:1", 3)
+
+        shard = cache._shards[0]
+        assert shard._tag_index == {}
+        assert shard._prefix_index == {"y:": {"y:1"}}
+
+
+@pytest.mark.unit
+class TestCacheManagerL1Metrics:
+    """Test L1 statistics wiring into CacheMetrics"""
+
+    @pytest.mark.asyncio
+    async def test_l1_counters_reach_metrics(self):
+        metrics = CacheMetrics()
+        manager = CacheManager(metrics=metrics, l1_num_shards=8)
+        # L1 only - no Redis connection
+        manager._initialized = True
+
+        await manager.set("key", {"v": 1}, ttl=60)
+        await manager.get("key")
+        await manager.get("other")
+
+        stats = manager.get_stats()
+        assert stats["l1_cache"]["num_shards"] == 8
+        assert stats["l1_cache"]["hits"] == 1
+        assert metrics.l1_hits == 1
+        assert metrics.l1_misses == 1
+        assert metrics.total_items == 1
+        assert metrics.get_stats()["l1_hit_rate"] == pytest.approx(0.5)
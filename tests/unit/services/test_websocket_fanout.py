@@ -0,0 +1,338 @@
+"""
+Unit Tests for WebSocket Fan-out
+
+Covers the bounded per-connection outbox (drop-oldest, slow-consumer
+eviction, concurrent sends), the Redis pub/sub topic relay and the topic
+routing of the AI cost ConnectionManager built on them.
+"""
+
+import asyncio
+import contextlib
+import json
+
+import pytest
+import pytest_asyncio
+
+from services.websocket_fanout import ConnectionOutbox, FanoutStats, TopicRelay
+
+pytestmark = pytest.mark.unit
+
+
+class FakeWebSocket:
+    """Records sent text; optionally blocks or fails on send."""
+
+    def __init__(self, delay=0.0, fail=False):
+        self.delay = delay
+        self.fail = fail
+        self.sent = []
+        self.closed_with = None
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text):
+        if self.fail:
+            raise ConnectionError("client went away")
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        self.sent.append(text)
+
+    async def close(self, code=1000):
+        self.closed_with = code
+
+
+class EvictionLog:
+    def __init__(self):
+        self.evicted = []
+
+    async def __call__(self, connection_id, reason):
+        self.evicted.append((connection_id, reason))
+
+
+async def drain(*outboxes):
+    while any(outbox.depth or (outbox._sender and not outbox._sender.done()) for outbox in outboxes):
+        await asyncio.sleep(0.001)
+
+
+class TestConnectionOutbox:
+    """Test bounded queues, drop-oldest and eviction"""
+
+    @pytest.mark.asyncio
+    async def test_messages_are_sent_in_order(self):
+        websocket = FakeWebSocket()
+        outbox = ConnectionOutbox("c1", websocket.send_text, EvictionLog())
+
+        for i in range(5):
+            outbox.put(f"m{i}")
+        await drain(outbox)
+
+        assert websocket.sent == [f"m{i}" for i in range(5)]
+        assert outbox.stats.messages_sent == 5
+
+    @pytest.mark.asyncio
+    async def test_full_queue_drops_oldest(self):
+        websocket = FakeWebSocket(delay=0.01)
+        outbox = ConnectionOutbox("c1", websocket.send_text, EvictionLog(), max_size=3)
+
+        for i in range(10):
+            outbox.put(f"m{i}")
+        await drain(outbox)
+
+        # The sender only starts on the next loop iteration, so m0..m6 fell off
+        assert websocket.sent == ["m7", "m8", "m9"]
+        assert outbox.stats.messages_dropped == 7
+        assert outbox.evicted_reason is None
+
+    @pytest.mark.asyncio
+    async def test_send_timeout_evicts(self):
+        evictions = EvictionLog()
+        outbox = ConnectionOutbox("slow", FakeWebSocket(delay=1).send_text, evictions, send_timeout=0.02)
+
+        outbox.put("m0")
+        outbox.put("m1")
+        await asyncio.sleep(0.05)
+
+        assert evictions.evicted == [("slow", "send timeout")]
+        assert outbox.closed
+        assert outbox.put("m2") is False
+        assert outbox.stats.evictions == 1
+
+    @pytest.mark.asyncio
+    async def test_sustained_overflow_evicts(self):
+        evictions = EvictionLog()
+        outbox = ConnectionOutbox("c1", FakeWebSocket(delay=1).send_text, evictions,
+                                  max_size=2, max_dropped=5)
+
+        accepted = [outbox.put(f"m{i}") for i in range(10)]
+        await asyncio.sleep(0)
+
+        assert accepted.count(False) > 0
+        assert evictions.evicted == [("c1", "queue overflow")]
+        await outbox.close()
+
+    @pytest.mark.asyncio
+    async def test_send_failure_evicts(self):
+        evictions = EvictionLog()
+        outbox = ConnectionOutbox("c1", FakeWebSocket(fail=True).send_text, evictions)
+
+        outbox.put("m0")
+        await asyncio.sleep(0.01)
+
+        assert evictions.evicted[0][1].startswith("send failed")
+        assert outbox.stats.send_failures == 1
+
+    @pytest.mark.asyncio
+    async def test_slow_client_does_not_delay_others(self):
+        stats = FanoutStats()
+        slow = FakeWebSocket(delay=0.5)
+        fast = [FakeWebSocket() for _ in range(20)]
+        outboxes = [ConnectionOutbox("slow", slow.send_text, EvictionLog(), stats=stats)]
+        outboxes += [ConnectionOutbox(f"c{i}", ws.send_text, EvictionLog(), stats=stats) for i, ws in enumerate(fast)]
+
+        for outbox in outboxes:
+            outbox.put("update")
+        await asyncio.wait_for(drain(*outboxes[1:]), timeout=0.2)
+
+        assert all(ws.sent == ["update"] for ws in fast)
+        assert slow.sent == []
+        await outboxes[0].close()
+
+
+@pytest_asyncio.fixture
+async def relays():
+    fakeredis = pytest.importorskip("fakeredis")
+    server = fakeredis.FakeServer()
+    started = []
+
+    async def make(received):
+        async def on_message(topic, text):
+            received.append((topic, text))
+
+        relay = TopicRelay(fakeredis.aioredis.FakeRedis(server=server, decode_responses=True), on_message)
+        await relay.start()
+        started.append(relay)
+        return relay
+
+    yield make
+    for relay in started:
+        await relay.stop()
+
+
+async def wait_for_messages(received, count, timeout=1.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while len(received) < count and asyncio.get_running_loop().time() < deadline:
+        await asyncio.sleep(0.01)
+
+
+class TestTopicRelay:
+    """Test cross-instance delivery through Redis pub/sub"""
+
+    @pytest.mark.asyncio
+    async def test_published_topic_reaches_other_instances_only(self, relays):
+        received_a, received_b = [], []
+        relay_a = await relays(received_a)
+        relay_b = await relays(received_b)
+        await relay_a.subscribe("cost_update")
+        await relay_b.subscribe("cost_update")
+
+        await relay_a.publish("cost_update", '{"type": "cost_update"}')
+        await wait_for_messages(received_b, 1)
+
+        assert received_b == [("cost_update", '{"type": "cost_update"}')]
+        assert received_a == []
+        assert relay_b.stats.relayed_in == 1
+
+    @pytest.mark.asyncio
+    async def test_unsubscribed_topics_are_not_delivered(self, relays):
+        received = []
+        relay_a = await relays([])
+        relay_b = await relays(received)
+        await relay_b.subscribe("cost_update")
+        await relay_b.unsubscribe("cost_update")
+
+        await relay_a.publish("cost_update", "{}")
+        await asyncio.sleep(0.05)
+
+        assert received == []
+
+    @pytest.mark.asyncio
+    async def test_remote_subscribers_excludes_own_subscription(self, relays):
+        relay_a = await relays([])
+        relay_b = await relays([])
+
+        assert await relay_a.remote_subscribers("cost_update") == 0
+        await relay_a.subscribe("cost_update")
+        assert await relay_a.remote_subscribers("cost_update") == 0
+        await relay_b.subscribe("cost_update")
+        assert await relay_a.remote_subscribers("cost_update") == 1
+
+    @pytest.mark.asyncio
+    async def test_lease_is_held_by_one_instance(self, relays):
+        relay_a = await relays([])
+        relay_b = await relays([])
+
+        assert await relay_a.acquire_lease("cost_update", 60)
+        assert not await relay_b.acquire_lease("cost_update", 60)
+        # The holder keeps renewing it
+        assert await relay_a.acquire_lease("cost_update", 60)
+
+
+@pytest.fixture
+def websocket_router():
+    return pytest.importorskip("api.routers.ai_cost_websocket")
+
+
+class TestConnectionManagerTopics:
+    """Test topic routing in the AI cost ConnectionManager"""
+
+    @pytest_asyncio.fixture
+    async def manager(self, websocket_router, monkeypatch):
+        manager = websocket_router.ConnectionManager()
+
+        async def no_initial_data(connection_id):
+            pass
+
+        monkeypatch.setattr(manager, "_send_initial_data", no_initial_data)
+        return manager
+
+    @pytest.mark.asyncio
+    async def test_publish_serializes_once_and_routes_by_topic(self, manager, monkeypatch):
+        dashboard, alerts, service = FakeWebSocket(), FakeWebSocket(), FakeWebSocket()
+        await manager.connect(dashboard, "u1", "dashboard_general")
+        await manager.connect(alerts, "u2", "budget_alerts")
+        await manager.connect(service, "u3", "service_policy_generation")
+        dumps_calls = []
+        real_dumps = json.dumps
+        monkeypatch.setattr(json, "dumps", lambda *a, **k: dumps_calls.append(a) or real_dumps(*a, **k))
+
+        delivered = await manager.publish("budget_alert", {"type": "budget_alert", "data": {}})
+        await manager.publish("cost_update", {"type": "cost_update", "data": {}})
+        await drain(*(c["outbox"] for c in manager.active_connections.values()))
+
+        assert delivered == 2
+        assert len(dumps_calls) == 2
+        assert [json.loads(t)["type"] for t in dashboard.sent] == ["budget_alert", "cost_update"]
+        assert [json.loads(t)["type"] for t in alerts.sent] == ["budget_alert"]
+        assert service.sent == []
+
+    @pytest.mark.asyncio
+    async def test_has_subscribers_follows_connections(self, manager):
+        assert not await manager.has_subscribers("cost_update")
+
+        connection_id = await manager.connect(FakeWebSocket(), "u1", "dashboard_general")
+        assert await manager.has_subscribers("cost_update")
+
+        await manager.disconnect(connection_id)
+        assert not await manager.has_subscribers("cost_update")
+        assert manager.topic_subscribers == {}
+
+    @pytest.mark.asyncio
+    async def test_unknown_event_types_are_not_subscribed(self, manager):
+        relayed = []
+
+        class RecordingRelay:
+            async def subscribe(self, topic):
+                relayed.append(topic)
+
+        manager.relay = RecordingRelay()
+        connection_id = await manager.connect(FakeWebSocket(), "u1", "service_policy_generation")
+
+        await manager.subscribe_to_events(connection_id, ["cost_update", "anything:else", {"not": "hashable"}])
+        await manager.subscribe_to_events(connection_id, "budget_alert")
+
+        assert manager.active_connections[connection_id]["subscriptions"] == {"cost_spike", "cost_update"}
+        assert set(manager.topic_subscribers) == {"cost_spike", "cost_update"}
+        assert relayed == ["cost_spike", "cost_update"]
+        manager.relay = None
+
+    @pytest.mark.asyncio
+    async def test_broadcast_matches_connection_type_prefix(self, manager):
+        dashboard, alerts = FakeWebSocket(), FakeWebSocket()
+        await manager.connect(dashboard, "u1", "dashboard_admin")
+        await manager.connect(alerts, "u2", "budget_alerts")
+
+        await manager.broadcast({"type": "notice"}, "dashboard")
+        await drain(*(c["outbox"] for c in manager.active_connections.values()))
+
+        assert len(dashboard.sent) == 1
+        assert alerts.sent == []
+
+    @pytest.mark.asyncio
+    async def test_failing_client_is_evicted_and_closed(self, manager, websocket_router):
+        broken = FakeWebSocket(fail=True)
+        connection_id = await manager.connect(broken, "u1", "dashboard_general")
+
+        await manager.publish("cost_update", {"type": "cost_update"})
+        for _ in range(10):
+            await asyncio.sleep(0.01)
+
+        assert connection_id not in manager.active_connections
+        assert broken.closed_with == websocket_router.status.WS_1013_TRY_AGAIN_LATER
+        assert manager.get_connection_stats()["fanout"]["evictions"] == 1
+
+    @pytest.mark.asyncio
+    async def test_cost_updates_are_not_computed_without_subscribers(self, manager, websocket_router, monkeypatch):
+        summaries = []
+
+        async def get_daily_summary(day):
+            summaries.append(day)
+            return {"total_cost": 1, "total_requests": 1}
+
+        monkeypatch.setattr(websocket_router, "connection_manager", manager)
+        monkeypatch.setattr(websocket_router, "COST_UPDATE_INTERVAL", 0.01)
+        monkeypatch.setattr(manager.cost_manager, "get_daily_summary", get_daily_summary)
+        task = asyncio.create_task(websocket_router.broadcast_cost_updates())
+        try:
+            await asyncio.sleep(0.05)
+            assert summaries == []
+            assert manager.stats.publishes_skipped > 0
+
+            websocket = FakeWebSocket()
+            await manager.connect(websocket, "u1", "dashboard_general")
+            await asyncio.sleep(0.05)
+            assert summaries
+            assert json.loads(websocket.sent[0])["type"] == "cost_update"
+        finally:
+            task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await task